@@ -1,6 +1,6 @@
 from fastapi import Depends, HTTPException, status, FastAPI
 from fastapi.security import OAuth2PasswordBearer
-from core.ai_model.text_to_sql_system import TextToSQLSystem
+from core.ai_model.model_registry import get_model_registry
 from core.dal.database.db_manager import DBManager
 from core.dal.query_history_dal import QueryHistoryDAL
 from core.converter.query_history_converter import QueryHistoryConverter
@@ -9,6 +9,7 @@ from core.service.sql_manager.query_service import QueryService
 from core.model.query_models import QueryHistoryCore, QueryHistoryVO, QueryRequest, QueryResponse
 from typing import List
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from core.dal.user_dal import UserDAL 
 from core.service.user_auth.auth_service import AuthService
 from core.model.user_models import UserRegister, UserLogin, Token, PasswordReset, RecoveryQuestionSet
@@ -42,7 +43,8 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
 
 
 # 1. Core Components
-tts_system = TextToSQLSystem()
+model_registry = get_model_registry()
+tts_system = model_registry.tts_system
 db_manager = DBManager()
 converter = QueryHistoryConverter()
 
@@ -71,6 +73,11 @@ app = FastAPI(
     description="API for converting natural language questions into SQL queries and retrieving history."
 )
 
+# Load models after the server starts
+@app.on_event("startup")
+async def startup_event():
+    model_registry.start()
+
 # ADD THIS CORS BLOCK BELOW app = FastAPI(...)
 origins = [
     "http://localhost:8000",       # Default localhost
@@ -183,4 +190,10 @@ def delete_schema(table_name: str, current_user: str):
 # Health Check Endpoint
 @app.get("/")
 def read_root():
-    return {"status": "Text-to-SQL API is running."}
\ No newline at end of file
+    return {"status": "Text-to-SQL API is running."}
+
+# Readiness: 503 until every model is loaded and warmed up
+@app.get("/ready")
+def get_readiness():
+    readiness = model_registry.readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Distilled intent classifier against the RBF One-Class SVM: agreement on held-out
+questions and predict latency at batch sizes 1 to 256.
+
+With the real artifacts, run the distillation tool itself, which embeds the
+questions with MiniLM and reads ocsvm_model.pkl:
+
+    python -m core.ai_model.intent_distillation --questions ../datasets/data/dev.jsonl --output intent.npz
+
+This benchmark needs neither: the dev questions are embedded with TF-IDF + SVD
+(384 dimensions, L2-normalized like MiniLM) and a One-Class SVM is fitted on them,
+with the same nu and gamma="scale" defaults as the production model.
+
+    python -m benchmark.intent_distillation_benchmark --components 64 128 256
+"""
+import argparse
+import numpy as np
+from benchmark.wikisql import DEV_PATH, load_examples
+from core.ai_model.intent_distillation import distill_ocsvm, evaluate, print_report
+
+
+def proxy_embeddings(questions, dimension: int = 384) -> np.ndarray:
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    tfidf = TfidfVectorizer().fit_transform(questions)
+    embeddings = TruncatedSVD(dimension, random_state=0).fit_transform(tfidf)
+    return (embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)).astype(np.float32)
+
+
+if __name__ == "__main__":
+    from sklearn.svm import OneClassSVM
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--nu", type=float, default=0.1)
+    parser.add_argument("--method", choices=("nystroem", "rff"), default="nystroem")
+    parser.add_argument("--components", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--held-out", type=float, default=0.2)
+    args = parser.parse_args()
+
+    questions = [example["question"] for example in load_examples(DEV_PATH, args.limit)]
+    embeddings = proxy_embeddings(questions)
+    order = np.random.default_rng(0).permutation(len(questions))
+    split = int(len(order) * (1.0 - args.held_out))
+    train, held_out = embeddings[order[:split]], embeddings[order[split:]]
+    # Outliers for the out-of-domain side: random directions in the embedding space
+    outliers = np.random.default_rng(1).normal(size=(len(held_out) // 4, embeddings.shape[1])).astype(np.float32)
+    held_out = np.vstack([held_out, outliers / np.linalg.norm(outliers, axis=1, keepdims=True)])
+
+    svm = OneClassSVM(nu=args.nu, gamma="scale").fit(train)
+    for n_components in args.components:
+        print_report(evaluate(svm, distill_ocsvm(svm, train, method=args.method, n_components=n_components), held_out))
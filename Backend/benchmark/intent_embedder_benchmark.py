@@ -0,0 +1,127 @@
+"""
+Intent embedder runtimes: sentence-transformers on PyTorch (before) against the
+exported ONNX graph (after). Each runtime is measured in a fresh interpreter:
+startup (imports + model load), resident memory once loaded, and latency per
+question at batch size 1 (the embedding cache is bypassed) and at batch size 32.
+
+Without --model, a randomly initialised model with all-MiniLM-L6-v2's shape
+(6 layers, 384 hidden, 12 heads, 30522-token vocabulary) is built, so timings are
+representative while the HF hub is not needed.
+
+    python -m benchmark.intent_embedder_benchmark --limit 500
+    python -m benchmark.intent_embedder_benchmark --model path/to/all-MiniLM-L6-v2
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from benchmark.wikisql import DEV_PATH, load_examples
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RUNTIMES = ("sentence-transformers", "onnx")
+
+
+def rss_mib() -> float:
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return float("nan")
+
+
+def build_minilm_shaped(directory: Path, questions):
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    bert_dir = directory / "bert"
+    bert_dir.mkdir()
+    words = sorted({word for question in questions for word in question.lower().replace("?", " ").split()})
+    vocabulary = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "?"] + words
+    vocabulary += [f"[unused{index}]" for index in range(30522 - len(vocabulary))]
+    (bert_dir / "vocab.txt").write_text("\n".join(vocabulary), encoding="utf-8")
+    BertTokenizer(str(bert_dir / "vocab.txt")).save_pretrained(str(bert_dir))
+    config = BertConfig(vocab_size=len(vocabulary), hidden_size=384, num_hidden_layers=6, num_attention_heads=12,
+                        intermediate_size=1536)
+    BertModel(config).save_pretrained(str(bert_dir))
+    transformer = models.Transformer(str(bert_dir), max_seq_length=256)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    SentenceTransformer(modules=[transformer, pooling, models.Normalize()], device="cpu").save(str(directory / "minilm"))
+    return str(directory / "minilm")
+
+
+def measure(runtime: str, model: str, onnx_dir: str, questions):
+    """Runs in the worker process: everything the runtime imports and loads counts towards its startup."""
+    rss_before = rss_mib()
+    started = time.perf_counter()
+    if runtime == "onnx":
+        from core.ai_model.onnx_embedder import ONNXEmbedder
+        embedder = ONNXEmbedder(onnx_dir)
+        embedder.load()
+    else:
+        from sentence_transformers import SentenceTransformer
+        embedder = SentenceTransformer(model, device="cpu")
+    embedder.encode(questions[:1])
+    startup_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    single = np.vstack([embedder.encode([question]) for question in questions])
+    single_ms = (time.perf_counter() - started) * 1000.0 / len(questions)
+    started = time.perf_counter()
+    embedder.encode(questions, batch_size=32)
+    batched_ms = (time.perf_counter() - started) * 1000.0 / len(questions)
+    return {
+        "startup_seconds": startup_seconds,
+        "rss_mib": rss_mib(),
+        "rss_added_mib": rss_mib() - rss_before,
+        "single_ms": single_ms,
+        "batched_ms": batched_ms,
+        "torch_imported": "torch" in sys.modules,
+        "embeddings": single.tolist(),
+    }
+
+
+def run_worker(runtime: str, model: str, onnx_dir: str, limit: int):
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmark.intent_embedder_benchmark", "--worker", runtime, "--model", model,
+         "--onnx-dir", onnx_dir, "--limit", str(limit)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(model: str, onnx_dir: str, limit: int):
+    results = {runtime: run_worker(runtime, model, onnx_dir, limit) for runtime in RUNTIMES}
+    difference = np.abs(np.array(results["onnx"]["embeddings"]) - np.array(results["sentence-transformers"]["embeddings"]))
+    print(f"{limit} questions, max |embedding difference| {difference.max():.2e}")
+    print(f"  {'runtime':<22} {'startup':>9} {'RSS':>10} {'batch 1':>14} {'batch 32':>15}  torch")
+    for runtime, result in results.items():
+        print(f"  {runtime:<22} {result['startup_seconds']:8.2f}s {result['rss_mib']:7.0f} MiB "
+              f"{result['single_ms']:9.2f} ms/q {result['batched_ms']:10.2f} ms/q  {result['torch_imported']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=300)
+    parser.add_argument("--model", default=None, help="sentence-transformers model (default: MiniLM-shaped random)")
+    parser.add_argument("--onnx-dir", default=None, help="Exported embedder (default: export --model)")
+    parser.add_argument("--worker", choices=RUNTIMES, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    questions = [example["question"] for example in load_examples(DEV_PATH, args.limit)]
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.model, args.onnx_dir, questions)))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        model = args.model or build_minilm_shaped(Path(directory), questions)
+        onnx_dir = args.onnx_dir
+        if onnx_dir is None:
+            from sentence_transformers import SentenceTransformer
+            from core.ai_model.onnx_embedder import export_embedder
+            onnx_dir = str(Path(directory) / "onnx")
+            export_embedder(SentenceTransformer(model, device="cpu"), Path(onnx_dir))
+        run(model, onnx_dir, args.limit)
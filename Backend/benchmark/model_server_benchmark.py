@@ -0,0 +1,149 @@
+"""
+N API workers that each load their own TextToSQLSystem, against one model
+server shared by N thin workers: time until every worker answers, throughput
+on datasets/data/dev.jsonl and the summed peak RSS of all the processes.
+
+Every worker is a separate process with --concurrency request threads, as a
+uvicorn worker serving that many requests at once would be.
+
+    python -m benchmark.model_server_benchmark --bundle /models/tts-bundle --workers 4 --limit 400
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from benchmark.wikisql import DEV_PATH, build_ddls, load_examples
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def peak_rss_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def run_worker(worker: int, workers: int, limit, concurrency: int) -> dict:
+    """Runs in the child process: loads (or connects), then generates its share of the questions."""
+    started = time.time()
+    from core.ai_model.model_registry import get_model_registry
+
+    registry = get_model_registry()
+    registry.load_all()
+    examples = load_examples(DEV_PATH, limit)[worker::workers]
+    ddls = build_ddls(examples)
+    tts_system = registry.tts_system
+    # First answer: the worker is serving
+    tts_system.generate_sql(examples[0]["question"], False, ddls[examples[0]["table_id"]])
+    ready = time.time()
+
+    pending = iter(examples[1:])
+    lock = threading.Lock()
+
+    def call():
+        while True:
+            with lock:
+                example = next(pending, None)
+            if example is None:
+                return
+            tts_system.generate_sql(example["question"], False, ddls[example["table_id"]])
+
+    threads = [threading.Thread(target=call) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"started": started, "ready": ready, "finished": time.time(), "requests": len(examples) - 1,
+            "peak_rss_mib": peak_rss_mib(os.getpid())}
+
+
+def run_workers(workers: int, limit, concurrency: int, env: dict) -> list:
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "benchmark.model_server_benchmark", "--child", str(worker),
+                          "--workers", str(workers), "--limit", str(limit), "--concurrency", str(concurrency)],
+                         cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True)
+        for worker in range(workers)
+    ]
+    results = []
+    for process in processes:
+        stdout, _ = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"Benchmark worker exited with {process.returncode}")
+        results.append(json.loads(stdout.strip().splitlines()[-1]))
+    return results
+
+
+def wait_for_server(socket_path: str, server: subprocess.Popen, timeout_seconds: float = 600.0):
+    from core.ai_model.remote_text_to_sql_system import RemoteModelRegistry, RemoteTextToSQLSystem
+
+    registry = RemoteModelRegistry(RemoteTextToSQLSystem(socket_path))
+    deadline = time.time() + timeout_seconds
+    while not registry.ready:
+        if server.poll() is not None or time.time() > deadline:
+            raise RuntimeError("Model server did not become ready")
+        time.sleep(0.1)
+
+
+def summarize(mode: str, launched: float, results: list, extra_rss_mib: float = 0.0) -> dict:
+    ready = max(result["ready"] for result in results)
+    started = min(result["ready"] for result in results)
+    finished = max(result["finished"] for result in results)
+    requests = sum(result["requests"] for result in results)
+    return {
+        "mode": mode,
+        "all_ready_s": ready - launched,
+        "throughput_qps": requests / (finished - started),
+        "total_peak_rss_mib": sum(result["peak_rss_mib"] for result in results) + extra_rss_mib,
+    }
+
+
+def benchmark_in_process(workers: int, limit, concurrency: int, env: dict) -> dict:
+    launched = time.time()
+    return summarize(f"{workers} in-process copies", launched, run_workers(workers, limit, concurrency, env))
+
+
+def benchmark_model_server(workers: int, limit, concurrency: int, env: dict) -> dict:
+    with tempfile.TemporaryDirectory(prefix="tts-") as directory:
+        socket_path = os.path.join(directory, "model.sock")
+        launched = time.time()
+        server = subprocess.Popen([sys.executable, "-m", "core.ai_model.model_server", "--socket", socket_path],
+                                  cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+        try:
+            wait_for_server(socket_path, server)
+            results = run_workers(workers, limit, concurrency, {**env, "TTS_MODEL_SERVER_SOCKET": socket_path})
+            server_rss_mib = peak_rss_mib(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+    return summarize(f"model server + {workers} workers", launched, results, server_rss_mib)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bundle", default=None, help="Load the models from this bundle (TTS_MODEL_BUNDLE_DIR)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests per worker")
+    parser.add_argument("--limit", type=int, default=400)
+    parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(run_worker(args.child, args.workers, args.limit, args.concurrency)))
+        sys.exit(0)
+
+    env = dict(os.environ)
+    env.pop("TTS_MODEL_SERVER_SOCKET", None)
+    if args.bundle:
+        env["TTS_MODEL_BUNDLE_DIR"] = args.bundle
+    print(f"{'mode':<28} {'all ready':>10} {'throughput':>12} {'total peak RSS':>16}")
+    for result in (benchmark_in_process(args.workers, args.limit, args.concurrency, env),
+                   benchmark_model_server(args.workers, args.limit, args.concurrency, env)):
+        print(f"{result['mode']:<28} {result['all_ready_s']:>8.1f} s {result['throughput_qps']:>8.1f} q/s "
+              f"{result['total_peak_rss_mib']:>12.0f} MiB")
@@ -0,0 +1,96 @@
+"""
+Latency and memory of the T5 inference backends on datasets/data/dev.jsonl.
+
+Every backend runs in its own subprocess so peak RSS is measured per runtime
+and not shared with the TensorFlow/ONNX Runtime libraries of the others. For
+each backend the exact-match rate against the first backend's output is also
+reported (run `tf` first to compare against the original model).
+
+    python -m core.ai_model.onnx_export --output core/ai_model/ai_models/t5_onnx
+    python -m benchmark.onnx_backend_benchmark --backends tf onnx-fp32 onnx-int8 --limit 200
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from benchmark.wikisql import DEV_PATH, build_ddls, load_examples
+
+
+def make_backend(name: str, onnx_model_dir: str):
+    from core.ai_model.inference_backend import ONNXBackend, TFBackend
+    if name == "tf":
+        return TFBackend()
+    return ONNXBackend(onnx_model_dir, quantized=(name == "onnx-int8"))
+
+
+def run_backend(name: str, limit, batch_size: int, onnx_model_dir: str) -> dict:
+    """Runs in the child process: loads one backend and decodes the sample."""
+    from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+    examples = load_examples(DEV_PATH, limit)
+    ddls = build_ddls(examples)
+    inputs = [f"Question: {example['question']} | {ddls[example['table_id']]}" for example in examples]
+
+    started = time.perf_counter()
+    system = TextToSQLSystem(batching_enabled=False, inference_backend=make_backend(name, onnx_model_dir))
+    system._lazy_load_model()
+    load_s = time.perf_counter() - started
+    system._generate_batch(inputs[:batch_size])  # warm-up
+
+    latencies, outputs = [], []
+    for start in range(0, len(inputs), batch_size):
+        started = time.perf_counter()
+        outputs += system._generate_batch(inputs[start:start + batch_size])
+        latencies.append((time.perf_counter() - started) * 1000.0)
+
+    latencies.sort()
+    return {
+        "backend": name,
+        "load_s": load_s,
+        "batches": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "questions_per_s": len(inputs) / (sum(latencies) / 1000.0),
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "outputs": outputs,
+    }
+
+
+def run(backends, limit, batch_size, onnx_model_dir):
+    results = []
+    for name in backends:
+        command = [sys.executable, "-m", "benchmark.onnx_backend_benchmark", "--child", name,
+                   "--batch-size", str(batch_size), "--onnx-model-dir", onnx_model_dir]
+        if limit is not None:
+            command += ["--limit", str(limit)]
+        completed = subprocess.run(command, check=True, capture_output=True, text=True)
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    reference = results[0]["outputs"]
+    print(f"{'backend':<10} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'q/s':>7} {'RSS MB':>8} {'exact match':>12}")
+    for result in results:
+        exact_match = sum(a == b for a, b in zip(result["outputs"], reference)) / len(reference)
+        print(f"{result['backend']:<10} {result['load_s']:>7.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+              f"{result['questions_per_s']:>7.1f} {result['peak_rss_mb']:>8.0f} {exact_match:>12.2%}")
+
+
+if __name__ == "__main__":
+    from core.ai_model import model_config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=["tf", "onnx-fp32", "onnx-int8"],
+                        default=["tf", "onnx-fp32", "onnx-int8"])
+    parser.add_argument("--limit", type=int, default=200, help="Only use the first N questions.")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--onnx-model-dir", default=model_config.ONNX_MODEL_DIR)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args.child, args.limit, args.batch_size, args.onnx_model_dir)))
+    else:
+        run(args.backends, args.limit, args.batch_size, args.onnx_model_dir)
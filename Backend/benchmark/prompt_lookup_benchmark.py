@@ -0,0 +1,119 @@
+"""
+Prompt-lookup speculative decoding vs plain greedy search on datasets/data/dev.jsonl.
+
+Each question is decoded alone (batch size 1) with both searches; the outputs
+are checked to be identical and the draft acceptance rate, tokens committed
+per decoder pass and wall-clock speedup are reported.
+
+    python -m benchmark.prompt_lookup_benchmark --backend tf --limit 200
+    python -m benchmark.prompt_lookup_benchmark --backend onnx --limit 200
+    python -m benchmark.prompt_lookup_benchmark --backend reference
+
+`reference` needs no model: a stub decoder emits the rendered WikiSQL query
+over a word-level vocabulary, which measures how much of the target SQL can be
+copied from the prompt. Words are split into letter runs and single digits,
+roughly as the T5 SentencePiece vocabulary splits table ids and numbers. Its
+speedup is the reduction in decoder passes.
+"""
+import argparse
+import re
+import time
+import numpy as np
+from benchmark.wikisql import DEV_PATH, build_ddls, load_examples, render_sql
+from core.ai_model.decoding import EncoderState, greedy_search, prompt_lookup_search
+
+_PIECE_PATTERN = re.compile(r"[^\W\d_]+|\d|[^\w\s]|_")
+
+
+class _PieceVocabulary:
+    def __init__(self):
+        self.ids = {"<pad>": 0, "</s>": 1}
+
+    def encode(self, text):
+        return [self.ids.setdefault(word, len(self.ids)) for word in _PIECE_PATTERN.findall(text)]
+
+
+class _ReferenceBackend:
+    """Emits a fixed target sequence, one position per decoder input token."""
+
+    def __init__(self, target_ids, vocab_size):
+        self.target_ids = target_ids
+        self.vocab_size = vocab_size
+
+    def encode(self, input_ids, attention_mask):
+        return EncoderState(input_ids, attention_mask)
+
+    def decode_step(self, encoder_state, decoder_input_ids, past=None):
+        position = past or 0
+        logits = np.zeros((1, decoder_input_ids.shape[1], self.vocab_size), dtype=np.float32)
+        for offset in range(decoder_input_ids.shape[1]):
+            logits[0, offset, self.target_ids[min(position + offset, len(self.target_ids) - 1)]] = 1.0
+        return logits, position + decoder_input_ids.shape[1]
+
+    @staticmethod
+    def crop_past(past, length):
+        return length
+
+
+def make_cases(backend_name, examples, ddls):
+    """Yields (backend, input_ids, attention_mask, generation kwargs) per question."""
+    inputs = [f"Question: {example['question']} | {ddls[example['table_id']]}" for example in examples]
+    if backend_name == "reference":
+        vocabulary = _PieceVocabulary()
+        encoded = [(vocabulary.encode(text), vocabulary.encode(render_sql(example)) + [1])
+                   for text, example in zip(inputs, examples)]
+        for prompt, target in encoded:
+            input_ids = np.array([prompt])
+            yield _ReferenceBackend(target, len(vocabulary.ids)), input_ids, np.ones_like(input_ids), 128
+        return
+
+    from core.ai_model.inference_backend import create_inference_backend
+    from core.ai_model.text_to_sql_system import TextToSQLSystem
+    system = TextToSQLSystem(batching_enabled=False, inference_backend=create_inference_backend(backend_name))
+    system._lazy_load_model()
+    for text in inputs:
+        encoded = system.t5_tokenizer([text], return_tensors='np', max_length=128, truncation=True)
+        yield system.inference_backend, encoded["input_ids"], encoded["attention_mask"], system.gen_config.max_length - 1
+
+
+def run(backend_name, limit, ngram_size, num_draft_tokens):
+    examples = load_examples(DEV_PATH, limit)
+    ddls = build_ddls(examples)
+
+    greedy_s = lookup_s = 0.0
+    greedy_steps = lookup_steps = generated = draft_tokens = accepted_tokens = mismatches = 0
+    for backend, input_ids, attention_mask, max_new_tokens in make_cases(backend_name, examples, ddls):
+        started = time.perf_counter()
+        greedy = greedy_search(backend, input_ids, attention_mask, max_new_tokens, 0, 1, 0)
+        greedy_s += time.perf_counter() - started
+
+        started = time.perf_counter()
+        output = prompt_lookup_search(backend, input_ids, attention_mask, max_new_tokens, 0, 1, 0,
+                                      max_ngram_size=ngram_size, num_draft_tokens=num_draft_tokens)
+        lookup_s += time.perf_counter() - started
+
+        mismatches += not np.array_equal(greedy.sequences, output.sequences)
+        greedy_steps += greedy.steps
+        lookup_steps += output.steps
+        generated += int(output.generated_tokens.sum())
+        draft_tokens += output.draft_tokens
+        accepted_tokens += output.accepted_tokens
+
+    print(f"questions:              {len(examples)}")
+    print(f"backend:                {backend_name}")
+    print(f"outputs differing:      {mismatches}")
+    print(f"draft acceptance rate:  {(accepted_tokens / draft_tokens) if draft_tokens else 0.0:.2%}")
+    print(f"tokens per pass:        {generated / lookup_steps:.2f} (greedy: {generated / greedy_steps:.2f})")
+    print(f"decoder passes:         {lookup_steps} vs {greedy_steps} ({greedy_steps / lookup_steps:.2f}x fewer)")
+    if backend_name != "reference":
+        print(f"wall-clock speedup:     {greedy_s / lookup_s:.2f}x ({greedy_s:.1f} s -> {lookup_s:.1f} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["reference", "tf", "onnx"], default="reference")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N questions.")
+    parser.add_argument("--ngram-size", type=int, default=3)
+    parser.add_argument("--num-draft-tokens", type=int, default=10)
+    args = parser.parse_args()
+    run(args.backend, args.limit, args.ngram_size, args.num_draft_tokens)
@@ -0,0 +1,117 @@
+"""
+Throughput and latency of T5 replica layouts (replicas x intra-op threads) on
+datasets/data/dev.jsonl under a fixed number of concurrent callers, to pick
+TTS_MODEL_REPLICAS / TTS_INTRA_OP_THREADS / TTS_REPLICA_CORE_AFFINITY per
+instance type.
+
+Every layout runs in its own subprocess: TensorFlow sizes its thread pools once
+per process. For "tf" the intra-op threads are shared by all replicas of the
+process (the layout's total is replicas x threads); ONNX Runtime gives every
+replica its own pool.
+
+    python -m benchmark.replica_sweep_benchmark --backend onnx --layouts 1x8 2x4 4x2 8x1 --affinity auto
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from benchmark.wikisql import DEV_PATH, build_ddls, load_examples
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def run_layout(limit, concurrency: int) -> dict:
+    """Runs in the child process, configured through the TTS_* environment."""
+    from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+    examples = load_examples(DEV_PATH, limit)
+    ddls = build_ddls(examples)
+    system = TextToSQLSystem()
+    system.generator_model.ensure_loaded()
+    for example in examples[:concurrency]:
+        system.generate_sql(example["question"], False, ddls[example["table_id"]])
+
+    pending = iter(examples)
+    lock = threading.Lock()
+    latencies = []
+
+    def call():
+        while True:
+            with lock:
+                example = next(pending, None)
+            if example is None:
+                return
+            started = time.perf_counter()
+            system.generate_sql(example["question"], False, ddls[example["table_id"]])
+            latency_ms = (time.perf_counter() - started) * 1000.0
+            with lock:
+                latencies.append(latency_ms)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=call) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput_qps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def layout_env(replicas: int, threads: int, backend: str, affinity: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "TTS_INFERENCE_BACKEND": backend,
+        "TTS_MODEL_REPLICAS": str(replicas),
+        # TensorFlow's pools are per process: the replicas share replicas x threads
+        "TTS_INTRA_OP_THREADS": str(replicas * threads if backend.startswith("tf") else threads),
+        "TTS_INTER_OP_THREADS": "1" if backend.startswith("tf") else "0",
+        "TTS_REPLICA_CORE_AFFINITY": affinity if replicas > 1 else "",
+        "TTS_WARMUP_GENERATIONS": "false",
+    })
+    return env
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="tf", choices=("tf", "tf-xla", "onnx"))
+    parser.add_argument("--layouts", nargs="+", default=["1x4", "2x2", "4x1"], help="replicas x intra-op threads")
+    parser.add_argument("--affinity", default="auto", help='TTS_REPLICA_CORE_AFFINITY for multi-replica layouts ("" off)')
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--bundle", default=None, help="Load the models from this bundle (TTS_MODEL_BUNDLE_DIR)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_layout(args.limit, args.concurrency)))
+        sys.exit(0)
+
+    print(f"{os.cpu_count()} cores, {args.backend}, {args.concurrency} concurrent callers, {args.limit} questions")
+    print(f"{'layout':<10} {'throughput':>12} {'p50':>10} {'p99':>10}")
+    for layout in args.layouts:
+        replicas, threads = (int(value) for value in layout.lower().split("x"))
+        env = layout_env(replicas, threads, args.backend, args.affinity)
+        if args.bundle:
+            env["TTS_MODEL_BUNDLE_DIR"] = args.bundle
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmark.replica_sweep_benchmark", "--child",
+             "--limit", str(args.limit), "--concurrency", str(args.concurrency)],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            print(f"{layout:<10} failed: {completed.stderr.strip().splitlines()[-1]}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"{layout:<10} {result['throughput_qps']:>8.1f} q/s {result['p50_ms']:>7.0f} ms {result['p99_ms']:>7.0f} ms")
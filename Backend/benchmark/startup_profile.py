@@ -0,0 +1,80 @@
+"""
+Cold start profile: what `import main` costs, by package and by module (from
+python -X importtime), and optionally how long each model and artifact takes to
+load and warm up.
+
+    python -m benchmark.startup_profile
+    python -m benchmark.startup_profile --load --bundle /models/tts-bundle
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def import_times(module: str = "main"):
+    """(wall seconds, {module: self microseconds}) of importing `module` in a fresh interpreter."""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    wall_seconds = time.perf_counter() - started
+    self_us = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if fields[0].isdigit():
+            self_us[fields[2]] = int(fields[0])
+    return wall_seconds, self_us
+
+
+def print_import_profile(top: int):
+    wall_seconds, self_us = import_times()
+    by_package = defaultdict(int)
+    for module, microseconds in self_us.items():
+        by_package[module.split(".")[0]] += microseconds
+
+    print(f"import main: {wall_seconds:.2f} s wall, {sum(self_us.values()) / 1e6:.2f} s in imports, "
+          f"{len(self_us)} modules")
+    print("  by package (self time):")
+    for package, microseconds in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"    {package:<32} {microseconds / 1000.0:8.1f} ms")
+    print("  slowest modules (self time):")
+    for module, microseconds in sorted(self_us.items(), key=lambda item: -item[1])[:top]:
+        print(f"    {module:<48} {microseconds / 1000.0:8.1f} ms")
+
+
+def print_load_profile():
+    from core.ai_model.model_registry import get_model_registry
+
+    registry = get_model_registry()
+    started = time.perf_counter()
+    registry.load_all()
+    print(f"models ready after {time.perf_counter() - started:.2f} s")
+    for name, status in registry.readiness()["models"].items():
+        warmup = f", warmup {status['warmup_seconds']:.2f} s" if status["warmup_seconds"] is not None else ""
+        print(f"  {name:<8} load {status['load_seconds']:.2f} s{warmup}")
+        for artifact, seconds in status["artifact_seconds"].items():
+            print(f"    {artifact:<20} {seconds:8.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--load", action="store_true", help="Also load and warm every model")
+    parser.add_argument("--bundle", default=None, help="Load the models from this bundle (TTS_MODEL_BUNDLE_DIR)")
+    args = parser.parse_args()
+
+    if args.bundle:
+        # Read by model_config on import, and passed on to the import subprocess
+        os.environ["TTS_MODEL_BUNDLE_DIR"] = args.bundle
+    print_import_profile(args.top)
+    if args.load:
+        print_load_profile()
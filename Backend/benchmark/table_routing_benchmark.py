@@ -0,0 +1,50 @@
+"""
+Table routing latency against operators with many stored tables.
+
+The question embedding comes from the intent recognizer's MiniLM cache, so the
+routing cost proper is the cosine search over the operator's table matrix. This
+benchmark times TableRouter.route() with a precomputed question embedding over
+random 384-dimensional (MiniLM-sized) table embeddings.
+
+    python -m benchmark.table_routing_benchmark --tables 10 100 1000 5000
+"""
+import argparse
+import time
+import numpy as np
+from unittest.mock import MagicMock
+from core.model.schema_models import SchemaCore
+from core.service.schema_manager.table_router import TableRouter
+
+DIMENSION = 384
+
+
+def run(table_counts, repeats, top_k):
+    rng = np.random.default_rng(0)
+    for table_count in table_counts:
+        repository = MagicMock()
+        repository.find_all_by_operator.return_value = [
+            SchemaCore(table_name=f"table_{i}", ddl_context=f"CREATE TABLE table_{i} (id INT)", operator="bench")
+            for i in range(table_count)
+        ]
+        router = TableRouter(embed=lambda texts: rng.normal(size=(len(texts), DIMENSION)),
+                             schema_repository=repository, top_k=top_k, min_similarity=-1.0)
+        questions = rng.normal(size=(repeats, DIMENSION)).astype(np.float32)
+
+        started = time.perf_counter()
+        router.route("bench", "", question_embedding=questions[0])
+        load_ms = (time.perf_counter() - started) * 1000.0
+
+        started = time.perf_counter()
+        for question in questions:
+            router.route("bench", "", question_embedding=question)
+        route_ms = (time.perf_counter() - started) * 1000.0 / repeats
+        print(f"{table_count:>6} tables: route {route_ms:.3f} ms (first call with index load {load_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeats", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=1)
+    args = parser.parse_args()
+    run(args.tables, args.repeats, args.top_k)
@@ -0,0 +1,76 @@
+"""
+Template cache benchmark on datasets/data/dev.jsonl.
+
+Every question is first looked up in the TemplateCache; misses are generated and
+stored. Each hit is compared with the generator's own answer to measure the
+disagreement rate, and latency saved is estimated from the measured generation
+latency minus the lookup overhead.
+
+    python -m benchmark.template_cache_benchmark                 # reference SQL as the generator
+    python -m benchmark.template_cache_benchmark --model t5      # the real TextToSQLSystem
+"""
+import argparse
+import time
+from benchmark.wikisql import DEV_PATH, build_ddls, load_examples, render_sql
+from core.cache.template_cache import TemplateCache
+
+MODEL_VERSION = "benchmark"
+
+
+def make_generator(model: str, stub_latency_ms: float):
+    if model == "t5":
+        from core.ai_model.text_to_sql_system import TextToSQLSystem
+        system = TextToSQLSystem(batching_enabled=False)
+        return lambda example, ddl: system.generate_sql(example["question"], False, ddl), None
+    return lambda example, ddl: render_sql(example), stub_latency_ms / 1000.0
+
+
+def run(limit, model, stub_latency_ms):
+    examples = load_examples(DEV_PATH, limit)
+    ddls = build_ddls(examples)
+    generate, fixed_latency_s = make_generator(model, stub_latency_ms)
+    cache = TemplateCache(max_entries=100000)
+
+    hits = disagreements = 0
+    lookup_s = generation_s = 0.0
+    generations = 0
+    for example in examples:
+        ddl = ddls[example["table_id"]]
+
+        started = time.perf_counter()
+        hit = cache.lookup(example["question"], ddl, False, MODEL_VERSION)
+        lookup_s += time.perf_counter() - started
+
+        started = time.perf_counter()
+        sql = generate(example, ddl)
+        elapsed = fixed_latency_s if fixed_latency_s is not None else time.perf_counter() - started
+
+        if hit is not None:
+            hits += 1
+            disagreements += hit.sql != sql
+        else:
+            generation_s += elapsed
+            generations += 1
+            cache.store(example["question"], ddl, False, MODEL_VERSION, sql, operator=None, table_name=example["table_id"])
+
+    avg_generation_ms = generation_s * 1000.0 / generations if generations else 0.0
+    stats = cache.get_stats()
+    print(f"questions:              {len(examples)}")
+    print(f"generator:              {model}")
+    print(f"templated questions:    {stats['template_lookups']}")
+    print(f"stored templates:       {stats['stored']} (unstorable: {stats['unstorable']})")
+    print(f"template hits:          {hits} ({hits / len(examples):.2%} of all questions)")
+    print(f"hit disagreement rate:  {(disagreements / hits) if hits else 0.0:.2%}")
+    print(f"avg generation latency: {avg_generation_ms:.2f} ms")
+    print(f"avg lookup overhead:    {lookup_s * 1000.0 / len(examples):.4f} ms")
+    print(f"latency saved:          {hits * avg_generation_ms - lookup_s * 1000.0:.1f} ms total")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N questions.")
+    parser.add_argument("--model", choices=["reference", "t5"], default="reference")
+    parser.add_argument("--stub-latency-ms", type=float, default=150.0,
+                        help="Generation latency assumed for the reference generator.")
+    args = parser.parse_args()
+    run(args.limit, args.model, args.stub_latency_ms)
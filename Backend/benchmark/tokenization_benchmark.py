@@ -0,0 +1,77 @@
+"""
+T5 input tokenization time per request: the slow SentencePiece T5Tokenizer on the
+whole "Question: ... | <ddl>" text (before), the fast tokenizer on the whole text,
+and the fast tokenizer with the DDL token-id cache (after), cold and warm.
+
+Uses the tokenizer of a checkpoint directory when given, otherwise a SentencePiece
+model trained on the dev questions and DDL (the HF hub is not needed).
+
+    python -m benchmark.tokenization_benchmark --limit 2000
+    python -m benchmark.tokenization_benchmark --tokenizer path/to/t5_checkpoint
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from transformers import T5Tokenizer, T5TokenizerFast
+from benchmark.wikisql import DEV_PATH, build_ddls, load_examples
+from core.ai_model.schema_linking import build_model_input
+from core.ai_model.text_to_sql_system import MAX_INPUT_TOKENS
+from core.ai_model.tokenization_cache import InputTokenizationCache
+
+
+def train_tokenizer(inputs, directory: Path):
+    import sentencepiece as spm
+    texts = [question for question, _ in inputs] + sorted({ddl for _, ddl in inputs})
+    spm.SentencePieceTrainer.train(
+        sentence_iterator=iter(texts), model_prefix=str(directory / "spiece"), vocab_size=2000,
+        model_type="unigram", character_coverage=1.0, pad_id=0, eos_id=1, unk_id=2, bos_id=-1, minloglevel=2
+    )
+    T5Tokenizer(str(directory / "spiece.model"), legacy=True).save_pretrained(str(directory))
+    return str(directory)
+
+
+def time_per_request(encode, inputs) -> float:
+    started = time.perf_counter()
+    for question, ddl in inputs:
+        encode(question, ddl)
+    return (time.perf_counter() - started) * 1000.0 / len(inputs)
+
+
+def run(inputs, source):
+    slow = T5Tokenizer.from_pretrained(source, legacy=True)
+    fast = T5TokenizerFast.from_pretrained(source)
+    cache = InputTokenizationCache(max_length=MAX_INPUT_TOKENS, max_entries=len(inputs))
+
+    def full(tokenizer):
+        return lambda question, ddl: tokenizer(
+            [build_model_input(question, ddl)], max_length=MAX_INPUT_TOKENS, truncation=True
+        )["input_ids"][0]
+
+    results = {
+        "slow tokenizer, whole text": time_per_request(full(slow), inputs),
+        "fast tokenizer, whole text": time_per_request(full(fast), inputs),
+        "fast tokenizer + DDL cache": time_per_request(lambda q, d: cache.encode(fast, q, d), inputs),
+    }
+    hit_rate = cache.get_stats()["hit_rate"]
+    # Second pass: every DDL is cached, as for a table that is queried repeatedly
+    results["fast tokenizer + warm cache"] = time_per_request(lambda q, d: cache.encode(fast, q, d), inputs)
+    baseline = results["slow tokenizer, whole text"]
+    print(f"{len(inputs)} requests, {len({ddl for _, ddl in inputs})} distinct DDL")
+    for name, milliseconds in results.items():
+        print(f"  {name:<28} {milliseconds * 1000.0:8.1f} us/request  ({baseline / milliseconds:.1f}x)")
+    print(f"  cache hit rate on the first pass {hit_rate:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", type=Path, default=DEV_PATH)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--tokenizer", default=None, help="Directory holding spiece.model (default: train one)")
+    args = parser.parse_args()
+
+    examples = load_examples(args.data, args.limit)
+    ddls = build_ddls(examples)
+    inputs = [(example["question"], ddls[example["table_id"]]) for example in examples]
+    with tempfile.TemporaryDirectory() as directory:
+        run(inputs, args.tokenizer or train_tokenizer(inputs, Path(directory)))
@@ -0,0 +1,123 @@
+"""
+Per-step decode cost and memory of the pruned LM head vs the stock T5 head.
+
+    python -m benchmark.vocab_pruning_benchmark --vocabulary core/ai_model/ai_models/t5_pruned_vocab.npz --limit 200
+    python -m benchmark.vocab_pruning_benchmark --synthetic --kept 6000
+
+With --vocabulary the checkpoint decodes the datasets/data/dev.jsonl questions
+with the stock TFBackend and with PrunedVocabBackend. Outputs are checked to be
+identical and the average decoder-step time, fallback rate and head memory are
+reported.
+
+--synthetic needs no model: it times only the output layer on a random head of
+the T5-small shape (32128 x 512), the full matmul against the pruned matmul plus
+the cluster bound. Random hidden states say nothing about the fallback rate, so
+it is not reported.
+"""
+import argparse
+import time
+import numpy as np
+from benchmark.wikisql import DEV_PATH, build_ddls, load_examples
+from core.ai_model.decoding import greedy_search
+from core.ai_model.vocab_pruning import PrunedVocabulary
+
+
+class _TimedDecodeSteps:
+    """Forwards to a backend and accumulates the time spent in decode_step()."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.seconds = 0.0
+        self.steps = 0
+
+    def encode(self, input_ids, attention_mask):
+        return self.backend.encode(input_ids, attention_mask)
+
+    def decode_step(self, encoder_state, decoder_input_ids, past=None):
+        started = time.perf_counter()
+        result = self.backend.decode_step(encoder_state, decoder_input_ids, past)
+        self.seconds += time.perf_counter() - started
+        self.steps += 1
+        return result
+
+
+def _mib(num_bytes):
+    return num_bytes / (1024 * 1024)
+
+
+def run_synthetic(kept, clusters, batch_sizes, repeats):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(32128, 512)).astype(np.float32)
+    vocabulary = PrunedVocabulary.from_output_embeddings(
+        embeddings, np.sort(rng.choice(len(embeddings), size=kept, replace=False)), num_clusters=clusters
+    )
+    stats = vocabulary.get_stats()
+    print(f"kept tokens:       {stats['kept_tokens']} of {stats['vocab_size']}")
+    print(f"head memory:       {_mib(stats['head_bytes']):.1f} MiB vs {_mib(stats['full_head_bytes']):.1f} MiB")
+    for batch_size in batch_sizes:
+        hidden = rng.normal(size=(batch_size, 512)).astype(np.float32)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            hidden @ embeddings.T
+        full_ms = (time.perf_counter() - started) * 1000.0 / repeats
+
+        # Random rows may all fall back: the full head is left out to time the pruned path alone
+        started = time.perf_counter()
+        for _ in range(repeats):
+            vocabulary.logits(hidden, lambda rows: 0.0)
+        pruned_ms = (time.perf_counter() - started) * 1000.0 / repeats
+        print(f"batch {batch_size:>3}: full head {full_ms:.3f} ms, pruned head {pruned_ms:.3f} ms "
+              f"(logits {_mib(batch_size * 32128 * 4):.2f} MiB either way)")
+
+
+def run_model(vocabulary_path, limit):
+    from core.ai_model.inference_backend import PrunedVocabBackend
+    from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+    system = TextToSQLSystem(batching_enabled=False)
+    system._lazy_load_model()
+    stock = system.inference_backend
+    pruned = PrunedVocabBackend(stock, vocabulary_path)
+    pruned.load()
+
+    examples = load_examples(DEV_PATH, limit)
+    ddls = build_ddls(examples)
+    timed_stock, timed_pruned = _TimedDecodeSteps(stock), _TimedDecodeSteps(pruned)
+    mismatches = 0
+    for example in examples:
+        text = f"Question: {example['question']} | {ddls[example['table_id']]}"
+        encoded = system.t5_tokenizer([text], return_tensors='np', max_length=128, truncation=True)
+        outputs = [
+            greedy_search(backend, encoded["input_ids"], encoded["attention_mask"],
+                          system.gen_config.max_length - 1, 0, 1, 0).sequences
+            for backend in (timed_stock, timed_pruned)
+        ]
+        mismatches += not np.array_equal(*outputs)
+
+    stats = pruned.get_stats()
+    stock_ms = timed_stock.seconds * 1000.0 / timed_stock.steps
+    pruned_ms = timed_pruned.seconds * 1000.0 / timed_pruned.steps
+    print(f"questions:          {len(examples)}")
+    print(f"outputs differing:  {mismatches}")
+    print(f"kept tokens:        {stats['kept_tokens']} of {stats['vocab_size']}")
+    print(f"fallback rate:      {stats['fallback_rate']:.2%} of decoder positions")
+    print(f"decoder step:       {pruned_ms:.2f} ms vs {stock_ms:.2f} ms ({stock_ms / pruned_ms:.2f}x)")
+    print(f"head memory:        {_mib(stats['head_bytes']):.1f} MiB pruned head on top of the "
+          f"{_mib(stats['full_head_bytes']):.1f} MiB full head kept for fallbacks")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vocabulary", help="Pruned vocabulary .npz written by core.ai_model.vocab_pruning.")
+    parser.add_argument("--synthetic", action="store_true", help="Time the output layer alone on a random head.")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N questions.")
+    parser.add_argument("--kept", type=int, default=6000, help="Synthetic: number of kept tokens.")
+    parser.add_argument("--clusters", type=int, default=256, help="Synthetic: clusters bounding the pruned rows.")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    if args.synthetic:
+        run_synthetic(args.kept, args.clusters, (1, 4, 8, 32), args.repeats)
+    elif args.vocabulary:
+        run_model(args.vocabulary, args.limit)
+    else:
+        parser.error("Pass --vocabulary or --synthetic.")
@@ -0,0 +1,66 @@
+"""
+Helpers for benchmarking against the WikiSQL questions in datasets/data/*.jsonl.
+The files carry the question, table id and the structured WikiSQL query but no
+table header, so tables are described with positional column names (col0, col1, ...).
+"""
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "datasets" / "data"
+DEV_PATH = DATA_DIR / "dev.jsonl"
+
+AGG_OPS = ["", "MAX", "MIN", "COUNT", "SUM", "AVG"]
+COND_OPS = ["=", ">", "<", "OP"]
+
+
+def load_examples(path: Path = DEV_PATH, limit: Optional[int] = None) -> List[dict]:
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                examples.append(json.loads(line))
+            if limit is not None and len(examples) >= limit:
+                break
+    return examples
+
+
+def table_name(table_id: str) -> str:
+    return "table_" + re.sub(r"\W", "_", table_id)
+
+
+def build_ddls(examples: List[dict]) -> Dict[str, str]:
+    """One CREATE TABLE per table id, wide enough for every column the queries reference."""
+    widths = defaultdict(int)
+    for example in examples:
+        sql = example["sql"]
+        columns = [sql["sel"]] + [cond[0] for cond in sql["conds"]]
+        widths[example["table_id"]] = max(widths[example["table_id"]], max(columns) + 1)
+    return {
+        table_id: f"CREATE TABLE {table_name(table_id)} ({', '.join(f'col{i} TEXT' for i in range(width))})"
+        for table_id, width in widths.items()
+    }
+
+
+def render_sql(example: dict) -> str:
+    """
+    Renders the structured WikiSQL query. Condition values are copied with the
+    surface form used in the question when it appears there, as a copy-based
+    text-to-SQL model would.
+    """
+    sql = example["sql"]
+    column = f"col{sql['sel']}"
+    select = f"{AGG_OPS[sql['agg']]}({column})" if sql["agg"] else column
+    query = f"SELECT {select} FROM {table_name(example['table_id'])}"
+    conditions = []
+    for column_index, op_index, value in sql["conds"]:
+        value = str(value)
+        match = re.search(re.escape(value), example["question"], re.IGNORECASE)
+        if match:
+            value = match.group(0)
+        conditions.append(f"col{column_index} {COND_OPS[op_index]} '{value}'")
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query
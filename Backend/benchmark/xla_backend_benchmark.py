@@ -0,0 +1,64 @@
+"""
+Mixed-traffic benchmark of eager vs XLA-compiled TensorFlow generation on
+datasets/data/dev.jsonl.
+
+Questions are sent in batches of random size (1..--max-batch), so both sequence
+length and batch size change from call to call as under real traffic. For the
+XLA backend the per-bucket compile time, steady-state latency and the number of
+retraces after warm-up (expected: 0) are printed.
+
+    python -m benchmark.xla_backend_benchmark --limit 400
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from benchmark.wikisql import DEV_PATH, build_ddls, load_examples
+from core.ai_model.inference_backend import TFBackend, XLABackend
+from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+
+def run_backend(backend, batches):
+    started = time.perf_counter()
+    system = TextToSQLSystem(batching_enabled=False, inference_backend=backend)
+    system._lazy_load_model()
+    load_s = time.perf_counter() - started
+
+    latencies, outputs = [], []
+    for batch in batches:
+        started = time.perf_counter()
+        outputs += system._generate_batch(batch)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+    latencies.sort()
+    print(f"{backend.name:<7} load+compile {load_s:7.1f} s  p50 {statistics.median(latencies):8.1f} ms  "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:8.1f} ms  total {sum(latencies) / 1000.0:7.1f} s")
+    return outputs
+
+
+def run(limit, max_batch, seed):
+    examples = load_examples(DEV_PATH, limit)
+    ddls = build_ddls(examples)
+    inputs = [f"Question: {example['question']} | {ddls[example['table_id']]}" for example in examples]
+    rng = random.Random(seed)
+    batches, position = [], 0
+    while position < len(inputs):
+        size = rng.randint(1, max_batch)
+        batches.append(inputs[position:position + size])
+        position += size
+
+    eager = run_backend(TFBackend(), batches)
+    xla_backend = XLABackend(batch_buckets=tuple(b for b in (1, 2, 4, 8) if b <= max_batch) or (max_batch,))
+    compiled = run_backend(xla_backend, batches)
+
+    print(f"exact match vs eager: {sum(a == b for a, b in zip(eager, compiled)) / len(eager):.2%}")
+    print(json.dumps(xla_backend.get_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=400, help="Only use the first N questions.")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.limit, args.max_batch, args.seed)
@@ -1,4 +1,4 @@
-from core.ai_model.text_to_sql_system import TextToSQLSystem
+from core.ai_model.model_registry import get_model_registry
 from core.dal.database.db_manager import DBManager
 from core.dal.query_history_dal import QueryHistoryDAL
 from core.converter.query_history_converter import QueryHistoryConverter
@@ -9,22 +9,76 @@ from core.service.user_auth.auth_service import AuthService
 from core.dal.schema_dal import SchemaDAL
 from core.service.schema_manager.schema_repository import SchemaRepository
 from core.service.schema_manager.schema_service import SchemaService
+from core.service.schema_manager.table_router import TableRouter
 from core.converter.schema_converter import SchemaConverter
+from core.cache.generation_result_cache import GenerationResultCache
+from core.cache.semantic_cache import SemanticCache
+from core.cache.template_cache import TemplateCache
+from core.cache.single_flight import SingleFlight
+from core.ai_model import model_config
 
 # Core Components
 db_manager = DBManager()
-tts_system = TextToSQLSystem()
+# One TextToSQLSystem per process, shared with main.py and api.py
+model_registry = get_model_registry()
+tts_system = model_registry.tts_system
+
+# Caches
+generation_result_cache = None
+if model_config.RESULT_CACHE_ENABLED:
+    generation_result_cache = GenerationResultCache(
+        max_entries=model_config.RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=model_config.RESULT_CACHE_MAX_BYTES,
+        ttl_seconds=model_config.RESULT_CACHE_TTL_SECONDS
+    )
+semantic_cache = None
+if model_config.SEMANTIC_CACHE_ENABLED:
+    semantic_cache = SemanticCache(
+        similarity_threshold=model_config.SEMANTIC_CACHE_THRESHOLD,
+        max_entries_per_partition=model_config.SEMANTIC_CACHE_MAX_ENTRIES_PER_PARTITION,
+        max_partitions=model_config.SEMANTIC_CACHE_MAX_PARTITIONS,
+        max_bytes=model_config.SEMANTIC_CACHE_MAX_BYTES
+    )
+template_cache = None
+if model_config.TEMPLATE_CACHE_ENABLED:
+    template_cache = TemplateCache(
+        max_entries=model_config.TEMPLATE_CACHE_MAX_ENTRIES,
+        verify_rate=model_config.TEMPLATE_CACHE_VERIFY_RATE
+    )
+single_flight = SingleFlight() if model_config.COALESCING_ENABLED else None
 
 # Services & Repositories
+schema_dal = SchemaDAL(db_manager=db_manager)
+schema_converter = SchemaConverter() 
+schema_repository = SchemaRepository(schema_dal=schema_dal, converter=schema_converter)
+
+# Server-side table routing for requests without DDL
+table_router = None
+if model_config.TABLE_ROUTING_ENABLED:
+    table_router = TableRouter(
+        embed=tts_system.embed_questions,
+        schema_repository=schema_repository,
+        top_k=model_config.TABLE_ROUTING_TOP_K,
+        min_similarity=model_config.TABLE_ROUTING_MIN_SIMILARITY
+    )
+schema_change_listeners = [
+    listener for listener in (generation_result_cache, semantic_cache, template_cache, table_router) if listener is not None
+]
+
 query_history_converter = QueryHistoryConverter()
 query_history_dal = QueryHistoryDAL(db_manager=db_manager)
 query_history_repo = QueryHistoryRepository(dal=query_history_dal, converter=query_history_converter)
-query_service = QueryService(tts_system=tts_system, history_repo=query_history_repo)
+query_service = QueryService(
+    tts_system=tts_system,
+    history_repo=query_history_repo,
+    result_cache=generation_result_cache,
+    semantic_cache=semantic_cache,
+    template_cache=template_cache,
+    single_flight=single_flight,
+    table_router=table_router
+)
 
 user_dal = UserDAL(db_manager=db_manager)
 auth_service = AuthService(user_dal=user_dal)
 
-schema_dal = SchemaDAL(db_manager=db_manager)
-schema_converter = SchemaConverter() 
-schema_repository = SchemaRepository(schema_dal=schema_dal, converter=schema_converter)
-schema_service = SchemaService(schema_repository=schema_repository, converter=schema_converter)
\ No newline at end of file
+schema_service = SchemaService(schema_repository=schema_repository, converter=schema_converter, schema_change_listeners=schema_change_listeners)
\ No newline at end of file
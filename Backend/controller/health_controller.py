@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from controller.dependencies import model_registry
+
+router = APIRouter(tags=["Health"])
+
+@router.get("/ready")
+def get_readiness():
+    """200 once every model is loaded and warmed up, 503 before (or after a failed load)."""
+    readiness = model_registry.readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
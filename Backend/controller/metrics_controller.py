@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from controller.dependencies import (
+    tts_system, generation_result_cache, semantic_cache, template_cache, single_flight, table_router
+)
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/inference")
+def get_inference_metrics() -> dict:
+    return tts_system.get_stats()
+
+@router.get("/cache")
+def get_cache_metrics() -> dict:
+    return {
+        "generation_result_cache": generation_result_cache.get_stats() if generation_result_cache is not None else None,
+        "semantic_cache": semantic_cache.get_stats() if semantic_cache is not None else None,
+        "template_cache": template_cache.get_stats() if template_cache is not None else None,
+        "coalescing": single_flight.get_stats() if single_flight is not None else None
+    }
+
+
+@router.get("/routing")
+def get_routing_metrics() -> dict:
+    return {"table_router": table_router.get_stats() if table_router is not None else None}
@@ -1,14 +1,102 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+import asyncio
+import json
+import threading
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional
 from controller.dependencies import query_service, query_history_converter
+from core.ai_model import model_config
+from core.ai_model.cancellation import CLIENT_DISCONNECTED, CancellationToken
+from core.model.models import ErrorContext, StatusEnum
 from core.model.query_models import QueryHistoryVO, QueryRequest, QueryResponse, QueryHistoryCore
 
 router = APIRouter(tags=["SQL Generation & History"])
 
 @router.post("/generate_sql", response_model=QueryResponse)
-def generate_sql_query(request: QueryRequest) -> QueryResponse:
+async def generate_sql_query(request: QueryRequest, http_request: Request,
+                             x_request_timeout: Optional[float] = Header(None)) -> QueryResponse:
+    """
+    Generation stops (and the request is recorded as CANCELLED) when the client
+    disconnects or the timeout passes: the timeout_seconds field, else the
+    X-Request-Timeout header, else TTS_REQUEST_TIMEOUT_SECONDS.
+    """
     paramCheck(request=request)
-    return query_service.process_and_generate_sql(request)
+    cancellation = request_cancellation(request, x_request_timeout)
+    watcher = asyncio.create_task(cancel_on_disconnect(http_request, cancellation))
+    try:
+        return await run_in_threadpool(query_service.process_and_generate_sql, request, cancellation=cancellation)
+    finally:
+        watcher.cancel()
+
+@router.post("/generate_sql/stream")
+def generate_sql_query_stream(request: QueryRequest,
+                              x_request_timeout: Optional[float] = Header(None)) -> StreamingResponse:
+    """
+    Server-Sent Events: "sql" events carry SQL fragments as the model decodes them,
+    then one "result" event carries the QueryResponse of /generate_sql (sent after
+    the history row is saved). Closing the stream cancels the generation.
+    """
+    paramCheck(request=request)
+    return StreamingResponse(
+        stream_sql_events(request, request_cancellation(request, x_request_timeout)),
+        media_type="text/event-stream",
+        # Proxies must pass each event on instead of buffering the response
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def request_cancellation(request: QueryRequest, timeout_header: Optional[float]) -> CancellationToken:
+    timeout_seconds = request.timeout_seconds or timeout_header or model_config.REQUEST_TIMEOUT_SECONDS
+    return CancellationToken(timeout_seconds if timeout_seconds and timeout_seconds > 0 else None)
+
+async def cancel_on_disconnect(http_request: Request, cancellation: CancellationToken):
+    """Polls the connection while the request runs and cancels it once the client has gone."""
+    while not cancellation.cancelled:
+        if await http_request.is_disconnected():
+            cancellation.cancel(CLIENT_DISCONNECTED)
+            return
+        await asyncio.sleep(model_config.DISCONNECT_CHECK_INTERVAL_MS / 1000.0)
+
+async def stream_sql_events(request: QueryRequest, cancellation: CancellationToken) -> AsyncIterator[str]:
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def send(event: str, data):
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, (event, data))
+        except RuntimeError:
+            # The loop has shut down with the abandoned stream: nobody reads these events anymore
+            pass
+
+    def generate():
+        try:
+            response = query_service.process_and_generate_sql(
+                request, on_text=lambda text: send("sql", {"text": text}), cancellation=cancellation
+            )
+        except Exception as e:
+            response = QueryResponse(
+                status=StatusEnum.FAILED,
+                result_data=None,
+                error_context=ErrorContext(error_message=str(e), error_type=type(e).__name__)
+            )
+        send("result", jsonable_encoder(response))
+
+    # The decode runs on its own thread so fragments can be sent while it is still going
+    threading.Thread(target=generate, name="sql-stream", daemon=True).start()
+    finished = False
+    try:
+        while not finished:
+            event, data = await events.get()
+            finished = event == "result"
+            yield format_sse_event(event, data)
+    finally:
+        # The stream was closed before the result: the client is gone
+        if not finished:
+            cancellation.cancel(CLIENT_DISCONNECTED)
+
+def format_sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @router.delete("/history/{operator}", response_model=None)
 def delete_sql_qeury(operator: str) -> QueryResponse:
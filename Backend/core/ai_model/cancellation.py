@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# Why a request was cancelled
+DEADLINE_EXCEEDED = "deadline_exceeded"
+CLIENT_DISCONNECTED = "client_disconnected"
+# A speculative generation whose question the intent check rejected
+INTENT_REJECTED = "intent_rejected"
+
+# Where a cancelled request stopped
+STAGE_BEFORE_DECODE = "before_decode"
+STAGE_DECODE = "decode"
+
+
+class RequestCancelledError(Exception):
+    """Raised where a cancelled request stops; `reason` is DEADLINE_EXCEEDED or CLIENT_DISCONNECTED."""
+    def __init__(self, reason: str):
+        super().__init__(f"Request cancelled ({reason.replace('_', ' ')}).")
+        self.reason = reason
+
+
+class CancellationToken:
+    """
+    Cancellation state of one request, checked at every stage it passes
+    through down to each decoder step. It is cancelled explicitly (the client
+    disconnected) or once `timeout_seconds` have passed since it was created.
+    A token with a `parent` is also cancelled with it and keeps its deadline,
+    so part of a request's work can be stopped on its own.
+    """
+    def __init__(self, timeout_seconds: Optional[float] = None, parent: Optional["CancellationToken"] = None):
+        if timeout_seconds is not None:
+            self.deadline = time.monotonic() + timeout_seconds
+        else:
+            self.deadline = parent.deadline if parent is not None else None
+        self.parent = parent
+        self._reason: Optional[str] = None
+
+    def cancel(self, reason: str = CLIENT_DISCONNECTED):
+        # The first reason sticks
+        if self._reason is None:
+            self._reason = reason
+
+    @property
+    def reason(self) -> Optional[str]:
+        if self._reason is None and self.parent is not None:
+            self._reason = self.parent.reason
+        if self._reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self._reason = DEADLINE_EXCEEDED
+        return self._reason
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def remaining_seconds(self) -> Optional[float]:
+        """Seconds until the deadline (None without one)."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def raise_if_cancelled(self):
+        reason = self.reason
+        if reason is not None:
+            raise RequestCancelledError(reason)
+
+
+class CancellationStats:
+    """Cancelled requests by reason and by the stage they stopped at."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reasons = Counter()
+        self.stages = Counter()
+
+    def record(self, reason: str, stage: str):
+        with self._lock:
+            self.reasons[reason] += 1
+            self.stages[stage] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "cancelled": sum(self.reasons.values()),
+                "reasons": dict(self.reasons),
+                "stages": dict(self.stages),
+            }
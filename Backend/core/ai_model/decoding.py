@@ -0,0 +1,199 @@
+from typing import Callable, List, NamedTuple, Optional, Union
+import numpy as np
+
+# Why a row of a greedy search stopped
+STOP_EOS = "eos"
+STOP_CRITERIA = "stopping_criteria"
+STOP_LENGTH = "length"
+STOP_CANCELLED = "cancelled"
+
+
+class EncoderState:
+    """Encoder output of a batch, reused by every decoder step."""
+    __slots__ = ("hidden_states", "attention_mask")
+
+    def __init__(self, hidden_states, attention_mask):
+        self.hidden_states = hidden_states
+        self.attention_mask = attention_mask
+
+
+class GreedySearchOutput(NamedTuple):
+    sequences: np.ndarray            # decoder start token followed by the generated tokens, pad after a row stops
+    stop_reasons: List[str]          # per row: STOP_EOS, STOP_CRITERIA, STOP_LENGTH or STOP_CANCELLED
+    generated_tokens: np.ndarray     # per row: tokens generated before it stopped (EOS included)
+    steps: int                       # decoder steps run for the whole batch
+    draft_tokens: int = 0            # prompt-lookup: draft tokens proposed, summed over active rows
+    accepted_tokens: int = 0         # prompt-lookup: draft tokens committed, summed over active rows
+
+
+# Called with each committed column of new tokens and the rows that generated them
+TokenCallback = Callable[[np.ndarray, np.ndarray], None]
+# Returns the rows whose request was cancelled (checked once per committed column)
+CancelledRows = Callable[[], np.ndarray]
+
+
+class _RowStopper:
+    """Applies cancellation, EOS, stopping-criteria and budget checks to one column of new tokens at a time."""
+
+    def __init__(self, budgets: np.ndarray, eos_token_id: int, pad_token_id: int, stopping_criteria,
+                 token_callback: Optional[TokenCallback] = None, cancelled_rows: Optional[CancelledRows] = None):
+        self.budgets = budgets
+        self.eos_token_id = eos_token_id
+        self.pad_token_id = pad_token_id
+        self.stopping_criteria = stopping_criteria
+        self.token_callback = token_callback
+        self.cancelled_rows = cancelled_rows
+        self.generated = np.zeros(len(budgets), dtype=np.int64)
+        self.stop_reasons: List[Optional[str]] = [STOP_LENGTH if budget <= 0 else None for budget in budgets]
+        self.finished = budgets <= 0
+
+    def commit(self, next_tokens: np.ndarray) -> np.ndarray:
+        """Records one generated token per row and returns the column to append (pad for stopped rows)."""
+        next_tokens = np.where(self.finished, self.pad_token_id, next_tokens)
+        active = ~self.finished
+        self.generated += active
+
+        stopped_cancelled = np.zeros(len(next_tokens), dtype=bool)
+        if self.cancelled_rows is not None:
+            stopped_cancelled = active & np.asarray(self.cancelled_rows(), dtype=bool)
+        stopped_eos = active & ~stopped_cancelled & (next_tokens == self.eos_token_id)
+        stopped_criteria = np.zeros(len(next_tokens), dtype=bool)
+        if self.stopping_criteria is not None:
+            stopped_criteria = (active & ~stopped_cancelled & ~stopped_eos
+                                & np.asarray(self.stopping_criteria(next_tokens), dtype=bool))
+        stopped_length = active & ~stopped_cancelled & ~stopped_eos & ~stopped_criteria & (self.generated >= self.budgets)
+        for reason, rows in ((STOP_CANCELLED, stopped_cancelled), (STOP_EOS, stopped_eos),
+                             (STOP_CRITERIA, stopped_criteria), (STOP_LENGTH, stopped_length)):
+            for row in np.flatnonzero(rows):
+                self.stop_reasons[row] = reason
+        self.finished = self.finished | stopped_cancelled | stopped_eos | stopped_criteria | stopped_length
+        if self.token_callback is not None:
+            self.token_callback(next_tokens, active)
+        return next_tokens
+
+
+def greedy_search(backend, input_ids: np.ndarray, attention_mask: np.ndarray,
+                  max_new_tokens: Union[int, np.ndarray], decoder_start_token_id: int, eos_token_id: int,
+                  pad_token_id: int,
+                  stopping_criteria: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                  token_callback: Optional[TokenCallback] = None,
+                  cancelled_rows: Optional[CancelledRows] = None) -> GreedySearchOutput:
+    """
+    KV-cached greedy decoding over a backend exposing encode() and decode_step().
+    Matches transformers' greedy search: sequences start with the decoder start
+    token and rows that already stopped are padded until the batch finishes.
+
+    `max_new_tokens` is a single budget or one per row. `stopping_criteria` is
+    called with each step's new tokens and returns the rows that are complete.
+    `token_callback` receives every committed column as soon as it is decided,
+    for streaming the output while the batch is still decoding. Rows reported
+    by `cancelled_rows` stop after the step that is running, and the search
+    ends as soon as no row is left.
+    """
+    batch_size = input_ids.shape[0]
+    budgets = np.broadcast_to(np.asarray(max_new_tokens, dtype=np.int64), (batch_size,))
+    stopper = _RowStopper(budgets, eos_token_id, pad_token_id, stopping_criteria, token_callback, cancelled_rows)
+    encoder_state = backend.encode(input_ids, attention_mask)
+    sequences = np.full((batch_size, 1), decoder_start_token_id, dtype=np.int64)
+
+    past = None
+    next_input = sequences
+    steps = 0
+    while not stopper.finished.all():
+        logits, past = backend.decode_step(encoder_state, next_input, past)
+        steps += 1
+        next_tokens = stopper.commit(logits[:, -1, :].argmax(axis=-1).astype(np.int64))
+        sequences = np.concatenate([sequences, next_tokens[:, None]], axis=1)
+        next_input = next_tokens[:, None]
+    return GreedySearchOutput(sequences, stopper.stop_reasons, stopper.generated, steps)
+
+
+def find_draft(prompt_ids: np.ndarray, generated_ids: np.ndarray, max_ngram_size: int, num_draft_tokens: int) -> np.ndarray:
+    """
+    Prompt lookup: finds the longest suffix n-gram of the generated tokens (down to
+    a single token) in the prompt and proposes the tokens that follow it there.
+    """
+    for ngram_size in range(min(max_ngram_size, len(generated_ids)), 0, -1):
+        if len(prompt_ids) <= ngram_size:
+            continue
+        windows = np.lib.stride_tricks.sliding_window_view(prompt_ids[:-1], ngram_size)
+        matches = np.flatnonzero((windows == generated_ids[-ngram_size:]).all(axis=1))
+        if len(matches):
+            start = matches[0] + ngram_size
+            return prompt_ids[start:start + num_draft_tokens]
+    return prompt_ids[:0]
+
+
+def prompt_lookup_search(backend, input_ids: np.ndarray, attention_mask: np.ndarray,
+                         max_new_tokens: Union[int, np.ndarray], decoder_start_token_id: int, eos_token_id: int,
+                         pad_token_id: int, stopping_criteria: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                         max_ngram_size: int = 3, num_draft_tokens: int = 10,
+                         token_callback: Optional[TokenCallback] = None,
+                         cancelled_rows: Optional[CancelledRows] = None) -> GreedySearchOutput:
+    """
+    Greedy search with prompt-lookup speculation: draft tokens copied from the
+    input (column names, table names, literals) are verified in a single decoder
+    pass and the agreeing prefix is committed at once, so the output is
+    identical to greedy_search(). The backend also needs crop_past().
+
+    The rows of a batch share one KV cache, so each step commits the shortest
+    accepted prefix across the active rows.
+    """
+    batch_size = input_ids.shape[0]
+    budgets = np.broadcast_to(np.asarray(max_new_tokens, dtype=np.int64), (batch_size,))
+    stopper = _RowStopper(budgets, eos_token_id, pad_token_id, stopping_criteria, token_callback, cancelled_rows)
+    encoder_state = backend.encode(input_ids, attention_mask)
+    prompts = [np.asarray(input_ids[row])[np.asarray(attention_mask[row]).astype(bool)] for row in range(batch_size)]
+    sequences = np.full((batch_size, 1), decoder_start_token_id, dtype=np.int64)
+
+    past = None
+    cache_length = 0
+    next_input = sequences
+    steps = draft_tokens = accepted_tokens = 0
+    while not stopper.finished.all():
+        active_rows = np.flatnonzero(~stopper.finished)
+        drafts = {}
+        if past is not None:
+            # Never draft beyond the largest remaining budget
+            limit = min(num_draft_tokens, int((budgets - stopper.generated)[active_rows].max()) - 1)
+            if limit > 0:
+                drafts = {row: find_draft(prompts[row], sequences[row, 1:], max_ngram_size, limit) for row in active_rows}
+        draft_length = min((len(draft) for draft in drafts.values()), default=0)
+
+        candidates = np.full((batch_size, draft_length), pad_token_id, dtype=np.int64)
+        for row, draft in drafts.items():
+            candidates[row] = draft[:draft_length]
+        logits, past = backend.decode_step(encoder_state, np.concatenate([next_input, candidates], axis=1), past)
+        steps += 1
+        predictions = logits.argmax(axis=-1).astype(np.int64)
+
+        # Draft tokens are accepted while they match the model's own greedy prediction
+        accepted = draft_length
+        for row in active_rows:
+            mismatches = np.flatnonzero(predictions[row, :draft_length] != candidates[row])
+            accepted = min(accepted, int(mismatches[0]) if len(mismatches) else draft_length)
+        draft_tokens += draft_length * len(active_rows)
+        accepted_tokens += accepted * len(active_rows)
+
+        for position in range(accepted + 1):
+            if stopper.finished.all():
+                break
+            next_tokens = stopper.commit(predictions[:, position])
+            sequences = np.concatenate([sequences, next_tokens[:, None]], axis=1)
+        # The cache holds the step's input token and the accepted drafts; the bonus token is fed next
+        cache_length += accepted + 1
+        if accepted < draft_length:
+            past = backend.crop_past(past, cache_length)
+        next_input = sequences[:, -1:]
+
+    # Same width as greedy_search: the batch ends with its longest row
+    sequences = sequences[:, :1 + int(stopper.generated.max(initial=0))]
+    return GreedySearchOutput(sequences, stopper.stop_reasons, stopper.generated, steps, draft_tokens, accepted_tokens)
+
+
+def greedy_decode(backend, input_ids: np.ndarray, attention_mask: np.ndarray, max_new_tokens: int,
+                  decoder_start_token_id: int, eos_token_id: int, pad_token_id: int) -> np.ndarray:
+    """Greedy search returning only the generated sequences."""
+    return greedy_search(
+        backend, input_ids, attention_mask, max_new_tokens, decoder_start_token_id, eos_token_id, pad_token_id
+    ).sequences
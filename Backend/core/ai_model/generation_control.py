@@ -0,0 +1,357 @@
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from core.ai_model.cancellation import CancellationToken
+from core.ai_model.decoding import STOP_CANCELLED, STOP_CRITERIA, STOP_LENGTH, greedy_search, prompt_lookup_search
+from core.ai_model.schema_linking import count_ddl_columns
+
+# Characters that change the statement scanner's state
+_SCANNED_CHARACTERS = set("'\"`();\\")
+_QUOTES = "'\"`"
+
+
+class SQLStatementStoppingCriteria:
+    """
+    Incremental per-row scanner over the generated tokens of one batch. A row is
+    complete once it has emitted a `;` outside quotes with balanced parentheses
+    after some statement text.
+    """
+    def __init__(self, token_pieces: Dict[int, str], batch_size: int):
+        # Only pieces containing a scanned character matter; any other token is plain statement text
+        self._token_pieces = token_pieces
+        self._quote = [""] * batch_size
+        self._escaped = [False] * batch_size
+        self._depth = [0] * batch_size
+        self._has_content = [False] * batch_size
+        self._complete = np.zeros(batch_size, dtype=bool)
+
+    def __call__(self, next_tokens: np.ndarray) -> np.ndarray:
+        for row, token in enumerate(next_tokens.tolist()):
+            if self._complete[row]:
+                continue
+            piece = self._token_pieces.get(token)
+            if piece is None:
+                self._has_content[row] = True
+                continue
+            for character in piece:
+                if self._scan(row, character):
+                    self._complete[row] = True
+                    break
+        return self._complete.copy()
+
+    def _scan(self, row: int, character: str) -> bool:
+        quote = self._quote[row]
+        if quote:
+            if self._escaped[row]:
+                self._escaped[row] = False
+            elif character == "\\" and quote != "`":
+                self._escaped[row] = True
+            elif character == quote:
+                # A doubled quote ('it''s') closes and immediately reopens: same net state
+                self._quote[row] = ""
+            return False
+        if character in _QUOTES:
+            self._quote[row] = character
+        elif character == "(":
+            self._depth[row] += 1
+        elif character == ")":
+            self._depth[row] -= 1
+        elif character == ";":
+            return self._has_content[row] and self._depth[row] == 0
+        if not character.isspace() and character != "▁":
+            self._has_content[row] = True
+        return False
+
+
+def _row_streams(streamers: Optional[Sequence[Optional[Callable[[int], None]]]]):
+    """A decoder token callback that forwards each row's tokens to that row's streamer."""
+    if streamers is None or all(streamer is None for streamer in streamers):
+        return None
+
+    def token_callback(next_tokens: np.ndarray, active: np.ndarray):
+        for row in np.flatnonzero(active):
+            if streamers[row] is not None:
+                streamers[row](int(next_tokens[row]))
+    return token_callback
+
+
+def _cancelled_rows(cancellations: Optional[Sequence[Optional[CancellationToken]]]):
+    """A decoder check returning the rows whose request was cancelled."""
+    if cancellations is None or all(cancellation is None for cancellation in cancellations):
+        return None
+
+    def cancelled_rows() -> np.ndarray:
+        return np.array([cancellation is not None and cancellation.cancelled for cancellation in cancellations])
+    return cancelled_rows
+
+
+# GenerationConfig fields that change the decode, with the value that leaves greedy search unchanged
+_GREEDY_SETTINGS = {
+    "num_beams": 1,
+    "num_beam_groups": 1,
+    "num_return_sequences": 1,
+    "do_sample": False,
+    "penalty_alpha": None,
+    "repetition_penalty": 1.0,
+    "encoder_repetition_penalty": 1.0,
+    "no_repeat_ngram_size": 0,
+    "encoder_no_repeat_ngram_size": 0,
+    "min_length": 0,
+    "min_new_tokens": None,
+    "bad_words_ids": None,
+    "sequence_bias": None,
+    "forced_bos_token_id": None,
+    "forced_eos_token_id": None,
+    "suppress_tokens": None,
+    "begin_suppress_tokens": None,
+    "exponential_decay_length_penalty": None,
+}
+
+
+def non_greedy_settings(generation_config) -> List[str]:
+    """
+    Settings of a generation config that the controller's greedy decode would
+    ignore. Empty for plain greedy configs; anything else must go through the
+    backend's own generate().
+    """
+    settings = []
+    for name, greedy_value in _GREEDY_SETTINGS.items():
+        value = getattr(generation_config, name, None)
+        if value is not None and value != greedy_value and value != []:
+            settings.append(name)
+    return settings
+
+
+def _skip_tokens(streamer: Optional[Callable[[int], None]], count: int):
+    """A streamer that ignores the first `count` tokens (those it already received)."""
+    if streamer is None:
+        return None
+    remaining = [count]
+
+    def put(token_id: int):
+        if remaining[0] > 0:
+            remaining[0] -= 1
+        else:
+            streamer(token_id)
+    return put
+
+
+def _replace_rows(sequences: np.ndarray, rows: Sequence[int], replacements: np.ndarray, pad_token_id: int) -> np.ndarray:
+    """`sequences` with the given rows replaced, padded to the longer of the two widths."""
+    width = max(sequences.shape[1], replacements.shape[1])
+    merged = np.full((sequences.shape[0], width), pad_token_id, dtype=sequences.dtype)
+    merged[:, :sequences.shape[1]] = sequences
+    for index, row in enumerate(rows):
+        merged[row] = pad_token_id
+        merged[row, :replacements.shape[1]] = replacements[index]
+    return merged
+
+
+class GenerationController:
+    """
+    Bounds the T5 decode of each request: a max-new-tokens budget derived from the
+    DDL column count and the question length (a row that exhausts it is decoded
+    again without it), and an optional stop as soon as a complete SQL statement
+    has been emitted. Used by TextToSQLSystem with
+    backends that support step-by-step decoding, for greedy generation configs
+    only (see non_greedy_settings).
+
+    With `prompt_lookup` the decode uses prompt-lookup speculation, which
+    produces the same tokens with fewer decoder passes when the SQL copies
+    spans of the question or DDL.
+
+    Rows of cancelled requests stop after the running decoder step; the steps
+    they were still allowed are counted as reclaimed.
+    """
+    def __init__(self, budget_base: int = 32, budget_per_column: int = 4, budget_per_question_word: int = 3,
+                 budget_min: int = 48, budget_max: int = 511, stop_on_complete_statement: bool = True,
+                 prompt_lookup: bool = False, prompt_lookup_ngram_size: int = 3, prompt_lookup_num_tokens: int = 10):
+        self.budget_base = budget_base
+        self.budget_per_column = budget_per_column
+        self.budget_per_question_word = budget_per_question_word
+        self.budget_min = budget_min
+        self.budget_max = budget_max
+        self.stop_on_complete_statement = stop_on_complete_statement
+        self.prompt_lookup = prompt_lookup
+        self.prompt_lookup_ngram_size = prompt_lookup_ngram_size
+        self.prompt_lookup_num_tokens = prompt_lookup_num_tokens
+        self._token_pieces = None
+        self._pieces_tokenizer = None
+        self._lock = threading.Lock()
+
+        # Stats
+        self.rows = 0
+        self.batches = 0
+        self.decoder_steps = 0
+        self.generated_tokens = 0
+        self.budget_total = 0
+        self.stop_reasons = Counter()
+        self.steps_saved_by_stop = 0
+        self.budget_fallbacks = 0
+        self.budget_fallback_steps = 0
+        self.draft_tokens = 0
+        self.accepted_tokens = 0
+        self.decode_seconds = 0.0
+        self.skipped_rows = 0
+        self.steps_saved_by_cancel = 0
+
+    def max_new_tokens(self, question: str, ddl_context: Optional[str]) -> int:
+        budget = (
+            self.budget_base
+            + self.budget_per_column * count_ddl_columns(ddl_context)
+            + self.budget_per_question_word * len((question or "").split())
+        )
+        return int(min(max(budget, self.budget_min), self.budget_max))
+
+    def _pieces(self, tokenizer) -> Dict[int, str]:
+        with self._lock:
+            if self._pieces_tokenizer is not tokenizer:
+                pieces = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+                self._token_pieces = {
+                    token_id: piece for token_id, piece in enumerate(pieces)
+                    if piece and not set(piece).isdisjoint(_SCANNED_CHARACTERS)
+                }
+                self._pieces_tokenizer = tokenizer
+            return self._token_pieces
+
+    def generate(self, backend, tokenizer, input_ids: np.ndarray, attention_mask: np.ndarray, generation_config,
+                 max_new_tokens: Optional[Sequence[Optional[int]]] = None,
+                 streamers: Optional[Sequence[Optional[Callable[[int], None]]]] = None,
+                 cancellations: Optional[Sequence[Optional[CancellationToken]]] = None) -> np.ndarray:
+        """
+        Greedy decode of one batch with per-row budgets (None: the generation
+        config's limit). A row's streamer, if any, is called with each of its
+        token ids as soon as the token is committed, and a row whose
+        cancellation token is cancelled stops decoding.
+
+        A row that runs out of its budget before completing is decoded again
+        under the generation config's limit, so a budget never truncates the
+        returned SQL; it only saves the steps of rows that complete within it.
+        """
+        default_budget = generation_config.max_new_tokens or (generation_config.max_length - 1)
+        budgets = np.array([
+            default_budget if budget is None else min(budget, default_budget)
+            for budget in (max_new_tokens or [None] * input_ids.shape[0])
+        ], dtype=np.int64)
+        input_ids, attention_mask = np.asarray(input_ids), np.asarray(attention_mask)
+
+        started = time.perf_counter()
+        output = self._search(backend, tokenizer, input_ids, attention_mask, budgets, generation_config,
+                              streamers, cancellations)
+        truncated = [
+            row for row, (reason, budget) in enumerate(zip(output.stop_reasons, budgets.tolist()))
+            if reason == STOP_LENGTH and budget < default_budget
+        ]
+        fallback = None
+        if truncated:
+            rows = np.array(truncated)
+            fallback = self._search(
+                backend, tokenizer, input_ids[rows], attention_mask[rows],
+                np.full(len(truncated), default_budget, dtype=np.int64), generation_config,
+                # Greedy decoding repeats the tokens already streamed: only the rest is passed on
+                [_skip_tokens(streamers[row], int(output.generated_tokens[row])) for row in truncated] if streamers else None,
+                [cancellations[row] for row in truncated] if cancellations else None
+            )
+        self._record(output, budgets, default_budget, time.perf_counter() - started, truncated, fallback)
+        if fallback is None:
+            return output.sequences
+        return _replace_rows(output.sequences, truncated, fallback.sequences, generation_config.pad_token_id or 0)
+
+    def _search(self, backend, tokenizer, input_ids: np.ndarray, attention_mask: np.ndarray, budgets: np.ndarray,
+                generation_config, streamers, cancellations):
+        stopping_criteria = None
+        if self.stop_on_complete_statement:
+            stopping_criteria = SQLStatementStoppingCriteria(self._pieces(tokenizer), input_ids.shape[0])
+
+        search_kwargs = dict(
+            decoder_start_token_id=generation_config.decoder_start_token_id or 0,
+            eos_token_id=generation_config.eos_token_id if generation_config.eos_token_id is not None else 1,
+            pad_token_id=generation_config.pad_token_id or 0,
+            stopping_criteria=stopping_criteria,
+            token_callback=_row_streams(streamers),
+            cancelled_rows=_cancelled_rows(cancellations)
+        )
+        if self.prompt_lookup:
+            return prompt_lookup_search(
+                backend, input_ids, attention_mask, budgets,
+                max_ngram_size=self.prompt_lookup_ngram_size,
+                num_draft_tokens=self.prompt_lookup_num_tokens,
+                **search_kwargs
+            )
+        return greedy_search(backend, input_ids, attention_mask, budgets, **search_kwargs)
+
+    def record_skipped(self, max_new_tokens: Sequence[Optional[int]], generation_config):
+        """Rows cancelled before their batch was decoded: their whole budget is reclaimed."""
+        default_budget = generation_config.max_new_tokens or (generation_config.max_length - 1)
+        with self._lock:
+            self.skipped_rows += len(max_new_tokens)
+            self.steps_saved_by_cancel += sum(
+                default_budget if budget is None else min(budget, default_budget) for budget in max_new_tokens
+            )
+
+    def _record(self, output, budgets: np.ndarray, default_budget: int, seconds: float,
+                truncated: Sequence[int] = (), fallback=None):
+        # Final outcome per row: the fallback decode replaces the rows it ran again
+        stop_reasons = list(output.stop_reasons)
+        final_generated = output.generated_tokens.tolist()
+        final_budgets = budgets.tolist()
+        decodes = [output]
+        if fallback is not None:
+            decodes.append(fallback)
+            for index, row in enumerate(truncated):
+                stop_reasons[row] = fallback.stop_reasons[index]
+                final_generated[row] = int(fallback.generated_tokens[index])
+                final_budgets[row] = default_budget
+        with self._lock:
+            self.batches += 1
+            self.decode_seconds += seconds
+            self.rows += len(budgets)
+            self.budget_total += int(budgets.sum())
+            for decode in decodes:
+                self.decoder_steps += decode.steps
+                self.generated_tokens += int(decode.generated_tokens.sum())
+                self.draft_tokens += decode.draft_tokens
+                self.accepted_tokens += decode.accepted_tokens
+            if fallback is not None:
+                self.budget_fallbacks += len(truncated)
+                self.budget_fallback_steps += fallback.steps
+            for reason, generated, budget in zip(stop_reasons, final_generated, final_budgets):
+                self.stop_reasons[reason] += 1
+                # Steps the row was still allowed under the unbounded config. An upper
+                # bound: without the cut the model might have emitted EOS earlier
+                if reason == STOP_CRITERIA:
+                    self.steps_saved_by_stop += default_budget - generated
+                elif reason == STOP_CANCELLED:
+                    # Also an upper bound: the row could have completed before its budget
+                    self.steps_saved_by_cancel += budget - generated
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            # Decode time per generated token of a row, the cost of one reclaimed step
+            seconds_per_row_step = (self.decode_seconds / self.generated_tokens) if self.generated_tokens else 0.0
+            return {
+                "stop_on_complete_statement": self.stop_on_complete_statement,
+                "batches": self.batches,
+                "rows": self.rows,
+                "decoder_steps": self.decoder_steps,
+                "generated_tokens": self.generated_tokens,
+                "avg_generated_tokens": (self.generated_tokens / self.rows) if self.rows else 0.0,
+                "avg_budget": (self.budget_total / self.rows) if self.rows else 0.0,
+                "stop_reasons": dict(self.stop_reasons),
+                "steps_saved_by_stop": self.steps_saved_by_stop,
+                # Rows decoded again because their budget ran out, and the decoder steps that took
+                "budget_fallbacks": self.budget_fallbacks,
+                "budget_fallback_steps": self.budget_fallback_steps,
+                "prompt_lookup": self.prompt_lookup,
+                "draft_tokens": self.draft_tokens,
+                "accepted_tokens": self.accepted_tokens,
+                "acceptance_rate": (self.accepted_tokens / self.draft_tokens) if self.draft_tokens else 0.0,
+                "tokens_per_step": (self.generated_tokens / self.decoder_steps) if self.decoder_steps else 0.0,
+                "decode_seconds": self.decode_seconds,
+                "cancelled_rows": self.stop_reasons[STOP_CANCELLED],
+                "skipped_cancelled_rows": self.skipped_rows,
+                "steps_saved_by_cancel": self.steps_saved_by_cancel,
+                "cpu_seconds_reclaimed": self.steps_saved_by_cancel * seconds_per_row_step,
+            }
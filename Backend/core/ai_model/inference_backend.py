@@ -0,0 +1,578 @@
+import copy
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from core.ai_model import model_config
+from core.ai_model.decoding import EncoderState, greedy_decode
+from core.ai_model.model_bundle import ModelBundle
+from core.ai_model.onnx_export import (
+    DECODER_FILE, DECODER_WITH_PAST_FILE, ENCODER_FILE, past_input_names, quantized_name
+)
+from core.ai_model.vocab_pruning import PrunedVocabulary
+
+# Path setting
+REMOTE_MODEL_PATH = "JordenBong/T5-Small-Text-to-SQL"
+T5_SUBFOLDER = "t5_small_text2sql_model"
+
+
+class InferenceBackend:
+    """
+    A seq2seq runtime for the text-to-SQL model. generate() maps padded input ids
+    to output token ids; runtimes with `supports_decode_steps` also expose
+    encode(), decode_step() and crop_past() so callers can drive their own decoding loop.
+    """
+    name = "base"
+    supports_decode_steps = False
+
+    @property
+    def tokenizer_source(self) -> Tuple[str, dict]:
+        """Where the tokenizer and generation config are loaded from: (path, from_pretrained kwargs)."""
+        return REMOTE_MODEL_PATH, {"subfolder": T5_SUBFOLDER}
+
+    def load(self):
+        raise NotImplementedError
+
+    def is_loaded(self) -> bool:
+        raise NotImplementedError
+
+    def unload(self):
+        """Drops the loaded model; load() brings it back."""
+        raise NotImplementedError
+
+    def generate(self, input_ids: np.ndarray, attention_mask: np.ndarray, generation_config) -> np.ndarray:
+        raise NotImplementedError
+
+    def warmup(self, generation_config):
+        """Called once the model and generation config are loaded, before serving traffic."""
+
+    def get_stats(self) -> dict:
+        return {"name": self.name}
+
+
+def set_tf_threads(intra_op_threads: int, inter_op_threads: int):
+    """
+    TensorFlow's intra/inter-op thread pools are process-wide and sized once,
+    when the first op runs; 0 keeps TensorFlow's default (one thread per core).
+    """
+    import tensorflow as tf
+
+    try:
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError as e:
+        print(f"TensorFlow thread counts not applied ({e}); set them before anything runs a TensorFlow op.")
+
+
+class TFBackend(InferenceBackend):
+    """The original TensorFlow model, decoded with transformers' generate() or step by step."""
+    name = "tf"
+    supports_decode_steps = True
+
+    def __init__(self, model_path: str = REMOTE_MODEL_PATH, subfolder: str = T5_SUBFOLDER,
+                 local_files_only: bool = False, intra_op_threads: int = 0, inter_op_threads: int = 0):
+        self._model_path = model_path
+        self._subfolder = subfolder
+        self._local_files_only = local_files_only
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.model = None
+
+    @property
+    def tokenizer_source(self) -> Tuple[str, dict]:
+        kwargs = {"subfolder": self._subfolder} if self._subfolder else {}
+        if self._local_files_only:
+            kwargs["local_files_only"] = True
+        return self._model_path, kwargs
+
+    def load(self):
+        if self.model is None:
+            # Deferred: importing the TF model class imports TensorFlow
+            from transformers import TFT5ForConditionalGeneration
+
+            set_tf_threads(self.intra_op_threads, self.inter_op_threads)
+            _, kwargs = self.tokenizer_source
+            self.model = TFT5ForConditionalGeneration.from_pretrained(self._model_path, **kwargs)
+
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def unload(self):
+        self.model = None
+
+    def generate(self, input_ids, attention_mask, generation_config):
+        import tensorflow as tf
+
+        outputs = self.model.generate(
+            input_ids=tf.constant(input_ids),
+            attention_mask=tf.constant(attention_mask),
+            generation_config=generation_config
+        )
+        return outputs.numpy()
+
+    def encode(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> EncoderState:
+        import tensorflow as tf
+
+        attention_mask = tf.constant(attention_mask, dtype=tf.int32)
+        hidden_states = self.model.get_encoder()(
+            input_ids=tf.constant(input_ids, dtype=tf.int32), attention_mask=attention_mask, training=False
+        ).last_hidden_state
+        return EncoderState(hidden_states, attention_mask)
+
+    def decode_step(self, encoder_state: EncoderState, decoder_input_ids: np.ndarray, past=None):
+        """Runs the decoder on the new tokens. `past` is transformers' per-layer cache tuple. Returns (logits, past)."""
+        import tensorflow as tf
+
+        outputs = self.model(
+            input_ids=None,
+            encoder_outputs=(encoder_state.hidden_states,),
+            attention_mask=encoder_state.attention_mask,
+            decoder_input_ids=tf.constant(decoder_input_ids, dtype=tf.int32),
+            past_key_values=past,
+            use_cache=True,
+            training=False
+        )
+        return outputs.logits.numpy(), outputs.past_key_values
+
+    def decode_hidden_step(self, encoder_state: EncoderState, decoder_input_ids: np.ndarray, past=None):
+        """
+        decode_step() without the LM head: returns (hidden_states, past) where the
+        hidden states are already scaled so that logits = hidden_states @ output_embeddings().T.
+        """
+        import tensorflow as tf
+
+        outputs = self.model.decoder(
+            tf.constant(decoder_input_ids, dtype=tf.int32),
+            encoder_hidden_states=encoder_state.hidden_states,
+            encoder_attention_mask=encoder_state.attention_mask,
+            past_key_values=past,
+            use_cache=True,
+            return_dict=True,
+            training=False
+        )
+        hidden_states = outputs.last_hidden_state
+        if self.model.config.tie_word_embeddings:
+            # Same rescaling as TFT5ForConditionalGeneration.call before the tied LM head
+            hidden_states = hidden_states * (self.model.model_dim ** -0.5)
+        return hidden_states.numpy(), outputs.past_key_values
+
+    def _output_embeddings(self):
+        import tensorflow as tf
+
+        if self.model.config.tie_word_embeddings:
+            return self.model.shared.embeddings
+        return tf.transpose(self.model.lm_head.kernel)
+
+    def output_embeddings(self, token_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows of the LM head, (vocab_size, d_model), or only those of `token_ids`."""
+        import tensorflow as tf
+
+        embeddings = self._output_embeddings()
+        if token_ids is not None:
+            embeddings = tf.gather(embeddings, tf.constant(token_ids, dtype=tf.int32))
+        return embeddings.numpy()
+
+    def project_logits(self, hidden_states: np.ndarray) -> np.ndarray:
+        """The full LM head applied to hidden states from decode_hidden_step(), (rows, vocab_size)."""
+        import tensorflow as tf
+
+        return tf.matmul(tf.constant(hidden_states), self._output_embeddings(), transpose_b=True).numpy()
+
+    @staticmethod
+    def crop_past(past, length: int):
+        """Keeps the first `length` positions of the self-attention cache (the cross-attention cache is fixed)."""
+        return tuple((layer[0][:, :, :length], layer[1][:, :, :length]) + tuple(layer[2:]) for layer in past)
+
+
+def select_bucket(size: int, buckets: Sequence[int]) -> Optional[int]:
+    """Smallest bucket that fits `size`, or None if it is larger than every bucket."""
+    for bucket in buckets:
+        if size <= bucket:
+            return bucket
+    return None
+
+
+def pad_to_bucket(input_ids: np.ndarray, attention_mask: np.ndarray, batch_size: int, length: int,
+                  pad_token_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Right-pads the sequences to `length` (masked out) and the batch to `batch_size`
+    by repeating the first row; the extra rows are dropped from the output.
+    """
+    rows, columns = input_ids.shape
+    padded_ids = np.full((batch_size, length), pad_token_id, dtype=np.int32)
+    padded_mask = np.zeros((batch_size, length), dtype=np.int32)
+    padded_ids[:rows, :columns] = input_ids
+    padded_mask[:rows, :columns] = attention_mask
+    padded_ids[rows:] = padded_ids[0]
+    padded_mask[rows:] = padded_mask[0]
+    return padded_ids, padded_mask
+
+
+class _BucketStats:
+    __slots__ = ("compile_ms", "calls", "total_ms", "rows", "padded_rows")
+
+    def __init__(self):
+        self.compile_ms = None
+        self.calls = 0
+        self.total_ms = 0.0
+        self.rows = 0
+        self.padded_rows = 0
+
+
+class XLABackend(TFBackend):
+    """
+    TensorFlow generate() compiled with XLA (tf.function(jit_compile=True)).
+    Inputs are padded to a fixed set of (batch, length) buckets, so mixed traffic
+    reuses a few compiled programs with a static-shape decoder cache instead of
+    retracing for every new sequence length. warmup() compiles every bucket.
+    """
+    name = "tf-xla"
+    # Decoding runs inside the compiled program
+    supports_decode_steps = False
+
+    def __init__(self, length_buckets: Sequence[int] = (32, 64, 128), batch_buckets: Sequence[int] = (1, 2, 4, 8),
+                 precompile: bool = True, model_path: str = REMOTE_MODEL_PATH, subfolder: str = T5_SUBFOLDER,
+                 local_files_only: bool = False, intra_op_threads: int = 0, inter_op_threads: int = 0):
+        super().__init__(model_path, subfolder, local_files_only, intra_op_threads, inter_op_threads)
+        self.length_buckets = tuple(sorted(length_buckets))
+        self.batch_buckets = tuple(sorted(batch_buckets))
+        self.precompile = precompile
+        self._compiled = None
+        self._generation_config = None
+        self._lock = threading.Lock()
+        self._bucket_stats = {}
+        self.retraces = 0
+        self.fallbacks = 0
+
+    def _compiled_generate(self, generation_config):
+        import tensorflow as tf
+
+        with self._lock:
+            if self._compiled is None or generation_config != self._generation_config:
+                # The generation config is baked into the compiled program
+                config = copy.deepcopy(generation_config)
+                self._compiled = tf.function(
+                    lambda input_ids, attention_mask: self.model.generate(
+                        input_ids=input_ids, attention_mask=attention_mask, generation_config=config
+                    ),
+                    jit_compile=True
+                )
+                self._generation_config = config
+                self._bucket_stats = {}
+            return self._compiled
+
+    def unload(self):
+        with self._lock:
+            # The compiled programs hold the model's variables
+            self._compiled = None
+            self._generation_config = None
+            self._bucket_stats = {}
+        super().unload()
+
+    def warmup(self, generation_config):
+        if not self.precompile:
+            return
+        pad_token_id = generation_config.pad_token_id or 0
+        for batch_size in self.batch_buckets:
+            for length in self.length_buckets:
+                input_ids = np.full((batch_size, length), pad_token_id, dtype=np.int32)
+                self._run_bucket(generation_config, input_ids, np.ones_like(input_ids), batch_size, length)
+        print(f"Compiled {len(self.batch_buckets) * len(self.length_buckets)} XLA generation buckets.")
+
+    def generate(self, input_ids, attention_mask, generation_config):
+        input_ids = np.asarray(input_ids, dtype=np.int32)
+        attention_mask = np.asarray(attention_mask, dtype=np.int32)
+        length = select_bucket(input_ids.shape[1], self.length_buckets)
+        if length is None:
+            with self._lock:
+                self.fallbacks += 1
+            return super().generate(input_ids, attention_mask, generation_config)
+
+        # Batches larger than the biggest bucket are split into chunks of that size
+        max_batch = self.batch_buckets[-1]
+        outputs = []
+        for start in range(0, input_ids.shape[0], max_batch):
+            chunk_ids = input_ids[start:start + max_batch]
+            batch_size = select_bucket(chunk_ids.shape[0], self.batch_buckets)
+            outputs.append(self._run_bucket(
+                generation_config, chunk_ids, attention_mask[start:start + max_batch], batch_size, length
+            ))
+        return np.concatenate(outputs, axis=0)
+
+    def _run_bucket(self, generation_config, input_ids, attention_mask, batch_size, length) -> np.ndarray:
+        import tensorflow as tf
+
+        compiled = self._compiled_generate(generation_config)
+        rows = input_ids.shape[0]
+        padded_ids, padded_mask = pad_to_bucket(
+            input_ids, attention_mask, batch_size, length, generation_config.pad_token_id or 0
+        )
+
+        traces_before = compiled.experimental_get_tracing_count()
+        started = time.perf_counter()
+        outputs = compiled(tf.constant(padded_ids), tf.constant(padded_mask)).numpy()
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        traced = compiled.experimental_get_tracing_count() > traces_before
+
+        with self._lock:
+            stats = self._bucket_stats.setdefault((batch_size, length), _BucketStats())
+            if traced and stats.compile_ms is None:
+                stats.compile_ms = elapsed_ms
+            else:
+                if traced:
+                    self.retraces += 1
+                stats.calls += 1
+                stats.total_ms += elapsed_ms
+                stats.rows += rows
+                stats.padded_rows += batch_size - rows
+        return outputs[:rows]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            buckets = {
+                f"{batch_size}x{length}": {
+                    "compile_ms": stats.compile_ms,
+                    "calls": stats.calls,
+                    "avg_latency_ms": (stats.total_ms / stats.calls) if stats.calls else 0.0,
+                    "rows": stats.rows,
+                    "padded_rows": stats.padded_rows,
+                }
+                for (batch_size, length), stats in sorted(self._bucket_stats.items())
+            }
+            return {
+                "name": self.name,
+                "length_buckets": list(self.length_buckets),
+                "batch_buckets": list(self.batch_buckets),
+                "compiled_buckets": sum(1 for stats in self._bucket_stats.values() if stats.compile_ms is not None),
+                "retraces": self.retraces,
+                "fallbacks": self.fallbacks,
+                "buckets": buckets,
+            }
+
+
+class ONNXBackend(InferenceBackend):
+    """
+    ONNX Runtime graphs written by core.ai_model.onnx_export, optionally the
+    dynamically int8-quantized ones, decoded greedily with a KV cache.
+    """
+    supports_decode_steps = True
+
+    def __init__(self, model_dir: str, quantized: bool = True, intra_op_threads: int = 0, inter_op_threads: int = 0):
+        self.model_dir = Path(model_dir)
+        self.quantized = quantized
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.name = "onnx-int8" if quantized else "onnx-fp32"
+        self._encoder = None
+        self._decoder = None
+        self._decoder_with_past = None
+        self._num_layers = None
+
+    @property
+    def tokenizer_source(self) -> Tuple[str, dict]:
+        return str(self.model_dir), {}
+
+    def _graph_path(self, file_name: str) -> str:
+        return str(self.model_dir / (quantized_name(file_name) if self.quantized else file_name))
+
+    def load(self):
+        if self._encoder is not None:
+            return
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.intra_op_threads:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads:
+            options.inter_op_num_threads = self.inter_op_threads
+        providers = ["CPUExecutionProvider"]
+
+        self._decoder = ort.InferenceSession(self._graph_path(DECODER_FILE), options, providers=providers)
+        self._decoder_with_past = ort.InferenceSession(self._graph_path(DECODER_WITH_PAST_FILE), options, providers=providers)
+        self._num_layers = (len(self._decoder.get_outputs()) - 1) // 4
+        # Assigned last: is_loaded() only reports True once every graph is ready
+        self._encoder = ort.InferenceSession(self._graph_path(ENCODER_FILE), options, providers=providers)
+
+    def is_loaded(self) -> bool:
+        return self._encoder is not None
+
+    def unload(self):
+        self._encoder = None
+        self._decoder = None
+        self._decoder_with_past = None
+
+    @staticmethod
+    def _run(session, feed: dict) -> List[np.ndarray]:
+        # The exporter drops graph inputs that end up unused (e.g. encoder_hidden_states once cached)
+        names = {graph_input.name for graph_input in session.get_inputs()}
+        return session.run(None, {name: value for name, value in feed.items() if name in names})
+
+    def encode(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> EncoderState:
+        attention_mask = attention_mask.astype(np.int64)
+        hidden_states = self._run(self._encoder, {
+            "input_ids": input_ids.astype(np.int64),
+            "attention_mask": attention_mask,
+        })[0]
+        return EncoderState(hidden_states, attention_mask)
+
+    def decode_step(self, encoder_state: EncoderState, decoder_input_ids: np.ndarray, past=None):
+        """
+        Runs the decoder on the new tokens. `past` is (self_attention_cache, cross_attention_cache),
+        two flat lists of [key, value] arrays per layer. Returns (logits, past).
+        """
+        feed = {
+            "decoder_input_ids": decoder_input_ids.astype(np.int64),
+            "encoder_hidden_states": encoder_state.hidden_states,
+            "encoder_attention_mask": encoder_state.attention_mask,
+        }
+        if past is None:
+            outputs = self._run(self._decoder, feed)
+            cache = outputs[1:]
+            self_cache = [tensor for i in range(0, len(cache), 4) for tensor in cache[i:i + 2]]
+            cross_cache = [tensor for i in range(0, len(cache), 4) for tensor in cache[i + 2:i + 4]]
+            return outputs[0], (self_cache, cross_cache)
+
+        self_cache, cross_cache = past
+        names = past_input_names(self._num_layers)
+        for layer in range(self._num_layers):
+            feed[names[4 * layer]] = self_cache[2 * layer]
+            feed[names[4 * layer + 1]] = self_cache[2 * layer + 1]
+            feed[names[4 * layer + 2]] = cross_cache[2 * layer]
+            feed[names[4 * layer + 3]] = cross_cache[2 * layer + 1]
+        outputs = self._run(self._decoder_with_past, feed)
+        return outputs[0], (outputs[1:], cross_cache)
+
+    @staticmethod
+    def crop_past(past, length: int):
+        """Keeps the first `length` positions of the self-attention cache."""
+        self_cache, cross_cache = past
+        return [tensor[:, :, :length] for tensor in self_cache], cross_cache
+
+    def generate(self, input_ids, attention_mask, generation_config):
+        max_new_tokens = generation_config.max_new_tokens or (generation_config.max_length - 1)
+        return greedy_decode(
+            self, np.asarray(input_ids), np.asarray(attention_mask), max_new_tokens,
+            decoder_start_token_id=generation_config.decoder_start_token_id or 0,
+            eos_token_id=generation_config.eos_token_id if generation_config.eos_token_id is not None else 1,
+            pad_token_id=generation_config.pad_token_id or 0,
+        )
+
+
+class PrunedVocabBackend(InferenceBackend):
+    """
+    Step-by-step decoding with a slimmed LM head written by core.ai_model.vocab_pruning.
+    Each decoder step scores only the kept tokens; rows where a pruned token could
+    outscore them are rescored with the full head, so the output matches the
+    wrapped backend. The wrapped backend needs decode_hidden_step(),
+    output_embeddings() and project_logits().
+    """
+    supports_decode_steps = True
+
+    def __init__(self, backend: InferenceBackend, vocabulary_path: str):
+        if not hasattr(backend, "decode_hidden_step"):
+            raise ValueError(f"Vocabulary pruning needs a step-by-step TensorFlow backend, not '{backend.name}'.")
+        self.backend = backend
+        self.vocabulary_path = vocabulary_path
+        self.name = f"{backend.name}-pruned"
+        self.vocabulary = None
+        self._lock = threading.Lock()
+        self.steps = 0
+        self.scored_rows = 0
+        self.fallback_rows = 0
+
+    @property
+    def tokenizer_source(self) -> Tuple[str, dict]:
+        return self.backend.tokenizer_source
+
+    def load(self):
+        if self.vocabulary is not None:
+            return
+        self.backend.load()
+        vocabulary = PrunedVocabulary.load(self.vocabulary_path)
+        # The cluster bound is only valid for the checkpoint the head was cut from
+        if not np.allclose(vocabulary.head, self.backend.output_embeddings(vocabulary.kept_ids), atol=1e-6):
+            raise ValueError(f"{self.vocabulary_path} was not built from the loaded checkpoint.")
+        self.vocabulary = vocabulary
+
+    def is_loaded(self) -> bool:
+        return self.vocabulary is not None
+
+    def unload(self):
+        self.vocabulary = None
+        self.backend.unload()
+
+    def warmup(self, generation_config):
+        self.backend.warmup(generation_config)
+
+    def encode(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> EncoderState:
+        return self.backend.encode(input_ids, attention_mask)
+
+    def decode_step(self, encoder_state: EncoderState, decoder_input_ids: np.ndarray, past=None):
+        hidden_states, past = self.backend.decode_hidden_step(encoder_state, decoder_input_ids, past)
+        batch_size, new_tokens, d_model = hidden_states.shape
+        logits, fallback = self.vocabulary.logits(hidden_states.reshape(-1, d_model), self.backend.project_logits)
+        with self._lock:
+            self.steps += 1
+            self.scored_rows += len(fallback)
+            self.fallback_rows += int(fallback.sum())
+        return logits.reshape(batch_size, new_tokens, -1), past
+
+    def crop_past(self, past, length: int):
+        return self.backend.crop_past(past, length)
+
+    def generate(self, input_ids, attention_mask, generation_config):
+        max_new_tokens = generation_config.max_new_tokens or (generation_config.max_length - 1)
+        return greedy_decode(
+            self, np.asarray(input_ids), np.asarray(attention_mask), max_new_tokens,
+            decoder_start_token_id=generation_config.decoder_start_token_id or 0,
+            eos_token_id=generation_config.eos_token_id if generation_config.eos_token_id is not None else 1,
+            pad_token_id=generation_config.pad_token_id or 0,
+        )
+
+    def get_stats(self) -> dict:
+        stats = {"name": self.name, "wrapped": self.backend.get_stats()}
+        if self.vocabulary is not None:
+            stats.update(self.vocabulary.get_stats())
+        with self._lock:
+            stats.update({
+                "decoder_steps": self.steps,
+                "scored_rows": self.scored_rows,
+                "fallback_rows": self.fallback_rows,
+                "fallback_rate": (self.fallback_rows / self.scored_rows) if self.scored_rows else 0.0,
+            })
+        return stats
+
+
+def create_inference_backend(name: Optional[str] = None) -> InferenceBackend:
+    """
+    Builds the backend selected by TTS_INFERENCE_BACKEND ('tf', 'tf-xla' or 'onnx'),
+    wrapped in PrunedVocabBackend when TTS_VOCAB_PRUNING_PATH is set. The TensorFlow
+    backends load from the model bundle at TTS_MODEL_BUNDLE_DIR, if set.
+    """
+    name = (name or model_config.INFERENCE_BACKEND).lower()
+    source = ModelBundle(model_config.MODEL_BUNDLE_DIR).t5_source() if model_config.MODEL_BUNDLE_DIR else {}
+    threads = {"intra_op_threads": model_config.INTRA_OP_THREADS, "inter_op_threads": model_config.INTER_OP_THREADS}
+    if name == "tf":
+        if model_config.VOCAB_PRUNING_PATH:
+            return PrunedVocabBackend(TFBackend(**source, **threads), model_config.VOCAB_PRUNING_PATH)
+        return TFBackend(**source, **threads)
+    if name == "tf-xla":
+        return XLABackend(
+            length_buckets=model_config.XLA_LENGTH_BUCKETS,
+            batch_buckets=model_config.XLA_BATCH_BUCKETS,
+            precompile=model_config.XLA_PRECOMPILE,
+            **source,
+            **threads
+        )
+    if name == "onnx":
+        return ONNXBackend(
+            model_config.ONNX_MODEL_DIR,
+            quantized=model_config.ONNX_QUANTIZED,
+            intra_op_threads=model_config.INTRA_OP_THREADS or model_config.ONNX_INTRA_OP_THREADS,
+            inter_op_threads=model_config.INTER_OP_THREADS
+        )
+    raise ValueError(f"Unknown inference backend '{name}'. Expected 'tf', 'tf-xla' or 'onnx'.")
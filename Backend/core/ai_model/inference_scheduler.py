@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+
+class _PendingRequest:
+    """A single caller waiting for its share of a batched model call."""
+    __slots__ = ("item", "future", "enqueued_at")
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceScheduler:
+    """
+    Dynamic micro-batching in front of a model.
+    Concurrent callers are gathered for at most `max_wait_ms` (or until
+    `max_batch_size` requests are waiting), executed with a single call to
+    `run_batch`, and every caller receives its own element of the result list.
+    `worker_init` runs first on the worker thread (e.g. to pin it to cores).
+    """
+    def __init__(self, run_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = 8,
+                 max_wait_ms: float = 10.0, name: str = "inference",
+                 worker_init: Optional[Callable[[], None]] = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self._run_batch = run_batch
+        self._worker_init = worker_init
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max(max_wait_ms, 0.0) / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._running = True
+
+        # Stats
+        self._requests = 0
+        self._batches = 0
+        self._max_queue_depth = 0
+        self._total_wait_s = 0.0
+        self._total_batch_s = 0.0
+        self._batch_sizes = Counter()
+
+    def submit(self, item: Any) -> Future:
+        """Queues an item and returns a Future resolved with its result."""
+        if not self._running:
+            raise RuntimeError(f"Scheduler '{self.name}' has been shut down.")
+        self._ensure_worker()
+        request = _PendingRequest(item)
+        self._queue.put(request)
+        with self._stats_lock:
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return request.future
+
+    def run(self, item: Any) -> Any:
+        """Blocking helper: submit an item and wait for its result."""
+        return self.submit(item).result()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            batches = self._batches
+            return {
+                "name": self.name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_s * 1000.0,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "batches": batches,
+                "avg_batch_size": (self._requests / batches) if batches else 0.0,
+                "avg_queue_wait_ms": (self._total_wait_s * 1000.0 / self._requests) if self._requests else 0.0,
+                "avg_batch_latency_ms": (self._total_batch_s * 1000.0 / batches) if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            }
+
+    def shutdown(self):
+        """Stops the worker thread once the queue has been drained."""
+        self._running = False
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    # --- Worker ---
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._worker_loop, name=f"{self.name}-scheduler", daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self, first: _PendingRequest) -> List[_PendingRequest]:
+        """Gathers requests until the batch is full or the first request's wait window closes."""
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Shutdown sentinel: put it back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _worker_loop(self):
+        if self._worker_init is not None:
+            self._worker_init()
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect_batch(first)
+
+            # Callers may have cancelled their future while waiting in the queue
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self._execute(batch)
+
+    def _execute(self, batch: List[_PendingRequest]):
+        started = time.perf_counter()
+        try:
+            results = self._run_batch([request.item for request in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch runner returned {len(results)} results for {len(batch)} requests."
+                )
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+        else:
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+        finally:
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self._requests += len(batch)
+                self._batches += 1
+                self._batch_sizes[len(batch)] += 1
+                self._total_batch_s += finished - started
+                self._total_wait_s += sum(started - request.enqueued_at for request in batch)
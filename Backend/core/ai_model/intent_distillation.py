@@ -0,0 +1,208 @@
+"""
+Distills the RBF One-Class SVM intent classifier into a linear decision function
+over an explicit kernel feature map, so predicting no longer touches every
+support vector:
+
+  nystroem  features are RBF kernel values against k-means centres of the
+            support vectors (Nystroem landmarks)
+  rff       random Fourier features cos(x W + b) approximating the RBF kernel
+
+The linear weights are fitted by ridge least squares to the OCSVM's own decision
+values on the given questions and the support vectors. The result is saved as
+an .npz that only needs numpy to evaluate; QueryIntentRecognizer loads it in
+place of ocsvm_model.pkl.
+
+    python -m core.ai_model.intent_distillation --questions questions.jsonl \\
+        --output core/ai_model/ai_models/intent_nystroem.npz
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+import numpy as np
+
+METHODS = ("nystroem", "rff")
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class LinearIntentClassifier:
+    """
+    decision_function(x) = features(x) . coef + intercept, predict() returns +1 / -1
+    like OneClassSVM.predict.
+    """
+    def __init__(self, method: str, gamma: float, coef: np.ndarray, intercept: float,
+                 landmarks: np.ndarray = None, weights: np.ndarray = None, phases: np.ndarray = None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}'. Expected one of {METHODS}.")
+        self.method = method
+        self.gamma = float(gamma)
+        self.coef = np.asarray(coef, dtype=np.float32)
+        self.intercept = float(intercept)
+        self.landmarks = None if landmarks is None else np.asarray(landmarks, dtype=np.float32)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float32)
+        self.phases = None if phases is None else np.asarray(phases, dtype=np.float32)
+        if self.landmarks is not None:
+            self._landmark_norms = (self.landmarks * self.landmarks).sum(axis=1)
+
+    @property
+    def n_components(self) -> int:
+        return len(self.coef)
+
+    def features(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if self.method == "nystroem":
+            distances = (X * X).sum(axis=1)[:, None] + self._landmark_norms[None, :] - 2.0 * (X @ self.landmarks.T)
+            return np.exp(-self.gamma * np.maximum(distances, 0.0))
+        return np.sqrt(2.0 / self.n_components) * np.cos(X @ self.weights + self.phases)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return self.features(X) @ self.coef + self.intercept
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.where(self.decision_function(X) > 0, 1, -1)
+
+    def save(self, path: str):
+        arrays = {"method": np.array(self.method), "gamma": np.array(self.gamma), "coef": self.coef,
+                  "intercept": np.array(self.intercept)}
+        for name in ("landmarks", "weights", "phases"):
+            if getattr(self, name) is not None:
+                arrays[name] = getattr(self, name)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "LinearIntentClassifier":
+        with np.load(path) as data:
+            return cls(
+                method=str(data["method"]), gamma=float(data["gamma"]), coef=data["coef"],
+                intercept=float(data["intercept"]),
+                **{name: data[name] for name in ("landmarks", "weights", "phases") if name in data.files}
+            )
+
+
+def distill_ocsvm(svm, embeddings: np.ndarray, method: str = "nystroem", n_components: int = 256,
+                  ridge: float = 1e-4, random_state: int = 0) -> LinearIntentClassifier:
+    """Fits a LinearIntentClassifier to the decision values of a fitted RBF OneClassSVM."""
+    if svm.kernel != "rbf":
+        raise ValueError(f"Only RBF One-Class SVMs can be distilled, got kernel '{svm.kernel}'.")
+    rng = np.random.default_rng(random_state)
+    gamma = svm._gamma
+    support_vectors = np.asarray(svm.support_vectors_, dtype=np.float32)
+    dimension = support_vectors.shape[1]
+
+    if method == "nystroem":
+        from sklearn.cluster import KMeans
+        if n_components >= len(support_vectors):
+            landmarks = support_vectors
+        else:
+            landmarks = KMeans(n_clusters=n_components, n_init=1, random_state=random_state).fit(
+                support_vectors, sample_weight=svm.dual_coef_[0]
+            ).cluster_centers_
+        classifier = LinearIntentClassifier(method, gamma, np.zeros(len(landmarks)), 0.0, landmarks=landmarks)
+    elif method == "rff":
+        weights = rng.normal(0.0, np.sqrt(2.0 * gamma), size=(dimension, n_components))
+        phases = rng.uniform(0.0, 2.0 * np.pi, size=n_components)
+        classifier = LinearIntentClassifier(method, gamma, np.zeros(n_components), 0.0, weights=weights, phases=phases)
+    else:
+        raise ValueError(f"Unknown method '{method}'. Expected one of {METHODS}.")
+
+    # Targets: the OCSVM's decision values, on the questions and on its own boundary-defining points
+    fit_points = np.vstack([np.asarray(embeddings, dtype=np.float32), support_vectors])
+    targets = svm.decision_function(fit_points)
+    features = np.hstack([classifier.features(fit_points), np.ones((len(fit_points), 1), dtype=np.float32)])
+    features = features.astype(np.float64)
+    solution = np.linalg.solve(features.T @ features + ridge * np.eye(features.shape[1]), features.T @ targets)
+    classifier.coef = solution[:-1].astype(np.float32)
+    classifier.intercept = float(solution[-1])
+    return classifier
+
+
+def _batch_latency_ms(predict, X: np.ndarray, batch_size: int, repeats: int) -> float:
+    batch = np.resize(X, (batch_size, X.shape[1])).astype(np.float32)
+    predict(batch)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        predict(batch)
+    return (time.perf_counter() - started) * 1000.0 / repeats
+
+
+def evaluate(svm, classifier: LinearIntentClassifier, held_out: np.ndarray,
+             batch_sizes: Sequence[int] = BATCH_SIZES, repeats: int = 50) -> Dict:
+    """Agreement with the OCSVM on held-out embeddings and per-batch predict latency of both."""
+    expected = svm.predict(held_out)
+    predicted = classifier.predict(held_out)
+    in_domain = expected == 1
+    return {
+        "support_vectors": len(svm.support_vectors_),
+        "n_components": classifier.n_components,
+        "held_out": len(held_out),
+        "agreement": float((predicted == expected).mean()),
+        "agreement_in_domain": float((predicted[in_domain] == 1).mean()) if in_domain.any() else None,
+        "agreement_out_of_domain": float((predicted[~in_domain] == -1).mean()) if (~in_domain).any() else None,
+        "decision_correlation": float(np.corrcoef(svm.decision_function(held_out),
+                                                  classifier.decision_function(held_out))[0, 1]),
+        "latency_ms": {
+            batch_size: {
+                "ocsvm": _batch_latency_ms(svm.predict, held_out, batch_size, repeats),
+                "distilled": _batch_latency_ms(classifier.predict, held_out, batch_size, repeats),
+            }
+            for batch_size in batch_sizes
+        },
+    }
+
+
+def print_report(report: Dict):
+    def rate(value):
+        return "n/a" if value is None else f"{value:.2%}"
+
+    print(f"OCSVM with {report['support_vectors']} support vectors -> {report['n_components']} components")
+    print(f"  agreement on {report['held_out']} held-out questions: {rate(report['agreement'])} "
+          f"(in-domain {rate(report['agreement_in_domain'])}, "
+          f"out-of-domain {rate(report['agreement_out_of_domain'])}), "
+          f"decision value correlation {report['decision_correlation']:.4f}")
+    print(f"  {'batch':>5} {'ocsvm ms':>10} {'distilled ms':>13} {'speedup':>8}")
+    for batch_size, latency in report["latency_ms"].items():
+        print(f"  {batch_size:>5} {latency['ocsvm']:10.3f} {latency['distilled']:13.3f} "
+              f"{latency['ocsvm'] / latency['distilled']:7.1f}x")
+
+
+def load_questions(path: Path) -> List[str]:
+    """Questions from a .jsonl file (a "question" field per line) or a text file (one per line)."""
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    if path.suffix == ".jsonl":
+        return [json.loads(line)["question"] for line in lines]
+    return lines
+
+
+def main():
+    import joblib
+    from core.ai_model.query_intent_recognizer import MODEL_PATH, QueryIntentRecognizer
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=Path, required=True, help=".jsonl (with a question field) or .txt file")
+    parser.add_argument("--output", type=Path, required=True, help="Path of the distilled .npz")
+    parser.add_argument("--ocsvm", default=MODEL_PATH)
+    parser.add_argument("--method", choices=METHODS, default="nystroem")
+    parser.add_argument("--components", type=int, default=256)
+    parser.add_argument("--held-out", type=float, default=0.2, help="Fraction of questions kept for evaluation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    svm = joblib.load(args.ocsvm)
+    questions = load_questions(args.questions)
+    recognizer = QueryIntentRecognizer()
+    recognizer.load_embedder()
+    embeddings = recognizer.embed_batch(questions)
+
+    order = np.random.default_rng(args.seed).permutation(len(questions))
+    split = int(len(order) * (1.0 - args.held_out))
+    classifier = distill_ocsvm(svm, embeddings[order[:split]], method=args.method, n_components=args.components,
+                               random_state=args.seed)
+    classifier.save(str(args.output))
+    print_report(evaluate(svm, classifier, embeddings[order[split:]]))
+    print(f"Saved {args.method} classifier to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+from core.ai_model.schema_linking import column_name, name_words, parse_ddl
+from core.cache.cache_keys import hash_ddl
+from core.cache.lru_cache import LRUCache
+
+# Phrases that ask for data: aggregates, filters, orderings and listing verbs
+_DATA_PATTERN = re.compile(
+    r"\b(how many|how much|number of|total|average|avg|sum|count|maximum|minimum|highest|lowest|largest|"
+    r"smallest|most|least|top \d+|list|show|display|find|give me|sorted|order by|group by|per|each|"
+    r"greater than|less than|more than|fewer than|at least|at most|between|before|after|records|rows)\b"
+)
+# Small talk and requests the text-to-SQL model cannot serve. Greetings and closings only count at the
+# start of the question (and closings only in short messages): "bye" and "story" are common WikiSQL values.
+# None of the 24,299 WikiSQL dev and test questions matches.
+_CHITCHAT_PATTERN = re.compile(
+    r"^(hi|hello|hey|greetings|good (morning|afternoon|evening))\b"
+    r"|^(thanks|thank you|thx|bye|goodbye|see you|lol|ok|okay|cool|nice)\b[\w\s!.,']{0,15}$"
+    r"|\b(how are you|who are you|what are you|what can you do|are you (a|an) (bot|robot|ai|human)|tell me a joke|"
+    r"what's the weather|what is the weather|weather (today|tomorrow|like)|write (me )?a (poem|story|song|essay)|"
+    r"sing (me )?a song)\b"
+)
+
+
+class SchemaWords(NamedTuple):
+    tables: List[FrozenSet[str]]   # words of each table name
+    columns: List[FrozenSet[str]]  # words of each column name
+
+
+class IntentFastPath:
+    """
+    Cheap lexical pre-classifier in front of the MiniLM + OCSVM intent model.
+    A question scores one point per data phrase (at most two), two points per
+    table or column of the supplied DDL it names (at most two matches), and
+    minus three if it is small talk. Scores at or above `accept_score` are
+    database questions, at or below `reject_score` they are not; everything in
+    between (and every request without a DDL) is left to the embedding model.
+
+    In shadow mode the decision is only compared with the model's, which still
+    answers, so thresholds can be validated on live traffic.
+    """
+    def __init__(self, accept_score: int = 3, reject_score: int = -3, shadow_mode: bool = False,
+                 max_schemas: int = 1024):
+        self.accept_score = accept_score
+        self.reject_score = reject_score
+        self.shadow_mode = shadow_mode
+        self._schemas = LRUCache(max_entries=max_schemas)
+        self._lock = threading.Lock()
+
+        # Stats
+        self.requests = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.fell_through = 0
+        self.no_ddl = 0
+        self.decide_seconds = 0.0
+        self.shadow_compared = 0
+        self.shadow_agreed = 0
+        self.shadow_false_accepts = 0
+        self.shadow_false_rejects = 0
+
+    def _schema_words(self, ddl_context: str) -> SchemaWords:
+        key = hash_ddl(ddl_context)
+        schema = self._schemas.get(key)
+        if schema is None:
+            tables = parse_ddl(ddl_context)
+            schema = SchemaWords(
+                tables=[frozenset(name_words(table.name)) for table in tables if name_words(table.name)],
+                columns=[frozenset(words) for table in tables for words in
+                         (name_words(column_name(definition)) for definition in table.columns) if words]
+            )
+            self._schemas.put(key, schema)
+        return schema
+
+    def score(self, question: str, ddl_context: str) -> Tuple[int, int, int, bool]:
+        """(score, data phrases, schema matches, small talk) of the question."""
+        text = question.lower()
+        question_words = set(name_words(question))
+        schema = self._schema_words(ddl_context)
+        matches = sum(words <= question_words for words in schema.tables + schema.columns)
+        phrases = len(_DATA_PATTERN.findall(text))
+        chitchat = _CHITCHAT_PATTERN.search(text) is not None
+        return min(phrases, 2) + 2 * min(matches, 2) - 3 * chitchat, phrases, matches, chitchat
+
+    def decide(self, question: str, ddl_context: Optional[str]) -> Optional[bool]:
+        """True / False for a confident decision, None to ask the embedding model."""
+        started = time.perf_counter()
+        decision = None
+        if ddl_context:
+            score = self.score(question, ddl_context)[0]
+            if score >= self.accept_score:
+                decision = True
+            elif score <= self.reject_score:
+                decision = False
+
+        with self._lock:
+            self.requests += 1
+            self.decide_seconds += time.perf_counter() - started
+            if not ddl_context:
+                self.no_ddl += 1
+            if decision is None:
+                self.fell_through += 1
+            elif decision:
+                self.accepted += 1
+            else:
+                self.rejected += 1
+        return decision
+
+    def record_shadow(self, question: str, decision: bool, model_decision: bool):
+        """Compares a fast-path decision with the embedding model's (shadow mode)."""
+        with self._lock:
+            self.shadow_compared += 1
+            if decision == model_decision:
+                self.shadow_agreed += 1
+            elif decision:
+                self.shadow_false_accepts += 1
+            else:
+                self.shadow_false_rejects += 1
+        if decision != model_decision:
+            print(f"Intent fast path disagrees with the model (fast path {decision}, model {model_decision}): {question!r}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            decided = self.accepted + self.rejected
+            return {
+                "shadow_mode": self.shadow_mode,
+                "requests": self.requests,
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "fell_through": self.fell_through,
+                "no_ddl": self.no_ddl,
+                "fired_rate": (decided / self.requests) if self.requests else 0.0,
+                "avg_decide_us": (self.decide_seconds * 1e6 / self.requests) if self.requests else 0.0,
+                "shadow_compared": self.shadow_compared,
+                "shadow_agreement": (self.shadow_agreed / self.shadow_compared) if self.shadow_compared else None,
+                "shadow_false_accepts": self.shadow_false_accepts,
+                "shadow_false_rejects": self.shadow_false_rejects,
+            }
@@ -0,0 +1,174 @@
+import ctypes
+import gc
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+
+def process_rss_bytes() -> int:
+    """Resident set size of this process (Linux), 0 where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def release_freed_memory():
+    """Collects the unloaded model's objects and returns freed heap pages to the OS (glibc)."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class MemoryManager:
+    """
+    Unloads models that are not in use: after `idle_ttl_seconds` without a
+    request, and least recently used first whenever the process RSS exceeds
+    `budget_bytes` (0 disables either). Each model's resident memory is the RSS
+    growth over its last load, which also lets a load make room beforehand.
+    Unloaded models load again on their next request.
+    """
+    def __init__(self, handles: Sequence, idle_ttl_seconds: float = 0.0, budget_bytes: int = 0,
+                 check_interval_seconds: float = 30.0, max_events: int = 100):
+        self.handles = list(handles)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.budget_bytes = budget_bytes
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        self._rss_before_load: Dict[str, int] = {}
+        self._events = deque(maxlen=max_events)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        for handle in self.handles:
+            handle.memory_manager = self
+
+        # Stats
+        self.loads = 0
+        self.idle_unloads = 0
+        self.budget_unloads = 0
+        self.over_budget = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.idle_ttl_seconds > 0 or self.budget_bytes > 0
+
+    def start(self):
+        """Checks the idle TTL and the budget periodically on a background thread (if either is set)."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="memory-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Memory check failed: {e}")
+
+    # --- Hooks called by ModelHandle.ensure_loaded ---
+    def before_load(self, handle):
+        if self.budget_bytes and handle.resident_bytes:
+            # Known from the previous load: make room first
+            self._enforce_budget(exclude=handle, incoming_bytes=handle.resident_bytes)
+        with self._lock:
+            self._rss_before_load[handle.name] = process_rss_bytes()
+
+    def after_load(self, handle, seconds: float):
+        rss = process_rss_bytes()
+        with self._lock:
+            handle.resident_bytes = max(rss - self._rss_before_load.pop(handle.name, rss), 0)
+            self.loads += 1
+        self._record(handle, "load", "first use" if handle.loads == 1 else "reload", seconds, rss)
+        if self.budget_bytes:
+            self._enforce_budget(exclude=handle)
+
+    # --- Eviction ---
+    def check(self) -> List[str]:
+        """Unloads idle and over-budget models; returns the names of those unloaded."""
+        unloaded = []
+        if self.idle_ttl_seconds > 0:
+            now = time.monotonic()
+            for handle in self.handles:
+                if handle.idle_seconds(now) >= self.idle_ttl_seconds and self._unload(handle, "idle"):
+                    unloaded.append(handle.name)
+        if self.budget_bytes:
+            unloaded += self._enforce_budget()
+        return unloaded
+
+    def _enforce_budget(self, exclude=None, incoming_bytes: int = 0) -> List[str]:
+        unloaded = []
+        while process_rss_bytes() + incoming_bytes > self.budget_bytes:
+            candidates = sorted(
+                (handle for handle in self.handles if handle is not exclude and handle.evictable),
+                key=lambda handle: handle.last_used
+            )
+            evicted = next((handle for handle in candidates if self._unload(handle, "budget")), None)
+            if evicted is None:
+                with self._lock:
+                    self.over_budget += 1
+                break
+            unloaded.append(evicted.name)
+        return unloaded
+
+    def _unload(self, handle, reason: str) -> bool:
+        started = time.perf_counter()
+        if not handle.unload():
+            return False
+        release_freed_memory()
+        with self._lock:
+            if reason == "idle":
+                self.idle_unloads += 1
+            else:
+                self.budget_unloads += 1
+        self._record(handle, "unload", reason, time.perf_counter() - started, process_rss_bytes())
+        return True
+
+    def _record(self, handle, event: str, reason: str, seconds: float, rss_bytes: int):
+        with self._lock:
+            self._events.append({
+                "model": handle.name,
+                "event": event,
+                "reason": reason,
+                "at": time.time(),
+                "seconds": seconds,
+                "resident_mb": handle.resident_bytes / 2 ** 20,
+                "process_rss_mb": rss_bytes / 2 ** 20,
+            })
+        print(f"Model {handle.name} {event}ed ({reason}) in {seconds:.2f} s, "
+              f"~{handle.resident_bytes / 2 ** 20:.0f} MiB, process RSS {rss_bytes / 2 ** 20:.0f} MiB")
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "budget_mb": self.budget_bytes / 2 ** 20 if self.budget_bytes else None,
+                "process_rss_mb": process_rss_bytes() / 2 ** 20,
+                "loads": self.loads,
+                "idle_unloads": self.idle_unloads,
+                "budget_unloads": self.budget_unloads,
+                # Over budget with nothing left to unload (every model in use or loading)
+                "over_budget": self.over_budget,
+                "models": {
+                    handle.name: {
+                        "state": handle.state,
+                        "resident_mb": handle.resident_bytes / 2 ** 20,
+                        "in_use": handle.in_use,
+                        "idle_seconds": handle.idle_seconds(now),
+                    }
+                    for handle in self.handles
+                },
+                "events": list(self._events),
+            }
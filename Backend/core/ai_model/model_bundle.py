@@ -0,0 +1,166 @@
+"""
+Local bundle of every model artifact the service loads, so startup needs neither
+the Hugging Face hub nor network access:
+
+    <bundle>/
+        manifest.json              format version, sources, file sizes and checksums
+        t5/                        TF weights (model.safetensors), config, tokenizer, generation config
+        minilm/                    sentence-transformers MiniLM (model.safetensors)
+        minilm_onnx/               the same MiniLM exported for ONNX Runtime (no PyTorch needed)
+        intent/ocsvm_model.pkl     intent classifier
+
+The T5 weights are stored as safetensors: loading reads them tensor by tensor from
+a memory-mapped file straight into the model instead of materializing an .h5 copy
+(or a PyTorch state dict to convert) next to it.
+
+Build it once where the hub is reachable, then point TTS_MODEL_BUNDLE_DIR at it:
+
+    python -m core.ai_model.model_bundle --output /models/tts-bundle
+    python -m core.ai_model.model_bundle --verify /models/tts-bundle
+"""
+import argparse
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from core.ai_model.onnx_embedder import EMBEDDER_FILE
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+T5_DIR = "t5"
+MINILM_DIR = "minilm"
+MINILM_ONNX_DIR = "minilm_onnx"
+OCSVM_FILE = "intent/ocsvm_model.pkl"
+T5_WEIGHTS_FILE = "t5/model.safetensors"
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelBundle:
+    """A built bundle. Opening it checks the manifest and that every listed file is present."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        manifest_path = self.path / MANIFEST_FILE
+        if not manifest_path.is_file():
+            raise ValueError(f"'{self.path}' is not a model bundle: {MANIFEST_FILE} is missing.")
+        self.manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Model bundle '{self.path}' has format {self.manifest.get('format_version')}, "
+                             f"expected {FORMAT_VERSION}.")
+        for name, entry in self.manifest["files"].items():
+            file_path = self.path / name
+            if not file_path.is_file() or file_path.stat().st_size != entry["bytes"]:
+                raise ValueError(f"Model bundle '{self.path}' is incomplete: '{name}' is missing or truncated.")
+
+    @property
+    def t5_dir(self) -> Path:
+        return self.path / T5_DIR
+
+    @property
+    def minilm_dir(self) -> Path:
+        return self.path / MINILM_DIR
+
+    @property
+    def ocsvm_path(self) -> Path:
+        return self.path / OCSVM_FILE
+
+    def t5_source(self) -> dict:
+        """TFBackend arguments that load T5 from the bundle."""
+        return {"model_path": str(self.t5_dir), "subfolder": "", "local_files_only": True}
+
+    @property
+    def minilm_onnx_dir(self) -> Path:
+        return self.path / MINILM_ONNX_DIR
+
+    def intent_source(self) -> dict:
+        """QueryIntentRecognizer arguments that load MiniLM and the OCSVM from the bundle."""
+        source = {"embedding_model": str(self.minilm_dir), "svm_model_path": str(self.ocsvm_path), "local_files_only": True}
+        if f"{MINILM_ONNX_DIR}/{EMBEDDER_FILE}" in self.manifest["files"]:
+            source["onnx_embedder_dir"] = str(self.minilm_onnx_dir)
+        return source
+
+    def verify_checksums(self) -> Dict[str, bool]:
+        """Recomputes every file's SHA-256 against the manifest."""
+        return {name: _sha256(self.path / name) == entry["sha256"] for name, entry in self.manifest["files"].items()}
+
+
+def build_bundle(output_dir, t5_source: str, t5_subfolder: Optional[str], minilm_source: str,
+                 ocsvm_path: str) -> ModelBundle:
+    """Downloads (or copies) every artifact into `output_dir` and writes the manifest last."""
+    from transformers import GenerationConfig, T5TokenizerFast, TFT5ForConditionalGeneration
+    from sentence_transformers import SentenceTransformer
+    from core.ai_model.onnx_embedder import export_embedder
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    t5_kwargs = {"subfolder": t5_subfolder} if t5_subfolder else {}
+
+    model = TFT5ForConditionalGeneration.from_pretrained(t5_source, **t5_kwargs)
+    model.save_pretrained(str(output_dir / T5_DIR), safe_serialization=True)
+    # Saves tokenizer.json next to spiece.model, so the fast tokenizer loads without conversion
+    T5TokenizerFast.from_pretrained(t5_source, **t5_kwargs).save_pretrained(str(output_dir / T5_DIR))
+    GenerationConfig.from_pretrained(t5_source, **t5_kwargs).save_pretrained(str(output_dir / T5_DIR))
+
+    embedder = SentenceTransformer(minilm_source)
+    embedder.save(str(output_dir / MINILM_DIR), safe_serialization=True)
+    export_embedder(embedder, output_dir / MINILM_ONNX_DIR)
+
+    (output_dir / OCSVM_FILE).parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(ocsvm_path, output_dir / OCSVM_FILE)
+
+    if not (output_dir / T5_WEIGHTS_FILE).is_file():
+        raise ValueError(f"T5 weights were not written as safetensors to '{output_dir / T5_WEIGHTS_FILE}'.")
+    files = sorted(path for path in output_dir.rglob("*") if path.is_file() and path.name != MANIFEST_FILE)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sources": {
+            "t5": f"{t5_source}/{t5_subfolder}" if t5_subfolder else t5_source,
+            "minilm": minilm_source,
+            "ocsvm": str(ocsvm_path),
+        },
+        "files": {
+            path.relative_to(output_dir).as_posix(): {"bytes": path.stat().st_size, "sha256": _sha256(path)}
+            for path in files
+        },
+    }
+    (output_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return ModelBundle(output_dir)
+
+
+def main():
+    from core.ai_model.inference_backend import REMOTE_MODEL_PATH, T5_SUBFOLDER
+    from core.ai_model.query_intent_recognizer import EMBEDDING_MODEL_NAME, MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Build or verify an offline model bundle.")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--output", type=Path, help="Directory to build the bundle in")
+    action.add_argument("--verify", type=Path, help="Bundle directory whose checksums to verify")
+    parser.add_argument("--t5", default=REMOTE_MODEL_PATH, help="Hub id or local directory of the T5 model")
+    parser.add_argument("--t5-subfolder", default=T5_SUBFOLDER)
+    parser.add_argument("--minilm", default=EMBEDDING_MODEL_NAME, help="Hub id or local directory of MiniLM")
+    parser.add_argument("--ocsvm", default=MODEL_PATH, help="Path of the intent classifier pickle")
+    args = parser.parse_args()
+
+    if args.verify:
+        results = ModelBundle(args.verify).verify_checksums()
+        for name, ok in results.items():
+            print(f"{'ok' if ok else 'MISMATCH':<8} {name}")
+        raise SystemExit(0 if all(results.values()) else 1)
+
+    bundle = build_bundle(args.output, args.t5, args.t5_subfolder, args.minilm, args.ocsvm)
+    total = sum(entry["bytes"] for entry in bundle.manifest["files"].values())
+    print(f"Wrote {len(bundle.manifest['files'])} files ({total / 2 ** 20:.1f} MiB) to {bundle.path}")
+
+
+if __name__ == "__main__":
+    main()
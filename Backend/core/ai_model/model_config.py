@@ -0,0 +1,148 @@
+# Runtime configuration for the AI models.
+# Every value can be overridden through an environment variable of the same name.
+import os
+from pathlib import Path
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# --- Micro-batching scheduler (TextToSQLSystem.generate_sql) ---
+BATCHING_ENABLED = _env_bool("TTS_BATCHING_ENABLED", True)
+BATCH_MAX_SIZE = int(os.getenv("TTS_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("TTS_BATCH_MAX_WAIT_MS", "10"))
+
+# --- Request deadlines: a request stops, down to its decode, when its client disconnects or its
+# timeout (X-Request-Timeout header or timeout_seconds field) passes ---
+# Timeout of requests that do not send one, in seconds; 0 for none
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("TTS_REQUEST_TIMEOUT_SECONDS", "0"))
+# How often the API checks its HTTP client, and the model server and its workers their connections
+DISCONNECT_CHECK_INTERVAL_MS = float(os.getenv("TTS_DISCONNECT_CHECK_INTERVAL_MS", "100"))
+
+# --- Model loading: dummy generations after load trace the graphs before real traffic ---
+WARMUP_GENERATIONS = _env_bool("TTS_WARMUP_GENERATIONS", True)
+# Directory written by `python -m core.ai_model.model_bundle`; empty loads T5 and MiniLM from the hub
+MODEL_BUNDLE_DIR = os.getenv("TTS_MODEL_BUNDLE_DIR", "")
+
+# --- Memory management: T5 and the intent model load independently, on first use, and are unloaded
+# when idle or when the process is over its memory budget (least recently used first) ---
+# Load every model at startup; off, each model loads on its first request
+PRELOAD_MODELS = _env_bool("TTS_PRELOAD_MODELS", True)
+# Seconds without a request before a model is unloaded; 0 keeps models loaded
+MODEL_IDLE_TTL_SECONDS = float(os.getenv("TTS_MODEL_IDLE_TTL_SECONDS", "0"))
+# Process RSS budget in MiB; 0 for no budget
+MEMORY_BUDGET_MB = float(os.getenv("TTS_MEMORY_BUDGET_MB", "0"))
+MEMORY_CHECK_INTERVAL_SECONDS = float(os.getenv("TTS_MEMORY_CHECK_INTERVAL_SECONDS", "30"))
+
+# --- Model server: with a socket path, API workers send generate and intent calls to
+# `python -m core.ai_model.model_server` instead of loading their own models ---
+MODEL_SERVER_SOCKET = os.getenv("TTS_MODEL_SERVER_SOCKET", "")
+# Idle connections each worker keeps open to the model server
+MODEL_SERVER_POOL_SIZE = int(os.getenv("TTS_MODEL_SERVER_POOL_SIZE", "8"))
+MODEL_SERVER_TIMEOUT_SECONDS = float(os.getenv("TTS_MODEL_SERVER_TIMEOUT_SECONDS", "120"))
+
+# --- Query intent recognizer ---
+INTENT_EMBEDDING_CACHE_SIZE = int(os.getenv("TTS_INTENT_EMBEDDING_CACHE_SIZE", "4096"))
+# MiniLM runtime: "sentence-transformers" (PyTorch) or "onnx" (ONNX Runtime, no PyTorch in the process)
+INTENT_EMBEDDER_BACKEND = os.getenv("TTS_INTENT_EMBEDDER_BACKEND", "sentence-transformers")
+# Directory written by `python -m core.ai_model.onnx_embedder`
+INTENT_ONNX_EMBEDDER_DIR = os.getenv(
+    "TTS_INTENT_ONNX_EMBEDDER_DIR", str(Path(__file__).resolve().parent / "ai_models" / "minilm_onnx")
+)
+# Distilled linear classifier (.npz from `python -m core.ai_model.intent_distillation`) used instead of
+# ocsvm_model.pkl, also when loading from a model bundle; empty keeps the One-Class SVM
+INTENT_CLASSIFIER_PATH = os.getenv("TTS_INTENT_CLASSIFIER_PATH", "")
+
+# --- Intent fast path: keyword and DDL-overlap score decides obvious questions before the embedding model ---
+INTENT_FAST_PATH_ENABLED = _env_bool("TTS_INTENT_FAST_PATH_ENABLED", True)
+INTENT_FAST_PATH_ACCEPT_SCORE = int(os.getenv("TTS_INTENT_FAST_PATH_ACCEPT_SCORE", "3"))
+INTENT_FAST_PATH_REJECT_SCORE = int(os.getenv("TTS_INTENT_FAST_PATH_REJECT_SCORE", "-3"))
+# Shadow mode (the default) only logs the fast path's agreement with the model, which keeps deciding;
+# turn it off to let the fast path decide once the agreement stats justify it
+INTENT_FAST_PATH_SHADOW = _env_bool("TTS_INTENT_FAST_PATH_SHADOW", True)
+
+# --- Speculative generation: T5 starts while the intent model decides, rejected results are discarded ---
+SPECULATIVE_INTENT_ENABLED = _env_bool("TTS_SPECULATIVE_INTENT_ENABLED", False)
+# Threads running speculative generations when the batching scheduler is off
+SPECULATIVE_INTENT_WORKERS = int(os.getenv("TTS_SPECULATIVE_INTENT_WORKERS", "4"))
+
+# --- Generation result cache (QueryService) ---
+RESULT_CACHE_ENABLED = _env_bool("TTS_RESULT_CACHE_ENABLED", True)
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("TTS_RESULT_CACHE_MAX_ENTRIES", "10000"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("TTS_RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("TTS_RESULT_CACHE_TTL_SECONDS", "3600"))
+
+# --- Semantic near-duplicate cache (QueryService), opt-in ---
+SEMANTIC_CACHE_ENABLED = _env_bool("TTS_SEMANTIC_CACHE_ENABLED", False)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("TTS_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES_PER_PARTITION = int(os.getenv("TTS_SEMANTIC_CACHE_MAX_ENTRIES_PER_PARTITION", "512"))
+SEMANTIC_CACHE_MAX_PARTITIONS = int(os.getenv("TTS_SEMANTIC_CACHE_MAX_PARTITIONS", "1024"))
+SEMANTIC_CACHE_MAX_BYTES = int(os.getenv("TTS_SEMANTIC_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# --- Literal-masked template cache (QueryService), opt-in ---
+TEMPLATE_CACHE_ENABLED = _env_bool("TTS_TEMPLATE_CACHE_ENABLED", False)
+TEMPLATE_CACHE_MAX_ENTRIES = int(os.getenv("TTS_TEMPLATE_CACHE_MAX_ENTRIES", "10000"))
+TEMPLATE_CACHE_VERIFY_RATE = float(os.getenv("TTS_TEMPLATE_CACHE_VERIFY_RATE", "0.02"))
+
+# --- Single-flight coalescing of identical in-flight requests (QueryService) ---
+COALESCING_ENABLED = _env_bool("TTS_COALESCING_ENABLED", True)
+
+# --- Inference backend for the T5 model: "tf" (TensorFlow), "tf-xla" (compiled TensorFlow) or "onnx" (ONNX Runtime) ---
+INFERENCE_BACKEND = os.getenv("TTS_INFERENCE_BACKEND", "tf")
+ONNX_MODEL_DIR = os.getenv("TTS_ONNX_MODEL_DIR", str(Path(__file__).resolve().parent / "ai_models" / "t5_onnx"))
+ONNX_QUANTIZED = _env_bool("TTS_ONNX_QUANTIZED", True)
+ONNX_INTRA_OP_THREADS = int(os.getenv("TTS_ONNX_INTRA_OP_THREADS", "0"))
+
+# --- Model replicas: copies of the T5 backend, each batching and decoding on its own thread ---
+MODEL_REPLICAS = int(os.getenv("TTS_MODEL_REPLICAS", "1"))
+# Intra/inter-op threads (0: the runtime's default). Per replica for ONNX Runtime; TensorFlow's
+# thread pools are process-wide, so for "tf" they are the total shared by all replicas
+INTRA_OP_THREADS = int(os.getenv("TTS_INTRA_OP_THREADS", "0"))
+INTER_OP_THREADS = int(os.getenv("TTS_INTER_OP_THREADS", "0"))
+# "" (no pinning), "auto" (equal shares of the available cores) or one core list per replica: "0-7;8-15"
+REPLICA_CORE_AFFINITY = os.getenv("TTS_REPLICA_CORE_AFFINITY", "")
+
+# --- XLA-compiled generation ("tf-xla" backend): inputs are padded to these shapes ---
+XLA_LENGTH_BUCKETS = tuple(int(size) for size in os.getenv("TTS_XLA_LENGTH_BUCKETS", "32,64,128").split(","))
+XLA_BATCH_BUCKETS = tuple(int(size) for size in os.getenv("TTS_XLA_BATCH_BUCKETS", "1,2,4,8").split(","))
+XLA_PRECOMPILE = _env_bool("TTS_XLA_PRECOMPILE", True)
+
+# --- Generation control: SQL-aware stop and per-request decode budget (step-by-step backends, greedy configs) ---
+GENERATION_CONTROL_ENABLED = _env_bool("TTS_GENERATION_CONTROL_ENABLED", True)
+STOP_ON_COMPLETE_STATEMENT = _env_bool("TTS_STOP_ON_COMPLETE_STATEMENT", True)
+DECODE_BUDGET_BASE = int(os.getenv("TTS_DECODE_BUDGET_BASE", "32"))
+DECODE_BUDGET_PER_COLUMN = int(os.getenv("TTS_DECODE_BUDGET_PER_COLUMN", "4"))
+DECODE_BUDGET_PER_QUESTION_WORD = int(os.getenv("TTS_DECODE_BUDGET_PER_QUESTION_WORD", "3"))
+DECODE_BUDGET_MIN = int(os.getenv("TTS_DECODE_BUDGET_MIN", "48"))
+DECODE_BUDGET_MAX = int(os.getenv("TTS_DECODE_BUDGET_MAX", "511"))
+
+# --- Prompt-lookup speculative decoding (generation control), same output as greedy ---
+PROMPT_LOOKUP_ENABLED = _env_bool("TTS_PROMPT_LOOKUP_ENABLED", False)
+PROMPT_LOOKUP_NGRAM_SIZE = int(os.getenv("TTS_PROMPT_LOOKUP_NGRAM_SIZE", "3"))
+PROMPT_LOOKUP_NUM_TOKENS = int(os.getenv("TTS_PROMPT_LOOKUP_NUM_TOKENS", "10"))
+
+# --- Schema linking: wide DDL is compacted to the question's top-k columns when the T5 input would be truncated ---
+SCHEMA_LINKING_ENABLED = _env_bool("TTS_SCHEMA_LINKING_ENABLED", True)
+SCHEMA_LINKING_TOP_K = int(os.getenv("TTS_SCHEMA_LINKING_TOP_K", "16"))
+# Weight of the column-name word overlap; the rest goes to the MiniLM similarity
+SCHEMA_LINKING_LEXICAL_WEIGHT = float(os.getenv("TTS_SCHEMA_LINKING_LEXICAL_WEIGHT", "0.5"))
+
+# --- Table routing: requests without ddl_context get the operator's best-matching stored table(s) ---
+TABLE_ROUTING_ENABLED = _env_bool("TTS_TABLE_ROUTING_ENABLED", True)
+TABLE_ROUTING_TOP_K = int(os.getenv("TTS_TABLE_ROUTING_TOP_K", "1"))
+TABLE_ROUTING_MIN_SIMILARITY = float(os.getenv("TTS_TABLE_ROUTING_MIN_SIMILARITY", "0.2"))
+
+# --- Static vocabulary pruning of the T5 output layer ("tf" backend), same output as the full head ---
+# Path of the .npz written by `python -m core.ai_model.vocab_pruning`; empty disables pruning
+VOCAB_PRUNING_PATH = os.getenv("TTS_VOCAB_PRUNING_PATH", "")
+
+# --- T5 tokenization: Rust-backed fast tokenizer and cached token ids of each distinct DDL ---
+# Off by default: the fast tokenizer breaks exact Viterbi-score ties (e.g. "2888" -> "2 8 88" vs "2 88 8")
+# differently from SentencePiece, so a few inputs get other ids than the model was trained on.
+FAST_TOKENIZER = _env_bool("TTS_FAST_TOKENIZER", False)
+TOKENIZATION_CACHE_ENABLED = _env_bool("TTS_TOKENIZATION_CACHE_ENABLED", True)
+TOKENIZATION_CACHE_MAX_ENTRIES = int(os.getenv("TTS_TOKENIZATION_CACHE_MAX_ENTRIES", "1024"))
@@ -0,0 +1,238 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelHandle:
+    """
+    One lazily loaded model. The first caller loads (and warms) it while
+    concurrent callers wait for that load instead of starting their own; a
+    failed load is recorded and retried by the next caller.
+
+    Requests hold the model with use() (or acquire()/release()), so unload(),
+    called by the MemoryManager, only releases a model nobody is using; the
+    next use() loads it again. `is_loaded` also counts the model as loaded when
+    it was set up without ensure_loaded().
+    """
+    def __init__(self, name: str, load: Callable[[], None], warmup: Optional[Callable[[], None]] = None,
+                 unload: Optional[Callable[[], None]] = None, is_loaded: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self._load = load
+        self._warmup = warmup
+        self._unload = unload
+        self._is_loaded = is_loaded
+        self._lock = threading.Lock()
+        self.state = NOT_LOADED
+        self.error: Optional[str] = None
+        self.loads = 0
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        # Seconds per artifact of the last load (weights, tokenizer, ...), filled by timed()
+        self.artifact_seconds: Dict[str, float] = {}
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.unloads = 0
+        # RSS growth over the last load, measured by the MemoryManager
+        self.resident_bytes = 0
+        self.memory_manager = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    @property
+    def loaded(self) -> bool:
+        return self.state == READY or (self._is_loaded is not None and self._is_loaded())
+
+    @property
+    def evictable(self) -> bool:
+        return self._unload is not None and self.state == READY and self.in_use == 0
+
+    def idle_seconds(self, now: Optional[float] = None) -> float:
+        """Seconds since the last request released the model (0 while in use or not loaded)"""
+        if self.state != READY or self.in_use:
+            return 0.0
+        return (now if now is not None else time.monotonic()) - self.last_used
+
+    def ensure_loaded(self):
+        if self.state == READY:
+            return
+        with self._lock:
+            if self.state == READY:
+                # Loaded by the caller we waited for
+                return
+            try:
+                self.state = LOADING
+                self.error = None
+                self.artifact_seconds = {}
+                if self.memory_manager is not None:
+                    self.memory_manager.before_load(self)
+                started = time.perf_counter()
+                self._load()
+                self.loads += 1
+                self.load_seconds = time.perf_counter() - started
+                if self._warmup is not None:
+                    self.state = WARMING
+                    started = time.perf_counter()
+                    self._warmup()
+                    self.warmup_seconds = time.perf_counter() - started
+                self.ready_at = time.time()
+                self.last_used = time.monotonic()
+                self.state = READY
+            except Exception as e:
+                self.state = FAILED
+                self.error = f"{type(e).__name__}: {e}"
+                raise
+        if self.memory_manager is not None:
+            self.memory_manager.after_load(self, (self.load_seconds or 0.0) + (self.warmup_seconds or 0.0))
+
+    def acquire(self):
+        """Loads the model if needed and keeps it loaded until release()."""
+        while True:
+            if not self.loaded:
+                self.ensure_loaded()
+            with self._lock:
+                # Unloaded again between the load and here: load once more
+                if self.loaded:
+                    self.in_use += 1
+                    self.last_used = time.monotonic()
+                    return
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+            self.last_used = time.monotonic()
+
+    @contextmanager
+    def use(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def unload(self) -> bool:
+        """Releases the model if it is loaded and not in use; False if it was kept."""
+        if self._unload is None or not self._lock.acquire(blocking=False):
+            # Being loaded (or checked out) right now
+            return False
+        try:
+            if self.state != READY or self.in_use:
+                return False
+            self._unload()
+            self.state = NOT_LOADED
+            self.unloads += 1
+            self.ready_at = None
+            return True
+        finally:
+            self._lock.release()
+
+    @contextmanager
+    def timed(self, artifact: str):
+        """Records how long loading one artifact of this model takes."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.artifact_seconds[artifact] = time.perf_counter() - started
+
+    def get_status(self) -> dict:
+        return {
+            "state": self.state,
+            "loads": self.loads,
+            "load_seconds": self.load_seconds,
+            "artifact_seconds": dict(self.artifact_seconds),
+            "warmup_seconds": self.warmup_seconds,
+            "ready_at": self.ready_at,
+            "error": self.error,
+            "in_use": self.in_use,
+            "unloads": self.unloads,
+        }
+
+
+class ModelRegistry:
+    """
+    The process-wide TextToSQLSystem and its models. main.py, api.py and the
+    routers all use this one instance, so the startup load and warmup serve real
+    traffic and a model is never loaded twice. Without `preload` nothing loads
+    at startup: each model loads on its first request.
+    """
+    def __init__(self, tts_system, preload: bool = True):
+        self.tts_system = tts_system
+        self.preload = preload
+        self.models: Dict[str, ModelHandle] = {
+            handle.name: handle for handle in (tts_system.intent_model, tts_system.generator_model)
+        }
+        self._start_lock = threading.Lock()
+        self._loader_thread: Optional[threading.Thread] = None
+
+    def load_all(self):
+        """Loads and warms every model (no-op for the ones already ready)."""
+        for handle in self.models.values():
+            handle.ensure_loaded()
+
+    def start(self) -> Optional[threading.Thread]:
+        """Loads the models on a background thread so the server can answer probes meanwhile."""
+        if not self.preload:
+            return None
+        with self._start_lock:
+            if self._loader_thread is None:
+                self._loader_thread = threading.Thread(target=self._load_in_background, name="model-loader", daemon=True)
+                self._loader_thread.start()
+            return self._loader_thread
+
+    def _load_in_background(self):
+        try:
+            self.load_all()
+        except Exception as e:
+            # The failure is kept on the model handle and reported by readiness()
+            print(f"Model loading failed: {e}")
+
+    @property
+    def ready(self) -> bool:
+        # Models unloaded when idle (or never preloaded) load again on demand
+        return all(
+            handle.ready or (handle.state == NOT_LOADED and (handle.unloads > 0 or not self.preload))
+            for handle in self.models.values()
+        )
+
+    def readiness(self) -> dict:
+        return {
+            "ready": self.ready,
+            "models": {name: handle.get_status() for name, handle in self.models.items()},
+        }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    The shared registry, created with its TextToSQLSystem on first use. With
+    TTS_MODEL_SERVER_SOCKET set, the system is a client of the model server.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from core.ai_model import model_config
+            if model_config.MODEL_SERVER_SOCKET:
+                from core.ai_model.remote_text_to_sql_system import RemoteModelRegistry, RemoteTextToSQLSystem
+                _registry = RemoteModelRegistry(RemoteTextToSQLSystem(
+                    model_config.MODEL_SERVER_SOCKET,
+                    pool_size=model_config.MODEL_SERVER_POOL_SIZE,
+                    timeout_seconds=model_config.MODEL_SERVER_TIMEOUT_SECONDS,
+                    cancel_check_seconds=model_config.DISCONNECT_CHECK_INTERVAL_MS / 1000.0
+                ))
+            else:
+                from core.ai_model.text_to_sql_system import TextToSQLSystem
+                _registry = ModelRegistry(TextToSQLSystem(), preload=model_config.PRELOAD_MODELS)
+        return _registry
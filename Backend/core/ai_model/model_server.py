@@ -0,0 +1,359 @@
+"""
+Model server: one process owns the TextToSQLSystem (T5, MiniLM, the intent
+classifier) and serves generate and intent calls to the API workers over a Unix
+domain socket, so N uvicorn workers share one copy of the models, one cold start
+and one batching scheduler.
+
+    python -m core.ai_model.model_server --socket /run/tts/model.sock
+    TTS_MODEL_SERVER_SOCKET=/run/tts/model.sock uvicorn main:app --workers 4
+
+Wire format: every message is a 5-byte header (kind: uint8, payload length:
+uint32, big-endian) followed by the payload, a sequence of tagged values. A
+request's kind is its operation, a response's kind is OK or ERROR. Each
+connection carries one request at a time; clients open several for concurrency.
+While a generate call runs, its client may send a CANCEL message on the same
+connection (or close it) to stop the decode; the call still gets its response.
+"""
+import argparse
+import json
+import os
+import select
+import socket
+import socketserver
+import stat
+import struct
+import threading
+import time
+from collections import Counter
+from typing import Any, List, Optional, Tuple
+import numpy as np
+from core.ai_model.cancellation import CLIENT_DISCONNECTED, CancellationToken, RequestCancelledError
+
+# Operations
+GENERATE_SQL = 1
+PREDICT_INTENT = 2
+EMBED_QUESTIONS = 3
+MODEL_VERSION = 4
+STATS = 5
+READINESS = 6
+# Sent during a GENERATE_SQL call, with the reason; not answered itself
+CANCEL = 7
+OPERATION_NAMES = {
+    GENERATE_SQL: "generate_sql", PREDICT_INTENT: "predict_intent", EMBED_QUESTIONS: "embed_questions",
+    MODEL_VERSION: "model_version", STATS: "stats", READINESS: "readiness", CANCEL: "cancel",
+}
+
+# Response kinds
+OK = 0
+ERROR = 1
+
+_HEADER = struct.Struct("!BI")
+_LENGTH = struct.Struct("!I")
+_SHAPE = struct.Struct("!II")
+_FLOAT = struct.Struct("!d")
+_INT = struct.Struct("!q")
+
+# Value tags
+_NONE, _TRUE, _FALSE, _STR, _ARRAY, _JSON, _LIST, _NUMBER, _INTEGER = (
+    b"N", b"T", b"F", b"S", b"A", b"J", b"L", b"D", b"I"
+)
+
+
+def _json_default(value):
+    # numpy scalars in the stats
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def _pack_value(value: Any, out: List[bytes]):
+    if value is None:
+        out.append(_NONE)
+    elif isinstance(value, (bool, np.bool_)):
+        out.append(_TRUE if value else _FALSE)
+    elif isinstance(value, (int, np.integer)):
+        out += [_INTEGER, _INT.pack(value)]
+    elif isinstance(value, (float, np.floating)):
+        out += [_NUMBER, _FLOAT.pack(value)]
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out += [_STR, _LENGTH.pack(len(data)), data]
+    elif isinstance(value, np.ndarray):
+        matrix = np.ascontiguousarray(value, dtype=np.float32)
+        if matrix.ndim != 2:
+            raise TypeError(f"Only 2-D arrays are sent to or from the model server, got shape {matrix.shape}")
+        out += [_ARRAY, _SHAPE.pack(*matrix.shape), matrix.tobytes()]
+    elif isinstance(value, (list, tuple)):
+        out += [_LIST, _LENGTH.pack(len(value))]
+        for item in value:
+            _pack_value(item, out)
+    elif isinstance(value, dict):
+        data = json.dumps(value, default=_json_default).encode("utf-8")
+        out += [_JSON, _LENGTH.pack(len(data)), data]
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} for the model server")
+
+
+def _unpack_value(payload: memoryview, offset: int) -> Tuple[Any, int]:
+    tag = bytes(payload[offset:offset + 1])
+    offset += 1
+    if tag == _NONE:
+        return None, offset
+    if tag in (_TRUE, _FALSE):
+        return tag == _TRUE, offset
+    if tag == _INTEGER:
+        (integer,) = _INT.unpack_from(payload, offset)
+        return integer, offset + _INT.size
+    if tag == _NUMBER:
+        (number,) = _FLOAT.unpack_from(payload, offset)
+        return number, offset + _FLOAT.size
+    if tag in (_STR, _JSON):
+        (length,) = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        text = bytes(payload[offset:offset + length]).decode("utf-8")
+        return (text if tag == _STR else json.loads(text)), offset + length
+    if tag == _ARRAY:
+        rows, columns = _SHAPE.unpack_from(payload, offset)
+        offset += _SHAPE.size
+        size = rows * columns * 4
+        matrix = np.frombuffer(payload[offset:offset + size], dtype=np.float32).reshape(rows, columns).copy()
+        return matrix, offset + size
+    if tag == _LIST:
+        (count,) = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        items = []
+        for _ in range(count):
+            item, offset = _unpack_value(payload, offset)
+            items.append(item)
+        return items, offset
+    raise ValueError(f"Unknown value tag {tag!r} in model server message")
+
+
+def encode_message(kind: int, *values) -> bytes:
+    out: List[bytes] = []
+    for value in values:
+        _pack_value(value, out)
+    payload = b"".join(out)
+    return _HEADER.pack(kind, len(payload)) + payload
+
+
+def decode_payload(payload: bytes) -> list:
+    view, offset, values = memoryview(payload), 0, []
+    while offset < len(view):
+        value, offset = _unpack_value(view, offset)
+        values.append(value)
+    return values
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view, received = memoryview(buffer), 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Model server connection closed")
+        received += count
+    return bytes(buffer)
+
+
+def read_message(sock: socket.socket) -> Tuple[int, list]:
+    """(kind, values) of the next message on the socket"""
+    kind, length = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return kind, decode_payload(_recv_exactly(sock, length))
+
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        self.server.model_server.serve_connection(self.request)
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # Connects beyond the listen backlog fail with EAGAIN on Unix sockets: every worker opens a burst at once
+    request_queue_size = 1024
+
+
+class ModelServer:
+    """
+    Serves one process's TextToSQLSystem on a Unix socket, a thread per client
+    connection. Concurrent generate calls from all the workers meet in the
+    system's batching scheduler, so they share decodes as in-process callers do.
+
+    A generate call runs with a CancellationToken holding the deadline its
+    client sent. The connection is watched meanwhile: a CANCEL message or the
+    client closing the connection cancels the token, which stops the decode.
+    """
+    def __init__(self, registry, socket_path: str, cancel_check_seconds: float = 0.1):
+        self.registry = registry
+        self.tts_system = registry.tts_system
+        self.socket_path = socket_path
+        self.cancel_check_seconds = cancel_check_seconds
+        self._server = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._open_connections = set()
+
+        # Stats
+        self.connections = 0
+        self.requests = Counter()
+        self.errors = 0
+        self.cancelled = 0
+        self.service_seconds = 0.0
+
+    def _handle(self, operation: int, args: list, sock: socket.socket):
+        if operation == GENERATE_SQL:
+            return self._generate_sql(sock, *args)
+        if operation == PREDICT_INTENT:
+            question, ddl_context = args
+            return bool(self.tts_system.predict_intent(question, ddl_context))
+        if operation == EMBED_QUESTIONS:
+            (questions,) = args
+            return np.asarray(self.tts_system.embed_questions(questions), dtype=np.float32)
+        if operation == MODEL_VERSION:
+            return self.tts_system.model_version
+        if operation == STATS:
+            return {**self.tts_system.get_stats(), "model_server": self.get_stats()}
+        if operation == READINESS:
+            return self.registry.readiness()
+        raise ValueError(f"Unknown model server operation {operation}")
+
+    def _generate_sql(self, sock: socket.socket, question, need_predict_intent, ddl_context,
+                      timeout_seconds: Optional[float] = None):
+        cancellation = CancellationToken(timeout_seconds)
+        done = threading.Event()
+        watcher = threading.Thread(target=self._watch_connection, args=(sock, cancellation, done),
+                                   name="model-server-cancel", daemon=True)
+        watcher.start()
+        try:
+            return self.tts_system.generate_sql(question, need_predict_intent, ddl_context, cancellation=cancellation)
+        finally:
+            # Joined before the response goes out: the watcher never reads the client's next request
+            done.set()
+            watcher.join()
+
+    def _watch_connection(self, sock: socket.socket, cancellation: CancellationToken, done: threading.Event):
+        """Cancels a running generate call when its client sends CANCEL or closes the connection."""
+        while not done.is_set():
+            readable, _, _ = select.select([sock], [], [], self.cancel_check_seconds)
+            if not readable:
+                continue
+            try:
+                if not sock.recv(1, socket.MSG_PEEK):
+                    cancellation.cancel(CLIENT_DISCONNECTED)
+                    return
+                operation, args = read_message(sock)
+            except (ConnectionError, OSError):
+                cancellation.cancel(CLIENT_DISCONNECTED)
+                return
+            if operation == CANCEL:
+                cancellation.cancel(args[0] if args else CLIENT_DISCONNECTED)
+                return
+
+    def serve_connection(self, sock: socket.socket):
+        with self._lock:
+            self.connections += 1
+            self._open_connections.add(sock)
+        try:
+            self._serve_requests(sock)
+        finally:
+            with self._lock:
+                self._open_connections.discard(sock)
+
+    def _serve_requests(self, sock: socket.socket):
+        while True:
+            try:
+                operation, args = read_message(sock)
+            except (ConnectionError, OSError):
+                return
+            if operation == CANCEL:
+                # Sent just as its call was answered: nothing left to stop
+                continue
+            started = time.perf_counter()
+            cancelled = False
+            try:
+                response = encode_message(OK, self._handle(operation, args, sock))
+                failed = False
+            except RequestCancelledError as e:
+                # The reason travels along so the worker raises the same error
+                response = encode_message(ERROR, type(e).__name__, str(e), e.reason)
+                failed, cancelled = False, True
+            except Exception as e:
+                response = encode_message(ERROR, type(e).__name__, str(e))
+                failed = True
+            with self._lock:
+                self.requests[OPERATION_NAMES.get(operation, str(operation))] += 1
+                if failed:
+                    self.errors += 1
+                if cancelled:
+                    self.cancelled += 1
+                self.service_seconds += time.perf_counter() - started
+            try:
+                sock.sendall(response)
+            except OSError:
+                # The worker went away while its request ran
+                return
+
+    def start(self) -> threading.Thread:
+        """Binds the socket and serves on a background thread."""
+        if os.path.exists(self.socket_path) and stat.S_ISSOCK(os.stat(self.socket_path).st_mode):
+            # Left behind by a server that did not shut down cleanly
+            os.unlink(self.socket_path)
+        self._server = _UnixServer(self.socket_path, _ConnectionHandler)
+        self._server.model_server = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="model-server", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            # Workers see their pooled connections close and reconnect to the next server
+            with self._lock:
+                connections = list(self._open_connections)
+            for sock in connections:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total = sum(self.requests.values())
+            return {
+                "socket": self.socket_path,
+                "connections": self.connections,
+                "requests": dict(self.requests),
+                "errors": self.errors,
+                "cancelled": self.cancelled,
+                "avg_service_ms": (self.service_seconds * 1000.0 / total) if total else 0.0,
+            }
+
+
+def main():
+    from core.ai_model import model_config
+    from core.ai_model.model_registry import ModelRegistry
+    from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=model_config.MODEL_SERVER_SOCKET or "/tmp/tts-model.sock")
+    args = parser.parse_args()
+
+    # Clients connect right away; /ready on the workers reports the load progress
+    registry = ModelRegistry(TextToSQLSystem())
+    server = ModelServer(registry, args.socket, cancel_check_seconds=model_config.DISCONNECT_CHECK_INTERVAL_MS / 1000.0)
+    thread = server.start()
+    print(f"Model server listening on {args.socket}")
+    registry.start()
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+MiniLM sentence embeddings on ONNX Runtime, so the intent recognizer does not
+need PyTorch (the T5 model already runs on TensorFlow or ONNX Runtime).
+
+The export wraps the sentence-transformers pipeline - transformer, mean pooling
+over the attention mask and (for all-MiniLM-L6-v2) L2 normalization - into one
+graph that returns the sentence embedding. The embeddings match
+SentenceTransformer.encode within float32 rounding, so the fitted OCSVM keeps
+working unchanged. Exporting needs PyTorch; running the exported directory only
+needs onnxruntime and tokenizers.
+
+    python -m core.ai_model.onnx_embedder --output core/ai_model/ai_models/minilm_onnx
+"""
+import argparse
+import json
+import shutil
+from pathlib import Path
+from typing import List
+import numpy as np
+
+EMBEDDER_FILE = "embedder_model.onnx"
+EMBEDDER_CONFIG_FILE = "embedder_config.json"
+TOKENIZER_FILE = "tokenizer.json"
+OPSET_VERSION = 17
+
+
+def _build_wrapper(sentence_transformer):
+    import torch
+    from sentence_transformers import models
+
+    transformer, pooling, *rest = list(sentence_transformer)
+    if not isinstance(transformer, models.Transformer) or not isinstance(pooling, models.Pooling):
+        raise ValueError("Expected a sentence-transformers model of a Transformer followed by Pooling.")
+    if pooling.get_pooling_mode_str() != "mean":
+        raise ValueError(f"Only mean pooling is supported, got '{pooling.get_pooling_mode_str()}'.")
+    if any(not isinstance(module, models.Normalize) for module in rest):
+        raise ValueError("Only a Normalize module may follow the pooling.")
+    normalize = bool(rest)
+
+    class EmbedderWrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = transformer.auto_model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            hidden_states = self.model(input_ids=input_ids, attention_mask=attention_mask,
+                                       token_type_ids=token_type_ids, return_dict=True).last_hidden_state
+            # Same arithmetic as sentence_transformers.models.Pooling (mean) and Normalize
+            mask = attention_mask.unsqueeze(-1).to(hidden_states.dtype)
+            embeddings = (hidden_states * mask).sum(1) / torch.clamp(mask.sum(1), min=1e-9)
+            if normalize:
+                embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+            return embeddings
+
+    return EmbedderWrapper().eval(), transformer
+
+
+def export_embedder(sentence_transformer, output_dir: Path):
+    """Exports a SentenceTransformer (Transformer, mean Pooling, optional Normalize) to output_dir."""
+    import torch
+
+    wrapper, transformer = _build_wrapper(sentence_transformer)
+    tokenizer = transformer.tokenizer
+    if not tokenizer.is_fast:
+        raise ValueError("The embedder's tokenizer must be a fast tokenizer (it is saved as tokenizer.json).")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    batch, length = 2, 7
+    input_ids = torch.ones((batch, length), dtype=torch.int64)
+    attention_mask = torch.ones((batch, length), dtype=torch.int64)
+    token_type_ids = torch.zeros((batch, length), dtype=torch.int64)
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper, (input_ids, attention_mask, token_type_ids), str(output_dir / EMBEDDER_FILE),
+            input_names=["input_ids", "attention_mask", "token_type_ids"], output_names=["sentence_embedding"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "tokens"}, "attention_mask": {0: "batch", 1: "tokens"},
+                          "token_type_ids": {0: "batch", 1: "tokens"}, "sentence_embedding": {0: "batch"}},
+            opset_version=OPSET_VERSION, dynamo=False,
+        )
+
+    tokenizer.backend_tokenizer.save(str(output_dir / TOKENIZER_FILE))
+    config = {
+        "max_seq_length": transformer.max_seq_length,
+        "pad_token_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+        "embedding_dimension": sentence_transformer.get_sentence_embedding_dimension(),
+    }
+    (output_dir / EMBEDDER_CONFIG_FILE).write_text(json.dumps(config, indent=2), encoding="utf-8")
+
+
+class ONNXEmbedder:
+    """
+    Drop-in for SentenceTransformer.encode on a directory written by export_embedder.
+    Inputs are sorted by length and batched like sentence-transformers does, so
+    batches carry little padding.
+    """
+    def __init__(self, model_dir: str, intra_op_threads: int = 0, batch_size: int = 32):
+        self.model_dir = Path(model_dir)
+        self.intra_op_threads = intra_op_threads
+        self.batch_size = batch_size
+        self._session = None
+        self._tokenizer = None
+        self._input_names = None
+        self._dimension = None
+
+    def load(self):
+        if self._session is not None:
+            return
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        config = json.loads((self.model_dir / EMBEDDER_CONFIG_FILE).read_text(encoding="utf-8"))
+        tokenizer = Tokenizer.from_file(str(self.model_dir / TOKENIZER_FILE))
+        tokenizer.enable_truncation(max_length=config["max_seq_length"])
+        tokenizer.enable_padding(pad_id=config["pad_token_id"], pad_token=config["pad_token"])
+        self._tokenizer = tokenizer
+        self._dimension = config["embedding_dimension"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.intra_op_threads:
+            options.intra_op_num_threads = self.intra_op_threads
+        session = ort.InferenceSession(str(self.model_dir / EMBEDDER_FILE), options, providers=["CPUExecutionProvider"])
+        self._input_names = {graph_input.name for graph_input in session.get_inputs()}
+        # Assigned last: load() returns early only once everything is ready
+        self._session = session
+
+    def encode(self, sentences: List[str], convert_to_numpy: bool = True, batch_size: int = None) -> np.ndarray:
+        self.load()
+        batch_size = batch_size or self.batch_size
+        order = sorted(range(len(sentences)), key=lambda index: -len(sentences[index]))
+        embeddings = [None] * len(sentences)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            encodings = self._tokenizer.encode_batch([sentences[index] for index in indices])
+            feed = {
+                "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+                "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+                "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64),
+            }
+            # The exporter drops inputs the graph does not use (e.g. token_type_ids of some models)
+            batch = self._session.run(None, {name: value for name, value in feed.items() if name in self._input_names})[0]
+            for index, embedding in zip(indices, batch):
+                embeddings[index] = embedding
+        return np.vstack(embeddings) if embeddings else np.zeros((0, self._dimension), dtype=np.float32)
+
+
+def main():
+    from core.ai_model.query_intent_recognizer import EMBEDDING_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True, help="Directory to write the ONNX embedder to.")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME, help="Hub id or local sentence-transformers directory")
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(args.output)
+    if output_dir.exists() and any(output_dir.iterdir()):
+        if not args.overwrite:
+            parser.error(f"{output_dir} is not empty (use --overwrite).")
+        shutil.rmtree(output_dir)
+    export_embedder(SentenceTransformer(args.model), output_dir)
+    print(f"Exported ONNX embedder to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
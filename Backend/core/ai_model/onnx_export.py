@@ -0,0 +1,209 @@
+"""
+Exports the T5 text-to-SQL checkpoint to ONNX Runtime graphs for ONNXBackend.
+
+Three graphs are written, mirroring a KV-cached greedy decode:
+  encoder_model.onnx            input_ids, attention_mask -> last_hidden_state
+  decoder_model.onnx            first decoder step, returns logits and the full KV cache
+  decoder_with_past_model.onnx  later steps, reuses the cache and returns the new self-attention cache
+
+With quantization enabled (default) each graph is also written as *_int8.onnx
+using dynamic int8 weight quantization. The tokenizer and generation config are
+saved next to the graphs so the backend can load the directory offline.
+
+    python -m core.ai_model.onnx_export --output core/ai_model/ai_models/t5_onnx
+"""
+import argparse
+import shutil
+from pathlib import Path
+
+ENCODER_FILE = "encoder_model.onnx"
+DECODER_FILE = "decoder_model.onnx"
+DECODER_WITH_PAST_FILE = "decoder_with_past_model.onnx"
+QUANTIZED_SUFFIX = "_int8"
+OPSET_VERSION = 17
+
+
+def quantized_name(file_name: str) -> str:
+    return file_name.replace(".onnx", f"{QUANTIZED_SUFFIX}.onnx")
+
+
+def past_input_names(num_layers: int):
+    names = []
+    for layer in range(num_layers):
+        names += [f"past_key_values.{layer}.decoder.key", f"past_key_values.{layer}.decoder.value",
+                  f"past_key_values.{layer}.encoder.key", f"past_key_values.{layer}.encoder.value"]
+    return names
+
+
+def present_output_names(num_layers: int, include_cross_attention: bool):
+    names = []
+    for layer in range(num_layers):
+        names += [f"present.{layer}.decoder.key", f"present.{layer}.decoder.value"]
+        if include_cross_attention:
+            names += [f"present.{layer}.encoder.key", f"present.{layer}.encoder.value"]
+    return names
+
+
+def _build_wrappers(model):
+    import torch
+
+    # Tied embeddings are rescaled before the LM head (see T5ForConditionalGeneration.forward)
+    scale = model.model_dim ** -0.5 if model.config.tie_word_embeddings else 1.0
+
+    class EncoderWrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.encoder = model.get_encoder()
+
+        def forward(self, input_ids, attention_mask):
+            return self.encoder(input_ids=input_ids, attention_mask=attention_mask, return_dict=True).last_hidden_state
+
+    class DecoderWrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.decoder = model.get_decoder()
+            self.lm_head = model.lm_head
+
+        def forward(self, decoder_input_ids, encoder_hidden_states, encoder_attention_mask):
+            outputs = self.decoder(
+                input_ids=decoder_input_ids,
+                encoder_hidden_states=encoder_hidden_states,
+                encoder_attention_mask=encoder_attention_mask,
+                use_cache=True,
+                return_dict=True,
+            )
+            logits = self.lm_head(outputs.last_hidden_state * scale)
+            return (logits,) + tuple(tensor for layer in outputs.past_key_values for tensor in layer)
+
+    class DecoderWithPastWrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.decoder = model.get_decoder()
+            self.lm_head = model.lm_head
+
+        def forward(self, decoder_input_ids, encoder_hidden_states, encoder_attention_mask, *past):
+            past_key_values = tuple(tuple(past[i:i + 4]) for i in range(0, len(past), 4))
+            outputs = self.decoder(
+                input_ids=decoder_input_ids,
+                encoder_hidden_states=encoder_hidden_states,
+                encoder_attention_mask=encoder_attention_mask,
+                past_key_values=past_key_values,
+                use_cache=True,
+                return_dict=True,
+            )
+            logits = self.lm_head(outputs.last_hidden_state * scale)
+            # Cross-attention cache never changes after the first step: only return the self-attention part
+            return (logits,) + tuple(tensor for layer in outputs.past_key_values for tensor in layer[:2])
+
+    return EncoderWrapper().eval(), DecoderWrapper().eval(), DecoderWithPastWrapper().eval()
+
+
+def export_model(model, output_dir: Path, quantize: bool = True):
+    """Exports a PyTorch T5ForConditionalGeneration to the three ONNX graphs in output_dir."""
+    import torch
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    num_layers = model.config.num_decoder_layers
+    encoder, decoder, decoder_with_past = _build_wrappers(model)
+
+    batch, source_len = 2, 7
+    input_ids = torch.ones((batch, source_len), dtype=torch.int64)
+    attention_mask = torch.ones((batch, source_len), dtype=torch.int64)
+    decoder_input_ids = torch.zeros((batch, 1), dtype=torch.int64)
+
+    with torch.no_grad():
+        encoder_hidden = encoder(input_ids, attention_mask)
+        first_step = decoder(decoder_input_ids, encoder_hidden, attention_mask)
+
+        torch.onnx.export(
+            encoder, (input_ids, attention_mask), str(output_dir / ENCODER_FILE),
+            input_names=["input_ids", "attention_mask"], output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "source"}, "attention_mask": {0: "batch", 1: "source"},
+                          "last_hidden_state": {0: "batch", 1: "source"}},
+            opset_version=OPSET_VERSION, dynamo=False,
+        )
+
+        present_names = present_output_names(num_layers, include_cross_attention=True)
+        torch.onnx.export(
+            decoder, (decoder_input_ids, encoder_hidden, attention_mask), str(output_dir / DECODER_FILE),
+            input_names=["decoder_input_ids", "encoder_hidden_states", "encoder_attention_mask"],
+            output_names=["logits"] + present_names,
+            dynamic_axes={
+                "decoder_input_ids": {0: "batch", 1: "target"},
+                "encoder_hidden_states": {0: "batch", 1: "source"},
+                "encoder_attention_mask": {0: "batch", 1: "source"},
+                "logits": {0: "batch", 1: "target"},
+                **{name: {0: "batch", 2: "source" if ".encoder." in name else "target"} for name in present_names},
+            },
+            opset_version=OPSET_VERSION, dynamo=False,
+        )
+
+        past_names = past_input_names(num_layers)
+        past = first_step[1:]
+        next_token = torch.zeros((batch, 1), dtype=torch.int64)
+        with_past_outputs = present_output_names(num_layers, include_cross_attention=False)
+        torch.onnx.export(
+            decoder_with_past, (next_token, encoder_hidden, attention_mask) + tuple(past),
+            str(output_dir / DECODER_WITH_PAST_FILE),
+            input_names=["decoder_input_ids", "encoder_hidden_states", "encoder_attention_mask"] + past_names,
+            output_names=["logits"] + with_past_outputs,
+            dynamic_axes={
+                "decoder_input_ids": {0: "batch", 1: "new_tokens"},
+                "encoder_hidden_states": {0: "batch", 1: "source"},
+                "encoder_attention_mask": {0: "batch", 1: "source"},
+                "logits": {0: "batch", 1: "new_tokens"},
+                **{name: {0: "batch", 2: "source" if ".encoder." in name else "past"} for name in past_names},
+                **{name: {0: "batch", 2: "total"} for name in with_past_outputs},
+            },
+            opset_version=OPSET_VERSION, dynamo=False,
+        )
+
+    if quantize:
+        quantize_directory(output_dir)
+
+
+def quantize_directory(output_dir: Path):
+    """Writes a dynamically int8-quantized copy of every exported graph."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    for file_name in (ENCODER_FILE, DECODER_FILE, DECODER_WITH_PAST_FILE):
+        quantize_dynamic(
+            str(output_dir / file_name),
+            str(output_dir / quantized_name(file_name)),
+            weight_type=QuantType.QInt8,
+        )
+
+
+def export_checkpoint(output_dir: Path, model_path: str, subfolder: str, quantize: bool = True):
+    """Converts the published (TensorFlow) checkpoint and saves the tokenizer and generation config alongside."""
+    from transformers import GenerationConfig, T5ForConditionalGeneration, T5Tokenizer
+
+    model = T5ForConditionalGeneration.from_pretrained(model_path, subfolder=subfolder, from_tf=True).eval()
+    export_model(model, output_dir, quantize=quantize)
+    T5Tokenizer.from_pretrained(model_path, subfolder=subfolder).save_pretrained(str(output_dir))
+    GenerationConfig.from_pretrained(model_path, subfolder=subfolder).save_pretrained(str(output_dir))
+    model.config.save_pretrained(str(output_dir))
+
+
+def main():
+    from core.ai_model.inference_backend import REMOTE_MODEL_PATH, T5_SUBFOLDER
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True, help="Directory to write the ONNX graphs to.")
+    parser.add_argument("--model-path", default=REMOTE_MODEL_PATH)
+    parser.add_argument("--subfolder", default=T5_SUBFOLDER)
+    parser.add_argument("--no-quantize", action="store_true", help="Only write the fp32 graphs.")
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output)
+    if output_dir.exists() and any(output_dir.iterdir()):
+        if not args.overwrite:
+            parser.error(f"{output_dir} is not empty (use --overwrite).")
+        shutil.rmtree(output_dir)
+    export_checkpoint(output_dir, args.model_path, args.subfolder, quantize=not args.no_quantize)
+    print(f"Exported ONNX model to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
-import joblib
-import pandas as pd
 import numpy as np
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+from typing import List
+from core.ai_model import model_config
+from core.cache.lru_cache import LRUCache
 
 # Path setting
 BASE_DIR = Path(__file__).resolve().parent
@@ -10,20 +10,105 @@ MODEL_PATH = str (BASE_DIR / 'ai_models/ocsvm_model.pkl')
 EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
 
 class QueryIntentRecognizer:
-    def __init__(self):
+    def __init__(self, embedding_cache_size: int = model_config.INTENT_EMBEDDING_CACHE_SIZE,
+                 embedding_model: str = EMBEDDING_MODEL_NAME,
+                 svm_model_path: str = model_config.INTENT_CLASSIFIER_PATH or MODEL_PATH,
+                 local_files_only: bool = False, embedder_backend: str = model_config.INTENT_EMBEDDER_BACKEND,
+                 onnx_embedder_dir: str = model_config.INTENT_ONNX_EMBEDDER_DIR):
+        # Model sources: hub id or local directory for MiniLM, OCSVM pickle or distilled .npz classifier
+        self.embedding_model = embedding_model
+        self.embedder_backend = embedder_backend.lower()
+        self.onnx_embedder_dir = onnx_embedder_dir
+        self.svm_model_path = svm_model_path
+        self.local_files_only = local_files_only
         self.embedder = None
         self.svm_model = None
+        self.embedding_cache = LRUCache(max_entries=embedding_cache_size)
 
     def lazy_load(self):
-        if self.embedder is None:
-            self.embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
-        if self.svm_model is None:
-            self.svm_model = joblib.load(MODEL_PATH)
+        self.load_embedder()
+        self.load_classifier()
 
-    def predict(self, question):
-        
-        embedding = self.embedder.encode([question], convert_to_numpy=True)
-        prediction = self.svm_model.predict(embedding)[0]
-        return prediction
+    def is_loaded(self) -> bool:
+        return self.embedder is not None and self.svm_model is not None
+
+    def unload(self):
+        """Drops MiniLM and the classifier; the embedding cache stays valid for the next load."""
+        self.embedder = None
+        self.svm_model = None
+
+    def load_embedder(self):
+        if self.embedder is not None:
+            return
+        if self.embedder_backend == "onnx":
+            # Same embeddings as sentence-transformers (within float32 rounding) without PyTorch
+            from core.ai_model.onnx_embedder import ONNXEmbedder
+            embedder = ONNXEmbedder(self.onnx_embedder_dir, intra_op_threads=model_config.ONNX_INTRA_OP_THREADS)
+            embedder.load()
+            self.embedder = embedder
+        elif self.embedder_backend == "sentence-transformers":
+            # Deferred: sentence-transformers imports PyTorch
+            from sentence_transformers import SentenceTransformer
+            self.embedder = SentenceTransformer(self.embedding_model, local_files_only=self.local_files_only)
+        else:
+            raise ValueError(f"Unknown intent embedder backend '{self.embedder_backend}' "
+                             "(expected 'sentence-transformers' or 'onnx').")
+
+    def load_classifier(self):
+        if self.svm_model is not None:
+            return
+        if str(self.svm_model_path).endswith(".npz"):
+            # Distilled by core.ai_model.intent_distillation: numpy only, no per-support-vector kernel
+            from core.ai_model.intent_distillation import LinearIntentClassifier
+            self.svm_model = LinearIntentClassifier.load(self.svm_model_path)
+        else:
+            import joblib
+            self.svm_model = joblib.load(self.svm_model_path)
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Cache key for a question: case and whitespace do not change the (uncased) MiniLM embedding."""
+        return " ".join(question.strip().lower().split())
 
+    def embed_batch(self, questions: List[str]) -> np.ndarray:
+        """
+        Returns one embedding row per question. Cached questions are served from
+        the LRU cache, the remaining distinct ones are encoded in a single call.
+        """
+        keys = [self.normalize_question(question) for question in questions]
+        embeddings = [None] * len(keys)
+        missing = {}
+
+        for position, key in enumerate(keys):
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                embeddings[position] = cached
+            else:
+                missing.setdefault(key, []).append(position)
+
+        if missing:
+            texts = list(missing)
+            encoded = self.embedder.encode(texts, convert_to_numpy=True)
+            for text, embedding in zip(texts, encoded):
+                embedding.setflags(write=False)
+                self.embedding_cache.put(text, embedding)
+                for position in missing[text]:
+                    embeddings[position] = embedding
+
+        return np.vstack(embeddings)
+
+    def predict_batch(self, questions: List[str]) -> np.ndarray:
+        """Classifies a whole list of questions with one vectorized SVM call."""
+        if not questions:
+            return np.array([], dtype=np.int64)
+        return self.svm_model.predict(self.embed_batch(questions))
+
+    def predict(self, question):
+        return self.predict_batch([question])[0]
 
+    def get_stats(self) -> dict:
+        return {
+            "embedder_backend": self.embedder_backend,
+            "classifier": type(self.svm_model).__name__ if self.svm_model is not None else None,
+            "embedding_cache": self.embedding_cache.get_stats(),
+        }
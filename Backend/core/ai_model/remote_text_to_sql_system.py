@@ -0,0 +1,210 @@
+import select
+import socket
+import threading
+import time
+from typing import List, Optional
+from core.ai_model.cancellation import CancellationToken, RequestCancelledError
+from core.ai_model.model_server import (
+    CANCEL, EMBED_QUESTIONS, ERROR, GENERATE_SQL, MODEL_VERSION, PREDICT_INTENT, READINESS, STATS, encode_message,
+    read_message
+)
+
+
+class RemoteModelError(RuntimeError):
+    """An exception raised by the model server while it handled the call."""
+    def __init__(self, remote_type: str, message: str, reason: Optional[str] = None):
+        super().__init__(f"{remote_type}: {message}")
+        self.remote_type = remote_type
+        # Why the call was cancelled, for RequestCancelledError
+        self.reason = reason
+
+
+class RemoteTextToSQLSystem:
+    """
+    Stand-in for TextToSQLSystem in API workers when the models run in a model
+    server (core.ai_model.model_server). The worker imports no ML package and
+    loads nothing; every call is one round trip on a pooled Unix socket
+    connection, one connection per concurrent call.
+
+    A generate call sends its request's remaining time to the server, which
+    stops the decode at that deadline. While waiting for the answer the worker
+    checks the request's cancellation token every `cancel_check_seconds` and
+    sends CANCEL once it is cancelled (e.g. the HTTP client disconnected).
+    """
+    def __init__(self, socket_path: str, pool_size: int = 8, timeout_seconds: Optional[float] = 120.0,
+                 cancel_check_seconds: float = 0.1):
+        self.socket_path = socket_path
+        self.pool_size = pool_size
+        self.timeout_seconds = timeout_seconds
+        self.cancel_check_seconds = cancel_check_seconds
+        self._idle: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._model_version: Optional[str] = None
+
+        # Stats
+        self.calls = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.cancels_sent = 0
+        self.round_trips = 0
+        self.round_trip_seconds = 0.0
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout_seconds)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _acquire(self):
+        """(connection, whether it was reused from the pool)"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def _release(self, sock: socket.socket):
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(sock)
+                return
+        sock.close()
+
+    def _read_response(self, sock: socket.socket, cancellation: Optional[CancellationToken]):
+        """The call's response; sends CANCEL first if `cancellation` is cancelled while waiting."""
+        if cancellation is None:
+            return read_message(sock)
+        waited_from = time.monotonic()
+        while True:
+            readable, _, _ = select.select([sock], [], [], self.cancel_check_seconds)
+            if readable:
+                return read_message(sock)
+            if cancellation.cancelled:
+                sock.sendall(encode_message(CANCEL, cancellation.reason))
+                with self._lock:
+                    self.cancels_sent += 1
+                # The server stops within a decoder step and answers the call
+                return read_message(sock)
+            if self.timeout_seconds is not None and time.monotonic() - waited_from > self.timeout_seconds:
+                raise socket.timeout("Model server did not answer in time")
+
+    def _call(self, operation: int, *args, cancellation: Optional[CancellationToken] = None):
+        request = encode_message(operation, *args)
+        started = time.perf_counter()
+        sock, reused = self._acquire()
+        try:
+            try:
+                sock.sendall(request)
+                kind, values = self._read_response(sock, cancellation)
+            except (ConnectionError, BrokenPipeError):
+                if not reused:
+                    raise
+                # A pooled connection from before a model server restart: retry once on a new one
+                sock.close()
+                sock = self._connect()
+                with self._lock:
+                    self.reconnects += 1
+                sock.sendall(request)
+                kind, values = self._read_response(sock, cancellation)
+        except BaseException:
+            sock.close()
+            with self._lock:
+                self.calls += 1
+                self.errors += 1
+            raise
+        self._release(sock)
+        with self._lock:
+            self.calls += 1
+            self.round_trips += 1
+            self.round_trip_seconds += time.perf_counter() - started
+            if kind == ERROR:
+                self.errors += 1
+        if kind == ERROR:
+            raise RemoteModelError(*values)
+        return values[0]
+
+    @property
+    def model_version(self) -> str:
+        if self._model_version is None:
+            self._model_version = self._call(MODEL_VERSION)
+        return self._model_version
+
+    def generate_sql(self, question, needPredictIntent, ddl_context, on_text=None, cancellation=None):
+        # The server answers whole: streaming callers get the SQL in their final event
+        timeout_seconds = None
+        if cancellation is not None:
+            cancellation.raise_if_cancelled()
+            timeout_seconds = cancellation.remaining_seconds()
+        try:
+            sql = self._call(GENERATE_SQL, question, bool(needPredictIntent), ddl_context, timeout_seconds,
+                             cancellation=cancellation)
+        except RemoteModelError as e:
+            if e.remote_type == RequestCancelledError.__name__:
+                raise RequestCancelledError(e.reason) from e
+            raise
+        if cancellation is not None:
+            # Cancelled as the answer arrived, like a decode that finished on its last step
+            cancellation.raise_if_cancelled()
+        return sql
+
+    def predict_intent(self, question, ddl_context=None):
+        return self._call(PREDICT_INTENT, question, ddl_context)
+
+    def embed_questions(self, questions):
+        return self._call(EMBED_QUESTIONS, list(questions))
+
+    def readiness(self) -> dict:
+        return self._call(READINESS)
+
+    def get_client_stats(self) -> dict:
+        with self._lock:
+            return {
+                "socket": self.socket_path,
+                "calls": self.calls,
+                "errors": self.errors,
+                "reconnects": self.reconnects,
+                "cancels_sent": self.cancels_sent,
+                "pooled_connections": len(self._idle),
+                "avg_round_trip_ms": (self.round_trip_seconds * 1000.0 / self.round_trips) if self.round_trips else 0.0,
+            }
+
+    def get_stats(self) -> dict:
+        """The model server's inference stats, with this worker's client stats"""
+        return {**self._call(STATS), "model_client": self.get_client_stats()}
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for sock in idle:
+            sock.close()
+
+
+class RemoteModelRegistry:
+    """
+    ModelRegistry of an API worker whose models live in the model server: there
+    is nothing to load here, and readiness is the server's.
+    """
+    def __init__(self, tts_system: RemoteTextToSQLSystem):
+        self.tts_system = tts_system
+        self.models = {}
+
+    def load_all(self):
+        pass
+
+    def start(self):
+        """The model server loads the models; workers start without waiting for it."""
+        return None
+
+    @property
+    def ready(self) -> bool:
+        return self.readiness()["ready"]
+
+    def readiness(self) -> dict:
+        try:
+            return self.tts_system.readiness()
+        except OSError as e:
+            return {"ready": False, "models": {},
+                    "error": f"Model server at {self.tts_system.socket_path} unavailable: {type(e).__name__}: {e}"}
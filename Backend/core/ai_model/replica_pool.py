@@ -0,0 +1,174 @@
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, FrozenSet, List, Optional, Sequence
+from core.ai_model.inference_backend import InferenceBackend
+from core.ai_model.inference_scheduler import InferenceScheduler
+
+
+def parse_core_sets(spec: str, replicas: int) -> List[Optional[FrozenSet[int]]]:
+    """
+    Cores of each replica from TTS_REPLICA_CORE_AFFINITY: "" leaves every replica
+    unpinned, "auto" splits the cores this process may use into contiguous equal
+    shares, and "0-7;8-15" lists one comma-separated core list or range per replica.
+    """
+    spec = spec.strip().lower()
+    if not spec:
+        return [None] * replicas
+    if spec == "auto":
+        cores = sorted(os.sched_getaffinity(0))
+        if len(cores) < replicas:
+            raise ValueError(f"Cannot pin {replicas} replicas to {len(cores)} cores.")
+        share = len(cores) // replicas
+        return [frozenset(cores[i * share:(i + 1) * share]) for i in range(replicas)]
+
+    core_sets = []
+    for replica_spec in spec.split(";"):
+        cores = set()
+        for part in replica_spec.split(","):
+            first, _, last = part.strip().partition("-")
+            cores.update(range(int(first), int(last or first) + 1))
+        core_sets.append(frozenset(cores))
+    if len(core_sets) != replicas:
+        raise ValueError(f"TTS_REPLICA_CORE_AFFINITY lists {len(core_sets)} core sets for {replicas} replicas.")
+    return core_sets
+
+
+def pin_current_thread(cores: Optional[FrozenSet[int]]):
+    """Restricts the calling thread (and the threads it starts later) to `cores`."""
+    if cores is None:
+        return
+    try:
+        # pid 0 is the calling thread on Linux
+        os.sched_setaffinity(0, cores)
+    except (AttributeError, OSError) as e:
+        print(f"Could not pin inference thread to cores {sorted(cores)}: {e}")
+
+
+def run_pinned(cores: Optional[FrozenSet[int]], fn: Callable[[], Any]) -> Any:
+    """Runs fn on a new thread pinned to `cores`, so the thread pools it creates inherit the affinity."""
+    if cores is None:
+        return fn()
+    outcome = {}
+
+    def target():
+        pin_current_thread(cores)
+        try:
+            outcome["result"] = fn()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, name="pinned-loader")
+    thread.start()
+    thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+
+class ModelReplica:
+    """One copy of the inference backend with its own scheduler thread."""
+    def __init__(self, index: int, backend: InferenceBackend, scheduler: InferenceScheduler,
+                 cores: Optional[FrozenSet[int]]):
+        self.index = index
+        self.backend = backend
+        self.scheduler = scheduler
+        self.cores = cores
+        self.in_flight = 0
+        self.requests = 0
+
+
+class ReplicaPool:
+    """
+    N replicas of the T5 backend behind one submit()/run() interface (the
+    InferenceScheduler's). Each replica batches and decodes on its own thread,
+    optionally pinned to its own cores, and every request goes to the replica
+    with the fewest requests queued or running.
+    """
+    def __init__(self, backends: Sequence[InferenceBackend], run_batch: Callable[[List[Any], InferenceBackend], List[Any]],
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0,
+                 core_sets: Optional[Sequence[Optional[FrozenSet[int]]]] = None, name: str = "t5"):
+        if not backends:
+            raise ValueError("A replica pool needs at least one backend.")
+        core_sets = list(core_sets) if core_sets is not None else [None] * len(backends)
+        if len(core_sets) != len(backends):
+            raise ValueError(f"{len(core_sets)} core sets for {len(backends)} replicas.")
+        self.name = name
+        self._lock = threading.Lock()
+        self.replicas = [
+            ModelReplica(index, backend, InferenceScheduler(
+                lambda items, backend=backend: run_batch(items, backend),
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                name=f"{name}-replica-{index}",
+                worker_init=lambda cores=cores: pin_current_thread(cores)
+            ), cores)
+            for index, (backend, cores) in enumerate(zip(backends, core_sets))
+        ]
+
+    @property
+    def backends(self) -> List[InferenceBackend]:
+        return [replica.backend for replica in self.replicas]
+
+    def load(self):
+        """Loads every replica's backend, each on a thread pinned to the replica's cores."""
+        for replica in self.replicas:
+            run_pinned(replica.cores, replica.backend.load)
+
+    def unload(self):
+        for replica in self.replicas:
+            replica.backend.unload()
+
+    def warmup(self, generation_config):
+        for replica in self.replicas:
+            run_pinned(replica.cores, lambda: replica.backend.warmup(generation_config))
+
+    def _least_loaded(self) -> ModelReplica:
+        with self._lock:
+            replica = min(self.replicas, key=lambda candidate: candidate.in_flight)
+            replica.in_flight += 1
+            replica.requests += 1
+            return replica
+
+    def _finished(self, replica: ModelReplica):
+        with self._lock:
+            replica.in_flight -= 1
+
+    def submit(self, item: Any) -> Future:
+        replica = self._least_loaded()
+        try:
+            future = replica.scheduler.submit(item)
+        except Exception:
+            self._finished(replica)
+            raise
+        future.add_done_callback(lambda _: self._finished(replica))
+        return future
+
+    def run(self, item: Any) -> Any:
+        return self.submit(item).result()
+
+    def queue_depth(self) -> int:
+        return sum(replica.scheduler.queue_depth() for replica in self.replicas)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            routing = [(replica.in_flight, replica.requests) for replica in self.replicas]
+        return {
+            "name": self.name,
+            "replicas": [
+                {
+                    "index": replica.index,
+                    "cores": sorted(replica.cores) if replica.cores is not None else None,
+                    "in_flight": in_flight,
+                    "requests": requests,
+                    "scheduler": replica.scheduler.get_stats(),
+                    "backend": replica.backend.get_stats(),
+                }
+                for replica, (in_flight, requests) in zip(self.replicas, routing)
+            ],
+            "requests": sum(requests for _, requests in routing),
+        }
+
+    def shutdown(self):
+        for replica in self.replicas:
+            replica.scheduler.shutdown()
@@ -0,0 +1,243 @@
+import re
+import threading
+from typing import Callable, List, NamedTuple, Optional, Sequence
+import numpy as np
+
+_CREATE_TABLE_PATTERN = re.compile(r"CREATE\s+(?:TEMPORARY\s+)?TABLE\b[^(]*\(", re.IGNORECASE)
+_CONSTRAINT_PATTERN = re.compile(
+    r"^(PRIMARY\s+KEY|FOREIGN\s+KEY|UNIQUE|KEY|INDEX|FULLTEXT|SPATIAL|CONSTRAINT|CHECK)\b", re.IGNORECASE
+)
+_CAMEL_CASE_PATTERN = re.compile(r"([a-z])([A-Z])")
+_WORD_PATTERN = re.compile(r"[a-z]+|\d+")
+
+
+def build_question_prefix(question: str) -> str:
+    """The part of the T5 input before the schema."""
+    return f"Question: {question} |"
+
+
+def build_model_input(question: str, ddl_context: Optional[str]) -> str:
+    """The T5 input text for a question and its schema."""
+    return f"{build_question_prefix(question)} {ddl_context}"
+
+
+class TableSchema(NamedTuple):
+    header: str               # "CREATE TABLE users", as written
+    name: str                 # table name without quotes
+    columns: List[str]        # column definitions, in order
+    constraints: List[str]    # PRIMARY KEY, FOREIGN KEY, ... definitions
+
+
+def _split_top_level(body: str) -> List[str]:
+    parts, depth, start = [], 0, 0
+    for position, character in enumerate(body):
+        if character == "(":
+            depth += 1
+        elif character == ")":
+            depth -= 1
+        elif character == "," and depth == 0:
+            parts.append(body[start:position])
+            start = position + 1
+    parts.append(body[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_ddl(ddl_context: Optional[str]) -> List[TableSchema]:
+    """Every CREATE TABLE of the DDL with its column and constraint definitions."""
+    tables = []
+    ddl_context = ddl_context or ""
+    for match in _CREATE_TABLE_PATTERN.finditer(ddl_context):
+        depth, start = 1, match.end()
+        for position in range(start, len(ddl_context)):
+            if ddl_context[position] == "(":
+                depth += 1
+            elif ddl_context[position] == ")":
+                depth -= 1
+                if depth == 0:
+                    definitions = _split_top_level(ddl_context[start:position])
+                    header = ddl_context[match.start():match.end() - 1].strip()
+                    tables.append(TableSchema(
+                        header=header,
+                        name=header.split()[-1].strip("`\"[]") if len(header.split()) > 2 else "",
+                        columns=[d for d in definitions if not _CONSTRAINT_PATTERN.match(d)],
+                        constraints=[d for d in definitions if _CONSTRAINT_PATTERN.match(d)]
+                    ))
+                    break
+    return tables
+
+
+def count_ddl_columns(ddl_context: Optional[str]) -> int:
+    """Number of column definitions across the CREATE TABLE statements (constraints excluded)."""
+    return sum(len(table.columns) for table in parse_ddl(ddl_context))
+
+
+def column_name(definition: str) -> str:
+    return definition.split()[0].strip("`\"[]")
+
+
+def name_words(name: str) -> List[str]:
+    """Lower-case words of an identifier or question: snake_case and camelCase are split, plurals folded."""
+    words = []
+    for word in _WORD_PATTERN.findall(_CAMEL_CASE_PATTERN.sub(r"\1 \2", name).lower()):
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def render_schema(tables: Sequence[TableSchema]) -> str:
+    return "; ".join(f"{table.header} ({', '.join(table.columns)})" for table in tables)
+
+
+class SchemaLinker:
+    """
+    Question-aware compaction of the DDL. When the T5 input would be cut at the
+    encoder's token limit, the columns are scored against the question (word
+    overlap of the column name and MiniLM similarity of "table column") and the
+    schema is rewritten with the top-k columns that fit, in their original
+    order. Table constraints are dropped from a compacted schema; inputs that
+    already fit are passed through unchanged.
+    """
+    def __init__(self, top_k: int = 16, lexical_weight: float = 0.5, max_input_tokens: int = 128):
+        self.top_k = top_k
+        self.lexical_weight = lexical_weight
+        self.max_input_tokens = max_input_tokens
+        self._lock = threading.Lock()
+
+        # Stats
+        self.requests = 0
+        self.truncated_before = 0
+        self.truncated_after = 0
+        self.compacted = 0
+        self.input_tokens_before = 0
+        self.encoder_tokens_before = 0
+        self.encoder_tokens_after = 0
+        self.columns_kept = 0
+        self.columns_dropped = 0
+
+    @staticmethod
+    def _token_counts(tokenizer, texts: List[str]) -> List[int]:
+        return [len(ids) for ids in tokenizer(texts)["input_ids"]]
+
+    def score_columns(self, question: str, tables: Sequence[TableSchema],
+                      embed: Optional[Callable[[List[str]], np.ndarray]]) -> List[np.ndarray]:
+        """Relevance of every column to the question, one array per table."""
+        question_words = set(name_words(question))
+        column_texts, lexical = [], []
+        for table in tables:
+            for definition in table.columns:
+                words = name_words(column_name(definition))
+                lexical.append(sum(word in question_words for word in words) / len(words) if words else 0.0)
+                column_texts.append(" ".join(name_words(table.name) + words))
+        scores = np.asarray(lexical, dtype=np.float32)
+
+        if embed is not None and self.lexical_weight < 1.0 and column_texts:
+            embeddings = np.asarray(embed([question] + column_texts), dtype=np.float32)
+            norms = np.linalg.norm(embeddings, axis=1)
+            similarity = embeddings[1:] @ embeddings[0] / np.maximum(norms[1:] * norms[0], 1e-12)
+            scores = self.lexical_weight * scores + (1.0 - self.lexical_weight) * similarity
+
+        per_table, offset = [], 0
+        for table in tables:
+            per_table.append(scores[offset:offset + len(table.columns)])
+            offset += len(table.columns)
+        return per_table
+
+    def link(self, question: str, ddl_context: Optional[str], tokenizer,
+             embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+             count_tokens: Optional[Callable[[str, Optional[str]], int]] = None) -> Optional[str]:
+        """
+        Returns the schema to put in the T5 input: the DDL itself, or its compaction
+        if it would be truncated. `count_tokens(question, ddl_context)`, if given,
+        measures the input instead of tokenizing it (e.g. from cached DDL ids).
+        """
+        if count_tokens is not None:
+            input_tokens = count_tokens(question, ddl_context)
+        else:
+            input_tokens = self._token_counts(tokenizer, [build_model_input(question, ddl_context)])[0]
+        linked = ddl_context
+        linked_tokens = input_tokens
+        if input_tokens > self.max_input_tokens:
+            tables = parse_ddl(ddl_context)
+            compacted = self._compact(question, tables, tokenizer, embed) if any(t.columns for t in tables) else None
+            if compacted is not None:
+                linked, linked_tokens = compacted
+
+        with self._lock:
+            self.requests += 1
+            self.input_tokens_before += input_tokens
+            self.encoder_tokens_before += min(input_tokens, self.max_input_tokens)
+            self.encoder_tokens_after += min(linked_tokens, self.max_input_tokens)
+            if input_tokens > self.max_input_tokens:
+                self.truncated_before += 1
+            if linked_tokens > self.max_input_tokens:
+                self.truncated_after += 1
+            if linked is not ddl_context:
+                kept = count_ddl_columns(linked)
+                self.compacted += 1
+                self.columns_kept += kept
+                self.columns_dropped += count_ddl_columns(ddl_context) - kept
+        return linked
+
+    def _compact(self, question, tables, tokenizer, embed):
+        """(schema, input tokens) with the best columns that fit, or None if no column fits."""
+        scores = self.score_columns(question, tables, embed)
+        ranked = sorted(
+            ((float(score), table_index, column_index)
+             for table_index, table_scores in enumerate(scores)
+             for column_index, score in enumerate(table_scores)),
+            key=lambda item: (-item[0], item[1], item[2])
+        )
+
+        # Token cost of each column definition and of the schema without any column
+        # (the end-of-sequence token of each count stands in for the separator)
+        costs = self._token_counts(tokenizer, [tables[table_index].columns[column_index]
+                                               for _, table_index, column_index in ranked])
+        empty = [TableSchema(table.header, table.name, [], []) for table in tables]
+        budget = self.max_input_tokens - self._token_counts(tokenizer, [build_model_input(question, render_schema(empty))])[0]
+
+        selected = []
+        for (_, table_index, column_index), cost in zip(ranked, costs):
+            if len(selected) >= self.top_k:
+                break
+            if cost <= budget:
+                selected.append((table_index, column_index))
+                budget -= cost
+        if not selected:
+            # The question alone fills the budget: compaction cannot help
+            return None
+
+        # The per-column costs are an estimate: drop the weakest columns until the real input fits
+        while True:
+            chosen = set(selected)
+            compacted = [
+                TableSchema(table.header, table.name,
+                            [column for column_index, column in enumerate(table.columns)
+                             if (table_index, column_index) in chosen], [])
+                for table_index, table in enumerate(tables)
+            ]
+            schema = render_schema([table for table in compacted if table.columns])
+            tokens = self._token_counts(tokenizer, [build_model_input(question, schema)])[0]
+            if tokens <= self.max_input_tokens or len(selected) <= 1:
+                return schema, tokens
+            selected.pop()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_input_tokens": self.max_input_tokens,
+                "top_k": self.top_k,
+                "requests": self.requests,
+                "truncated_before": self.truncated_before,
+                "truncated_after": self.truncated_after,
+                "truncation_rate_before": (self.truncated_before / self.requests) if self.requests else 0.0,
+                "truncation_rate_after": (self.truncated_after / self.requests) if self.requests else 0.0,
+                "compacted": self.compacted,
+                "avg_input_tokens": (self.input_tokens_before / self.requests) if self.requests else 0.0,
+                "avg_encoder_tokens_before": (self.encoder_tokens_before / self.requests) if self.requests else 0.0,
+                "avg_encoder_tokens_after": (self.encoder_tokens_after / self.requests) if self.requests else 0.0,
+                "avg_columns_kept": (self.columns_kept / self.compacted) if self.compacted else 0.0,
+                "avg_columns_dropped": (self.columns_dropped / self.compacted) if self.compacted else 0.0,
+            }
@@ -0,0 +1,112 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+from core.ai_model.cancellation import INTENT_REJECTED, CancellationToken
+
+
+class SpeculativeGeneration:
+    """
+    Starts SQL generation before the intent check has passed and runs the check
+    meanwhile, so a request takes about max(intent, generation) instead of their
+    sum. When the check rejects the question, generation that is still queued is
+    cancelled; generation that already started is stopped through its
+    cancellation token, if it has one, or else left to finish, and its result
+    is discarded (counted as wasted work).
+    """
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.requests = 0
+        self.passed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.discarded = 0
+        self.stopped = 0
+        self.intent_seconds = 0.0
+        self.generation_wait_seconds = 0.0
+        self.wasted_generation_seconds = 0.0
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Runs fn on the speculation thread pool (for generation without a batching scheduler)."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="speculative")
+        return self._executor.submit(fn, *args)
+
+    def run(self, start_generation: Callable[[], Future], check_intent: Callable[[], bool],
+            cancellation: Optional[CancellationToken] = None) -> Tuple[bool, Any]:
+        """
+        (True, generation result) if the intent check passes, else (False, None).
+        `cancellation` is the generation's token, cancelled when the check rejects.
+        """
+        submitted = time.perf_counter()
+        future = start_generation()
+        try:
+            passed = check_intent()
+        except Exception:
+            future.cancel()
+            raise
+        checked = time.perf_counter()
+
+        if passed:
+            try:
+                return True, future.result()
+            finally:
+                with self._lock:
+                    self.requests += 1
+                    self.passed += 1
+                    self.intent_seconds += checked - submitted
+                    self.generation_wait_seconds += time.perf_counter() - checked
+
+        cancelled = future.cancel()
+        stopped = not cancelled and cancellation is not None
+        if stopped:
+            # The decode stops within a step instead of running to completion
+            cancellation.cancel(INTENT_REJECTED)
+        with self._lock:
+            self.requests += 1
+            self.rejected += 1
+            self.intent_seconds += checked - submitted
+            if cancelled:
+                self.cancelled += 1
+            else:
+                self.discarded += 1
+            if stopped:
+                self.stopped += 1
+        if not cancelled:
+            future.add_done_callback(lambda _: self._record_waste(time.perf_counter() - submitted))
+        return False, None
+
+    def _record_waste(self, seconds: float):
+        with self._lock:
+            self.wasted_generation_seconds += seconds
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "passed": self.passed,
+                "rejected": self.rejected,
+                # Rejected before generation started: nothing was spent
+                "cancelled": self.cancelled,
+                # Rejected after generation started: the decode ran for nothing
+                "discarded": self.discarded,
+                # Discarded generations cancelled mid-decode rather than run to the end
+                "stopped": self.stopped,
+                "wasted_rate": (self.discarded / self.requests) if self.requests else 0.0,
+                # Wall time from submission to completion of the discarded generations
+                "wasted_generation_ms": self.wasted_generation_seconds * 1000.0,
+                "avg_intent_ms": (self.intent_seconds * 1000.0 / self.requests) if self.requests else 0.0,
+                "avg_generation_wait_ms": (self.generation_wait_seconds * 1000.0 / self.passed) if self.passed else 0.0,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,30 @@
+from typing import Callable, List
+
+
+class SQLTextStreamer:
+    """
+    Turns one request's generated token ids into SQL text fragments while the
+    batch is still decoding. Each put() decodes the tokens so far the same way
+    the final answer is decoded and passes on the new text, so the fragments
+    concatenate to the returned SQL. When decoding a new token rewrites text
+    already sent (tokenizer space clean-up), nothing is sent until it settles.
+    """
+    def __init__(self, tokenizer, on_text: Callable[[str], None]):
+        self.tokenizer = tokenizer
+        self.on_text = on_text
+        self.token_ids: List[int] = []
+        self.sent = ""
+
+    def put(self, token_id: int):
+        self.token_ids.append(token_id)
+        self._send(self.tokenizer.decode(self.token_ids, skip_special_tokens=True))
+
+    def end(self, text: str):
+        """Sends whatever the final answer adds to the fragments (all of it for whole-sequence backends)."""
+        self._send(text)
+
+    def _send(self, text: str):
+        if len(text) > len(self.sent) and text.startswith(self.sent):
+            fragment = text[len(self.sent):]
+            self.sent = text
+            self.on_text(fragment)
@@ -1,71 +1,441 @@
 import numpy as np
+from functools import partial
 from pathlib import Path
+from typing import List, Optional
 from core.ai_model.query_intent_recognizer import QueryIntentRecognizer
-from transformers import TFT5ForConditionalGeneration, T5Tokenizer, GenerationConfig
+from core.ai_model.intent_fast_path import IntentFastPath
+from core.ai_model.speculation import SpeculativeGeneration
+from core.ai_model.sql_streaming import SQLTextStreamer
+from core.ai_model.cancellation import (
+    STAGE_BEFORE_DECODE, STAGE_DECODE, CancellationStats, CancellationToken, RequestCancelledError
+)
+from core.ai_model.inference_scheduler import InferenceScheduler
+from core.ai_model.replica_pool import ReplicaPool, parse_core_sets
+from core.ai_model.generation_control import GenerationController, non_greedy_settings
+from core.ai_model.schema_linking import SchemaLinker, build_model_input
+from core.ai_model.model_registry import ModelHandle
+from core.ai_model.memory_manager import MemoryManager
+from core.ai_model.model_bundle import ModelBundle
+from core.ai_model.tokenization_cache import InputTokenizationCache, pad_input_ids
+from core.ai_model import model_config
+from core.ai_model.inference_backend import (
+    InferenceBackend, REMOTE_MODEL_PATH, T5_SUBFOLDER, create_inference_backend
+)
 
 # Path setting
 BASE_DIR = Path(__file__).resolve().parent
-REMOTE_MODEL_PATH = "JordenBong/T5-Small-Text-to-SQL"
+
+# T5 encoder input limit, longer inputs are truncated
+MAX_INPUT_TOKENS = 128
+
+# Answer to questions the intent check rejects (QueryService.WARNING_MESSAGE detects it)
+REJECTED_RESPONSE = "Please ask something related to query data from database."
+
+# Dummy requests run after loading: a short and a wide schema, so both ends of the input lengths are traced
+WARMUP_INPUTS = [
+    ("How many users are there?", "CREATE TABLE users (id INT, name VARCHAR(50))"),
+    ("What is the average salary of employees hired after 2020 in each department?",
+     "CREATE TABLE employees (" + ", ".join(f"column_{i} VARCHAR(50)" for i in range(24)) + ")"),
+]
 
 # Initialize text-to-sql models
 class TextToSQLSystem:
-    def __init__(self):
-        self.t5_model = None  # Don't load yet
-        self.t5_tokenizer = None
-        self.query_intent_recognizer = QueryIntentRecognizer()
+    def __init__(self, batching_enabled: bool = model_config.BATCHING_ENABLED,
+                 inference_backend: InferenceBackend = None,
+                 inference_backends: Optional[List[InferenceBackend]] = None,
+                 generation_control_enabled: bool = model_config.GENERATION_CONTROL_ENABLED,
+                 schema_linking_enabled: bool = model_config.SCHEMA_LINKING_ENABLED,
+                 tokenization_cache_enabled: bool = model_config.TOKENIZATION_CACHE_ENABLED,
+                 intent_fast_path_enabled: bool = model_config.INTENT_FAST_PATH_ENABLED,
+                 speculative_intent_enabled: bool = model_config.SPECULATIVE_INTENT_ENABLED):
+        # T5 runtime (TensorFlow or ONNX Runtime), selected by TTS_INFERENCE_BACKEND; one per replica
+        if inference_backends is None:
+            inference_backends = [inference_backend] if inference_backend is not None else [
+                create_inference_backend() for _ in range(max(model_config.MODEL_REPLICAS, 1))
+            ]
+        self.inference_backends = list(inference_backends)
+        self.inference_backend = self.inference_backends[0]
+        self.t5_tokenizer = None  # Don't load yet
+        self.gen_config = None
+        # MiniLM and the OCSVM come from the offline bundle when TTS_MODEL_BUNDLE_DIR is set
+        intent_source = ModelBundle(model_config.MODEL_BUNDLE_DIR).intent_source() if model_config.MODEL_BUNDLE_DIR else {}
+        if model_config.INTENT_CLASSIFIER_PATH:
+            intent_source["svm_model_path"] = model_config.INTENT_CLASSIFIER_PATH
+        self.query_intent_recognizer = QueryIntentRecognizer(**intent_source)
 
-    def _lazy_load_model(self):
-        if self.t5_model is None:
-            print("Loading T5 model... this may take a moment.")
-            self.t5_model = TFT5ForConditionalGeneration.from_pretrained(
-                REMOTE_MODEL_PATH, subfolder="t5_small_text2sql_model"
+        # Loaded once on first use; concurrent first requests wait for the same load
+        self.generator_model = ModelHandle(
+            "t5", self._load_generator, warmup=self._warmup_generator,
+            unload=self._unload_generator, is_loaded=lambda: self.t5_tokenizer is not None
+        )
+        self.intent_model = ModelHandle(
+            "intent", self._load_intent_recognizer,
+            unload=self.query_intent_recognizer.unload, is_loaded=self.query_intent_recognizer.is_loaded
+        )
+
+        # Idle models are unloaded, and the least recently used ones when over the memory budget
+        self.memory_manager = MemoryManager(
+            [self.generator_model, self.intent_model],
+            idle_ttl_seconds=model_config.MODEL_IDLE_TTL_SECONDS,
+            budget_bytes=int(model_config.MEMORY_BUDGET_MB * 2 ** 20),
+            check_interval_seconds=model_config.MEMORY_CHECK_INTERVAL_SECONDS
+        )
+        self.memory_manager.start()
+
+        # Obvious database questions and small talk are decided from the words alone
+        self.intent_fast_path = None
+        if intent_fast_path_enabled:
+            self.intent_fast_path = IntentFastPath(
+                accept_score=model_config.INTENT_FAST_PATH_ACCEPT_SCORE,
+                reject_score=model_config.INTENT_FAST_PATH_REJECT_SCORE,
+                shadow_mode=model_config.INTENT_FAST_PATH_SHADOW
+            )
+
+        # Generation starts while the intent model is still deciding
+        self.speculation = None
+        if speculative_intent_enabled:
+            self.speculation = SpeculativeGeneration(max_workers=model_config.SPECULATIVE_INTENT_WORKERS)
+
+        # Per-request decode budget and SQL-aware stop (backends that decode step by step)
+        self.generation_controller = None
+        if generation_control_enabled:
+            self.generation_controller = GenerationController(
+                budget_base=model_config.DECODE_BUDGET_BASE,
+                budget_per_column=model_config.DECODE_BUDGET_PER_COLUMN,
+                budget_per_question_word=model_config.DECODE_BUDGET_PER_QUESTION_WORD,
+                budget_min=model_config.DECODE_BUDGET_MIN,
+                budget_max=model_config.DECODE_BUDGET_MAX,
+                stop_on_complete_statement=model_config.STOP_ON_COMPLETE_STATEMENT,
+                prompt_lookup=model_config.PROMPT_LOOKUP_ENABLED,
+                prompt_lookup_ngram_size=model_config.PROMPT_LOOKUP_NGRAM_SIZE,
+                prompt_lookup_num_tokens=model_config.PROMPT_LOOKUP_NUM_TOKENS
+            )
+
+        # Wide DDL is cut down to the question's most relevant columns instead of being truncated
+        self.schema_linker = None
+        if schema_linking_enabled:
+            self.schema_linker = SchemaLinker(
+                top_k=model_config.SCHEMA_LINKING_TOP_K,
+                lexical_weight=model_config.SCHEMA_LINKING_LEXICAL_WEIGHT,
+                max_input_tokens=MAX_INPUT_TOKENS
             )
-            self.t5_tokenizer = T5Tokenizer.from_pretrained(
-                REMOTE_MODEL_PATH, subfolder="t5_small_text2sql_model"
+
+        # Token ids of each distinct DDL are reused across questions
+        self.tokenization_cache = None
+        if tokenization_cache_enabled:
+            self.tokenization_cache = InputTokenizationCache(
+                max_length=MAX_INPUT_TOKENS,
+                max_entries=model_config.TOKENIZATION_CACHE_MAX_ENTRIES
+            )
+
+        # Requests abandoned by their client or past their deadline
+        self.cancellation_stats = CancellationStats()
+
+        # Concurrent generate_sql calls share one batched T5 decode
+        self.scheduler = None
+        self.replica_pool = None
+        if len(self.inference_backends) > 1:
+            # Each replica batches on its own thread; requests go to the least busy one
+            self.replica_pool = ReplicaPool(
+                self.inference_backends,
+                self._generate_scheduled_batch,
+                max_batch_size=model_config.BATCH_MAX_SIZE if batching_enabled else 1,
+                max_wait_ms=model_config.BATCH_MAX_WAIT_MS if batching_enabled else 0.0,
+                core_sets=parse_core_sets(model_config.REPLICA_CORE_AFFINITY, len(self.inference_backends)),
+                name="t5"
             )
-            self.gen_config = GenerationConfig.from_pretrained(
-                REMOTE_MODEL_PATH, subfolder="t5_small_text2sql_model"
+            self.scheduler = self.replica_pool
+        elif batching_enabled:
+            self.scheduler = InferenceScheduler(
+                self._generate_scheduled_batch,
+                max_batch_size=model_config.BATCH_MAX_SIZE,
+                max_wait_ms=model_config.BATCH_MAX_WAIT_MS,
+                name="t5"
             )
-            self.gen_config.max_length = 512
 
-            self.query_intent_recognizer.lazy_load()
+    @property
+    def model_version(self) -> str:
+        """Identifies the generating model, used to key cached results"""
+        return f"{REMOTE_MODEL_PATH}/{T5_SUBFOLDER}:{self.inference_backend.name}"
+
+    def _lazy_load_model(self):
+        # The intent model loads on its first use(): requests that skip the check never need it
+        if self.t5_tokenizer is None:
+            self.generator_model.ensure_loaded()
+
+    def _load_generator(self):
+        # Imported here so starting the server does not wait for transformers
+        from transformers import T5Tokenizer, T5TokenizerFast, GenerationConfig
+
+        print(f"Loading T5 model ({self.inference_backend.name})... this may take a moment.")
+        with self.generator_model.timed("weights"):
+            if self.replica_pool is not None:
+                self.replica_pool.load()
+            else:
+                self.inference_backend.load()
+        source, kwargs = self.inference_backend.tokenizer_source
+        tokenizer_class = T5TokenizerFast if model_config.FAST_TOKENIZER else T5Tokenizer
+        with self.generator_model.timed("tokenizer"):
+            tokenizer = tokenizer_class.from_pretrained(source, **kwargs)
+        with self.generator_model.timed("generation_config"):
+            self.gen_config = GenerationConfig.from_pretrained(source, **kwargs)
+        self.gen_config.max_length = 512
+        ignored = non_greedy_settings(self.gen_config)
+        if self.generation_controller is not None and ignored:
+            print(f"Generation config sets {', '.join(ignored)}: decoding with the backend's generate() "
+                  f"instead of generation control.")
+        # Set last: a loaded tokenizer lets requests through
+        self.t5_tokenizer = tokenizer
 
-    def predict_intent(self, question):
+    def _unload_generator(self):
+        # Cleared first: requests that find no tokenizer load the model again
+        self.t5_tokenizer = None
+        if self.replica_pool is not None:
+            self.replica_pool.unload()
+        else:
+            self.inference_backend.unload()
+        self.gen_config = None
+
+    def _load_intent_recognizer(self):
+        with self.intent_model.timed("minilm"):
+            self.query_intent_recognizer.load_embedder()
+        with self.intent_model.timed("ocsvm"):
+            self.query_intent_recognizer.load_classifier()
+
+    def _warmup_generator(self):
+        """Backend warmup, then dummy requests through the whole path to trace the graphs"""
+        if self.replica_pool is not None:
+            self.replica_pool.warmup(self.gen_config)
+        else:
+            self.inference_backend.warmup(self.gen_config)
+        if model_config.WARMUP_GENERATIONS:
+            for question, ddl_context in WARMUP_INPUTS:
+                # The handle is still warming: generate directly instead of through use()
+                self._generate_sql(question, needPredictIntent=False, ddl_context=ddl_context)
+
+    def predict_intent(self, question, ddl_context=None):
         """Determine if question is database-related"""
-        result = self.query_intent_recognizer.predict(question)
-        if result == np.int64(1):
-          return True
-        return False
+        decision = self._fast_intent(question, ddl_context)
+        if decision is not None and not self.intent_fast_path.shadow_mode:
+            return decision
+        return self._model_intent(question, decision)
+
+    def _fast_intent(self, question, ddl_context):
+        """The lexical fast path's decision, or None when it has none (or is disabled)"""
+        if self.intent_fast_path is None:
+            return None
+        return self.intent_fast_path.decide(question, ddl_context)
+
+    def _model_intent(self, question, fast_decision=None):
+        """The embedding model's decision, compared with the fast path's in shadow mode"""
+        with self.intent_model.use():
+            result = self.query_intent_recognizer.predict(question)
+        model_decision = bool(result == np.int64(1))
+        if fast_decision is not None:
+            self.intent_fast_path.record_shadow(question, fast_decision, model_decision)
+        return model_decision
+
 
+    def embed_questions(self, questions):
+        """MiniLM embeddings of the questions (shared with the intent recognizer's cache)"""
+        with self.intent_model.use():
+            return self.query_intent_recognizer.embed_batch(questions)
 
-    def generate_sql(self, question, needPredictIntent, ddl_context):
-        """Generate SQL using your T5 model"""
-        self._lazy_load_model()
+    def generate_sql(self, question, needPredictIntent, ddl_context, on_text=None, cancellation=None):
+        """
+        Generate SQL using your T5 model. With `on_text`, the SQL is also passed
+        on in fragments while it is decoded (backends that decode step by step;
+        others pass it on whole when the decode ends). Once `cancellation` is
+        cancelled the request stops at the next check, within one decoder step
+        while decoding, and raises RequestCancelledError.
+        """
+        # T5 stays loaded until the answer is decoded; the intent model loads only if it is asked
+        with self.generator_model.use():
+            return self._generate_sql(question, needPredictIntent, ddl_context, on_text, cancellation)
+
+    def _generate_sql(self, question, needPredictIntent, ddl_context, on_text=None, cancellation=None):
+        self._check_cancelled(cancellation, STAGE_BEFORE_DECODE)
 
         # user request to check intent or not
+        model_check_needed = False
+        fast_decision = None
         if needPredictIntent:
-            # study user intent
-            intent = self.predict_intent(question)
+            # study user intent, the lexical fast path first
+            fast_decision = self._fast_intent(question, ddl_context)
+            model_check_needed = fast_decision is None or self.intent_fast_path.shadow_mode
 
             # detected as not db-related question
-            if not intent:
-                response = "Please ask something related to query data from database."
-                return response
-            
-        # input formatting
-        input_text = f"Question: {question} | {ddl_context}"
+            if not model_check_needed and not fast_decision:
+                return REJECTED_RESPONSE
+
+        # speculate that the question passes: generate while the intent model decides
+        # (not when streaming, which would show SQL for questions that are then rejected)
+        if model_check_needed and self.speculation is not None and on_text is None:
+            # Its own token: a rejection stops this decode, the request's token still applies
+            speculative = CancellationToken(parent=cancellation)
+            item = self._prepare_generation(question, ddl_context, cancellation=speculative)
+            passed, sql = self.speculation.run(
+                lambda: self._submit_generation(item), lambda: self._model_intent(question, fast_decision),
+                speculative
+            )
+            if not passed:
+                return REJECTED_RESPONSE
+            self._check_cancelled(cancellation, STAGE_DECODE)
+            return sql
+
+        if model_check_needed and not self._model_intent(question, fast_decision):
+            return REJECTED_RESPONSE
 
         # continue predict sql
-        inputs = self.t5_tokenizer(input_text, return_tensors='tf', max_length=128, padding=True, truncation=True)
+        self._check_cancelled(cancellation, STAGE_BEFORE_DECODE)
+        streamer = SQLTextStreamer(self.t5_tokenizer, on_text) if on_text is not None else None
+        item = self._prepare_generation(question, ddl_context, streamer, cancellation)
+        if self.scheduler is not None:
+            sql = self.scheduler.run(item)
+        else:
+            sql = self._generate_one(item)
+        # A decode cut short (or skipped) by the cancellation has no answer
+        self._check_cancelled(cancellation, STAGE_DECODE)
+        return sql
+
+    def _check_cancelled(self, cancellation, stage):
+        if cancellation is not None and cancellation.cancelled:
+            self.cancellation_stats.record(cancellation.reason, stage)
+            raise RequestCancelledError(cancellation.reason)
 
-        outputs = self.t5_model.generate(
-            input_ids=inputs['input_ids'],
-            attention_mask=inputs['attention_mask'],
-            generation_config=self.gen_config
+    def _prepare_generation(self, question, ddl_context, streamer=None, cancellation=None):
+        """(input_ids, max_new_tokens, streamer, cancellation) of the request: schema linked, tokenized and budgeted"""
+        # fit the schema into the encoder input
+        if self.schema_linker is not None:
+            count_tokens = None
+            if self.tokenization_cache is not None:
+                # Measured from the cached DDL ids: the DDL is tokenized once, not once per request
+                count_tokens = partial(self.tokenization_cache.count_tokens, self.t5_tokenizer)
+            ddl_context = self.schema_linker.link(
+                question, ddl_context, self.t5_tokenizer, self.embed_questions, count_tokens
+            )
+
+        # input formatting
+        input_ids = self._encode_input(question, ddl_context)
+        max_new_tokens = None
+        if self._generation_control_active():
+            max_new_tokens = self.generation_controller.max_new_tokens(question, ddl_context)
+        return input_ids, max_new_tokens, streamer, cancellation
+
+    def _submit_generation(self, item):
+        """Starts generating without waiting: a Future of the SQL"""
+        # A rejected question returns before its decode finishes: T5 stays in use until then
+        self.generator_model.acquire()
+        try:
+            if self.scheduler is not None:
+                future = self.scheduler.submit(item)
+            else:
+                future = self.speculation.submit(self._generate_one, item)
+        except Exception:
+            self.generator_model.release()
+            raise
+        future.add_done_callback(lambda _: self.generator_model.release())
+        return future
+
+    def _generate_one(self, item):
+        return self._generate_scheduled_batch([item])[0]
+
+    def _encode_input(self, question, ddl_context):
+        """Token ids of the T5 input, truncated to MAX_INPUT_TOKENS"""
+        if self.tokenization_cache is not None:
+            return self.tokenization_cache.encode(self.t5_tokenizer, question, ddl_context)
+        inputs = self.t5_tokenizer([build_model_input(question, ddl_context)], max_length=MAX_INPUT_TOKENS, truncation=True)
+        return list(inputs['input_ids'][0])
+
+    def _generation_control_active(self):
+        # The controller only implements greedy search: beams, sampling or penalties need generate()
+        return (
+            self.generation_controller is not None
+            and self.inference_backend.supports_decode_steps
+            and self.gen_config is not None
+            and not non_greedy_settings(self.gen_config)
         )
-        sql_query = self.t5_tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return sql_query
 
+    def _generate_scheduled_batch(self, items, backend=None):
+        """
+        Scheduler entry point: items from _prepare_generation, decoded on `backend`
+        (a replica's). Requests cancelled while they were queued are not decoded
+        and get None.
+        """
+        live = [index for index, item in enumerate(items) if item[3] is None or not item[3].cancelled]
+        if len(live) < len(items) and self._generation_control_active():
+            skipped = set(range(len(items))) - set(live)
+            self.generation_controller.record_skipped([items[index][1] for index in skipped], self.gen_config)
+        results = [None] * len(items)
+        if not live:
+            return results
+        input_ids, max_new_tokens, streamers, cancellations = zip(*(items[index] for index in live))
+        padded_ids, attention_mask = pad_input_ids(input_ids, self.t5_tokenizer.pad_token_id)
+        decoded = self._generate_encoded(padded_ids, attention_mask, list(max_new_tokens), backend,
+                                         list(streamers), list(cancellations))
+        for index, sql in zip(live, decoded):
+            results[index] = sql
+        return results
+
+    def _generate_batch(self, input_texts, max_new_tokens=None):
+        """Run one padded T5 decode for a list of formatted inputs (optionally with a decode budget each)"""
+        inputs = self.t5_tokenizer(input_texts, return_tensors='np', max_length=MAX_INPUT_TOKENS, padding=True, truncation=True)
+        return self._generate_encoded(inputs['input_ids'], inputs['attention_mask'], max_new_tokens)
+
+    def _generate_encoded(self, input_ids, attention_mask, max_new_tokens=None, backend=None, streamers=None,
+                          cancellations=None):
+        """
+        Run one T5 decode over padded token ids, streaming the rows that have a
+        streamer. Rows cancelled meanwhile stop early and get None.
+        """
+        backend = backend or self.inference_backend
+        if self._generation_control_active():
+            outputs = self.generation_controller.generate(
+                backend,
+                self.t5_tokenizer,
+                input_ids,
+                attention_mask,
+                self.gen_config,
+                max_new_tokens,
+                [streamer.put if streamer is not None else None for streamer in streamers] if streamers else None,
+                cancellations
+            )
+        else:
+            outputs = backend.generate(
+                input_ids,
+                attention_mask,
+                self.gen_config
+            )
+        results = [self.t5_tokenizer.decode(output, skip_special_tokens=True) for output in outputs]
+        for row, cancellation in enumerate(cancellations or []):
+            if cancellation is not None and cancellation.cancelled:
+                results[row] = None
+        for streamer, result in zip(streamers or [], results):
+            if streamer is not None and result is not None:
+                streamer.end(result)
+        return results
 
+    def get_stats(self):
+        """Runtime statistics of the inference path"""
+        return {
+            "backend": self.inference_backend.get_stats(),
+            "scheduler": self.scheduler.get_stats() if self.scheduler is not None else None,
+            "generation_control": self.generation_controller.get_stats() if self.generation_controller is not None else None,
+            "schema_linking": self.schema_linker.get_stats() if self.schema_linker is not None else None,
+            "tokenization": self.tokenization_cache.get_stats() if self.tokenization_cache is not None else None,
+            "intent": self.query_intent_recognizer.get_stats(),
+            "intent_fast_path": self.intent_fast_path.get_stats() if self.intent_fast_path is not None else None,
+            "speculation": self.speculation.get_stats() if self.speculation is not None else None,
+            "models": {handle.name: handle.get_status() for handle in (self.intent_model, self.generator_model)},
+            "memory": self.memory_manager.get_stats(),
+            "cancellation": self._cancellation_stats()
+        }
 
-  
+    def _cancellation_stats(self):
+        stats = self.cancellation_stats.get_stats()
+        if self.generation_controller is not None:
+            # Decoder steps cancelled requests did not run, and the CPU time they would have taken
+            decoding = self.generation_controller.get_stats()
+            stats["decode_steps_reclaimed"] = decoding["steps_saved_by_cancel"]
+            stats["cpu_seconds_reclaimed"] = decoding["cpu_seconds_reclaimed"]
+        return stats
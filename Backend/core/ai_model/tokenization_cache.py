@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from core.ai_model.schema_linking import build_model_input, build_question_prefix
+from core.cache.cache_keys import hash_ddl
+from core.cache.lru_cache import LRUCache
+
+
+def pad_input_ids(rows: Sequence[Sequence[int]], pad_token_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Right-pads token id lists into (input_ids, attention_mask), as the tokenizer's padding=True does."""
+    length = max(len(row) for row in rows)
+    input_ids = np.full((len(rows), length), pad_token_id, dtype=np.int64)
+    attention_mask = np.zeros((len(rows), length), dtype=np.int64)
+    for index, row in enumerate(rows):
+        input_ids[index, :len(row)] = row
+        attention_mask[index, :len(row)] = 1
+    return input_ids, attention_mask
+
+
+class InputTokenizationCache:
+    """
+    Token ids of the T5 input "Question: <question> | <ddl>" without re-tokenizing
+    the DDL on every request. The DDL segment's ids are cached by content hash and
+    joined with the freshly tokenized question prefix, then truncated and closed
+    with </s> exactly like the tokenizer's own truncation.
+
+    The fast tokenizer segments every whitespace-separated word on its own, so the
+    joined ids equal the tokenization of the whole text. The slow SentencePiece
+    tokenizer segments the sentence as a whole and may break exact score ties
+    differently in context. This is checked once per DDL when it is first cached;
+    a DDL whose ids differ is remembered and always tokenized as part of the full
+    text.
+    """
+    def __init__(self, max_length: int = 128, max_entries: int = 1024):
+        self.max_length = max_length
+        self._cache = LRUCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self._backend_source = None
+        self._backend_copy = None
+
+        # Stats
+        self.requests = 0
+        self.unsplittable = 0
+        self.tokenize_seconds = 0.0
+
+    def _truncate(self, token_ids: List[int], eos_token_id: int) -> List[int]:
+        return token_ids[:self.max_length - 1] + [eos_token_id]
+
+    def _tokenize_full(self, tokenizer, text: str) -> List[int]:
+        return list(tokenizer([text], max_length=self.max_length, truncation=True)["input_ids"][0])
+
+    def _backend(self, tokenizer):
+        """
+        A private copy of a fast tokenizer's Rust tokenizer. Calling the tokenizer
+        sets truncation and padding on its own backend, the copy never has either.
+        """
+        if getattr(tokenizer, "is_fast", False) is not True:
+            return None
+        from tokenizers import Tokenizer
+        with self._lock:
+            if self._backend_source is not tokenizer:
+                self._backend_copy = Tokenizer.from_str(tokenizer.backend_tokenizer.to_str())
+                self._backend_copy.no_truncation()
+                self._backend_copy.no_padding()
+                self._backend_source = tokenizer
+            return self._backend_copy
+
+    def _token_ids(self, tokenizer, texts: List[str]) -> List[List[int]]:
+        """Ids of each text without special tokens or truncation."""
+        backend = self._backend(tokenizer)
+        if backend is not None:
+            # Skips the Python BatchEncoding wrapper of the fast tokenizer
+            return [backend.encode(text, add_special_tokens=False).ids for text in texts]
+        return [list(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def _untruncated_ids(self, tokenizer, question: str, ddl_context: Optional[str]) -> Optional[List[int]]:
+        """
+        Ids of build_model_input(question, ddl_context) without </s> or truncation,
+        from the cached DDL ids; None when the DDL must be tokenized with the full text.
+        """
+        ddl_text = f"{ddl_context}"
+        key = hash_ddl(ddl_text)
+        entry = self._cache.get(key)
+
+        if entry is None:
+            prefix_ids, ddl_ids, whole_ids = self._token_ids(
+                tokenizer, [build_question_prefix(question), ddl_text, build_model_input(question, ddl_context)]
+            )
+            splittable = prefix_ids + ddl_ids == whole_ids
+            self._cache.put(key, (splittable, ddl_ids))
+            if splittable:
+                return whole_ids
+            with self._lock:
+                self.unsplittable += 1
+            return None
+        if entry[0]:
+            return self._token_ids(tokenizer, [build_question_prefix(question)])[0] + entry[1]
+        return None
+
+    def encode(self, tokenizer, question: str, ddl_context: Optional[str]) -> List[int]:
+        """Token ids of build_model_input(question, ddl_context), truncated to max_length."""
+        started = time.perf_counter()
+        token_ids = self._untruncated_ids(tokenizer, question, ddl_context)
+        if token_ids is not None:
+            token_ids = self._truncate(token_ids, tokenizer.eos_token_id)
+        else:
+            token_ids = self._tokenize_full(tokenizer, build_model_input(question, ddl_context))
+
+        with self._lock:
+            self.requests += 1
+            self.tokenize_seconds += time.perf_counter() - started
+        return token_ids
+
+    def count_tokens(self, tokenizer, question: str, ddl_context: Optional[str]) -> int:
+        """Untruncated length of the tokenized model input with </s>, for schema linking."""
+        token_ids = self._untruncated_ids(tokenizer, question, ddl_context)
+        if token_ids is None:
+            return len(tokenizer([build_model_input(question, ddl_context)])["input_ids"][0])
+        return len(token_ids) + 1
+
+    def get_stats(self) -> dict:
+        stats = self._cache.get_stats()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "entries": stats["entries"],
+                "max_entries": stats["max_entries"],
+                "hits": stats["hits"],
+                "misses": stats["misses"],
+                "hit_rate": stats["hit_rate"],
+                "unsplittable": self.unsplittable,
+                "avg_tokenize_ms": (self.tokenize_seconds * 1000.0 / self.requests) if self.requests else 0.0,
+            }
@@ -0,0 +1,224 @@
+"""
+Static vocabulary pruning of the T5 output layer.
+
+SQL generated for the WikiSQL-style questions uses a small part of the 32k-piece
+SentencePiece vocabulary: SQL keywords, operators and the pieces copied from the
+question and DDL. The tool below counts token usage over datasets/data/*.jsonl,
+keeps the used pieces and exports a slimmed LM head (the kept rows plus the
+reduced-to-full id table) that PrunedVocabBackend scores at every decoder step
+instead of the full head.
+
+The pruned rows are grouped into clusters with a center and a radius, so
+h . w <= h . center + |h| * radius bounds every pruned logit. A row whose best
+kept logit does not beat that bound falls back to the full head, which keeps the
+greedy output identical to the stock model.
+
+    python -m core.ai_model.vocab_pruning --output core/ai_model/ai_models/t5_pruned_vocab.npz
+"""
+import argparse
+import glob
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Kept whatever the data says: the statements the model is trained to produce
+SQL_VOCABULARY = (
+    "SELECT DISTINCT COUNT SUM AVG MIN MAX FROM WHERE AND OR NOT IN LIKE BETWEEN IS NULL "
+    "GROUP BY ORDER HAVING ASC DESC LIMIT OFFSET AS JOIN LEFT RIGHT INNER OUTER ON UNION "
+    "INSERT INTO VALUES UPDATE SET DELETE CREATE TABLE ALTER DROP ADD COLUMN "
+    "select distinct count sum avg min max from where and or not in like between is null "
+    "group by order having asc desc limit offset as join on "
+    "= != <> < > <= >= ( ) , ; * . ' \" ` % - + / 0 1 2 3 4 5 6 7 8 9"
+)
+
+
+def count_token_usage(tokenizer, texts: Iterable[str]) -> Counter:
+    """How often each token id appears in the tokenized texts."""
+    usage = Counter()
+    for text in texts:
+        usage.update(tokenizer(text, add_special_tokens=False)["input_ids"])
+    return usage
+
+
+def select_vocabulary(tokenizer, target_usage: Counter, input_usage: Optional[Counter] = None,
+                      min_count: int = 1) -> np.ndarray:
+    """
+    Sorted token ids to keep: special tokens, the SQL vocabulary, every piece of
+    the target SQL and, since the model copies from its input, the input pieces
+    seen at least `min_count` times.
+    """
+    kept = set(tokenizer.all_special_ids)
+    kept.update(count_token_usage(tokenizer, SQL_VOCABULARY.split()))
+    kept.update(target_usage)
+    if input_usage is not None:
+        kept.update(token_id for token_id, count in input_usage.items() if count >= min_count)
+    return np.array(sorted(kept), dtype=np.int64)
+
+
+def build_bound_clusters(rows: np.ndarray, num_clusters: int = 256, iterations: int = 10,
+                         seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    k-means over the pruned LM head rows. Returns (centers, radii) where every row
+    lies within its cluster's radius of the center; empty clusters are dropped.
+    """
+    rows = rows.astype(np.float64)
+    if len(rows) == 0:
+        return np.zeros((0, rows.shape[1]), dtype=np.float32), np.zeros(0, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    centers = rows[rng.choice(len(rows), size=min(num_clusters, len(rows)), replace=False)]
+    row_norms = (rows ** 2).sum(axis=1)
+
+    def assign(centers):
+        distances = row_norms[:, None] - 2.0 * rows @ centers.T + (centers ** 2).sum(axis=1)[None, :]
+        return distances.argmin(axis=1)
+
+    for _ in range(iterations):
+        labels = assign(centers)
+        for cluster in range(len(centers)):
+            members = rows[labels == cluster]
+            if len(members):
+                centers[cluster] = members.mean(axis=0)
+
+    labels = assign(centers)
+    used = np.unique(labels)
+    radii = np.array([np.linalg.norm(rows[labels == cluster] - centers[cluster], axis=1).max() for cluster in used])
+    # float32 scoring of the kept rows must not make a pruned token look beaten when it is not
+    radii += 1e-4 * np.sqrt(row_norms.max())
+    return centers[used].astype(np.float32), radii.astype(np.float32)
+
+
+class PrunedVocabulary:
+    """
+    A slimmed LM head: the kept rows, their full-vocabulary ids and the cluster
+    bound over the pruned rows.
+    """
+    def __init__(self, kept_ids: np.ndarray, head: np.ndarray, centers: np.ndarray, radii: np.ndarray,
+                 vocab_size: int):
+        self.kept_ids = np.asarray(kept_ids, dtype=np.int64)
+        self.head = np.ascontiguousarray(head, dtype=np.float32)
+        self.centers = np.ascontiguousarray(centers, dtype=np.float32)
+        self.radii = np.asarray(radii, dtype=np.float32)
+        self.vocab_size = int(vocab_size)
+
+    @classmethod
+    def from_output_embeddings(cls, embeddings: np.ndarray, kept_ids: np.ndarray, num_clusters: int = 256,
+                               seed: int = 0) -> "PrunedVocabulary":
+        pruned = np.ones(len(embeddings), dtype=bool)
+        pruned[kept_ids] = False
+        centers, radii = build_bound_clusters(embeddings[pruned], num_clusters=num_clusters, seed=seed)
+        return cls(kept_ids, embeddings[kept_ids], centers, radii, len(embeddings))
+
+    def save(self, path):
+        np.savez(path, format_version=FORMAT_VERSION, kept_ids=self.kept_ids, head=self.head,
+                 centers=self.centers, radii=self.radii, vocab_size=self.vocab_size)
+
+    @classmethod
+    def load(cls, path) -> "PrunedVocabulary":
+        with np.load(path) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported pruned vocabulary format in {path}.")
+            return cls(data["kept_ids"], data["head"], data["centers"], data["radii"], int(data["vocab_size"]))
+
+    @property
+    def num_kept(self) -> int:
+        return len(self.kept_ids)
+
+    @property
+    def remap(self) -> np.ndarray:
+        """Full-vocabulary id -> reduced index, -1 for pruned tokens."""
+        table = np.full(self.vocab_size, -1, dtype=np.int64)
+        table[self.kept_ids] = np.arange(self.num_kept)
+        return table
+
+    def logits(self, hidden_states: np.ndarray,
+               full_logits: Callable[[np.ndarray], np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Full-vocabulary logits for (rows, d_model) hidden states: the kept tokens are
+        scored with the slimmed head and the pruned ones are -inf, except on rows
+        where a pruned token could win, which are scored by `full_logits`.
+        Returns (logits, fallback_rows).
+        """
+        hidden_states = np.ascontiguousarray(hidden_states, dtype=np.float32)
+        reduced = hidden_states @ self.head.T
+        fallback = np.zeros(len(hidden_states), dtype=bool)
+        if len(self.centers):
+            norms = np.linalg.norm(hidden_states, axis=1)
+            bound = (hidden_states @ self.centers.T + norms[:, None] * self.radii[None, :]).max(axis=1)
+            fallback = ~(reduced.max(axis=1) > bound)
+
+        logits = np.full((len(hidden_states), self.vocab_size), -np.inf, dtype=np.float32)
+        logits[:, self.kept_ids] = reduced
+        if fallback.any():
+            logits[fallback] = full_logits(hidden_states[fallback])
+        return logits, fallback
+
+    def get_stats(self) -> dict:
+        d_model = self.head.shape[1]
+        return {
+            "vocab_size": self.vocab_size,
+            "kept_tokens": self.num_kept,
+            "bound_clusters": len(self.centers),
+            "head_bytes": self.head.nbytes + self.centers.nbytes + self.radii.nbytes,
+            "full_head_bytes": self.vocab_size * d_model * 4,
+        }
+
+
+def _wikisql_texts(paths):
+    """(model input, target SQL) pairs, with the DDL and SQL rendering of the benchmarks."""
+    from benchmark.wikisql import build_ddls, load_examples, render_sql
+
+    for path in paths:
+        examples = load_examples(Path(path))
+        ddls = build_ddls(examples)
+        for example in examples:
+            yield f"Question: {example['question']} | {ddls[example['table_id']]}", render_sql(example)
+
+
+def main():
+    from transformers import T5Tokenizer
+    from core.ai_model.inference_backend import REMOTE_MODEL_PATH, T5_SUBFOLDER, TFBackend
+
+    default_data = str(Path(__file__).resolve().parents[3] / "datasets" / "data" / "*.jsonl")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True, help="Path of the .npz pruned vocabulary to write.")
+    parser.add_argument("--data", default=default_data, help="Glob of WikiSQL .jsonl files.")
+    parser.add_argument("--model-path", default=REMOTE_MODEL_PATH)
+    parser.add_argument("--subfolder", default=T5_SUBFOLDER)
+    parser.add_argument("--min-input-count", type=int, default=1,
+                        help="Keep input pieces seen at least this often (0: targets and SQL vocabulary only).")
+    parser.add_argument("--clusters", type=int, default=256, help="Clusters bounding the pruned rows.")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.data))
+    if not paths:
+        parser.error(f"No data files match {args.data}.")
+    tokenizer = T5Tokenizer.from_pretrained(args.model_path, subfolder=args.subfolder)
+    pairs = list(_wikisql_texts(paths))
+    target_usage = count_token_usage(tokenizer, (target for _, target in pairs))
+    input_usage = count_token_usage(tokenizer, (text for text, _ in pairs)) if args.min_input_count else None
+    kept_ids = select_vocabulary(tokenizer, target_usage, input_usage, min_count=max(args.min_input_count, 1))
+
+    backend = TFBackend(args.model_path, args.subfolder)
+    backend.load()
+    vocabulary = PrunedVocabulary.from_output_embeddings(backend.output_embeddings(), kept_ids,
+                                                         num_clusters=args.clusters)
+    vocabulary.save(args.output)
+
+    report = {
+        "data_files": paths,
+        "examples": len(pairs),
+        "target_tokens": sum(target_usage.values()),
+        "distinct_target_tokens": len(target_usage),
+        "distinct_input_tokens": len(input_usage) if input_usage is not None else None,
+        **vocabulary.get_stats(),
+    }
+    print(json.dumps(report, indent=2))
+    print(f"Wrote pruned vocabulary to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import hashlib
+from typing import Optional
+
+
+def normalize_question_text(question: str) -> str:
+    """
+    Collapses surrounding and repeated whitespace. Case is preserved because the
+    T5 tokenizer is cased and literals are copied into the generated SQL.
+    """
+    return " ".join((question or "").split())
+
+
+def hash_ddl(ddl_context: Optional[str]) -> str:
+    """Stable content hash of a DDL string."""
+    return hashlib.sha256((ddl_context or "").encode("utf-8")).hexdigest()
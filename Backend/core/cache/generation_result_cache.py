@@ -0,0 +1,54 @@
+from typing import Hashable, Optional
+from core.cache.cache_keys import hash_ddl, normalize_question_text
+from core.cache.tagged_cache import TaggedLRUCache
+
+# Fixed per-entry overhead (tuple, key strings, bookkeeping) used in the size estimate
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+class GenerationResultCache:
+    """
+    In-process cache of TextToSQLSystem.generate_sql results.
+    Entries are keyed on the normalized question, the DDL hash, the intent flag
+    and the model version, and tagged with (operator, table_name) so a schema
+    change can drop everything generated against the old DDL.
+    """
+    def __init__(self, max_entries: int = 10000, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self._cache = TaggedLRUCache(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            ttl_seconds=ttl_seconds,
+            size_of=self._estimate_size,
+        )
+
+    @staticmethod
+    def make_key(question: str, ddl_context: Optional[str], need_predict_intent: bool, model_version: str) -> tuple:
+        return (normalize_question_text(question), hash_ddl(ddl_context), bool(need_predict_intent), str(model_version))
+
+    def get(self, key: tuple) -> Optional[str]:
+        return self._cache.get(key)
+
+    def put(self, key: tuple, result: str, operator: Optional[str], table_name: Optional[str]):
+        self._cache.put(key, result, tag=(operator, table_name))
+
+    def invalidate(self, operator: Optional[str], table_name: Optional[str]) -> int:
+        """Removes every entry generated for the operator's table. Returns the number removed."""
+        return self._cache.invalidate((operator, table_name))
+
+    def on_schema_changed(self, operator: str, table_name: str, ddl_context: Optional[str]):
+        """SchemaService listener: the table's DDL was updated or deleted."""
+        self.invalidate(operator, table_name)
+
+    def clear(self):
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        return self._cache.get_stats()
+
+    @staticmethod
+    def _estimate_size(key: tuple, result: str, tag: Hashable) -> int:
+        question, ddl_hash, _, model_version = key
+        operator, table_name = tag
+        text_parts = (question, ddl_hash, model_version, result, operator or "", table_name or "")
+        return _ENTRY_OVERHEAD_BYTES + sum(len(part.encode("utf-8")) for part in text_parts)
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: Any, size: int, expires_at: Optional[float]):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded least-recently-used cache with hit/miss counters.
+    Optionally bounded by an estimated memory footprint (`max_bytes`, measured with
+    `size_of`) and by entry age (`ttl_seconds`).
+    """
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None, size_of: Optional[Callable[[Hashable, Any], int]] = None,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._size_of = size_of or (lambda key, value: 0)
+        self._on_evict = on_evict
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value (marking it as recently used) or None."""
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                evicted.append((key, entry.value))
+                entry = None
+            if entry is None:
+                self.misses += 1
+                value = None
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry.value
+        self._notify_evicted(evicted)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> bool:
+        """Stores a value. Returns False if the value alone exceeds the memory cap."""
+        size = self._size_of(key, value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            with self._lock:
+                self.rejected += 1
+            return False
+
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds is not None else None
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, size, expires_at)
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.current_bytes > self.max_bytes
+            ):
+                oldest_key, oldest = self._entries.popitem(last=False)
+                self.current_bytes -= oldest.size
+                self.evictions += 1
+                evicted.append((oldest_key, oldest.value))
+        self._notify_evicted(evicted)
+        return True
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._remove(key)
+            return entry.value if entry is not None else None
+
+    def purge_expired(self) -> int:
+        """Drops every expired entry and returns how many were removed."""
+        evicted = []
+        with self._lock:
+            now = self._clock()
+            for key in [k for k, e in self._entries.items() if e.expires_at is not None and e.expires_at <= now]:
+                evicted.append((key, self._remove(key).value))
+            self.expirations += len(evicted)
+        self._notify_evicted(evicted)
+        return len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "rejected": self.rejected,
+            }
+
+    # --- Helpers (caller holds the lock) ---
+    def _remove(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+        return entry
+
+    def _notify_evicted(self, evicted):
+        # Called outside the lock so callbacks may use their own locks safely
+        if self._on_evict is not None:
+            for key, value in evicted:
+                self._on_evict(key, value)
@@ -0,0 +1,240 @@
+import threading
+from collections import OrderedDict, deque
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
+from core.cache.cache_keys import hash_ddl
+from core.cache.template_cache import extract_ddl_literals, mask_question
+
+# Upper edges of the similarity buckets reported in get_stats()
+_SCORE_BUCKETS = (0.80, 0.85, 0.90, 0.92, 0.94, 0.96, 0.98, 0.99, 1.0)
+_RECENT_SCORES = 100
+# Rows allocated for a new partition before it starts doubling
+_INITIAL_ROWS = 8
+
+
+class SemanticCacheHit(NamedTuple):
+    sql: str
+    similarity: float
+    question: str
+
+
+class _Partition:
+    """
+    Normalized question embeddings and their SQL for one (operator, DDL, model).
+    The matrix starts small and doubles as questions arrive, up to `capacity` rows.
+    """
+
+    def __init__(self, table_name: Optional[str], capacity: int, dim: int):
+        self.table_name = table_name
+        self.capacity = capacity
+        rows = min(_INITIAL_ROWS, capacity)
+        self.embeddings = np.zeros((rows, dim), dtype=np.float32)
+        self.sql: List[str] = []
+        self.questions: List[str] = []
+        self.literals: List[Tuple[str, ...]] = []
+        self.last_used = np.zeros(rows, dtype=np.int64)
+        self.text_bytes = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.sql)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated footprint: the allocated arrays plus the stored question and SQL text."""
+        return self.embeddings.nbytes + self.last_used.nbytes + self.text_bytes
+
+    def reserve_slot(self):
+        """Doubles the allocated rows when they are all in use and the partition is not full."""
+        rows = self.embeddings.shape[0]
+        if self.size < rows or rows >= self.capacity:
+            return
+        grown = min(rows * 2, self.capacity)
+        embeddings = np.zeros((grown, self.embeddings.shape[1]), dtype=np.float32)
+        embeddings[:rows] = self.embeddings
+        last_used = np.zeros(grown, dtype=np.int64)
+        last_used[:rows] = self.last_used
+        self.embeddings, self.last_used = embeddings, last_used
+
+
+class SemanticCache:
+    """
+    Near-duplicate question cache. Each (operator, DDL hash, model version)
+    partition keeps a NumPy matrix of L2-normalized question embeddings; a
+    lookup is a single matrix-vector product followed by a top-1 cosine check
+    against `similarity_threshold`. A similar question only hits when its
+    literals (numbers, quoted strings, DDL values) match the stored question's,
+    since the stored SQL embeds them. Least recently used partitions are dropped
+    once there are more than `max_partitions` or their estimated footprint
+    exceeds `max_bytes`.
+    """
+    def __init__(self, similarity_threshold: float = 0.95, max_entries_per_partition: int = 512,
+                 max_partitions: int = 1024, max_bytes: Optional[int] = None):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_partition = max_entries_per_partition
+        self.max_partitions = max_partitions
+        self.max_bytes = max_bytes
+        self._partitions: "OrderedDict[tuple, _Partition]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._tick = 0
+        self.current_bytes = 0
+
+        # Stats
+        self.lookups = 0
+        self.hits = 0
+        self.literal_mismatches = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation_seconds = 0.0
+        self._generations = 0
+        self._hit_score_histogram = {bucket: 0 for bucket in _SCORE_BUCKETS}
+        self._miss_score_histogram = {bucket: 0 for bucket in _SCORE_BUCKETS}
+        self._recent_hit_scores = deque(maxlen=_RECENT_SCORES)
+
+    @staticmethod
+    def _partition_key(operator: Optional[str], ddl_context: Optional[str], model_version: str) -> tuple:
+        return (operator, hash_ddl(ddl_context), str(model_version))
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, operator: Optional[str], ddl_context: Optional[str], model_version: str,
+               embedding: np.ndarray, question: Optional[str] = None) -> Optional[SemanticCacheHit]:
+        """
+        Returns the stored SQL of the most similar question above the threshold, if any.
+        With `question`, stored questions whose literals differ from it are skipped.
+        """
+        query = self._normalize(embedding)
+        literals = self._literals(question, ddl_context) if question is not None else None
+        with self._lock:
+            self.lookups += 1
+            partition = self._partitions.get(self._partition_key(operator, ddl_context, model_version))
+            if partition is None or partition.size == 0:
+                return None
+
+            scores = partition.embeddings[:partition.size] @ query
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.similarity_threshold:
+                self._record_score(self._miss_score_histogram, score)
+                return None
+            if literals is not None and partition.literals[best] != literals:
+                candidates = [index for index in np.argsort(-scores)
+                              if scores[index] >= self.similarity_threshold and partition.literals[index] == literals]
+                if not candidates:
+                    self.literal_mismatches += 1
+                    return None
+                best = int(candidates[0])
+                score = float(scores[best])
+
+            self._tick += 1
+            partition.last_used[best] = self._tick
+            self.hits += 1
+            self._record_score(self._hit_score_histogram, score)
+            self._recent_hit_scores.append(round(score, 4))
+            return SemanticCacheHit(sql=partition.sql[best], similarity=score, question=partition.questions[best])
+
+    def add(self, operator: Optional[str], table_name: Optional[str], ddl_context: Optional[str],
+            model_version: str, question: str, embedding: np.ndarray, sql: str):
+        vector = self._normalize(embedding)
+        literals = self._literals(question, ddl_context)
+        key = self._partition_key(operator, ddl_context, model_version)
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                partition = _Partition(table_name, self.max_entries_per_partition, vector.shape[0])
+                self._partitions[key] = partition
+                self.current_bytes += partition.nbytes
+            self._partitions.move_to_end(key)
+            bytes_before = partition.nbytes
+
+            self._tick += 1
+            partition.reserve_slot()
+            if partition.size < self.max_entries_per_partition:
+                slot = partition.size
+                partition.sql.append(sql)
+                partition.questions.append(question)
+                partition.literals.append(literals)
+            else:
+                # Replace the least recently used question of a full partition
+                slot = int(np.argmin(partition.last_used))
+                partition.text_bytes -= self._text_bytes(partition.questions[slot], partition.sql[slot])
+                partition.sql[slot] = sql
+                partition.questions[slot] = question
+                partition.literals[slot] = literals
+                self.evictions += 1
+            partition.text_bytes += self._text_bytes(question, sql)
+            partition.embeddings[slot] = vector
+            partition.last_used[slot] = self._tick
+            self.current_bytes += partition.nbytes - bytes_before
+
+            # The partition just written to is the most recently used and is never dropped here
+            while len(self._partitions) > 1 and (
+                len(self._partitions) > self.max_partitions
+                or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+            ):
+                _, evicted = self._partitions.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+                self.evictions += evicted.size
+
+    @staticmethod
+    def _literals(question: str, ddl_context: Optional[str]) -> Tuple[str, ...]:
+        return mask_question(question, extract_ddl_literals(ddl_context)).slots
+
+    @staticmethod
+    def _text_bytes(question: str, sql: str) -> int:
+        return len(question.encode("utf-8")) + len(sql.encode("utf-8"))
+
+    def invalidate(self, operator: Optional[str], table_name: Optional[str]) -> int:
+        """Drops the partitions built for the operator's table. Returns the number of entries removed."""
+        with self._lock:
+            keys = [key for key, partition in self._partitions.items()
+                    if key[0] == operator and partition.table_name == table_name]
+            partitions = [self._partitions.pop(key) for key in keys]
+            self.current_bytes -= sum(partition.nbytes for partition in partitions)
+            removed = sum(partition.size for partition in partitions)
+            self.invalidations += removed
+            return removed
+
+    def on_schema_changed(self, operator: str, table_name: str, ddl_context: Optional[str]):
+        """SchemaService listener: the table's DDL was updated or deleted."""
+        self.invalidate(operator, table_name)
+
+    def observe_generation_latency(self, seconds: float):
+        """Records the cost of a model generation, used to estimate time saved by hits."""
+        with self._lock:
+            self._generation_seconds += seconds
+            self._generations += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            avg_generation_s = (self._generation_seconds / self._generations) if self._generations else 0.0
+            return {
+                "similarity_threshold": self.similarity_threshold,
+                "partitions": len(self._partitions),
+                "entries": sum(partition.size for partition in self._partitions.values()),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": (self.hits / self.lookups) if self.lookups else 0.0,
+                "literal_mismatches": self.literal_mismatches,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "avg_generation_ms": avg_generation_s * 1000.0,
+                "estimated_saved_ms": self.hits * avg_generation_s * 1000.0,
+                "hit_score_histogram": {f"<={bucket}": count for bucket, count in self._hit_score_histogram.items()},
+                "miss_best_score_histogram": {f"<={bucket}": count for bucket, count in self._miss_score_histogram.items()},
+                "recent_hit_scores": list(self._recent_hit_scores),
+            }
+
+    @staticmethod
+    def _record_score(histogram: dict, score: float):
+        for bucket in _SCORE_BUCKETS:
+            if score <= bucket:
+                histogram[bucket] += 1
+                return
+        histogram[_SCORE_BUCKETS[-1]] += 1
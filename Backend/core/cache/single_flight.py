@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import Future, wait
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from core.ai_model.cancellation import CancellationToken
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller (the leader)
+    runs the function, every caller arriving while it is in flight waits on the
+    same future and receives the same result or exception. A follower holding a
+    cancellation token stops waiting once its own token fires; the leader's work
+    carries on for the remaining callers.
+    """
+    def __init__(self, wait_slice_seconds: float = 0.05):
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._wait_slice_seconds = wait_slice_seconds
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any],
+           cancellation: Optional[CancellationToken] = None) -> Tuple[Any, bool]:
+        """
+        Returns (result, shared); `shared` is True for callers that waited on another caller's work.
+        Raises RequestCancelledError when a follower's `cancellation` fires before the leader finishes.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            self._wait(future, cancellation)
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _wait(self, future: Future, cancellation: Optional[CancellationToken]):
+        """Waits for the leader in short slices so the follower's own token is honoured."""
+        if cancellation is None:
+            return
+        while not future.done():
+            if cancellation.cancelled:
+                with self._lock:
+                    self.abandoned += 1
+                cancellation.raise_if_cancelled()
+            timeout = self._wait_slice_seconds
+            remaining = cancellation.remaining_seconds()
+            if remaining is not None:
+                timeout = max(0.0, min(timeout, remaining))
+            wait([future], timeout=timeout)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total = self.leaders + self.coalesced
+            return {
+                "in_flight": len(self._in_flight),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "abandoned": self.abandoned,
+                "coalesced_rate": (self.coalesced / total) if total else 0.0,
+            }
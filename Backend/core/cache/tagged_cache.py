@@ -0,0 +1,91 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+from core.cache.lru_cache import LRUCache
+
+
+class TaggedLRUCache:
+    """
+    LRUCache whose entries carry a tag (e.g. (operator, table_name)) so every
+    entry sharing a tag can be invalidated at once.
+    """
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None,
+                 size_of: Optional[Callable[[Hashable, Any, Hashable], int]] = None):
+        self._cache = LRUCache(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            ttl_seconds=ttl_seconds,
+            size_of=(lambda key, entry: size_of(key, entry[0], entry[1])) if size_of else None,
+            on_evict=self._forget_key,
+        )
+        self._keys_by_tag: Dict[Hashable, Set[Hashable]] = {}
+        self._tag_by_key: Dict[Hashable, Hashable] = {}
+        self._index_lock = threading.Lock()
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._cache.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any, tag: Hashable) -> bool:
+        # Index first so an eviction racing with this put always finds the key
+        with self._index_lock:
+            previous_tag = self._tag_by_key.get(key)
+            if previous_tag is not None and previous_tag != tag:
+                self._unindex(key, previous_tag)
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+            self._tag_by_key[key] = tag
+        if not self._cache.put(key, (value, tag)):
+            # The entry being replaced is stale either way
+            self._cache.pop(key)
+            self._forget_key(key, (value, tag))
+            return False
+        return True
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        entry = self._cache.pop(key)
+        if entry is None:
+            return None
+        self._forget_key(key, entry)
+        return entry[0]
+
+    def invalidate(self, tag: Hashable) -> int:
+        """Removes every entry carrying the tag. Returns the number removed."""
+        with self._index_lock:
+            keys = self._keys_by_tag.pop(tag, set())
+            for key in keys:
+                self._tag_by_key.pop(key, None)
+        removed = sum(1 for key in keys if self._cache.pop(key) is not None)
+        self.invalidations += removed
+        return removed
+
+    def clear(self):
+        with self._index_lock:
+            self._keys_by_tag.clear()
+            self._tag_by_key.clear()
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get_stats(self) -> dict:
+        stats = self._cache.get_stats()
+        stats["invalidations"] = self.invalidations
+        return stats
+
+    def _forget_key(self, key: Hashable, entry: tuple):
+        """Keeps the tag index in sync with LRU/TTL evictions."""
+        _, tag = entry
+        with self._index_lock:
+            # A key re-put under another tag is already indexed there
+            if self._tag_by_key.get(key) == tag:
+                del self._tag_by_key[key]
+                self._unindex(key, tag)
+
+    def _unindex(self, key: Hashable, tag: Hashable):
+        # Caller holds the index lock
+        keys = self._keys_by_tag.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
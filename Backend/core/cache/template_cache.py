@@ -0,0 +1,191 @@
+import random
+import re
+import threading
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from core.cache.cache_keys import hash_ddl, normalize_question_text
+from core.cache.tagged_cache import TaggedLRUCache
+
+# Literals that are masked out of a question
+_QUOTED_PATTERN = re.compile(r'"([^"]+)"|\'([^\']+)\'')
+_NUMBER_PATTERN = re.compile(r'(?<![\w.])\d+(?:[.,:/-]\d+)*(?!\w)')
+_DDL_LITERAL_PATTERN = re.compile(r"'([^']{2,})'")
+
+# Slot markers inside a stored SQL skeleton: private-use characters, never word
+# characters, so they cannot be matched by a later slot value
+_SLOT_BASE = 0xE000
+_MAX_SLOTS = 0x100
+_SLOT_MARKER_PATTERN = re.compile(f"[{chr(_SLOT_BASE)}-{chr(_SLOT_BASE + _MAX_SLOTS - 1)}]")
+
+
+class QuestionTemplate(NamedTuple):
+    text: str                 # question with every literal replaced by <NUM>, <STR> or <VAL>
+    slots: Tuple[str, ...]    # the masked literals, in order of appearance
+
+
+class TemplateHit(NamedTuple):
+    sql: str
+    key: tuple
+    template: str
+
+
+def extract_ddl_literals(ddl_context: Optional[str]) -> List[str]:
+    """Quoted values that appear in the DDL (DEFAULT, CHECK ... IN, comments), longest first."""
+    literals = {match.group(1) for match in _DDL_LITERAL_PATTERN.finditer(ddl_context or "")}
+    return sorted(literals, key=len, reverse=True)
+
+
+def _literal_pattern(value: str) -> "re.Pattern":
+    return re.compile(r"(?<!\w)" + re.escape(value) + r"(?!\w)")
+
+
+def mask_question(question: str, ddl_literals: Iterable[str] = ()) -> QuestionTemplate:
+    """Replaces quoted strings, DDL literal values and numbers in the question with typed placeholders."""
+    question = normalize_question_text(question)
+    spans = []
+
+    def add_span(start: int, end: int, kind: str, value: str):
+        if all(end <= other_start or start >= other_end for other_start, other_end, _, _ in spans):
+            spans.append((start, end, kind, value))
+
+    for match in _QUOTED_PATTERN.finditer(question):
+        add_span(match.start(), match.end(), "<STR>", match.group(1) or match.group(2))
+    for literal in ddl_literals:
+        for match in re.finditer(r"(?<!\w)" + re.escape(literal) + r"(?!\w)", question, re.IGNORECASE):
+            add_span(match.start(), match.end(), "<VAL>", match.group(0))
+    for match in _NUMBER_PATTERN.finditer(question):
+        add_span(match.start(), match.end(), "<NUM>", match.group(0))
+
+    spans.sort()
+    parts, slots, position = [], [], 0
+    for start, end, kind, value in spans:
+        parts.append(question[position:start])
+        parts.append(kind)
+        slots.append(value)
+        position = end
+    parts.append(question[position:])
+    return QuestionTemplate(text="".join(parts), slots=tuple(slots))
+
+
+def build_skeleton(sql: str, slots: Tuple[str, ...]) -> Optional[str]:
+    """
+    Replaces every slot value in the generated SQL with a slot marker.
+    Returns None when the mapping is ambiguous (repeated slot values) or a slot
+    does not appear in the SQL, since substituting it would not be safe.
+    """
+    if not slots or len(slots) > _MAX_SLOTS or len(set(slots)) != len(slots):
+        return None
+    skeleton = sql
+    # Longest first, so "21" is not replaced inside "2021"-like overlapping values
+    for index in sorted(range(len(slots)), key=lambda i: len(slots[i]), reverse=True):
+        pattern = _literal_pattern(slots[index])
+        if not pattern.search(skeleton):
+            return None
+        skeleton = pattern.sub(chr(_SLOT_BASE + index), skeleton)
+    return skeleton
+
+
+def fill_skeleton(skeleton: str, slots: Tuple[str, ...]) -> str:
+    return _SLOT_MARKER_PATTERN.sub(lambda match: slots[ord(match.group(0)) - _SLOT_BASE], skeleton)
+
+
+class TemplateCache:
+    """
+    Literal-masked question templates. A generated SQL statement is stored as a
+    skeleton with one slot per masked literal; the next question with the same
+    template, DDL, intent flag and model gets its SQL by slot filling instead of
+    a T5 decode.
+
+    With `verify_rate` > 0 a sample of hits is also sent to the real model and
+    the disagreement rate is reported; a template that disagrees is dropped.
+    """
+    def __init__(self, max_entries: int = 10000, verify_rate: float = 0.0, rng: Optional[random.Random] = None):
+        self._cache = TaggedLRUCache(max_entries=max_entries)
+        self.verify_rate = verify_rate
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.lookups = 0
+        self.hits = 0
+        self.stored = 0
+        self.unstorable = 0
+        self.verifications = 0
+        self.disagreements = 0
+
+    @staticmethod
+    def make_key(template_text: str, ddl_context: Optional[str], need_predict_intent: bool, model_version: str) -> tuple:
+        return (template_text, hash_ddl(ddl_context), bool(need_predict_intent), str(model_version))
+
+    def lookup(self, question: str, ddl_context: Optional[str], need_predict_intent: bool,
+               model_version: str) -> Optional[TemplateHit]:
+        template = mask_question(question, extract_ddl_literals(ddl_context))
+        if not template.slots:
+            # Nothing to substitute: the exact-match result cache covers this question
+            return None
+        key = self.make_key(template.text, ddl_context, need_predict_intent, model_version)
+        with self._lock:
+            self.lookups += 1
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        skeleton, slot_count = entry
+        if slot_count != len(template.slots):
+            return None
+        with self._lock:
+            self.hits += 1
+        return TemplateHit(sql=fill_skeleton(skeleton, template.slots), key=key, template=template.text)
+
+    def store(self, question: str, ddl_context: Optional[str], need_predict_intent: bool, model_version: str,
+              sql: str, operator: Optional[str], table_name: Optional[str]) -> bool:
+        """Stores the SQL skeleton of a freshly generated result. Returns False if it cannot be templated."""
+        template = mask_question(question, extract_ddl_literals(ddl_context))
+        if not template.slots:
+            return False
+        skeleton = build_skeleton(sql, template.slots)
+        if skeleton is None:
+            with self._lock:
+                self.unstorable += 1
+            return False
+        key = self.make_key(template.text, ddl_context, need_predict_intent, model_version)
+        self._cache.put(key, (skeleton, len(template.slots)), tag=(operator, table_name))
+        with self._lock:
+            self.stored += 1
+        return True
+
+    def should_verify(self) -> bool:
+        """Samples `verify_rate` of the hits for verification against the real model."""
+        return self.verify_rate > 0 and self._rng.random() < self.verify_rate
+
+    def record_verification(self, hit: TemplateHit, model_sql: str) -> bool:
+        """Compares a slot-filled hit with the model's own output. Returns True if they agree."""
+        agreed = hit.sql == model_sql
+        with self._lock:
+            self.verifications += 1
+            if not agreed:
+                self.disagreements += 1
+        if not agreed:
+            self._cache.pop(hit.key)
+        return agreed
+
+    def invalidate(self, operator: Optional[str], table_name: Optional[str]) -> int:
+        return self._cache.invalidate((operator, table_name))
+
+    def on_schema_changed(self, operator: str, table_name: str, ddl_context: Optional[str]):
+        """SchemaService listener: the table's DDL was updated or deleted."""
+        self.invalidate(operator, table_name)
+
+    def get_stats(self) -> dict:
+        stats = self._cache.get_stats()
+        with self._lock:
+            stats.update({
+                "template_lookups": self.lookups,
+                "template_hits": self.hits,
+                "template_hit_rate": (self.hits / self.lookups) if self.lookups else 0.0,
+                "stored": self.stored,
+                "unstorable": self.unstorable,
+                "verify_rate": self.verify_rate,
+                "verifications": self.verifications,
+                "disagreements": self.disagreements,
+                "disagreement_rate": (self.disagreements / self.verifications) if self.verifications else 0.0,
+            })
+        return stats
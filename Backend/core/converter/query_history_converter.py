@@ -23,7 +23,8 @@ class QueryHistoryConverter:
             status=core.status,
             error_message=core.error_message,
             table_name=core.table_name,
-            ddl_context=core.ddl_context
+            ddl_context=core.ddl_context,
+            served_from_cache=core.served_from_cache
         )
 
     @staticmethod
@@ -44,7 +45,8 @@ class QueryHistoryConverter:
             status=db_object.status,
             error_message=db_object.error_message,
             table_name=db_object.table_name,
-            ddl_context=db_object.ddl_context
+            ddl_context=db_object.ddl_context,
+            served_from_cache=db_object.served_from_cache
         )
 
     @staticmethod
@@ -65,5 +67,6 @@ class QueryHistoryConverter:
             status=core_object.status,
             error_message=core_object.error_message,
             table_name=core_object.table_name,
-            ddl_context=core_object.ddl_context
+            ddl_context=core_object.ddl_context,
+            served_from_cache=core_object.served_from_cache
         )
\ No newline at end of file
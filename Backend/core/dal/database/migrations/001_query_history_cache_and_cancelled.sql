@@ -0,0 +1,12 @@
+-- query_history: columns and values written by QueryHistoryDAL since the result caches
+-- and request cancellation were added. Run once against the database in db_config.MYSQL_CONFIG.
+
+-- Set by QueryService when the SQL came from a cache or a coalesced in-flight request
+ALTER TABLE query_history
+    ADD COLUMN served_from_cache BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- StatusEnum gained CANCELLED (client disconnected or the request's timeout passed).
+-- Stored as a plain string, so an ENUM('SUCCESS', 'FAILED') or a shorter VARCHAR column
+-- would reject it; widen the column to hold every StatusEnum value.
+ALTER TABLE query_history
+    MODIFY COLUMN status VARCHAR(16) NOT NULL;
@@ -27,18 +27,20 @@ class QueryHistoryDAL:
             status=row['status'],
             error_message=row['error_message'],
             table_name=row['table_name'],
-            ddl_context=row['ddl_context']
+            ddl_context=row['ddl_context'],
+            served_from_cache=bool(row.get('served_from_cache', False))
         )
         
     def insert_query_history(self, history_do: QueryHistoryDO) -> int:
         """
         Inserts a QueryHistoryDO record into the database.
         Returns the ID of the new record.
+        Requires database/migrations/001_query_history_cache_and_cancelled.sql (served_from_cache, CANCELLED status).
         """
         sql = f"""
         INSERT INTO {HISTORY_TABLE_NAME} 
-        (question, generated_sql, intent_recognized, operator, status, error_message, table_name, ddl_context)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        (question, generated_sql, intent_recognized, operator, status, error_message, table_name, ddl_context, served_from_cache)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
         
         # Prepare the data tuple
@@ -50,7 +52,8 @@ class QueryHistoryDAL:
             history_do.status,
             history_do.error_message,
             history_do.table_name,
-            history_do.ddl_context
+            history_do.ddl_context,
+            history_do.served_from_cache
         )
         
         # Use the DBManager to execute the commit operation
@@ -62,7 +65,7 @@ class QueryHistoryDAL:
         ordered by timestamp descending.
         """
         sql = f"""
-        SELECT id, gmt_create, question, generated_sql, intent_recognized, operator, status, error_message, table_name, ddl_context
+        SELECT id, gmt_create, question, generated_sql, intent_recognized, operator, status, error_message, table_name, ddl_context, served_from_cache
         FROM {HISTORY_TABLE_NAME} 
         WHERE operator = %s AND status = 'SUCCESS'
         ORDER BY gmt_create DESC 
@@ -9,6 +9,8 @@ class StatusEnum(str, Enum):
     """
     SUCCESS = "SUCCESS"
     FAILED = "FAILED"
+    # Stopped when the client disconnected or the request's timeout passed
+    CANCELLED = "CANCELLED"
 
 
 # --- Context Models ---
@@ -19,6 +19,7 @@ class QueryHistoryDO(BaseModel):
     gmt_create: Optional[datetime] = Field(None, description="Database insertion time.")
     table_name: Optional[str] = None 
     ddl_context: Optional[str] = None
+    served_from_cache: bool = False
 
 
 # --- B. Core Model ---
@@ -37,6 +38,7 @@ class QueryHistoryCore(BaseModel):
     gmt_create: Optional[datetime] = Field(None, description="Database insertion time.")
     table_name: Optional[str] = None 
     ddl_context: Optional[str] = None
+    served_from_cache: bool = Field(False, description="True if the result was served from a generation cache instead of the model.")
 
 
 # --- C. Value Object (VO) Model ---
@@ -55,6 +57,7 @@ class QueryHistoryVO(BaseModel):
     gmt_create: Optional[datetime] = Field(None, description="Database insertion time.")
     table_name: Optional[str] = None 
     ddl_context: Optional[str] = None
+    served_from_cache: bool = Field(False, description="True if the result was served from a generation cache instead of the model.")
 
     class Config:
         """
@@ -84,6 +87,7 @@ class QueryRequest(BaseModel):
     operator: Optional[str] = Field(None, description="An optional parameter indicating a specific database operator or context (e.g., 'SUM', 'COUNT').")
     table_name: Optional[str] = None 
     ddl_context: Optional[str] = None
+    timeout_seconds: Optional[float] = Field(None, gt=0, description="Seconds after which generation is abandoned (overrides the X-Request-Timeout header).")
 
     class Config:
         # Example schema for the automatically generated documentation
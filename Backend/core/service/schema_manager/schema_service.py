@@ -2,15 +2,27 @@ from core.converter.schema_converter import SchemaConverter
 from core.model.schema_models import SchemaCore, SchemaVO, SchemaDO 
 from core.service.schema_manager.schema_repository import SchemaRepository
 from fastapi import HTTPException
-from typing import List
+from typing import List, Optional
 
 class SchemaService:
     """
-    Coordinates CRUD oeprations upon schema information between users and database
+    Coordinates CRUD oeprations upon schema information between users and database.
+    Listeners are notified through on_schema_changed(operator, table_name, ddl_context)
+    whenever a table's DDL is saved (ddl_context set) or deleted (ddl_context None).
     """
-    def __init__(self, converter: SchemaConverter, schema_repository: SchemaRepository): 
+    def __init__(self, converter: SchemaConverter, schema_repository: SchemaRepository,
+                 schema_change_listeners: Optional[List] = None): 
         self._schema_repository = schema_repository
         self._converter = converter
+        self._schema_change_listeners = list(schema_change_listeners or [])
+
+    def _notify_schema_changed(self, operator: str, table_name: str, ddl_context: Optional[str]):
+        """ Listener failures must not fail the schema operation itself """
+        for listener in self._schema_change_listeners:
+            try:
+                listener.on_schema_changed(operator, table_name, ddl_context)
+            except Exception as e:
+                print(f"WARNING: schema change listener {type(listener).__name__} failed: {e}")
 
     def _map_do_to_vo(self, schema_do: SchemaDO) -> SchemaVO:
         """ Helper to map DO to VO """
@@ -20,6 +32,7 @@ class SchemaService:
     def add_or_update_schema(self, schema: SchemaCore) -> SchemaVO:
         """ insert or update schema """
         schema_do = self._schema_repository.save(schema)
+        self._notify_schema_changed(schema.operator, schema.table_name, schema.ddl_context)
         return self._map_do_to_vo(schema_do)
 
     def get_all_schemas(self, operator: str) -> List[SchemaVO]:
@@ -33,4 +46,5 @@ class SchemaService:
             raise HTTPException(status_code=404, detail=f"Table schema '{table_name}' not found for operator '{operator}'.")
         
         self._schema_repository.delete(table_name, operator)
+        self._notify_schema_changed(operator, table_name, None)
         return {"message": f"Table schema '{table_name}' deleted successfully."}
\ No newline at end of file
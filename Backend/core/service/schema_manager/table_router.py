@@ -0,0 +1,171 @@
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+from core.ai_model.schema_linking import column_name, name_words, parse_ddl
+from core.service.schema_manager.schema_repository import SchemaRepository
+
+
+class RoutedTable(NamedTuple):
+    table_name: str
+    ddl_context: str
+    similarity: float
+
+
+def describe_table(table_name: str, ddl_context: Optional[str]) -> str:
+    """The text embedded for a stored table: its name and column names as plain words."""
+    words = name_words(table_name)
+    for table in parse_ddl(ddl_context):
+        for definition in table.columns:
+            words += name_words(column_name(definition))
+    return " ".join(words)
+
+
+class _OperatorIndex:
+    """The tables of one operator and their L2-normalized embeddings, one row per table."""
+    __slots__ = ("table_names", "ddl_contexts", "matrix")
+
+    def __init__(self, dimension: int = 0):
+        self.table_names: List[str] = []
+        self.ddl_contexts: List[str] = []
+        self.matrix = np.zeros((0, dimension), dtype=np.float32)
+
+    def upsert(self, table_name: str, ddl_context: str, embedding: np.ndarray):
+        if table_name in self.table_names:
+            row = self.table_names.index(table_name)
+            self.ddl_contexts[row] = ddl_context
+            self.matrix[row] = embedding
+            return
+        self.table_names.append(table_name)
+        self.ddl_contexts.append(ddl_context)
+        matrix = self.matrix if self.matrix.shape[1] == len(embedding) else self.matrix.reshape(0, len(embedding))
+        self.matrix = np.vstack([matrix, embedding[None, :]])
+
+    def remove(self, table_name: str):
+        if table_name in self.table_names:
+            row = self.table_names.index(table_name)
+            del self.table_names[row]
+            del self.ddl_contexts[row]
+            self.matrix = np.delete(self.matrix, row, axis=0)
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+class TableRouter:
+    """
+    Picks the stored table(s) a question is about, so requests can arrive without
+    table_name and ddl_context. Every operator's tables are kept as a matrix of
+    MiniLM embeddings of "table name + column names"; a question is routed by one
+    matrix-vector cosine similarity against its operator's matrix.
+
+    Registered as a SchemaService listener: saved tables are embedded when they
+    are stored and deleted ones leave the index. An operator's tables are read
+    from the repository the first time it is routed or saves a table, which
+    also covers schemas stored before the process started.
+    """
+    def __init__(self, embed: Callable[[List[str]], np.ndarray], schema_repository: SchemaRepository,
+                 top_k: int = 1, min_similarity: float = 0.0):
+        self._embed = embed
+        self._schema_repository = schema_repository
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self._indexes: Dict[str, _OperatorIndex] = {}
+        self._lock = threading.Lock()
+
+        # Stats
+        self.requests = 0
+        self.routed = 0
+        self.unrouted = 0
+        self.index_loads = 0
+        self.search_seconds = 0.0
+
+    def _load_operator(self, operator: str) -> _OperatorIndex:
+        with self._lock:
+            index = self._indexes.get(operator)
+        if index is not None:
+            return index
+
+        schemas = [schema for schema in self._schema_repository.find_all_by_operator(operator) if schema is not None]
+        index = _OperatorIndex()
+        if schemas:
+            index.table_names = [schema.table_name for schema in schemas]
+            index.ddl_contexts = [schema.ddl_context for schema in schemas]
+            index.matrix = _normalize(self._embed([describe_table(s.table_name, s.ddl_context) for s in schemas]))
+        with self._lock:
+            # A concurrent load or schema change may have won the race; keep that index
+            index = self._indexes.setdefault(operator, index)
+            self.index_loads += 1
+        return index
+
+    def get(self, operator: Optional[str], table_name: str) -> Optional[RoutedTable]:
+        """The stored DDL of a table named by the client."""
+        if not operator:
+            return None
+        index = self._load_operator(operator)
+        with self._lock:
+            if table_name not in index.table_names:
+                return None
+            return RoutedTable(table_name, index.ddl_contexts[index.table_names.index(table_name)], 1.0)
+
+    def route(self, operator: Optional[str], question: str,
+              question_embedding: Optional[np.ndarray] = None) -> List[RoutedTable]:
+        """The best-matching tables of the operator, most similar first (empty if none qualifies)."""
+        if not operator:
+            return []
+        index = self._load_operator(operator)
+        if question_embedding is None:
+            question_embedding = self._embed([question])[0]
+        query = _normalize(question_embedding)
+
+        started = time.perf_counter()
+        with self._lock:
+            self.requests += 1
+            similarities = index.matrix @ query if len(index.table_names) else np.zeros(0, dtype=np.float32)
+            count = min(self.top_k, len(similarities))
+            best = np.argpartition(-similarities, count - 1)[:count] if count else np.zeros(0, dtype=np.int64)
+            best = best[np.argsort(-similarities[best], kind="stable")]
+            routed = [
+                RoutedTable(index.table_names[row], index.ddl_contexts[row], float(similarities[row]))
+                for row in best if similarities[row] >= self.min_similarity
+            ]
+            self.search_seconds += time.perf_counter() - started
+            if routed:
+                self.routed += 1
+            else:
+                self.unrouted += 1
+        return routed
+
+    def on_schema_changed(self, operator: str, table_name: str, ddl_context: Optional[str]):
+        """SchemaService listener: embeds a saved table, drops a deleted one."""
+        with self._lock:
+            index = self._indexes.get(operator)
+        if index is None:
+            if ddl_context is not None:
+                # The repository already holds the saved table
+                self._load_operator(operator)
+            return
+        if ddl_context is None:
+            with self._lock:
+                index.remove(table_name)
+            return
+        embedding = _normalize(self._embed([describe_table(table_name, ddl_context)])[0])
+        with self._lock:
+            index.upsert(table_name, ddl_context, embedding)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "top_k": self.top_k,
+                "min_similarity": self.min_similarity,
+                "operators": len(self._indexes),
+                "tables": sum(len(index.table_names) for index in self._indexes.values()),
+                "index_loads": self.index_loads,
+                "requests": self.requests,
+                "routed": self.routed,
+                "unrouted": self.unrouted,
+                "avg_search_ms": (self.search_seconds * 1000.0 / self.requests) if self.requests else 0.0,
+            }
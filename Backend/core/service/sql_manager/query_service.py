@@ -1,23 +1,45 @@
 import core.ai_model.text_to_sql_system as text_to_sql_system 
+from core.ai_model.cancellation import CancellationToken, RequestCancelledError
 from core.service.sql_manager.query_history_repository import QueryHistoryRepository
 from core.model.models import StatusEnum, ErrorContext
 from core.model.query_models import QueryHistoryCore, QueryRequest, QueryResponse
-from typing import List
+from core.cache.generation_result_cache import GenerationResultCache
+from core.cache.semantic_cache import SemanticCache
+from core.cache.template_cache import TemplateCache
+from core.cache.single_flight import SingleFlight
+from core.service.schema_manager.table_router import TableRouter
+from typing import Callable, List, Optional, Tuple
+import time
 
-WARNING_MESSAGE = "Please ask something related to query data from database."
+WARNING_MESSAGE = text_to_sql_system.REJECTED_RESPONSE
 
 class QueryService:
     """
     Service Layer: Orchestrates the Text-to-SQL process, handles business logic, 
     and manages history persistence.
     """
-    def __init__(self, tts_system: text_to_sql_system.TextToSQLSystem, history_repo: QueryHistoryRepository):
+    def __init__(self, tts_system: text_to_sql_system.TextToSQLSystem, history_repo: QueryHistoryRepository,
+                 result_cache: Optional[GenerationResultCache] = None,
+                 semantic_cache: Optional[SemanticCache] = None,
+                 template_cache: Optional[TemplateCache] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 table_router: Optional[TableRouter] = None):
         self._tts_system = tts_system
         self._history_repo = history_repo
+        self._result_cache = result_cache
+        self._semantic_cache = semantic_cache
+        self._template_cache = template_cache
+        self._single_flight = single_flight
+        self._table_router = table_router
 
-    def process_and_generate_sql(self, request: QueryRequest) -> QueryResponse:
+    def process_and_generate_sql(self, request: QueryRequest,
+                                 on_text: Optional[Callable[[str], None]] = None,
+                                 cancellation: Optional[CancellationToken] = None) -> QueryResponse:
         """
         Processes the user question, generates SQL, saves history, and returns the API response.
+        With `on_text`, SQL the model generates is also passed on in fragments while it is decoded
+        (cached answers arrive only in the response). A request whose `cancellation` is cancelled
+        stops generating and is answered and recorded as CANCELLED.
         """
         # Initialize Core model fields from request
         history_core = QueryHistoryCore(
@@ -32,13 +54,15 @@ class QueryService:
         )
         
         try:
+            # 0. Requests without DDL are answered against the operator's stored tables
+            request = self._route_table(request)
+            history_core.table_name = request.table_name
+            history_core.ddl_context = request.ddl_context
+
             # 1. Generate SQL (Intent recognition is handled inside this call)
             # The result is either the SQL query or a non-database related message.
-            sql_or_response = self._tts_system.generate_sql(
-                question=request.question,
-                needPredictIntent=request.need_predict_intent,
-                ddl_context=request.ddl_context
-            )
+            sql_or_response, served_from_cache = self._generate_sql_coalesced(request, on_text, cancellation)
+            history_core.served_from_cache = served_from_cache
 
             # Check if the response is warning message 
             if sql_or_response == WARNING_MESSAGE:
@@ -69,6 +93,21 @@ class QueryService:
                 history_core.generated_sql = sql_or_response
                 history_core.intent_recognized = True
               
+        except RequestCancelledError as e:
+            response = QueryResponse(
+                status=StatusEnum.CANCELLED,
+                result_data=None,
+                error_context=ErrorContext(
+                    error_message=str(e),
+                    error_type=e.reason.upper(),
+                    suggested_action="Retry the request, with a longer timeout if it expired."
+                )
+            )
+
+            history_core.status = StatusEnum.CANCELLED
+            history_core.error_message = str(e)
+            history_core.intent_recognized = False
+
         except Exception as e:
             # 2. Handle failure for API response
             error_context = ErrorContext(
@@ -97,6 +136,116 @@ class QueryService:
                 pass          
         return response
 
+    def _route_table(self, request: QueryRequest) -> QueryRequest:
+        """
+        Fills in ddl_context from the stored schemas when the client did not send it:
+        the named table's DDL, or the best-matching tables for the question.
+        """
+        if self._table_router is None or request.ddl_context:
+            return request
+        if request.table_name:
+            named = self._table_router.get(request.operator, request.table_name)
+            routed = [named] if named is not None else []
+        else:
+            routed = self._table_router.route(request.operator, request.question)
+        if not routed:
+            return request
+        return request.model_copy(update={
+            "table_name": routed[0].table_name,
+            "ddl_context": "\n".join(table.ddl_context for table in routed)
+        })
+
+    def _generate_sql_coalesced(self, request: QueryRequest,
+                                on_text: Optional[Callable[[str], None]] = None,
+                                cancellation: Optional[CancellationToken] = None) -> Tuple[str, bool]:
+        """
+        Identical requests (question, DDL, intent flag, model) arriving while one is
+        in flight wait for that result instead of running their own decode.
+        Coalesced callers are reported as served from cache (and are not streamed).
+        """
+        if self._single_flight is None:
+            return self._generate_sql(request, on_text, cancellation)
+        key = GenerationResultCache.make_key(
+            request.question, request.ddl_context, request.need_predict_intent, self._tts_system.model_version
+        )
+        try:
+            (sql_or_response, served_from_cache), shared = self._single_flight.do(
+                key, lambda: self._generate_sql(request, on_text, cancellation), cancellation
+            )
+        except RequestCancelledError:
+            if cancellation is not None and cancellation.cancelled:
+                raise
+            # The request we waited on was cancelled, this one was not: generate it ourselves
+            return self._generate_sql(request, on_text, cancellation)
+        return sql_or_response, served_from_cache or shared
+
+    def _generate_sql(self, request: QueryRequest,
+                      on_text: Optional[Callable[[str], None]] = None,
+                      cancellation: Optional[CancellationToken] = None) -> Tuple[str, bool]:
+        """
+        Returns (sql_or_response, served_from_cache). Results are deterministic for a
+        given question, DDL, intent flag and model, so repeats are answered from the cache.
+        """
+        cache_key = None
+        if self._result_cache is not None:
+            cache_key = self._result_cache.make_key(
+                request.question, request.ddl_context, request.need_predict_intent, self._tts_system.model_version
+            )
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                return cached, True
+
+        template_hit = None
+        if self._template_cache is not None:
+            template_hit = self._template_cache.lookup(
+                request.question, request.ddl_context, request.need_predict_intent, self._tts_system.model_version
+            )
+            if template_hit is not None and not self._template_cache.should_verify():
+                # As with semantic hits, the new literals must not let an off-topic question through
+                if request.need_predict_intent and not self._tts_system.predict_intent(request.question, request.ddl_context):
+                    return WARNING_MESSAGE, False
+                return template_hit.sql, True
+
+        embedding = None
+        if self._semantic_cache is not None and template_hit is None:
+            embedding = self._tts_system.embed_questions([request.question])[0]
+            hit = self._semantic_cache.lookup(
+                request.operator, request.ddl_context, self._tts_system.model_version, embedding, request.question
+            )
+            if hit is not None:
+                # The stored SQL came from a question that passed the intent gate; this one must pass too.
+                # The embedding is already cached, so this is only the SVM call.
+                if request.need_predict_intent and not self._tts_system.predict_intent(request.question, request.ddl_context):
+                    return WARNING_MESSAGE, False
+                return hit.sql, True
+
+        started = time.perf_counter()
+        sql_or_response = self._tts_system.generate_sql(
+            question=request.question,
+            needPredictIntent=request.need_predict_intent,
+            ddl_context=request.ddl_context,
+            on_text=on_text,
+            cancellation=cancellation
+        )
+
+        if cache_key is not None:
+            self._result_cache.put(cache_key, sql_or_response, operator=request.operator, table_name=request.table_name)
+        if template_hit is not None:
+            # Sampled verification: compare the slot-filled SQL with the model's answer
+            self._template_cache.record_verification(template_hit, sql_or_response)
+        elif self._template_cache is not None and sql_or_response != WARNING_MESSAGE:
+            self._template_cache.store(
+                request.question, request.ddl_context, request.need_predict_intent, self._tts_system.model_version,
+                sql_or_response, operator=request.operator, table_name=request.table_name
+            )
+        if embedding is not None and sql_or_response != WARNING_MESSAGE:
+            self._semantic_cache.observe_generation_latency(time.perf_counter() - started)
+            self._semantic_cache.add(
+                request.operator, request.table_name, request.ddl_context, self._tts_system.model_version,
+                request.question, embedding, sql_or_response
+            )
+        return sql_or_response, False
+
     def get_query_history(self, operator: str) -> List[QueryHistoryCore]:
         """
         Retrieves history using the repository.
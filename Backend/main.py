@@ -1,9 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
-from core.ai_model.text_to_sql_system import TextToSQLSystem
 
-from controller import user_auth_controller, schema_manager_controller, sql_query_controller
+from controller import user_auth_controller, schema_manager_controller, sql_query_controller, metrics_controller, health_controller
+from controller.dependencies import model_registry
 
 app = FastAPI(
     title="Text-to-SQL API",
@@ -11,12 +11,10 @@ app = FastAPI(
 )
 
 
- # Load models AFTER server starts
-text_to_sql_system = TextToSQLSystem()
-
+ # Load models AFTER server starts; /ready reports when they are warm
 @app.on_event("startup")
 async def startup_event():
-    text_to_sql_system._lazy_load_model()
+    model_registry.start()
 
 # Include EV URL from environment variable
 production_url = os.getenv("FRONTEND_URL")
@@ -43,6 +41,8 @@ app.add_middleware(
 app.include_router(user_auth_controller.router)
 app.include_router(schema_manager_controller.router)
 app.include_router(sql_query_controller.router)
+app.include_router(metrics_controller.router)
+app.include_router(health_controller.router)
 
 @app.get("/")
 def read_root():
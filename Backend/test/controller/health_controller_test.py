@@ -0,0 +1,28 @@
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from main import app
+
+client = TestClient(app)
+
+ROUTER_REGISTRY_PATH = "controller.health_controller.model_registry"
+
+
+class TestHealthRouter:
+
+    def test_ready_when_models_are_warm(self):
+        with patch(ROUTER_REGISTRY_PATH) as mock_registry:
+            mock_registry.readiness.return_value = {"ready": True, "models": {"t5": {"state": "ready"}}}
+
+            response = client.get("/ready")
+
+            assert response.status_code == 200
+            assert response.json()["models"]["t5"]["state"] == "ready"
+
+    def test_not_ready_while_loading(self):
+        with patch(ROUTER_REGISTRY_PATH) as mock_registry:
+            mock_registry.readiness.return_value = {"ready": False, "models": {"t5": {"state": "loading"}}}
+
+            response = client.get("/ready")
+
+            assert response.status_code == 503
+            assert response.json()["ready"] is False
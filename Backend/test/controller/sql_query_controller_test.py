@@ -1,10 +1,18 @@
+import asyncio
+import json
+import threading
+import time
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi import HTTPException
 
 # Assuming your FastAPI app is created in main.py
 from main import app 
+from controller.sql_query_controller import cancel_on_disconnect, stream_sql_events
+from core.ai_model.cancellation import CLIENT_DISCONNECTED, CancellationToken
+from core.model.models import ErrorContext, StatusEnum
+from core.model.query_models import QueryRequest, QueryResponse
 
 client = TestClient(app)
 
@@ -92,4 +100,131 @@ class TestQueryRouter:
         response = client.post("/generate_sql", json=payload)
 
         # Assert
-        assert response.status_code == 422
\ No newline at end of file
+        assert response.status_code == 422
+
+    # --- Streaming Tests ---
+
+    def _events(self, body):
+        events = []
+        for block in body.strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in block.split("\n"))
+            events.append((lines["event"], json.loads(lines["data"])))
+        return events
+
+    def test_generate_sql_stream_sends_fragments_then_result(self):
+        """Tests that SQL fragments arrive as events before the final QueryResponse."""
+        with patch(ROUTER_SERVICE_PATH) as mock_service:
+            # Arrange
+            def process(request, on_text=None, cancellation=None):
+                on_text("SELECT *")
+                on_text(" FROM users;")
+                return QueryResponse(status=StatusEnum.SUCCESS, result_data="SELECT * FROM users;", error_context=None)
+            mock_service.process_and_generate_sql.side_effect = process
+
+            payload = {"question": "Show all users", "operator": "admin", "need_predict_intent": True}
+
+            # Act
+            response = client.post("/generate_sql/stream", json=payload)
+
+            # Assert
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert self._events(response.text) == [
+                ("sql", {"text": "SELECT *"}),
+                ("sql", {"text": " FROM users;"}),
+                ("result", {"status": "SUCCESS", "result_data": "SELECT * FROM users;", "error_context": None}),
+            ]
+
+    def test_generate_sql_stream_reports_failure_in_result(self):
+        """Tests that a service exception ends the stream with a FAILED result event."""
+        with patch(ROUTER_SERVICE_PATH) as mock_service:
+            # Arrange
+            mock_service.process_and_generate_sql.side_effect = RuntimeError("model crashed")
+
+            payload = {"question": "Show all users", "operator": "admin", "need_predict_intent": True}
+
+            # Act
+            response = client.post("/generate_sql/stream", json=payload)
+
+            # Assert
+            [(event, data)] = self._events(response.text)
+            assert event == "result"
+            assert data["status"] == "FAILED"
+            assert data["error_context"]["error_message"] == "model crashed"
+
+    def test_generate_sql_stream_validates_params(self):
+        """Tests that parameter checks run before the stream starts."""
+        payload = {"question": "", "operator": "admin", "need_predict_intent": True}
+
+        response = client.post("/generate_sql/stream", json=payload)
+
+        assert response.status_code == 400
+
+    # --- Deadline & Cancellation Tests ---
+
+    def test_generate_sql_timeout_from_header_or_field(self):
+        """Tests that the request gets a cancellation token with the client's timeout."""
+        with patch(ROUTER_SERVICE_PATH) as mock_service:
+            mock_service.process_and_generate_sql.return_value = {
+                "status": "SUCCESS", "result_data": "SELECT 1", "error_context": None
+            }
+            payload = {"question": "Show all users", "operator": "admin", "need_predict_intent": True}
+
+            client.post("/generate_sql", json=payload, headers={"X-Request-Timeout": "30"})
+            header_token = mock_service.process_and_generate_sql.call_args.kwargs["cancellation"]
+            client.post("/generate_sql", json={**payload, "timeout_seconds": 5}, headers={"X-Request-Timeout": "30"})
+            field_token = mock_service.process_and_generate_sql.call_args.kwargs["cancellation"]
+
+            assert 25 < header_token.remaining_seconds() <= 30
+            assert field_token.remaining_seconds() <= 5
+
+    def test_generate_sql_cancelled_response(self):
+        """Tests that a cancelled generation is reported with the CANCELLED status."""
+        with patch(ROUTER_SERVICE_PATH) as mock_service:
+            mock_service.process_and_generate_sql.return_value = QueryResponse(
+                status=StatusEnum.CANCELLED, result_data=None,
+                error_context=ErrorContext(error_message="Request cancelled (deadline exceeded).", error_type="DEADLINE_EXCEEDED")
+            )
+            payload = {"question": "Show all users", "operator": "admin", "need_predict_intent": True, "timeout_seconds": 1}
+
+            response = client.post("/generate_sql", json=payload)
+
+            assert response.status_code == 200
+            assert response.json()["status"] == "CANCELLED"
+
+    def test_disconnect_cancels_the_request(self):
+        """Tests that the connection watcher cancels the token once the client is gone."""
+        http_request = MagicMock()
+        http_request.is_disconnected = AsyncMock(side_effect=[False, False, True])
+        token = CancellationToken()
+
+        with patch("controller.sql_query_controller.model_config.DISCONNECT_CHECK_INTERVAL_MS", 1):
+            asyncio.run(cancel_on_disconnect(http_request, token))
+
+        assert token.reason == CLIENT_DISCONNECTED
+        assert http_request.is_disconnected.await_count == 3
+
+    def test_closed_stream_cancels_the_request(self):
+        """Tests that closing the event stream before the result cancels the generation."""
+        started = threading.Event()
+        token = CancellationToken()
+
+        def process(request, on_text=None, cancellation=None):
+            on_text("SELECT")
+            started.set()
+            while not cancellation.cancelled:
+                time.sleep(0.01)
+            return QueryResponse(status=StatusEnum.CANCELLED, result_data=None, error_context=None)
+
+        async def read_first_event():
+            events = stream_sql_events(QueryRequest(question="q", operator="admin"), token)
+            first = await events.__anext__()
+            await events.aclose()
+            return first
+
+        with patch(ROUTER_SERVICE_PATH) as mock_service:
+            mock_service.process_and_generate_sql.side_effect = process
+            first = asyncio.run(read_first_event())
+
+        assert first.startswith("event: sql")
+        assert token.reason == CLIENT_DISCONNECTED
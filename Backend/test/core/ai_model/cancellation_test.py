@@ -0,0 +1,190 @@
+import threading
+import time
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from transformers import GenerationConfig
+from core.ai_model.cancellation import (
+    CLIENT_DISCONNECTED, DEADLINE_EXCEEDED, CancellationToken, RequestCancelledError
+)
+from core.ai_model.decoding import EncoderState
+from core.ai_model.text_to_sql_system import REJECTED_RESPONSE, TextToSQLSystem
+
+PIECES = ["<pad>", "</s>", "▁SELECT", "▁name", "▁FROM", "▁users"]
+STEP_SECONDS = 0.02
+DDL = "CREATE TABLE users (name TEXT)"
+
+
+class StubTokenizer:
+    pad_token_id = 0
+
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": [[3] for _ in texts]}
+
+    def __len__(self):
+        return len(PIECES)
+
+    def convert_ids_to_tokens(self, token_ids):
+        return [PIECES[token_id] for token_id in token_ids]
+
+    def decode(self, token_ids, skip_special_tokens=True):
+        return "".join(PIECES[token_id] for token_id in token_ids if token_id > 1).replace("▁", " ").strip()
+
+
+class EndlessGenerator:
+    """Step-by-step backend that never emits EOS, so every decode runs to its budget."""
+    supports_decode_steps = True
+    name = "stub"
+
+    def __init__(self):
+        self.steps = 0
+
+    def encode(self, input_ids, attention_mask):
+        return EncoderState(input_ids, attention_mask)
+
+    def decode_step(self, encoder_state, decoder_input_ids, past=None):
+        time.sleep(STEP_SECONDS)
+        self.steps += 1
+        logits = np.zeros((decoder_input_ids.shape[0], 1, len(PIECES)), dtype=np.float32)
+        logits[:, 0, 3] = 1.0
+        return logits, (past or 0) + 1
+
+    def get_stats(self):
+        return {"name": self.name}
+
+
+class TestCancellationToken:
+
+    def test_deadline(self):
+        token = CancellationToken(timeout_seconds=0.05)
+        assert not token.cancelled
+        assert 0 < token.remaining_seconds() <= 0.05
+
+        time.sleep(0.06)
+
+        assert token.reason == DEADLINE_EXCEEDED
+        with pytest.raises(RequestCancelledError) as error:
+            token.raise_if_cancelled()
+        assert error.value.reason == DEADLINE_EXCEEDED
+
+    def test_first_reason_sticks(self):
+        token = CancellationToken(timeout_seconds=0.01)
+        token.cancel(CLIENT_DISCONNECTED)
+        time.sleep(0.02)
+
+        assert token.reason == CLIENT_DISCONNECTED
+
+    def test_without_timeout(self):
+        token = CancellationToken()
+
+        assert not token.cancelled
+        assert token.remaining_seconds() is None
+
+    def test_child_follows_its_parent(self):
+        parent = CancellationToken(timeout_seconds=5)
+        child = CancellationToken(parent=parent)
+        child.cancel("intent_rejected")
+
+        assert not parent.cancelled
+        assert child.deadline == parent.deadline
+
+        other = CancellationToken(parent=parent)
+        parent.cancel()
+        assert other.reason == CLIENT_DISCONNECTED
+
+
+class TestCancelledGeneration:
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def _system(self, mock_intent, batching_enabled=False, speculative_intent_enabled=False):
+        system = TextToSQLSystem(batching_enabled=batching_enabled, inference_backend=EndlessGenerator(),
+                                 schema_linking_enabled=False, tokenization_cache_enabled=False,
+                                 intent_fast_path_enabled=False, speculative_intent_enabled=speculative_intent_enabled)
+        system.t5_tokenizer = StubTokenizer()
+        # 48 steps (~1 s) per request
+        system.gen_config = GenerationConfig(decoder_start_token_id=0, pad_token_id=0, eos_token_id=1, max_length=49)
+        system.generation_controller.stop_on_complete_statement = False
+        return system
+
+    @pytest.mark.parametrize("batching_enabled", [False, True])
+    def test_disconnect_stops_the_decode_within_a_step(self, batching_enabled):
+        system = self._system(batching_enabled=batching_enabled)
+        token = CancellationToken()
+        threading.Timer(5 * STEP_SECONDS, token.cancel).start()
+
+        started = time.perf_counter()
+        with pytest.raises(RequestCancelledError) as error:
+            system.generate_sql("list names", False, DDL, cancellation=token)
+        elapsed = time.perf_counter() - started
+
+        assert error.value.reason == CLIENT_DISCONNECTED
+        assert system.inference_backend.steps < 12
+        assert elapsed < 12 * STEP_SECONDS
+        stats = system.get_stats()
+        assert stats["cancellation"]["reasons"] == {CLIENT_DISCONNECTED: 1}
+        assert stats["cancellation"]["stages"] == {"decode": 1}
+        assert stats["cancellation"]["decode_steps_reclaimed"] > 30
+        assert stats["cancellation"]["cpu_seconds_reclaimed"] > 30 * STEP_SECONDS / 2
+        assert stats["generation_control"]["stop_reasons"] == {"cancelled": 1}
+
+    def test_deadline_stops_the_decode(self):
+        system = self._system()
+
+        with pytest.raises(RequestCancelledError) as error:
+            system.generate_sql("list names", False, DDL, cancellation=CancellationToken(timeout_seconds=0.1))
+
+        assert error.value.reason == DEADLINE_EXCEEDED
+        assert system.inference_backend.steps < 10
+
+    def test_other_rows_of_the_batch_finish(self):
+        system = self._system()
+        token = CancellationToken()
+        items = [
+            system._prepare_generation("list names", DDL, cancellation=token),
+            system._prepare_generation("list names", DDL),
+        ]
+        threading.Timer(3 * STEP_SECONDS, token.cancel).start()
+
+        results = system._generate_scheduled_batch(items)
+
+        assert results[0] is None
+        assert results[1] == " ".join(["name"] * 48)
+
+    def test_queued_requests_cancelled_before_their_batch_are_skipped(self):
+        system = self._system()
+        token = CancellationToken()
+        token.cancel()
+
+        results = system._generate_scheduled_batch([system._prepare_generation("list names", DDL, cancellation=token)])
+
+        assert results == [None]
+        assert system.inference_backend.steps == 0
+        stats = system.generation_controller.get_stats()
+        assert stats["skipped_cancelled_rows"] == 1
+        assert stats["steps_saved_by_cancel"] == 48
+
+    def test_cancelled_before_decoding_skips_the_intent_model(self):
+        system = self._system()
+        token = CancellationToken()
+        token.cancel()
+
+        with pytest.raises(RequestCancelledError):
+            system.generate_sql("list names", True, DDL, cancellation=token)
+
+        system.query_intent_recognizer.predict.assert_not_called()
+        assert system.get_stats()["cancellation"]["stages"] == {"before_decode": 1}
+
+    @pytest.mark.parametrize("batching_enabled", [False, True])
+    def test_rejected_speculative_decode_is_stopped(self, batching_enabled):
+        system = self._system(batching_enabled=batching_enabled, speculative_intent_enabled=True)
+        system.query_intent_recognizer.predict.side_effect = lambda question: time.sleep(5 * STEP_SECONDS) or np.int64(-1)
+
+        assert system.generate_sql("tell me a joke", True, DDL) == REJECTED_RESPONSE
+        # The discarded decode winds down in the background
+        time.sleep(10 * STEP_SECONDS)
+
+        assert system.inference_backend.steps < 12
+        assert system.get_stats()["speculation"]["stopped"] == 1
+        assert system.get_stats()["generation_control"]["stop_reasons"] == {"cancelled": 1}
+        # Not a cancelled request
+        assert system.get_stats()["cancellation"]["cancelled"] == 0
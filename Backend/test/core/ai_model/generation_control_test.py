@@ -0,0 +1,404 @@
+import pytest
+import numpy as np
+import tensorflow as tf
+from unittest.mock import MagicMock, patch
+from transformers import GenerationConfig, T5Config, TFT5ForConditionalGeneration
+from core.ai_model.decoding import (
+    STOP_CANCELLED, STOP_CRITERIA, STOP_EOS, STOP_LENGTH, EncoderState, find_draft, greedy_search, prompt_lookup_search
+)
+from core.ai_model.generation_control import (
+    GenerationController, SQLStatementStoppingCriteria, count_ddl_columns, non_greedy_settings
+)
+from core.ai_model.inference_backend import TFBackend
+from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+PIECES = ["<pad>", "</s>", "▁SELECT", "▁name", "▁FROM", "▁users", ";", "▁WHERE", "▁x", "▁=",
+          "▁'", "a;b", "'", "▁(", ")", "▁junk", "▁COUNT"]
+TOKEN = {piece: token_id for token_id, piece in enumerate(PIECES)}
+
+
+def ids(*pieces):
+    return [TOKEN[piece] for piece in pieces]
+
+
+class StubTokenizer:
+    """SentencePiece-like tokenizer over PIECES; every input becomes a single token."""
+    pad_token_id = 0
+    eos_token_id = 1
+
+    def __call__(self, texts, **kwargs):
+        input_ids = np.full((len(texts), 1), TOKEN["▁x"], dtype=np.int64)
+        return {"input_ids": input_ids, "attention_mask": np.ones_like(input_ids)}
+
+    def __len__(self):
+        return len(PIECES)
+
+    def convert_ids_to_tokens(self, token_ids):
+        return [PIECES[token_id] for token_id in token_ids]
+
+    def decode(self, token_ids, skip_special_tokens=True):
+        pieces = [PIECES[token_id] for token_id in token_ids if token_id > 1]
+        return "".join(pieces).replace("▁", " ").strip()
+
+
+class ScriptedBackend:
+    """
+    Emits a fixed token script per row regardless of its input (the script repeats
+    its last token). The "cache" is the number of decoder positions consumed.
+    """
+    supports_decode_steps = True
+    name = "stub"
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.decode_steps = 0
+
+    def encode(self, input_ids, attention_mask):
+        return EncoderState(input_ids, attention_mask)
+
+    def decode_step(self, encoder_state, decoder_input_ids, past=None):
+        self.decode_steps += 1
+        position = 0 if past is None else past
+        new_tokens = decoder_input_ids.shape[1]
+        logits = np.zeros((len(self.scripts), new_tokens, len(PIECES)), dtype=np.float32)
+        for row, script in enumerate(self.scripts):
+            for offset in range(new_tokens):
+                logits[row, offset, script[min(position + offset, len(script) - 1)]] = 1.0
+        return logits, position + new_tokens
+
+    @staticmethod
+    def crop_past(past, length):
+        return length
+
+
+def generation_config(max_length=512):
+    return GenerationConfig(decoder_start_token_id=0, pad_token_id=0, eos_token_id=1, max_length=max_length)
+
+
+class TestCountDDLColumns:
+
+    def test_counts_columns_and_skips_constraints(self):
+        ddl = ("CREATE TABLE orders (id INT NOT NULL, total DECIMAL(10, 2), status ENUM('a','b'), "
+               "PRIMARY KEY (id), CONSTRAINT fk FOREIGN KEY (id) REFERENCES users(id))")
+        assert count_ddl_columns(ddl) == 3
+
+    def test_counts_across_tables(self):
+        ddl = "CREATE TABLE a (x INT, y INT); CREATE TABLE IF NOT EXISTS `b` (`z` TEXT, KEY idx (z))"
+        assert count_ddl_columns(ddl) == 3
+
+    def test_missing_ddl(self):
+        assert count_ddl_columns(None) == 0
+        assert count_ddl_columns("users(id, name)") == 0
+
+
+class TestDecodeBudget:
+
+    def test_budget_grows_with_columns_and_question_length(self):
+        controller = GenerationController(budget_base=10, budget_per_column=4, budget_per_question_word=2,
+                                          budget_min=0, budget_max=1000)
+        assert controller.max_new_tokens("how many users", "CREATE TABLE u (a INT, b INT)") == 10 + 8 + 6
+
+    def test_budget_is_clamped(self):
+        controller = GenerationController(budget_base=10, budget_min=48, budget_max=60)
+        assert controller.max_new_tokens("hi", None) == 48
+        assert controller.max_new_tokens("word " * 100, None) == 60
+
+
+class TestSQLStatementStoppingCriteria:
+
+    def _run(self, *pieces):
+        criteria = SQLStatementStoppingCriteria(GenerationController()._pieces(StubTokenizer()), batch_size=1)
+        results = [bool(criteria(np.array([TOKEN[piece]]))[0]) for piece in pieces]
+        return results
+
+    def test_stops_at_terminating_semicolon(self):
+        assert self._run("▁SELECT", "▁name", "▁FROM", "▁users", ";") == [False, False, False, False, True]
+
+    def test_semicolon_inside_quotes_does_not_stop(self):
+        results = self._run("▁SELECT", "▁name", "▁WHERE", "▁x", "▁=", "▁'", "a;b", "'", ";")
+        assert results == [False] * 8 + [True]
+
+    def test_unbalanced_parentheses_do_not_stop(self):
+        assert self._run("▁SELECT", "▁COUNT", "▁(", "▁name", ";") == [False] * 5
+        assert self._run("▁SELECT", "▁COUNT", "▁(", "▁name", ")", ";")[-1] is True
+
+    def test_leading_semicolon_does_not_stop(self):
+        assert self._run(";") == [False]
+
+    def test_rows_are_scanned_independently(self):
+        criteria = SQLStatementStoppingCriteria(GenerationController()._pieces(StubTokenizer()), batch_size=2)
+        criteria(np.array(ids("▁SELECT", "▁'")))
+        assert criteria(np.array(ids(";", ";"))).tolist() == [True, False]
+
+
+class TestGreedySearch:
+
+    def test_per_row_budgets_stop_reasons_and_padding(self):
+        backend = ScriptedBackend([
+            ids("▁SELECT", "</s>"),
+            ids("▁SELECT", "▁name", ";", "▁junk"),
+            ids("▁junk"),
+        ])
+        criteria = SQLStatementStoppingCriteria(GenerationController()._pieces(StubTokenizer()), batch_size=3)
+
+        output = greedy_search(backend, np.ones((3, 1)), np.ones((3, 1)), np.array([10, 10, 4]),
+                               decoder_start_token_id=0, eos_token_id=1, pad_token_id=0, stopping_criteria=criteria)
+
+        assert output.stop_reasons == [STOP_EOS, STOP_CRITERIA, STOP_LENGTH]
+        assert output.generated_tokens.tolist() == [2, 3, 4]
+        assert output.steps == 4
+        assert output.sequences[0].tolist() == [0] + ids("▁SELECT", "</s>") + [0, 0]
+        assert output.sequences[1].tolist() == [0] + ids("▁SELECT", "▁name", ";") + [0]
+
+    def test_without_criteria_runs_to_eos(self):
+        backend = ScriptedBackend([ids("▁SELECT", ";", "▁junk", "</s>")])
+
+        output = greedy_search(backend, np.ones((1, 1)), np.ones((1, 1)), 50,
+                               decoder_start_token_id=0, eos_token_id=1, pad_token_id=0)
+
+        assert output.stop_reasons == [STOP_EOS]
+        assert output.steps == 4
+
+    def test_cancelled_rows_stop_after_the_running_step(self):
+        backend = ScriptedBackend([ids("▁junk"), ids("▁junk")])
+        cancelled = np.array([False, False])
+
+        def cancel_first_row_after_two_steps():
+            cancelled[0] = backend.decode_steps >= 2
+            return cancelled
+
+        output = greedy_search(backend, np.ones((2, 1)), np.ones((2, 1)), 5, decoder_start_token_id=0,
+                               eos_token_id=1, pad_token_id=0, cancelled_rows=cancel_first_row_after_two_steps)
+
+        assert output.stop_reasons == [STOP_CANCELLED, STOP_LENGTH]
+        assert output.generated_tokens.tolist() == [2, 5]
+
+    def test_token_callback_sees_each_committed_column(self):
+        backend = ScriptedBackend([ids("▁SELECT", "</s>"), ids("▁SELECT", "▁name", "</s>")])
+        columns = []
+
+        greedy_search(backend, np.ones((2, 1)), np.ones((2, 1)), 10, decoder_start_token_id=0, eos_token_id=1,
+                      pad_token_id=0, token_callback=lambda tokens, active: columns.append((tokens.tolist(), active.tolist())))
+
+        assert columns == [
+            (ids("▁SELECT", "▁SELECT"), [True, True]),
+            (ids("</s>", "▁name"), [True, True]),
+            ([0] + ids("</s>"), [False, True]),
+        ]
+
+
+class TestPromptLookup:
+
+    def test_find_draft_prefers_longest_ngram(self):
+        prompt = np.array([5, 6, 7, 8, 9, 6, 3, 4])
+        np.testing.assert_array_equal(find_draft(prompt, np.array([1, 5, 6]), 3, 3), [7, 8, 9])
+        np.testing.assert_array_equal(find_draft(prompt, np.array([2, 9, 6]), 3, 2), [3, 4])
+        np.testing.assert_array_equal(find_draft(prompt, np.array([6]), 3, 2), [7, 8])
+        assert len(find_draft(prompt, np.array([42]), 3, 2)) == 0
+
+    def test_copied_spans_commit_in_one_step_with_greedy_output(self):
+        sql = ids("▁SELECT", "▁name", "▁FROM", "▁users", "▁WHERE", "▁x", "▁=", "▁'", "a;b", "'", "</s>")
+        # The prompt already contains most of the statement
+        prompt = np.array([ids("▁x", "▁name", "▁FROM", "▁users", "▁WHERE", "▁x", "▁=", "▁'", "a;b", "'", "▁junk")])
+        greedy = greedy_search(ScriptedBackend([sql]), prompt, np.ones_like(prompt), 50, 0, 1, 0)
+
+        backend = ScriptedBackend([sql])
+        output = prompt_lookup_search(backend, prompt, np.ones_like(prompt), 50, 0, 1, 0)
+
+        np.testing.assert_array_equal(output.sequences, greedy.sequences)
+        assert output.stop_reasons == greedy.stop_reasons == [STOP_EOS]
+        assert backend.decode_steps < greedy.steps
+        assert output.accepted_tokens > 0
+        assert output.accepted_tokens <= output.draft_tokens
+
+    def test_rejected_drafts_and_stops_match_greedy(self):
+        scripts = [
+            ids("▁SELECT", "▁name", "▁FROM", "▁junk", "▁users", ";", "▁junk"),
+            ids("▁SELECT", "▁COUNT", "▁(", "▁name", ")", "▁FROM", "▁users", "</s>"),
+            ids("▁SELECT") + ids("▁junk") * 3,
+        ]
+        prompt = np.array([ids("▁SELECT", "▁name", "▁FROM", "▁users", ";", "▁WHERE")] * 3)
+        mask = np.ones_like(prompt)
+        budgets = np.array([30, 30, 3])
+        pieces = GenerationController()._pieces(StubTokenizer())
+
+        greedy = greedy_search(ScriptedBackend(scripts), prompt, mask, budgets, 0, 1, 0,
+                               stopping_criteria=SQLStatementStoppingCriteria(pieces, 3))
+        output = prompt_lookup_search(ScriptedBackend(scripts), prompt, mask, budgets, 0, 1, 0,
+                                      stopping_criteria=SQLStatementStoppingCriteria(pieces, 3))
+
+        np.testing.assert_array_equal(output.sequences, greedy.sequences)
+        assert output.stop_reasons == greedy.stop_reasons == [STOP_CRITERIA, STOP_EOS, STOP_LENGTH]
+        assert output.generated_tokens.tolist() == greedy.generated_tokens.tolist()
+
+    def test_controller_reports_acceptance(self):
+        sql = ids("▁SELECT", "▁name", "▁FROM", "▁users", "</s>")
+        prompt = np.array([ids("▁name", "▁FROM", "▁users")])
+        controller = GenerationController(prompt_lookup=True)
+
+        sequences = controller.generate(ScriptedBackend([sql]), StubTokenizer(), prompt, np.ones_like(prompt),
+                                        generation_config())
+
+        assert StubTokenizer().decode(sequences[0]) == "SELECT name FROM users"
+        stats = controller.get_stats()
+        assert stats["accepted_tokens"] > 0
+        assert 0 < stats["acceptance_rate"] <= 1
+        assert stats["tokens_per_step"] > 1
+
+
+class TestGenerationController:
+
+    def test_stops_rambling_decode_and_reports_saved_steps(self):
+        backend = ScriptedBackend([ids("▁SELECT", "▁name", "▁FROM", "▁users", ";") + ids("▁junk")])
+        controller = GenerationController()
+
+        sequences = controller.generate(backend, StubTokenizer(), np.ones((1, 1)), np.ones((1, 1)),
+                                        generation_config(max_length=512), [100])
+
+        assert StubTokenizer().decode(sequences[0]) == "SELECT name FROM users;"
+        assert backend.decode_steps == 5
+        stats = controller.get_stats()
+        assert stats["stop_reasons"] == {STOP_CRITERIA: 1}
+        assert stats["steps_saved_by_stop"] == 511 - 5
+        assert stats["decoder_steps"] == 5
+
+    def test_exhausted_budget_falls_back_to_the_full_decode(self):
+        backend = ScriptedBackend([ids("▁SELECT") + ids("▁name") * 70 + ids(";")])
+        controller = GenerationController()
+        streamed = []
+
+        sequences = controller.generate(backend, StubTokenizer(), np.ones((1, 1)), np.ones((1, 1)),
+                                        generation_config(max_length=512), [60], [streamed.append])
+
+        # The cut-off SQL is never returned: the row is decoded again up to the config's limit
+        assert StubTokenizer().decode(sequences[0]) == "SELECT" + " name" * 70 + ";"
+        assert streamed == ids("▁SELECT") + ids("▁name") * 70 + ids(";")
+        assert backend.decode_steps == 60 + 72
+        stats = controller.get_stats()
+        assert stats["stop_reasons"] == {STOP_CRITERIA: 1}
+        assert stats["budget_fallbacks"] == 1
+        assert stats["budget_fallback_steps"] == 72
+
+    def test_rows_within_budget_are_not_decoded_again(self):
+        backend = ScriptedBackend([ids("▁SELECT", "▁name", ";"), ids("▁junk")])
+        controller = GenerationController()
+
+        sequences = controller.generate(backend, StubTokenizer(), np.ones((2, 1)), np.ones((2, 1)),
+                                        generation_config(max_length=512), [60, 511])
+
+        assert StubTokenizer().decode(sequences[0]) == "SELECT name;"
+        assert controller.get_stats()["budget_fallbacks"] == 0
+
+    def test_budget_never_exceeds_generation_config(self):
+        backend = ScriptedBackend([ids("▁junk")])
+        controller = GenerationController(stop_on_complete_statement=False)
+
+        controller.generate(backend, StubTokenizer(), np.ones((1, 1)), np.ones((1, 1)),
+                            generation_config(max_length=21), [100])
+
+        assert backend.decode_steps == 20
+        assert controller.get_stats()["budget_fallbacks"] == 0
+
+
+class TestTextToSQLSystemGenerationControl:
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def _system(self, backend, mock_intent, **kwargs):
+        system = TextToSQLSystem(batching_enabled=False, inference_backend=backend, **kwargs)
+        system.t5_tokenizer = StubTokenizer()
+        system.gen_config = generation_config()
+        return system
+
+    def test_generate_sql_uses_budget_and_stop(self):
+        backend = ScriptedBackend([ids("▁SELECT", "▁name", "▁FROM", "▁users", ";", "▁junk")])
+        system = self._system(backend)
+
+        result = system.generate_sql("list names", needPredictIntent=False, ddl_context="CREATE TABLE users (name TEXT)")
+
+        assert result == "SELECT name FROM users;"
+        assert system.generation_controller.get_stats()["stop_reasons"] == {STOP_CRITERIA: 1}
+
+    def test_budget_is_derived_from_question_and_ddl(self):
+        backend = ScriptedBackend([ids("▁junk")])
+        system = self._system(backend)
+        ddl = "CREATE TABLE users (" + ", ".join(f"c{i} INT" for i in range(5)) + ")"
+
+        system.generate_sql("list all names", needPredictIntent=False, ddl_context=ddl)
+
+        # The budget, then the fallback decode up to max_length
+        budget = system.generation_controller.max_new_tokens("list all names", ddl)
+        assert backend.decode_steps == budget + 511
+        assert system.generation_controller.get_stats()["avg_budget"] == budget
+
+    def test_disabled_controller_uses_backend_generate(self):
+        backend = MagicMock(supports_decode_steps=True)
+        backend.generate.return_value = np.array([ids("▁SELECT", "</s>")])
+        system = self._system(backend, generation_control_enabled=False)
+
+        assert system.generate_sql("q", needPredictIntent=False, ddl_context="") == "SELECT"
+        backend.generate.assert_called_once()
+
+    @pytest.mark.parametrize("settings", [{"num_beams": 4}, {"repetition_penalty": 1.3},
+                                          {"do_sample": True}, {"no_repeat_ngram_size": 3}, {"min_length": 5}])
+    def test_non_greedy_config_uses_backend_generate(self, settings):
+        backend = MagicMock(supports_decode_steps=True)
+        backend.generate.return_value = np.array([ids("▁SELECT", "</s>")])
+        system = self._system(backend)
+        system.gen_config.update(**settings)
+
+        assert system.generate_sql("q", needPredictIntent=False, ddl_context="") == "SELECT"
+        backend.generate.assert_called_once()
+        backend.decode_step.assert_not_called()
+        assert non_greedy_settings(system.gen_config) == list(settings)
+
+
+@pytest.fixture(scope="module")
+def tiny_tf_backend():
+    config = T5Config(
+        vocab_size=16, d_model=32, d_kv=8, d_ff=64, num_layers=2, num_decoder_layers=2, num_heads=4,
+        decoder_start_token_id=0, pad_token_id=0, eos_token_id=1,
+    )
+    model = TFT5ForConditionalGeneration(config)
+    model(input_ids=tf.ones((1, 4), tf.int32), decoder_input_ids=tf.zeros((1, 1), tf.int32))
+    for index, weight in enumerate(model.weights):
+        weight.assign(tf.random.stateless_normal(weight.shape, seed=(index, 1), stddev=0.5))
+    backend = TFBackend()
+    backend.model = model
+    return backend
+
+
+def _ragged_inputs(seed):
+    input_ids = np.random.default_rng(seed).integers(2, 16, size=(2, 9))
+    attention_mask = np.ones_like(input_ids)
+    input_ids[1, 5:] = 0
+    attention_mask[1, 5:] = 0
+    return input_ids, attention_mask
+
+
+class TestTFBackendDecodeSteps:
+
+    def test_greedy_search_matches_transformers_generate(self, tiny_tf_backend):
+        input_ids, attention_mask = _ragged_inputs(0)
+
+        output = greedy_search(tiny_tf_backend, input_ids, attention_mask, 15,
+                               decoder_start_token_id=0, eos_token_id=1, pad_token_id=0)
+
+        expected = tiny_tf_backend.model.generate(
+            input_ids=tf.constant(input_ids), attention_mask=tf.constant(attention_mask),
+            max_new_tokens=15, do_sample=False
+        ).numpy()
+        np.testing.assert_array_equal(output.sequences, expected)
+
+    def test_prompt_lookup_matches_greedy_search(self, tiny_tf_backend):
+        drafted = 0
+        for seed in range(4):
+            input_ids, attention_mask = _ragged_inputs(seed)
+            greedy = greedy_search(tiny_tf_backend, input_ids, attention_mask, 12, 0, 1, 0)
+
+            output = prompt_lookup_search(tiny_tf_backend, input_ids, attention_mask, 12, 0, 1, 0,
+                                          max_ngram_size=2, num_draft_tokens=4)
+
+            np.testing.assert_array_equal(output.sequences, greedy.sequences)
+            drafted += output.draft_tokens
+        # A 16-token vocabulary guarantees prompt matches, so verification and cache cropping were exercised
+        assert drafted > 0
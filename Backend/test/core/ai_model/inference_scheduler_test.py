@@ -0,0 +1,97 @@
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from core.ai_model.inference_scheduler import InferenceScheduler
+
+
+class RecordingRunner:
+    """Stub batch runner that records every batch it receives."""
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+        time.sleep(self.delay)
+        return [f"SQL({item})" for item in items]
+
+
+class TestInferenceScheduler:
+
+    def test_single_request_returns_own_result(self):
+        runner = RecordingRunner()
+        scheduler = InferenceScheduler(runner, max_batch_size=4, max_wait_ms=1)
+
+        assert scheduler.run("q1") == "SQL(q1)"
+        assert runner.batches == [["q1"]]
+        scheduler.shutdown()
+
+    def test_concurrent_requests_are_batched(self):
+        """Requests arriving within the wait window share one batched call."""
+        runner = RecordingRunner()
+        scheduler = InferenceScheduler(runner, max_batch_size=8, max_wait_ms=200)
+        questions = [f"q{i}" for i in range(8)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(scheduler.run, questions))
+
+        # Every caller gets its own decoded result, in its own order
+        assert results == [f"SQL({q})" for q in questions]
+        assert len(runner.batches) < len(questions)
+        assert sorted(sum(runner.batches, [])) == sorted(questions)
+        scheduler.shutdown()
+
+    def test_batch_size_is_capped(self):
+        runner = RecordingRunner()
+        scheduler = InferenceScheduler(runner, max_batch_size=2, max_wait_ms=200)
+
+        futures = [scheduler.submit(f"q{i}") for i in range(5)]
+        assert [f.result(timeout=5) for f in futures] == [f"SQL(q{i})" for i in range(5)]
+        assert all(len(batch) <= 2 for batch in runner.batches)
+        scheduler.shutdown()
+
+    def test_runner_exception_propagates_to_all_callers(self):
+        def failing_runner(items):
+            raise ValueError("model crashed")
+
+        scheduler = InferenceScheduler(failing_runner, max_batch_size=4, max_wait_ms=1)
+
+        with pytest.raises(ValueError, match="model crashed"):
+            scheduler.run("q1")
+        scheduler.shutdown()
+
+    def test_cancelled_request_is_skipped(self):
+        runner = RecordingRunner(delay=0.2)
+        scheduler = InferenceScheduler(runner, max_batch_size=1, max_wait_ms=0)
+
+        first = scheduler.submit("busy")
+        time.sleep(0.05)  # let the worker pick up the first request
+        cancelled = scheduler.submit("abandoned")
+        assert cancelled.cancel()
+
+        assert first.result(timeout=5) == "SQL(busy)"
+        scheduler.shutdown()
+        assert ["abandoned"] not in runner.batches
+
+    def test_stats(self):
+        runner = RecordingRunner()
+        scheduler = InferenceScheduler(runner, max_batch_size=4, max_wait_ms=1, name="t5")
+
+        scheduler.run("q1")
+        scheduler.run("q2")
+        stats = scheduler.get_stats()
+
+        assert stats["name"] == "t5"
+        assert stats["requests"] == 2
+        assert stats["batches"] == 2
+        assert stats["avg_batch_size"] == 1.0
+        assert stats["batch_size_histogram"] == {1: 2}
+        assert stats["queue_depth"] == 0
+        scheduler.shutdown()
+
+    def test_invalid_batch_size(self):
+        with pytest.raises(ValueError):
+            InferenceScheduler(RecordingRunner(), max_batch_size=0)
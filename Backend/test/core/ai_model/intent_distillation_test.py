@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from sklearn.svm import OneClassSVM
+from core.ai_model.intent_distillation import LinearIntentClassifier, distill_ocsvm, evaluate
+from core.ai_model.query_intent_recognizer import QueryIntentRecognizer
+
+
+def normalize(X):
+    return X / np.linalg.norm(X, axis=1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Normalized embeddings around a few topic centres (the questions) plus scattered outliers."""
+    rng = np.random.default_rng(0)
+    centres = rng.normal(size=(8, 64))
+
+    def questions(count):
+        return normalize(centres[rng.integers(len(centres), size=count)] + 0.35 * rng.normal(size=(count, 64)))
+
+    train = questions(1500)
+    held_out = np.vstack([questions(500), normalize(rng.normal(size=(200, 64)))])
+    svm = OneClassSVM(nu=0.1, gamma="scale").fit(train)
+    return svm, train, held_out
+
+
+class TestDistillOCSVM:
+
+    def test_nystroem_agrees_with_ocsvm(self, data):
+        svm, train, held_out = data
+
+        classifier = distill_ocsvm(svm, train, method="nystroem", n_components=64)
+
+        assert classifier.n_components == 64
+        assert (classifier.predict(held_out) == svm.predict(held_out)).mean() >= 0.97
+
+    def test_rff_agrees_with_ocsvm(self, data):
+        svm, train, held_out = data
+
+        classifier = distill_ocsvm(svm, train, method="rff", n_components=1024)
+
+        assert (classifier.predict(held_out) == svm.predict(held_out)).mean() >= 0.85
+
+    def test_support_vectors_as_landmarks_reproduce_decision_values(self, data):
+        svm, train, held_out = data
+
+        classifier = distill_ocsvm(svm, train, method="nystroem", n_components=len(svm.support_vectors_))
+
+        np.testing.assert_allclose(classifier.decision_function(held_out), svm.decision_function(held_out),
+                                   atol=1e-2)
+
+    def test_save_and_load_round_trip(self, data, tmp_path):
+        svm, train, held_out = data
+        for method in ("nystroem", "rff"):
+            classifier = distill_ocsvm(svm, train, method=method, n_components=32)
+            classifier.save(str(tmp_path / f"{method}.npz"))
+
+            loaded = LinearIntentClassifier.load(str(tmp_path / f"{method}.npz"))
+
+            assert loaded.method == method
+            np.testing.assert_array_equal(loaded.decision_function(held_out), classifier.decision_function(held_out))
+
+    def test_rejects_non_rbf_kernel(self, data):
+        _, train, _ = data
+        svm = OneClassSVM(kernel="linear").fit(train[:100])
+
+        with pytest.raises(ValueError, match="RBF"):
+            distill_ocsvm(svm, train)
+
+    def test_rejects_unknown_method(self, data):
+        svm, train, _ = data
+
+        with pytest.raises(ValueError, match="Unknown method"):
+            distill_ocsvm(svm, train, method="pca")
+
+    def test_evaluate_reports_agreement_and_latency(self, data):
+        svm, train, held_out = data
+        classifier = distill_ocsvm(svm, train, n_components=64)
+
+        report = evaluate(svm, classifier, held_out, batch_sizes=(1, 256), repeats=2)
+
+        assert report["agreement"] >= 0.97
+        assert report["agreement_in_domain"] is not None and report["agreement_out_of_domain"] is not None
+        assert set(report["latency_ms"]) == {1, 256}
+        assert set(report["latency_ms"][256]) == {"ocsvm", "distilled"}
+
+
+class TestQueryIntentRecognizerClassifier:
+
+    def test_loads_distilled_classifier(self, data, tmp_path):
+        svm, train, held_out = data
+        distill_ocsvm(svm, train, n_components=64).save(str(tmp_path / "intent.npz"))
+        recognizer = QueryIntentRecognizer(svm_model_path=str(tmp_path / "intent.npz"))
+        recognizer.embedder = MagicMock()
+        recognizer.embedder.encode.side_effect = lambda texts, convert_to_numpy: held_out[:len(texts)]
+
+        recognizer.load_classifier()
+        predictions = recognizer.predict_batch([f"question {index}" for index in range(10)])
+
+        assert isinstance(recognizer.svm_model, LinearIntentClassifier)
+        np.testing.assert_array_equal(predictions, svm.predict(held_out[:10]))
+        assert recognizer.get_stats()["classifier"] == "LinearIntentClassifier"
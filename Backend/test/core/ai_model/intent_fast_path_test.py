@@ -0,0 +1,120 @@
+import json
+import numpy as np
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from core.ai_model.intent_fast_path import IntentFastPath
+from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+DEV_PATH = Path(__file__).resolve().parents[4] / "datasets" / "data" / "dev.jsonl"
+EMPLOYEES_DDL = "CREATE TABLE employees (id INT, full_name VARCHAR(50), salary INT, department VARCHAR(30), hired_at DATE)"
+SMALL_TALK = ["hello", "Hi there!", "thanks!", "How are you?", "tell me a joke", "What's the weather like today?",
+              "who are you", "Good morning", "write a poem about databases", "bye", "What can you do?"]
+
+
+class TestIntentFastPath:
+
+    def setup_method(self):
+        self.fast_path = IntentFastPath(accept_score=3, reject_score=-3)
+
+    def test_accepts_question_naming_columns(self):
+        assert self.fast_path.decide("What is the average salary per department?", EMPLOYEES_DDL) is True
+        assert self.fast_path.decide("List employees hired after 2020", EMPLOYEES_DDL) is True
+
+    def test_rejects_small_talk(self):
+        for question in SMALL_TALK:
+            assert self.fast_path.decide(question, EMPLOYEES_DDL) is False, question
+
+    def test_ambiguous_questions_fall_through(self):
+        assert self.fast_path.decide("Who is Amir Johnson?", EMPLOYEES_DDL) is None
+        # Small talk that also asks for data is left to the model
+        assert self.fast_path.decide("Hello, how many employees are there?", EMPLOYEES_DDL) is None
+
+    def test_requires_ddl_context(self):
+        assert self.fast_path.decide("hello", None) is None
+        assert self.fast_path.decide("What is the average salary per department?", "") is None
+        assert self.fast_path.get_stats()["no_ddl"] == 2
+
+    def test_score_breakdown(self):
+        score, phrases, matches, chitchat = self.fast_path.score("Show the total salary of each department",
+                                                                 EMPLOYEES_DDL)
+
+        assert (phrases, matches, chitchat) == (3, 2, False)
+        assert score == 2 + 4
+
+    def test_thresholds_are_configurable(self):
+        strict = IntentFastPath(accept_score=10, reject_score=-10)
+
+        assert strict.decide("What is the average salary per department?", EMPLOYEES_DDL) is None
+        assert strict.decide("hello", EMPLOYEES_DDL) is None
+
+    def test_never_rejects_wikisql_questions(self):
+        """WikiSQL values such as "bye" or "story" must not read as small talk."""
+        ddl = "CREATE TABLE t (col0 TEXT, col1 TEXT)"
+        with open(DEV_PATH, encoding="utf-8") as f:
+            questions = [json.loads(line)["question"] for line in f]
+
+        assert not any(self.fast_path.decide(question, ddl) is False for question in questions)
+
+    def test_counters(self):
+        self.fast_path.decide("What is the average salary per department?", EMPLOYEES_DDL)
+        self.fast_path.decide("hello", EMPLOYEES_DDL)
+        self.fast_path.decide("Who is Amir Johnson?", EMPLOYEES_DDL)
+        self.fast_path.decide("Who is Amir Johnson?", EMPLOYEES_DDL)
+
+        stats = self.fast_path.get_stats()
+        assert (stats["requests"], stats["accepted"], stats["rejected"], stats["fell_through"]) == (4, 1, 1, 2)
+        assert stats["fired_rate"] == pytest.approx(0.5)
+        assert stats["avg_decide_us"] > 0
+
+    def test_shadow_comparison_counts_disagreements(self, capsys):
+        self.fast_path.record_shadow("q1", True, True)
+        self.fast_path.record_shadow("q2", True, False)
+        self.fast_path.record_shadow("q3", False, True)
+
+        stats = self.fast_path.get_stats()
+        assert stats["shadow_compared"] == 3
+        assert stats["shadow_agreement"] == pytest.approx(1 / 3)
+        assert (stats["shadow_false_accepts"], stats["shadow_false_rejects"]) == (1, 1)
+        assert "q2" in capsys.readouterr().out
+
+
+class TestPredictIntentFastPath:
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def _system(self, mock_intent, shadow_mode=False):
+        with patch('core.ai_model.text_to_sql_system.model_config.INTENT_FAST_PATH_SHADOW', shadow_mode):
+            return TextToSQLSystem(batching_enabled=False, inference_backend=MagicMock(),
+                                   schema_linking_enabled=False, tokenization_cache_enabled=False)
+
+    def test_confident_decision_skips_embedding_model(self):
+        system = self._system()
+
+        assert system.predict_intent("What is the average salary per department?", EMPLOYEES_DDL) is True
+        assert system.predict_intent("tell me a joke", EMPLOYEES_DDL) is False
+        system.query_intent_recognizer.predict.assert_not_called()
+
+    def test_ambiguous_question_uses_embedding_model(self):
+        system = self._system()
+        system.query_intent_recognizer.predict.return_value = np.int64(1)
+
+        assert system.predict_intent("Who is Amir Johnson?", EMPLOYEES_DDL) is True
+        system.query_intent_recognizer.predict.assert_called_once_with("Who is Amir Johnson?")
+
+    def test_shadow_mode_keeps_model_decision(self):
+        system = self._system(shadow_mode=True)
+        system.query_intent_recognizer.predict.return_value = np.int64(-1)
+
+        assert system.predict_intent("What is the average salary per department?", EMPLOYEES_DDL) is False
+        stats = system.get_stats()["intent_fast_path"]
+        assert stats["shadow_mode"] is True
+        assert (stats["shadow_compared"], stats["shadow_false_accepts"]) == (1, 1)
+
+    def test_disabled_fast_path(self):
+        with patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer'):
+            system = TextToSQLSystem(batching_enabled=False, inference_backend=MagicMock(),
+                                     intent_fast_path_enabled=False)
+        system.query_intent_recognizer.predict.return_value = np.int64(1)
+
+        assert system.predict_intent("hello", EMPLOYEES_DDL) is True
+        assert system.get_stats()["intent_fast_path"] is None
@@ -0,0 +1,211 @@
+import threading
+import numpy as np
+from unittest.mock import MagicMock, patch
+from core.ai_model.memory_manager import MemoryManager
+from core.ai_model.model_registry import NOT_LOADED, READY, ModelHandle, ModelRegistry
+from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+MIB = 2 ** 20
+
+
+class FakeProcess:
+    """RSS of a process whose models take a fixed amount of memory each while loaded."""
+
+    def __init__(self, base_mb=100):
+        self.base_mb = base_mb
+        self.loaded = {}
+
+    def rss(self):
+        return int((self.base_mb + sum(self.loaded.values())) * MIB)
+
+    def handle(self, name, size_mb):
+        return ModelHandle(name, lambda: self.loaded.__setitem__(name, size_mb),
+                           unload=lambda: self.loaded.pop(name))
+
+
+def make_manager(process, handles, **kwargs):
+    manager = MemoryManager(handles, **kwargs)
+    patch('core.ai_model.memory_manager.release_freed_memory').start()
+    patch('core.ai_model.memory_manager.process_rss_bytes', side_effect=process.rss).start()
+    return manager
+
+
+class TestMemoryManager:
+
+    def teardown_method(self, method):
+        patch.stopall()
+
+    def test_resident_memory_is_measured_per_load(self):
+        process = FakeProcess()
+        t5, intent = process.handle("t5", 900), process.handle("intent", 100)
+        manager = make_manager(process, [t5, intent])
+
+        t5.ensure_loaded()
+        intent.ensure_loaded()
+
+        assert t5.resident_bytes == 900 * MIB
+        assert intent.resident_bytes == 100 * MIB
+        stats = manager.get_stats()
+        assert stats["loads"] == 2
+        assert [(event["model"], event["reason"]) for event in stats["events"]] == [("t5", "first use"), ("intent", "first use")]
+
+    def test_idle_models_are_unloaded_and_reload_on_next_use(self):
+        process = FakeProcess()
+        t5, intent = process.handle("t5", 900), process.handle("intent", 100)
+        manager = make_manager(process, [t5, intent], idle_ttl_seconds=60)
+        with t5.use(), intent.use():
+            pass
+        t5.last_used -= 120
+
+        assert manager.check() == ["t5"]
+        assert t5.state == NOT_LOADED and intent.ready
+        assert process.rss() == 200 * MIB
+
+        with t5.use():
+            assert t5.ready
+        assert t5.loads == 2
+        stats = manager.get_stats()
+        assert stats["idle_unloads"] == 1
+        assert [event["reason"] for event in stats["events"]] == ["first use", "first use", "idle", "reload"]
+
+    def test_models_in_use_are_never_unloaded(self):
+        process = FakeProcess()
+        t5 = process.handle("t5", 900)
+        manager = make_manager(process, [t5], idle_ttl_seconds=60, budget_bytes=500 * MIB)
+
+        with t5.use():
+            t5.last_used -= 120
+            assert manager.check() == []
+            assert t5.ready
+
+        assert manager.get_stats()["over_budget"] > 0
+        assert manager.check() == ["t5"]
+
+    def test_budget_unloads_least_recently_used_first(self):
+        process = FakeProcess()
+        t5, intent = process.handle("t5", 600), process.handle("intent", 300)
+        manager = make_manager(process, [t5, intent], budget_bytes=800 * MIB)
+        with intent.use():
+            pass
+        intent.last_used -= 10
+
+        # Loading T5 puts the process at 1000 MiB: the intent model was used least recently
+        with t5.use():
+            pass
+
+        assert intent.state == NOT_LOADED and t5.ready
+        assert manager.get_stats()["budget_unloads"] == 1
+
+        # Its size is known now: T5 is unloaded before the intent model loads again
+        with intent.use():
+            pass
+        assert t5.state == NOT_LOADED and intent.ready
+        assert process.rss() <= 800 * MIB
+
+    def test_disabled_without_ttl_or_budget(self):
+        manager = MemoryManager([ModelHandle("t5", MagicMock())])
+
+        manager.start()
+
+        assert not manager.enabled
+        assert manager._thread is None
+
+    def test_unload_waits_for_concurrent_users(self):
+        process = FakeProcess()
+        t5 = process.handle("t5", 900)
+        make_manager(process, [t5])
+        t5.acquire()
+        released = threading.Event()
+
+        def user():
+            with t5.use():
+                released.wait()
+
+        thread = threading.Thread(target=user)
+        thread.start()
+        t5.release()
+        assert not t5.unload()
+
+        released.set()
+        thread.join()
+        assert t5.unload()
+
+
+class TestIndependentLoading:
+
+    def _system(self):
+        with patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer') as mock_intent:
+            mock_intent.return_value.is_loaded.return_value = False
+            system = TextToSQLSystem(batching_enabled=False, inference_backend=MagicMock(),
+                                     schema_linking_enabled=False, tokenization_cache_enabled=False,
+                                     intent_fast_path_enabled=False, speculative_intent_enabled=False)
+        system.inference_backend.supports_decode_steps = False
+        system.inference_backend.generate.return_value = [[1]]
+        return system
+
+    def _load_generator(self, system):
+        tokenizer = MagicMock(pad_token_id=0)
+        tokenizer.return_value = {'input_ids': [[1, 2]]}
+        tokenizer.decode.return_value = "SELECT 1"
+        system.t5_tokenizer = tokenizer
+
+    def test_generation_without_intent_check_does_not_load_intent_model(self):
+        system = self._system()
+        system.generator_model._load = lambda: self._load_generator(system)
+        system.generator_model._warmup = None
+
+        assert system.generate_sql("q", False, "CREATE TABLE t (a INT)") == "SELECT 1"
+
+        assert system.generator_model.ready
+        assert system.intent_model.state == NOT_LOADED
+        system.query_intent_recognizer.load_embedder.assert_not_called()
+
+    def test_unloaded_generator_reloads_on_next_request(self):
+        system = self._system()
+        system.generator_model._load = lambda: self._load_generator(system)
+        system.generator_model._warmup = None
+
+        assert system.generate_sql("q", False, "CREATE TABLE t (a INT)") == "SELECT 1"
+        assert system.generator_model.unload()
+        assert system.t5_tokenizer is None and system.gen_config is None
+        system.inference_backend.unload.assert_called_once()
+
+        assert system.generate_sql("q", False, "CREATE TABLE t (a INT)") == "SELECT 1"
+        assert system.generator_model.loads == 2
+
+    def test_intent_check_loads_intent_model_on_demand(self):
+        system = self._system()
+        self._load_generator(system)
+        recognizer = system.query_intent_recognizer
+        recognizer.predict.return_value = np.int64(1)
+
+        system.generate_sql("q", True, "CREATE TABLE t (a INT)")
+
+        recognizer.load_embedder.assert_called_once()
+        recognizer.load_classifier.assert_called_once()
+        assert system.intent_model.ready
+        assert system.get_stats()["memory"]["models"]["intent"]["state"] == READY
+
+
+class TestRegistryReadiness:
+
+    def _registry(self, preload=True):
+        tts_system = MagicMock()
+        tts_system.intent_model = ModelHandle("intent", MagicMock(), unload=MagicMock())
+        tts_system.generator_model = ModelHandle("t5", MagicMock(), unload=MagicMock())
+        return ModelRegistry(tts_system, preload=preload)
+
+    def test_unloaded_models_keep_the_registry_ready(self):
+        registry = self._registry()
+        registry.load_all()
+
+        assert registry.tts_system.generator_model.unload()
+
+        assert registry.ready
+
+    def test_without_preload_nothing_loads_at_startup(self):
+        registry = self._registry(preload=False)
+
+        assert registry.start() is None
+        assert registry.ready
+        assert all(handle.state == NOT_LOADED for handle in registry.models.values())
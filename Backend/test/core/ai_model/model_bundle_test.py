@@ -0,0 +1,150 @@
+import json
+import joblib
+import numpy as np
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from core.ai_model.inference_backend import TFBackend, create_inference_backend
+from core.ai_model.model_bundle import MANIFEST_FILE, T5_WEIGHTS_FILE, ModelBundle, build_bundle
+from core.ai_model.query_intent_recognizer import QueryIntentRecognizer
+
+DEV_PATH = Path(__file__).resolve().parents[4] / "datasets" / "data" / "dev.jsonl"
+QUESTIONS = ["How many users are there?", "Show the names of employees in each department", "hello there"]
+
+
+def dev_questions(limit=500):
+    with open(DEV_PATH, encoding="utf-8") as f:
+        return [json.loads(line)["question"] for _, line in zip(range(limit), f)]
+
+
+def build_t5(directory: Path):
+    import sentencepiece as spm
+    from transformers import GenerationConfig, T5Config, T5Tokenizer, TFT5ForConditionalGeneration
+
+    directory.mkdir()
+    spm.SentencePieceTrainer.train(
+        sentence_iterator=iter(dev_questions()), model_prefix=str(directory / "spiece"), vocab_size=300,
+        model_type="unigram", character_coverage=1.0, pad_id=0, eos_id=1, unk_id=2, bos_id=-1, minloglevel=2
+    )
+    tokenizer = T5Tokenizer(str(directory / "spiece.model"), legacy=True, extra_ids=0)
+    tokenizer.save_pretrained(str(directory))
+    config = T5Config(vocab_size=len(tokenizer), d_model=16, d_kv=4, d_ff=32, num_layers=1, num_heads=2,
+                      decoder_start_token_id=0)
+    model = TFT5ForConditionalGeneration(config)
+    model(input_ids=np.ones((1, 4), dtype=np.int32), decoder_input_ids=np.zeros((1, 1), dtype=np.int32))
+    model.save_pretrained(str(directory))
+    GenerationConfig.from_model_config(config).save_pretrained(str(directory))
+    return model, tokenizer
+
+
+def build_minilm(directory: Path):
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    words = sorted({word for question in dev_questions() for word in question.lower().replace("?", " ").split()})
+    transformer_dir = directory.parent / "bert"
+    transformer_dir.mkdir()
+    (transformer_dir / "vocab.txt").write_text(
+        "\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "?"] + words), encoding="utf-8"
+    )
+    tokenizer = BertTokenizer(str(transformer_dir / "vocab.txt"))
+    tokenizer.save_pretrained(str(transformer_dir))
+    config = BertConfig(vocab_size=len(tokenizer), hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+                        intermediate_size=32)
+    BertModel(config).save_pretrained(str(transformer_dir))
+    transformer = models.Transformer(str(transformer_dir))
+    pooling = models.Pooling(transformer.get_word_embedding_dimension())
+    embedder = SentenceTransformer(modules=[transformer, pooling])
+    embedder.save(str(directory))
+    return embedder
+
+
+@pytest.fixture(scope="module")
+def sources(tmp_path_factory):
+    from sklearn.svm import OneClassSVM
+
+    root = tmp_path_factory.mktemp("sources")
+    t5_model, t5_tokenizer = build_t5(root / "t5")
+    embedder = build_minilm(root / "minilm")
+    svm = OneClassSVM(nu=0.5).fit(embedder.encode(dev_questions(200)))
+    joblib.dump(svm, root / "ocsvm_model.pkl")
+    return {"root": root, "t5_model": t5_model, "t5_tokenizer": t5_tokenizer, "embedder": embedder, "svm": svm}
+
+
+@pytest.fixture(scope="module")
+def bundle(sources, tmp_path_factory):
+    root = sources["root"]
+    return build_bundle(tmp_path_factory.mktemp("bundle"), str(root / "t5"), None, str(root / "minilm"),
+                        str(root / "ocsvm_model.pkl"))
+
+
+class TestModelBundle:
+
+    def test_manifest_lists_every_artifact(self, bundle):
+        files = bundle.manifest["files"]
+
+        assert T5_WEIGHTS_FILE in files
+        assert {"t5/tokenizer.json", "t5/spiece.model", "t5/generation_config.json",
+                "minilm/model.safetensors", "minilm_onnx/embedder_model.onnx", "intent/ocsvm_model.pkl"} <= set(files)
+        assert all(bundle.verify_checksums().values())
+
+    def test_t5_loads_offline_from_bundle(self, bundle, sources, monkeypatch):
+        from transformers import GenerationConfig, T5Tokenizer
+        monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+
+        backend = TFBackend(**bundle.t5_source())
+        backend.load()
+        source, kwargs = backend.tokenizer_source
+        tokenizer = T5Tokenizer.from_pretrained(source, **kwargs)
+        GenerationConfig.from_pretrained(source, **kwargs)
+
+        assert kwargs == {"local_files_only": True}
+        for loaded, original in zip(backend.model.weights, sources["t5_model"].weights):
+            np.testing.assert_array_equal(loaded.numpy(), original.numpy())
+        assert tokenizer(QUESTIONS)["input_ids"] == sources["t5_tokenizer"](QUESTIONS)["input_ids"]
+
+    def test_intent_recognizer_loads_offline_from_bundle(self, bundle, sources, monkeypatch):
+        monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+
+        recognizer = QueryIntentRecognizer(**bundle.intent_source())
+        recognizer.lazy_load()
+
+        np.testing.assert_allclose(recognizer.embed_batch(QUESTIONS), sources["embedder"].encode(QUESTIONS),
+                                   atol=1e-6)
+        np.testing.assert_array_equal(recognizer.predict_batch(QUESTIONS),
+                                      sources["svm"].predict(sources["embedder"].encode(QUESTIONS)))
+
+    def test_onnx_intent_embedder_loads_from_bundle(self, bundle, sources):
+        recognizer = QueryIntentRecognizer(embedder_backend="onnx", **bundle.intent_source())
+        recognizer.lazy_load()
+
+        np.testing.assert_allclose(recognizer.embed_batch(QUESTIONS), sources["embedder"].encode(QUESTIONS),
+                                   atol=1e-5)
+
+    def test_backend_factory_uses_configured_bundle(self, bundle):
+        with patch("core.ai_model.inference_backend.model_config.MODEL_BUNDLE_DIR", str(bundle.path)), \
+                patch("core.ai_model.inference_backend.model_config.VOCAB_PRUNING_PATH", ""):
+            backend = create_inference_backend("tf")
+
+        assert backend.tokenizer_source == (str(bundle.t5_dir), {"local_files_only": True})
+
+    def test_rejects_directory_without_manifest(self, tmp_path):
+        with pytest.raises(ValueError, match="not a model bundle"):
+            ModelBundle(tmp_path)
+
+    def test_rejects_truncated_bundle(self, tmp_path):
+        (tmp_path / "t5").mkdir()
+        (tmp_path / T5_WEIGHTS_FILE).write_bytes(b"abc")
+        manifest = {"format_version": 1, "files": {T5_WEIGHTS_FILE: {"bytes": 10, "sha256": ""}}}
+        (tmp_path / MANIFEST_FILE).write_text(json.dumps(manifest), encoding="utf-8")
+
+        with pytest.raises(ValueError, match="incomplete"):
+            ModelBundle(tmp_path)
+
+    def test_detects_corrupted_file(self, tmp_path):
+        (tmp_path / "t5").mkdir()
+        (tmp_path / T5_WEIGHTS_FILE).write_bytes(b"abc")
+        manifest = {"format_version": 1, "files": {T5_WEIGHTS_FILE: {"bytes": 3, "sha256": "0" * 64}}}
+        (tmp_path / MANIFEST_FILE).write_text(json.dumps(manifest), encoding="utf-8")
+
+        assert ModelBundle(tmp_path).verify_checksums() == {T5_WEIGHTS_FILE: False}
@@ -0,0 +1,169 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from core.ai_model import model_registry
+from core.ai_model.model_registry import FAILED, NOT_LOADED, READY, ModelHandle, ModelRegistry, get_model_registry
+from core.ai_model.text_to_sql_system import TextToSQLSystem, WARMUP_INPUTS
+
+
+def run_concurrently(target, count=8):
+    barrier = threading.Barrier(count)
+
+    def worker():
+        barrier.wait()
+        target()
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestModelHandle:
+
+    def test_concurrent_callers_share_one_load(self):
+        load = MagicMock(side_effect=lambda: time.sleep(0.05))
+        handle = ModelHandle("t5", load)
+
+        run_concurrently(handle.ensure_loaded)
+
+        load.assert_called_once()
+        assert handle.ready
+        assert handle.get_status()["loads"] == 1
+        assert handle.get_status()["load_seconds"] >= 0.05
+
+    def test_warmup_runs_after_load(self):
+        calls = []
+        handle = ModelHandle("t5", lambda: calls.append("load"), warmup=lambda: calls.append("warmup"))
+
+        handle.ensure_loaded()
+        handle.ensure_loaded()
+
+        assert calls == ["load", "warmup"]
+        status = handle.get_status()
+        assert status["state"] == READY
+        assert status["warmup_seconds"] is not None
+        assert status["ready_at"] is not None
+
+    def test_timed_records_each_artifact(self):
+        handle = ModelHandle("t5", MagicMock())
+        with handle.timed("weights"):
+            time.sleep(0.01)
+
+        assert handle.get_status()["artifact_seconds"]["weights"] >= 0.01
+
+    def test_failed_load_is_reported_and_retried(self):
+        load = MagicMock(side_effect=[OSError("checkpoint not found"), None])
+        handle = ModelHandle("t5", load)
+
+        with pytest.raises(OSError):
+            handle.ensure_loaded()
+        assert handle.state == FAILED
+        assert handle.get_status()["error"] == "OSError: checkpoint not found"
+
+        handle.ensure_loaded()
+        assert handle.ready
+        assert handle.get_status()["error"] is None
+
+
+class TestModelRegistry:
+
+    def _registry(self, t5_load=None):
+        tts_system = MagicMock()
+        tts_system.intent_model = ModelHandle("intent", MagicMock())
+        tts_system.generator_model = ModelHandle("t5", t5_load or MagicMock())
+        return ModelRegistry(tts_system)
+
+    def test_readiness_reports_every_model(self):
+        registry = self._registry()
+
+        readiness = registry.readiness()
+        assert readiness["ready"] is False
+        assert readiness["models"]["t5"]["state"] == NOT_LOADED
+
+        registry.load_all()
+        readiness = registry.readiness()
+        assert readiness["ready"] is True
+        assert {status["state"] for status in readiness["models"].values()} == {READY}
+
+    def test_start_loads_in_background_once(self):
+        release = threading.Event()
+        registry = self._registry(t5_load=release.wait)
+
+        thread = registry.start()
+        assert registry.start() is thread
+        assert registry.ready is False
+
+        release.set()
+        thread.join(timeout=5)
+        assert registry.ready is True
+
+    def test_background_failure_keeps_server_unready(self):
+        registry = self._registry(t5_load=MagicMock(side_effect=RuntimeError("out of memory")))
+
+        registry.start().join(timeout=5)
+
+        readiness = registry.readiness()
+        assert readiness["ready"] is False
+        assert readiness["models"]["t5"]["state"] == FAILED
+        assert readiness["models"]["intent"]["state"] == READY
+
+    def test_shared_registry_is_created_once(self, monkeypatch):
+        monkeypatch.setattr(model_registry, "_registry", None)
+        with patch("core.ai_model.text_to_sql_system.TextToSQLSystem") as mock_system:
+            mock_system.return_value.intent_model = ModelHandle("intent", MagicMock())
+            mock_system.return_value.generator_model = ModelHandle("t5", MagicMock())
+
+            assert get_model_registry() is get_model_registry()
+
+        mock_system.assert_called_once()
+
+
+class TestTextToSQLSystemLoading:
+
+    @patch('core.ai_model.text_to_sql_system.model_config.WARMUP_GENERATIONS', False)
+    def test_concurrent_first_requests_load_t5_once(self):
+        with patch('transformers.T5Tokenizer') as mock_tokenizer, \
+                patch('transformers.GenerationConfig'), \
+                patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer'):
+            backend = MagicMock()
+            backend.tokenizer_source = ("checkpoint", {})
+            backend.load.side_effect = lambda: time.sleep(0.05)
+            system = TextToSQLSystem(batching_enabled=False, inference_backend=backend)
+            system.query_intent_recognizer.is_loaded.return_value = False
+
+            run_concurrently(system._lazy_load_model)
+
+        backend.load.assert_called_once()
+        backend.warmup.assert_called_once()
+        mock_tokenizer.from_pretrained.assert_called_once_with("checkpoint")
+        # The intent model waits for its first use
+        system.query_intent_recognizer.load_embedder.assert_not_called()
+        models = system.get_stats()["models"]
+        assert models["t5"]["state"] == READY
+        assert models["intent"]["state"] != READY
+        assert set(models["t5"]["artifact_seconds"]) == {"weights", "tokenizer", "generation_config"}
+
+        system.embed_questions(["How many users are there?"])
+        system.query_intent_recognizer.load_embedder.assert_called_once()
+        system.query_intent_recognizer.load_classifier.assert_called_once()
+        assert set(system.get_stats()["models"]["intent"]["artifact_seconds"]) == {"minilm", "ocsvm"}
+
+    def test_warmup_runs_dummy_generations(self):
+        with patch('transformers.T5Tokenizer'), \
+                patch('transformers.GenerationConfig'), \
+                patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer'):
+            backend = MagicMock()
+            backend.tokenizer_source = ("checkpoint", {})
+            system = TextToSQLSystem(batching_enabled=False, inference_backend=backend)
+
+            with patch.object(system, "_generate_sql") as mock_generate:
+                system.generator_model.ensure_loaded()
+
+        assert mock_generate.call_count == len(WARMUP_INPUTS)
+        for (question, ddl_context), call in zip(WARMUP_INPUTS, mock_generate.call_args_list):
+            assert call.args == (question,)
+            # Warming T5 does not load the intent model
+            assert call.kwargs == {"needPredictIntent": False, "ddl_context": ddl_context}
@@ -0,0 +1,292 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import socket
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from core.ai_model.cancellation import CLIENT_DISCONNECTED, DEADLINE_EXCEEDED, CancellationToken, RequestCancelledError
+from core.ai_model.model_registry import ModelRegistry
+from core.ai_model.model_server import GENERATE_SQL, OK, ModelServer, decode_payload, encode_message
+from core.ai_model.remote_text_to_sql_system import RemoteModelError, RemoteModelRegistry, RemoteTextToSQLSystem
+from core.ai_model.text_to_sql_system import REJECTED_RESPONSE, TextToSQLSystem
+from core.model.models import StatusEnum
+from core.model.query_models import QueryRequest
+from core.service.sql_manager.query_service import QueryService
+
+DDL = "CREATE TABLE users (id INT, name VARCHAR(50), city VARCHAR(50))"
+
+
+def fake_generate(system, items):
+    # Stands in for the T5 decode: slow enough for concurrent requests to share a batch
+    time.sleep(0.05)
+    return [f"SELECT count(*) FROM users -- {len(input_ids)} tokens" for input_ids, *_ in items]
+
+
+def long_generate(system, items):
+    # A 2 s decode that, like the step-by-step decoders, stops the rows of cancelled requests
+    def cancelled(item):
+        return item[3] is not None and item[3].cancelled
+
+    for _ in range(100):
+        if all(cancelled(item) for item in items):
+            break
+        time.sleep(0.02)
+    return [None if cancelled(item) else "SELECT 1" for item in items]
+
+
+@pytest.fixture
+def socket_path():
+    # AF_UNIX paths are limited to ~100 bytes, shorter than pytest's tmp_path can be
+    directory = tempfile.mkdtemp(prefix="tts-")
+    yield os.path.join(directory, "model.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def make_system(generate):
+    with patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer'), \
+            patch.object(TextToSQLSystem, "_generate_scheduled_batch", generate):
+        system = TextToSQLSystem(batching_enabled=True, inference_backend=MagicMock(name="tf"),
+                                 schema_linking_enabled=False, tokenization_cache_enabled=False)
+    system.inference_backend.name = "tf"
+    system.inference_backend.supports_decode_steps = False
+    system.inference_backend.get_stats.return_value = {"name": "tf"}
+    system.t5_tokenizer = MagicMock(pad_token_id=0)
+    system.t5_tokenizer.side_effect = lambda texts, **kwargs: {'input_ids': [[1] * len(texts[0].split())]}
+    system.query_intent_recognizer.predict.return_value = np.int64(-1)
+    # The fast path decides the intent calls below; the stubbed model rejects everything
+    system.intent_fast_path.shadow_mode = False
+    system.query_intent_recognizer.embed_batch.side_effect = lambda questions: np.ones((len(questions), 4), np.float32)
+    system.query_intent_recognizer.get_stats.return_value = {}
+    for handle in (system.intent_model, system.generator_model):
+        handle._load = lambda: None
+        handle._warmup = None
+    return system
+
+
+@pytest.fixture
+def system():
+    return make_system(fake_generate)
+
+
+@pytest.fixture
+def server(system, socket_path):
+    server = ModelServer(ModelRegistry(system), socket_path)
+    server.start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def client(server):
+    client = RemoteTextToSQLSystem(server.socket_path, pool_size=4, timeout_seconds=10)
+    yield client
+    client.close()
+
+
+class TestWireFormat:
+
+    def test_values_round_trip(self):
+        embeddings = np.arange(6, dtype=np.float32).reshape(2, 3)
+        message = encode_message(GENERATE_SQL, "Wie viele Städte?", True, None, ["a", "b"], {"ready": False},
+                                 2.5, embeddings)
+
+        assert message[0] == GENERATE_SQL
+        assert int.from_bytes(message[1:5], "big") == len(message) - 5
+        question, flag, missing, items, readiness, number, array = decode_payload(message[5:])
+        assert (question, flag, missing, items, readiness, number) == (
+            "Wie viele Städte?", True, None, ["a", "b"], {"ready": False}, 2.5
+        )
+        np.testing.assert_array_equal(array, embeddings)
+
+    def test_integers_round_trip(self):
+        values = [0, 48, -3, 2 ** 40, np.int64(511)]
+
+        decoded = decode_payload(encode_message(GENERATE_SQL, *values)[5:])
+
+        assert decoded == [0, 48, -3, 2 ** 40, 511]
+        assert all(type(value) is int for value in decoded)
+        # bool is an int subclass but keeps its own tag
+        assert decode_payload(encode_message(OK, True)[5:])[0] is True
+
+    def test_numpy_values_in_stats_are_encoded(self):
+        (stats,) = decode_payload(encode_message(OK, {"count": np.int64(3), "rate": np.float32(0.5)})[5:])
+
+        assert stats == {"count": 3, "rate": 0.5}
+
+    def test_unsupported_values_are_rejected(self):
+        with pytest.raises(TypeError):
+            encode_message(OK, object())
+        with pytest.raises(TypeError):
+            encode_message(OK, np.zeros(3))
+
+
+class TestModelServer:
+
+    def test_generate_sql(self, client):
+        assert client.generate_sql("List users in each city", True, DDL).startswith("SELECT count(*) FROM users")
+        assert client.generate_sql("tell me a joke", True, DDL) == REJECTED_RESPONSE
+
+    def test_predict_intent_and_embeddings(self, client, system):
+        assert client.predict_intent("Show the name of users in each city", DDL) is True
+        assert client.predict_intent("Who is Amir Johnson?", DDL) is False
+
+        embeddings = client.embed_questions(["a", "b", "c"])
+        assert embeddings.shape == (3, 4)
+        assert embeddings.dtype == np.float32
+
+    def test_model_version_is_fetched_once(self, client, server):
+        assert client.model_version == client.model_version
+        assert server.get_stats()["requests"]["model_version"] == 1
+
+    def test_server_errors_are_raised_in_the_worker(self, client, system):
+        system.query_intent_recognizer.embed_batch.side_effect = OSError("minilm not found")
+
+        with pytest.raises(RemoteModelError, match="OSError: minilm not found") as error:
+            client.embed_questions(["a"])
+        assert error.value.remote_type == "OSError"
+        # The connection stays usable
+        assert client.predict_intent("Show the name of users in each city", DDL) is True
+        assert client.get_client_stats()["errors"] == 1
+
+    def test_workers_share_one_batching_scheduler(self, socket_path, server):
+        workers = [RemoteTextToSQLSystem(socket_path) for _ in range(4)]
+        results = []
+
+        def call(worker, index):
+            results.append(worker.generate_sql(f"How many users are in city {index}?", False, DDL))
+
+        threads = [threading.Thread(target=call, args=(workers[i % 4], i)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == 16
+        stats = workers[0].get_stats()
+        assert stats["scheduler"]["requests"] == 16
+        assert stats["scheduler"]["batches"] < 16
+        assert stats["model_server"]["requests"]["generate_sql"] == 16
+        assert stats["model_client"]["calls"] == 4 + 1
+
+    def test_pooled_connection_reconnects_after_server_restart(self, system, socket_path):
+        server = ModelServer(ModelRegistry(system), socket_path)
+        server.start()
+        client = RemoteTextToSQLSystem(socket_path)
+        assert client.predict_intent("Show the name of users in each city", DDL) is True
+        server.shutdown()
+
+        restarted = ModelServer(ModelRegistry(system), socket_path)
+        restarted.start()
+        try:
+            assert client.predict_intent("Show the name of users in each city", DDL) is True
+            assert client.get_client_stats()["reconnects"] == 1
+        finally:
+            restarted.shutdown()
+
+    def test_query_service_over_model_server(self, client):
+        history_repo = MagicMock()
+        service = QueryService(client, history_repo)
+
+        response = service.process_and_generate_sql(QueryRequest(
+            question="List the name of users in each city", operator="admin", table_name="users",
+            ddl_context=DDL, need_predict_intent=True
+        ))
+
+        assert response.status == StatusEnum.SUCCESS
+        assert response.result_data.startswith("SELECT count(*) FROM users")
+        history_repo.save_query_history.assert_called_once()
+
+
+class TestModelServerCancellation:
+
+    @pytest.fixture
+    def server(self, socket_path):
+        server = ModelServer(ModelRegistry(make_system(long_generate)), socket_path, cancel_check_seconds=0.02)
+        server.start()
+        yield server
+        server.shutdown()
+
+    @pytest.fixture
+    def client(self, server):
+        client = RemoteTextToSQLSystem(server.socket_path, cancel_check_seconds=0.02)
+        yield client
+        client.close()
+
+    def _wait_for_cancellation(self, server):
+        for _ in range(100):
+            if server.tts_system.get_stats()["cancellation"]["cancelled"]:
+                return server.tts_system.get_stats()["cancellation"]
+            time.sleep(0.02)
+        raise AssertionError("the decode was not cancelled")
+
+    def test_deadline_stops_the_server_decode(self, client, server):
+        started = time.perf_counter()
+        with pytest.raises(RequestCancelledError) as error:
+            client.generate_sql("List users", False, DDL, cancellation=CancellationToken(timeout_seconds=0.2))
+
+        assert error.value.reason == DEADLINE_EXCEEDED
+        assert time.perf_counter() - started < 1.0
+        assert server.tts_system.get_stats()["cancellation"]["reasons"] == {DEADLINE_EXCEEDED: 1}
+        assert server.get_stats()["cancelled"] == 1
+        assert server.get_stats()["errors"] == 0
+
+    def test_cancelled_request_sends_cancel(self, client, server):
+        cancellation = CancellationToken()
+        threading.Timer(0.2, cancellation.cancel).start()
+
+        started = time.perf_counter()
+        with pytest.raises(RequestCancelledError) as error:
+            client.generate_sql("List users", False, DDL, cancellation=cancellation)
+
+        assert error.value.reason == CLIENT_DISCONNECTED
+        assert time.perf_counter() - started < 1.0
+        assert client.get_client_stats()["cancels_sent"] == 1
+        # The connection is back in the pool, in step with the server
+        assert client.predict_intent("Show the name of users in each city", DDL) is True
+        assert client.get_client_stats()["reconnects"] == 0
+
+    def test_closed_connection_stops_the_server_decode(self, server, socket_path):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+        sock.sendall(encode_message(GENERATE_SQL, "List users", False, DDL, None))
+        time.sleep(0.1)
+        started = time.perf_counter()
+        sock.close()
+
+        stats = self._wait_for_cancellation(server)
+
+        assert stats["reasons"] == {CLIENT_DISCONNECTED: 1}
+        assert time.perf_counter() - started < 1.0
+
+
+class TestRemoteModelRegistry:
+
+    def test_readiness_comes_from_the_server(self, client, server):
+        registry = RemoteModelRegistry(client)
+
+        assert registry.start() is None
+        readiness = registry.readiness()
+        assert readiness["ready"] is False
+        assert set(readiness["models"]) == {"intent", "t5"}
+
+        server.registry.load_all()
+        assert registry.ready is True
+
+    def test_unreachable_server_is_not_ready(self, socket_path):
+        registry = RemoteModelRegistry(RemoteTextToSQLSystem(socket_path))
+
+        readiness = registry.readiness()
+        assert readiness["ready"] is False
+        assert "unavailable" in readiness["error"]
+
+    def test_factory_uses_model_server_when_configured(self, socket_path):
+        from core.ai_model import model_registry
+        with patch.object(model_registry, "_registry", None), \
+                patch('core.ai_model.model_config.MODEL_SERVER_SOCKET', socket_path):
+            registry = model_registry.get_model_registry()
+
+        assert isinstance(registry, RemoteModelRegistry)
+        assert registry.tts_system.socket_path == socket_path
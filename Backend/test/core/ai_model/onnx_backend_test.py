@@ -0,0 +1,155 @@
+import os
+import json
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from core.ai_model.decoding import greedy_decode, greedy_search, prompt_lookup_search
+from core.ai_model.inference_backend import ONNXBackend, TFBackend, create_inference_backend
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+
+from transformers import T5Config, T5ForConditionalGeneration  # noqa: E402
+from core.ai_model.onnx_export import export_model  # noqa: E402
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    torch.manual_seed(0)
+    config = T5Config(
+        vocab_size=64, d_model=32, d_kv=8, d_ff=64, num_layers=2, num_decoder_layers=2, num_heads=4,
+        decoder_start_token_id=0, pad_token_id=0, eos_token_id=1,
+    )
+    return T5ForConditionalGeneration(config).eval()
+
+
+@pytest.fixture(scope="module")
+def exported_dir(tiny_model, tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp("t5_onnx")
+    export_model(tiny_model, output_dir, quantize=True)
+    return output_dir
+
+
+def _inputs():
+    rng = np.random.default_rng(0)
+    input_ids = rng.integers(2, 64, size=(3, 9)).astype(np.int64)
+    attention_mask = np.ones_like(input_ids)
+    # Ragged batch: padding on the last two rows
+    input_ids[1, 6:] = 0
+    attention_mask[1, 6:] = 0
+    input_ids[2, 4:] = 0
+    attention_mask[2, 4:] = 0
+    return input_ids, attention_mask
+
+
+def _reference(model, input_ids, attention_mask, max_new_tokens):
+    with torch.no_grad():
+        return model.generate(
+            input_ids=torch.tensor(input_ids), attention_mask=torch.tensor(attention_mask),
+            max_new_tokens=max_new_tokens, do_sample=False, num_beams=1,
+        ).numpy()
+
+
+class TestONNXBackend:
+
+    def test_fp32_greedy_matches_transformers_generate(self, tiny_model, exported_dir):
+        backend = ONNXBackend(str(exported_dir), quantized=False)
+        backend.load()
+        input_ids, attention_mask = _inputs()
+
+        result = greedy_decode(backend, input_ids, attention_mask, max_new_tokens=20,
+                               decoder_start_token_id=0, eos_token_id=1, pad_token_id=0)
+
+        expected = _reference(tiny_model, input_ids, attention_mask, max_new_tokens=20)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_decode_step_logits_match_full_forward(self, tiny_model, exported_dir):
+        backend = ONNXBackend(str(exported_dir), quantized=False)
+        backend.load()
+        input_ids, attention_mask = _inputs()
+        decoder_input_ids = np.array([[0, 5, 7]] * 3, dtype=np.int64)
+
+        state = backend.encode(input_ids, attention_mask)
+        _, past = backend.decode_step(state, decoder_input_ids[:, :1])
+        logits, _ = backend.decode_step(state, decoder_input_ids[:, 1:], past)
+
+        with torch.no_grad():
+            expected = tiny_model(
+                input_ids=torch.tensor(input_ids), attention_mask=torch.tensor(attention_mask),
+                decoder_input_ids=torch.tensor(decoder_input_ids),
+            ).logits.numpy()
+        np.testing.assert_allclose(logits, expected[:, 1:], atol=1e-4)
+
+    def test_prompt_lookup_matches_greedy(self, exported_dir):
+        backend = ONNXBackend(str(exported_dir), quantized=False)
+        backend.load()
+        drafted = 0
+        for seed in range(8):
+            # Prompts over the whole vocabulary, so the generated tokens can be found in them
+            input_ids = np.random.default_rng(seed).permutation(64)[None, :40]
+            attention_mask = np.ones_like(input_ids)
+
+            greedy = greedy_search(backend, input_ids, attention_mask, 20, 0, 1, 0)
+            output = prompt_lookup_search(backend, input_ids, attention_mask, 20, 0, 1, 0, num_draft_tokens=4)
+
+            np.testing.assert_array_equal(output.sequences, greedy.sequences)
+            drafted += output.draft_tokens
+        assert drafted > 0
+
+    def test_int8_backend_generates(self, exported_dir):
+        backend = ONNXBackend(str(exported_dir), quantized=True)
+        assert backend.name == "onnx-int8"
+        assert not backend.is_loaded()
+        backend.load()
+        assert backend.is_loaded()
+        input_ids, attention_mask = _inputs()
+
+        generation_config = MagicMock(max_new_tokens=8, decoder_start_token_id=0, eos_token_id=1, pad_token_id=0)
+        result = backend.generate(input_ids, attention_mask, generation_config)
+
+        assert result.shape[0] == 3
+        assert 1 < result.shape[1] <= 9
+        assert (result[:, 0] == 0).all()
+
+    def test_tokenizer_source_is_export_directory(self, exported_dir):
+        backend = ONNXBackend(str(exported_dir))
+        assert backend.tokenizer_source == (str(exported_dir), {})
+
+
+class TestCreateInferenceBackend:
+
+    def test_tf_backend(self):
+        assert isinstance(create_inference_backend("tf"), TFBackend)
+
+    def test_onnx_backend(self):
+        backend = create_inference_backend("ONNX")
+        assert isinstance(backend, ONNXBackend)
+
+    def test_unknown_backend_raises_error(self):
+        with pytest.raises(ValueError, match="Unknown inference backend"):
+            create_inference_backend("tensorrt")
+
+
+@pytest.mark.skipif(not os.environ.get("TTS_ONNX_PARITY_MODEL_DIR"),
+                    reason="Set TTS_ONNX_PARITY_MODEL_DIR to an exported model directory to run.")
+def test_real_model_parity_on_dev_sample():
+    """Exact-match parity of the exported fp32 and int8 graphs against the TensorFlow model."""
+    from core.ai_model.text_to_sql_system import TextToSQLSystem
+    from benchmark.wikisql import DEV_PATH, build_ddls, load_examples
+
+    model_dir = os.environ["TTS_ONNX_PARITY_MODEL_DIR"]
+    examples = load_examples(DEV_PATH, limit=int(os.environ.get("TTS_ONNX_PARITY_SAMPLES", "100")))
+    ddls = build_ddls(examples)
+    inputs = [f"Question: {example['question']} | {ddls[example['table_id']]}" for example in examples]
+
+    reference = TextToSQLSystem(batching_enabled=False, inference_backend=TFBackend())
+    reference._lazy_load_model()
+    expected = reference._generate_batch(inputs)
+
+    for quantized, min_exact_match in ((False, 1.0), (True, 0.95)):
+        system = TextToSQLSystem(batching_enabled=False, inference_backend=ONNXBackend(model_dir, quantized=quantized))
+        system._lazy_load_model()
+        result = system._generate_batch(inputs)
+        exact_match = np.mean([a == b for a, b in zip(result, expected)])
+        print(json.dumps({"backend": system.inference_backend.name, "exact_match": exact_match}))
+        assert exact_match >= min_exact_match
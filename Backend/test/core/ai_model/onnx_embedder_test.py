@@ -0,0 +1,124 @@
+import json
+import subprocess
+import sys
+import numpy as np
+import pytest
+from pathlib import Path
+from core.ai_model.onnx_embedder import ONNXEmbedder, export_embedder
+from core.ai_model.query_intent_recognizer import QueryIntentRecognizer
+
+BACKEND_DIR = Path(__file__).resolve().parents[3]
+DEV_PATH = Path(__file__).resolve().parents[4] / "datasets" / "data" / "dev.jsonl"
+MAX_SEQ_LENGTH = 24
+
+
+def dev_questions(limit=300):
+    with open(DEV_PATH, encoding="utf-8") as f:
+        return [json.loads(line)["question"] for _, line in zip(range(limit), f)]
+
+
+def build_sentence_transformer(directory: Path, pooling_mode="mean", normalize=True):
+    """A tiny BERT with all-MiniLM-L6-v2's pipeline: mean pooling, then L2 normalization."""
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    directory.mkdir()
+    words = sorted({word for question in dev_questions() for word in question.lower().replace("?", " ").split()})
+    (directory / "vocab.txt").write_text(
+        "\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "?"] + words), encoding="utf-8"
+    )
+    BertTokenizer(str(directory / "vocab.txt")).save_pretrained(str(directory))
+    config = BertConfig(vocab_size=len(words) + 6, hidden_size=32, num_hidden_layers=2, num_attention_heads=4,
+                        intermediate_size=64)
+    BertModel(config).save_pretrained(str(directory))
+
+    transformer = models.Transformer(str(directory), max_seq_length=MAX_SEQ_LENGTH)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode=pooling_mode)
+    modules = [transformer, pooling] + ([models.Normalize()] if normalize else [])
+    return SentenceTransformer(modules=modules, device="cpu")
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    root = tmp_path_factory.mktemp("embedder")
+    model = build_sentence_transformer(root / "bert")
+    export_embedder(model, root / "onnx")
+    return model, root / "onnx"
+
+
+@pytest.fixture(scope="module")
+def questions():
+    questions = dev_questions(100)
+    # Longer than max_seq_length: both runtimes must truncate identically
+    questions.append(" ".join(questions[:5]))
+    return questions
+
+
+class TestONNXEmbedder:
+
+    def test_matches_sentence_transformers(self, exported, questions):
+        model, onnx_dir = exported
+        embedder = ONNXEmbedder(str(onnx_dir), batch_size=8)
+
+        np.testing.assert_allclose(embedder.encode(questions), model.encode(questions), atol=1e-5)
+        np.testing.assert_allclose(np.linalg.norm(embedder.encode(questions), axis=1), 1.0, atol=1e-5)
+
+    def test_batching_does_not_change_embeddings(self, exported, questions):
+        _, onnx_dir = exported
+        embedder = ONNXEmbedder(str(onnx_dir))
+
+        single = np.vstack([embedder.encode([question]) for question in questions[:20]])
+        np.testing.assert_allclose(embedder.encode(questions[:20], batch_size=7), single, atol=1e-5)
+
+    def test_without_normalization(self, tmp_path, questions):
+        model = build_sentence_transformer(tmp_path / "bert", normalize=False)
+        export_embedder(model, tmp_path / "onnx")
+
+        np.testing.assert_allclose(ONNXEmbedder(str(tmp_path / "onnx")).encode(questions), model.encode(questions),
+                                   atol=1e-5)
+
+    def test_rejects_unsupported_pooling(self, tmp_path):
+        model = build_sentence_transformer(tmp_path / "bert", pooling_mode="cls")
+
+        with pytest.raises(ValueError, match="mean pooling"):
+            export_embedder(model, tmp_path / "onnx")
+
+    def test_empty_input(self, exported):
+        model, onnx_dir = exported
+
+        assert ONNXEmbedder(str(onnx_dir)).encode([]).shape == (0, model.get_sentence_embedding_dimension())
+
+    def test_runtime_does_not_import_torch(self, exported):
+        _, onnx_dir = exported
+        script = (
+            "import sys\n"
+            "from core.ai_model.onnx_embedder import ONNXEmbedder\n"
+            f"ONNXEmbedder({str(onnx_dir)!r}).encode(['How many users are there?'])\n"
+            "print('torch' in sys.modules)\n"
+        )
+        completed = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True,
+                                   timeout=120)
+
+        assert completed.returncode == 0, completed.stderr
+        assert completed.stdout.strip() == "False"
+
+
+class TestQueryIntentRecognizerEmbedderBackend:
+
+    def test_onnx_backend_keeps_ocsvm_predictions(self, exported, questions):
+        from sklearn.svm import OneClassSVM
+        model, onnx_dir = exported
+        svm = OneClassSVM(nu=0.3).fit(model.encode(dev_questions(300)[100:]))
+
+        recognizer = QueryIntentRecognizer(embedder_backend="onnx", onnx_embedder_dir=str(onnx_dir))
+        recognizer.load_embedder()
+        recognizer.svm_model = svm
+
+        np.testing.assert_array_equal(recognizer.predict_batch(questions), svm.predict(model.encode(questions)))
+        assert recognizer.get_stats()["embedder_backend"] == "onnx"
+
+    def test_unknown_backend_is_rejected(self):
+        recognizer = QueryIntentRecognizer(embedder_backend="tensorrt")
+
+        with pytest.raises(ValueError, match="Unknown intent embedder backend"):
+            recognizer.load_embedder()
@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from core.ai_model.query_intent_recognizer import QueryIntentRecognizer
+
+
+def fake_encode(texts, convert_to_numpy=True):
+    """Deterministic stand-in for SentenceTransformer.encode."""
+    return np.array([[float(len(text)), float(text.count(" "))] for text in texts], dtype=np.float32)
+
+
+class TestQueryIntentRecognizer:
+
+    def setup_method(self, method):
+        self.recognizer = QueryIntentRecognizer(embedding_cache_size=2)
+        self.recognizer.embedder = MagicMock()
+        self.recognizer.embedder.encode.side_effect = fake_encode
+        self.recognizer.svm_model = MagicMock()
+        self.recognizer.svm_model.predict.side_effect = lambda X: np.where(X[:, 0] > 10, 1, -1)
+
+    def test_predict_batch_single_encode_and_predict_call(self):
+        result = self.recognizer.predict_batch(["How many users are there?", "hi"])
+
+        assert list(result) == [1, -1]
+        self.recognizer.embedder.encode.assert_called_once()
+        self.recognizer.svm_model.predict.assert_called_once()
+        assert self.recognizer.svm_model.predict.call_args[0][0].shape == (2, 2)
+
+    def test_predict_matches_predict_batch(self):
+        assert self.recognizer.predict("How many users are there?") == 1
+        assert self.recognizer.predict("hi") == -1
+
+    def test_embedding_cache_hit_skips_encoder(self):
+        self.recognizer.predict("How many users?")
+        # Same question modulo case and whitespace
+        self.recognizer.predict("  how MANY   users? ")
+
+        assert self.recognizer.embedder.encode.call_count == 1
+        stats = self.recognizer.get_stats()["embedding_cache"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_duplicates_in_batch_encoded_once(self):
+        embeddings = self.recognizer.embed_batch(["List users", "list users", "Count orders"])
+
+        encoded_texts = self.recognizer.embedder.encode.call_args[0][0]
+        assert encoded_texts == ["list users", "count orders"]
+        np.testing.assert_array_equal(embeddings[0], embeddings[1])
+
+    def test_embedding_cache_is_bounded(self):
+        self.recognizer.embed_batch(["a", "b", "c"])
+
+        stats = self.recognizer.get_stats()["embedding_cache"]
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+
+    def test_predict_batch_empty(self):
+        assert len(self.recognizer.predict_batch([])) == 0
+        self.recognizer.embedder.encode.assert_not_called()
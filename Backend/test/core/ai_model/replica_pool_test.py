@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from core.ai_model.inference_backend import InferenceBackend
+from core.ai_model.replica_pool import ReplicaPool, parse_core_sets, run_pinned
+from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+
+class FakeBackend(InferenceBackend):
+
+    def __init__(self, name):
+        self.name = name
+        self.loaded_on = None
+        self.warmed_up = False
+
+    def load(self):
+        self.loaded_on = threading.current_thread().name
+
+    def is_loaded(self):
+        return self.loaded_on is not None
+
+    def warmup(self, generation_config):
+        self.warmed_up = True
+
+    def generate(self, input_ids, attention_mask, generation_config):
+        time.sleep(0.02)
+        return np.array([[len(self.name)]] * len(input_ids))
+
+
+def backend_names(items, backend):
+    return [backend.name for _ in items]
+
+
+class TestParseCoreSets:
+
+    def test_no_pinning(self):
+        assert parse_core_sets("", 3) == [None, None, None]
+
+    def test_explicit_core_lists(self):
+        assert parse_core_sets("0-3;4,6-7", 2) == [frozenset({0, 1, 2, 3}), frozenset({4, 6, 7})]
+
+    def test_auto_splits_available_cores(self):
+        with patch('core.ai_model.replica_pool.os.sched_getaffinity', return_value=set(range(8))):
+            assert parse_core_sets("auto", 2) == [frozenset(range(4)), frozenset(range(4, 8))]
+            with pytest.raises(ValueError):
+                parse_core_sets("auto", 16)
+
+    def test_core_set_count_must_match_replicas(self):
+        with pytest.raises(ValueError):
+            parse_core_sets("0-3;4-7", 3)
+
+
+class TestReplicaPool:
+
+    def test_requests_go_to_least_loaded_replica(self):
+        release = threading.Event()
+
+        def run_batch(items, backend):
+            if backend.name == "a":
+                release.wait()
+            return backend_names(items, backend)
+
+        pool = ReplicaPool([FakeBackend("a"), FakeBackend("b")], run_batch, max_batch_size=1, max_wait_ms=0)
+        blocked = pool.submit("first")
+
+        # Replica "a" is busy: everything else goes to "b" while it is
+        assert [pool.run(item) for item in ("second", "third")] == ["b", "b"]
+        release.set()
+        assert blocked.result(timeout=5) == "a"
+
+        stats = pool.get_stats()
+        assert [replica["requests"] for replica in stats["replicas"]] == [1, 2]
+        assert [replica["in_flight"] for replica in stats["replicas"]] == [0, 0]
+        pool.shutdown()
+
+    def test_each_replica_batches_on_its_own_backend(self):
+        pool = ReplicaPool([FakeBackend("a"), FakeBackend("b")], backend_names, max_batch_size=8, max_wait_ms=20)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(pool.run("item"))) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(set(results)) == ["a", "b"]
+        stats = pool.get_stats()
+        assert stats["requests"] == 16
+        assert sum(replica["scheduler"]["requests"] for replica in stats["replicas"]) == 16
+        pool.shutdown()
+
+    def test_replica_threads_and_loads_are_pinned(self):
+        pinned = []
+        backends = [FakeBackend("a"), FakeBackend("b")]
+        with patch('core.ai_model.replica_pool.os.sched_setaffinity',
+                   side_effect=lambda pid, cores: pinned.append((threading.current_thread().name, cores))):
+            pool = ReplicaPool(backends, backend_names, core_sets=[frozenset({0}), frozenset({1})])
+            pool.load()
+            pool.run("item")
+            pool.shutdown()
+
+        assert [backend.loaded_on for backend in backends] == ["pinned-loader", "pinned-loader"]
+        assert ("pinned-loader", frozenset({0})) in pinned and ("pinned-loader", frozenset({1})) in pinned
+        assert any(name.startswith("t5-replica-") for name, _ in pinned)
+
+    def test_pinning_failure_does_not_stop_the_replica(self):
+        with patch('core.ai_model.replica_pool.os.sched_setaffinity', side_effect=OSError("invalid argument")):
+            pool = ReplicaPool([FakeBackend("a")], backend_names, core_sets=[frozenset({4096})])
+            assert pool.run("item") == "a"
+            pool.shutdown()
+
+    def test_run_pinned_reraises(self):
+        with patch('core.ai_model.replica_pool.os.sched_setaffinity'):
+            with pytest.raises(OSError, match="checkpoint"):
+                run_pinned(frozenset({0}), MagicMock(side_effect=OSError("checkpoint not found")))
+
+    @pytest.mark.skipif(not hasattr(os, "sched_getaffinity"), reason="Linux only")
+    def test_pinning_applies_to_the_thread(self):
+        core = min(os.sched_getaffinity(0))
+
+        assert run_pinned(frozenset({core}), lambda: os.sched_getaffinity(0)) == {core}
+
+
+class TestTextToSQLSystemReplicas:
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def _system(self, mock_intent, backends):
+        system = TextToSQLSystem(inference_backends=backends, generation_control_enabled=False,
+                                 schema_linking_enabled=False, tokenization_cache_enabled=False,
+                                 intent_fast_path_enabled=False)
+        system.t5_tokenizer = MagicMock(pad_token_id=0)
+        system.t5_tokenizer.return_value = {'input_ids': [[1, 2]]}
+        system.t5_tokenizer.decode.side_effect = lambda output, **kwargs: f"SELECT {output[0]}"
+        return system
+
+    def test_generation_is_spread_over_replicas(self):
+        backends = [FakeBackend("a"), FakeBackend("bb")]
+        system = self._system(backends=backends)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(system.generate_sql("q", False, "CREATE TABLE t (a INT)")))
+                   for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert system.replica_pool is system.scheduler
+        assert sorted(set(results)) == ["SELECT 1", "SELECT 2"]
+        stats = system.get_stats()["scheduler"]
+        assert [replica["backend"]["name"] for replica in stats["replicas"]] == ["a", "bb"]
+
+    def test_every_replica_is_loaded_and_warmed_up(self):
+        backends = [FakeBackend("a"), FakeBackend("b")]
+        system = self._system(backends=backends)
+
+        with patch('transformers.T5Tokenizer'), patch('transformers.GenerationConfig'), \
+                patch('core.ai_model.text_to_sql_system.model_config.WARMUP_GENERATIONS', False):
+            system.generator_model.ensure_loaded()
+
+        assert all(backend.is_loaded() and backend.warmed_up for backend in backends)
+
+    def test_replicas_from_config(self):
+        with patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer'), \
+                patch('core.ai_model.text_to_sql_system.model_config.MODEL_REPLICAS', 3), \
+                patch('core.ai_model.text_to_sql_system.create_inference_backend',
+                      side_effect=lambda: FakeBackend("tf")) as create:
+            system = TextToSQLSystem()
+
+        assert create.call_count == 3
+        assert len(system.replica_pool.replicas) == 3
+        assert system.inference_backend is system.inference_backends[0]
+
+    def test_single_backend_keeps_one_scheduler(self):
+        system = self._system(backends=[FakeBackend("a")])
+
+        assert system.replica_pool is None
+        assert system.get_stats()["scheduler"]["name"] == "t5"
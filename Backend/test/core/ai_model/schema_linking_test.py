@@ -0,0 +1,151 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock, patch
+from core.ai_model.schema_linking import (
+    SchemaLinker, build_model_input, count_ddl_columns, name_words, parse_ddl, render_schema
+)
+from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+
+class WordTokenizer:
+    """One token per whitespace-separated word plus the end-of-sequence token."""
+    pad_token_id = 0
+    eos_token_id = 1
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        input_ids = [[1] * (len(text.split()) + 1) for text in texts]
+        return {"input_ids": input_ids, "attention_mask": input_ids}
+
+
+def wide_ddl(columns):
+    return "CREATE TABLE employees (" + ", ".join(f"{column} VARCHAR(20)" for column in columns) + ")"
+
+
+FILLER = [f"attribute_{i}" for i in range(60)]
+
+
+class TestParseDDL:
+
+    def test_parses_tables_columns_and_constraints(self):
+        ddl = ("CREATE TABLE `users` (id INT, price DECIMAL(10, 2), PRIMARY KEY (id)); "
+               "CREATE TEMPORARY TABLE orders (id INT, user_id INT, FOREIGN KEY (user_id) REFERENCES users(id))")
+
+        tables = parse_ddl(ddl)
+
+        assert [table.name for table in tables] == ["users", "orders"]
+        assert tables[0].header == "CREATE TABLE `users`"
+        assert tables[0].columns == ["id INT", "price DECIMAL(10, 2)"]
+        assert tables[0].constraints == ["PRIMARY KEY (id)"]
+        assert tables[1].columns == ["id INT", "user_id INT"]
+        assert count_ddl_columns(ddl) == 4
+
+    def test_render_round_trips_columns(self):
+        tables = parse_ddl("CREATE TABLE t (a INT, b TEXT)")
+
+        assert render_schema(tables) == "CREATE TABLE t (a INT, b TEXT)"
+
+    def test_non_ddl_context_has_no_tables(self):
+        assert parse_ddl("TABLE users") == []
+        assert parse_ddl(None) == []
+
+    def test_name_words_split_identifiers(self):
+        assert name_words("hireDate") == ["hire", "date"]
+        assert name_words("dept_names") == ["dept", "name"]
+        assert name_words("Which salaries?") == ["which", "salary"]
+
+
+class TestSchemaLinker:
+
+    def test_input_that_fits_is_unchanged(self):
+        linker = SchemaLinker(max_input_tokens=128)
+        embed = MagicMock()
+        ddl = wide_ddl(["name", "salary"])
+
+        linked = linker.link("list salaries", ddl, WordTokenizer(), embed)
+
+        assert linked is ddl
+        embed.assert_not_called()
+        stats = linker.get_stats()
+        assert stats["truncated_before"] == 0
+        assert stats["compacted"] == 0
+        assert stats["avg_encoder_tokens_before"] == stats["avg_encoder_tokens_after"]
+
+    def test_wide_schema_is_compacted_to_relevant_columns(self):
+        linker = SchemaLinker(top_k=4, lexical_weight=1.0, max_input_tokens=40)
+        ddl = wide_ddl(FILLER[:20] + ["hire_date"] + FILLER[20:40] + ["salary"])
+        question = "Which employees have a salary above 5000 and what is their hire date?"
+
+        linked = linker.link(question, ddl, WordTokenizer())
+
+        # Both matching columns, then the best-ranked filler while the budget lasts, in DDL order
+        assert parse_ddl(linked)[0].columns == [
+            "attribute_0 VARCHAR(20)", "attribute_1 VARCHAR(20)", "hire_date VARCHAR(20)", "salary VARCHAR(20)"
+        ]
+        assert len(build_model_input(question, linked).split()) + 1 <= 40
+        stats = linker.get_stats()
+        assert stats["truncated_before"] == 1
+        assert stats["truncated_after"] == 0
+        assert stats["compacted"] == 1
+        assert stats["avg_columns_kept"] + stats["avg_columns_dropped"] == 42
+        assert stats["avg_encoder_tokens_after"] <= 40
+
+    def test_minilm_similarity_ranks_columns(self):
+        linker = SchemaLinker(top_k=1, lexical_weight=0.0, max_input_tokens=20)
+        ddl = wide_ddl(["pay", "department", "location"] + FILLER[:10])
+
+        def embed(texts):
+            # The question and "employee pay" point the same way, everything else is orthogonal
+            return np.array([[1.0, 0.0] if text in ("how much do staff earn", "employee pay") else [0.0, 1.0]
+                             for text in texts])
+
+        linked = linker.link("how much do staff earn", ddl, WordTokenizer(), embed)
+
+        assert linked == "CREATE TABLE employees (pay VARCHAR(20))"
+
+    def test_tables_without_relevant_columns_are_dropped(self):
+        linker = SchemaLinker(top_k=2, lexical_weight=1.0, max_input_tokens=30)
+        ddl = (wide_ddl(["salary"] + FILLER[:15]) + "; "
+               "CREATE TABLE offices (" + ", ".join(f"{column} INT" for column in FILLER[15:30]) + ")")
+
+        linked = linker.link("top salary", ddl, WordTokenizer())
+
+        assert [table.name for table in parse_ddl(linked)] == ["employees"]
+        assert "salary VARCHAR(20)" in linked
+
+    def test_question_longer_than_budget_keeps_ddl(self):
+        linker = SchemaLinker(max_input_tokens=5)
+        ddl = wide_ddl(["name", "salary"])
+
+        linked = linker.link("a very long question that alone does not fit", ddl, WordTokenizer())
+
+        assert linked is ddl
+        stats = linker.get_stats()
+        assert stats["truncated_before"] == 1
+        assert stats["truncated_after"] == 1
+        assert stats["compacted"] == 0
+
+
+class TestTextToSQLSystemSchemaLinking:
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def test_generate_sql_encodes_compacted_schema(self, mock_intent):
+        backend = MagicMock()
+        backend.supports_decode_steps = False
+        backend.generate.return_value = [MagicMock()]
+        system = TextToSQLSystem(batching_enabled=False, inference_backend=backend)
+        system.schema_linker.lexical_weight = 1.0
+        system.t5_tokenizer = WordTokenizer()
+        system.t5_tokenizer.decode = MagicMock(return_value="SELECT salary FROM employees")
+
+        result = system.generate_sql("list every salary", needPredictIntent=False,
+                                     ddl_context=wide_ddl(FILLER + ["salary"] + FILLER))
+
+        assert result == "SELECT salary FROM employees"
+        encoded_text = system.t5_tokenizer.calls[-1][0]
+        assert "salary VARCHAR(20)" in encoded_text
+        assert len(encoded_text.split()) < 128
+        assert system.get_stats()["schema_linking"]["compacted"] == 1
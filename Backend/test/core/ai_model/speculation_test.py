@@ -0,0 +1,146 @@
+import threading
+import time
+import numpy as np
+import pytest
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+from core.ai_model.cancellation import INTENT_REJECTED, CancellationToken
+from core.ai_model.speculation import SpeculativeGeneration
+from core.ai_model.text_to_sql_system import REJECTED_RESPONSE, TextToSQLSystem
+
+DELAY = 0.2
+
+
+def finished_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+class TestSpeculativeGeneration:
+
+    def setup_method(self):
+        self.speculation = SpeculativeGeneration(max_workers=2)
+
+    def teardown_method(self):
+        self.speculation.shutdown()
+
+    def test_passed_check_returns_generation(self):
+        passed, result = self.speculation.run(lambda: finished_future("SELECT 1"), lambda: True)
+
+        assert (passed, result) == (True, "SELECT 1")
+        assert self.speculation.get_stats()["passed"] == 1
+
+    def test_rejection_cancels_queued_generation(self):
+        queued = Future()
+
+        passed, result = self.speculation.run(lambda: queued, lambda: False)
+
+        assert (passed, result) == (False, None)
+        assert queued.cancelled()
+        stats = self.speculation.get_stats()
+        assert (stats["rejected"], stats["cancelled"], stats["discarded"]) == (1, 1, 0)
+        assert stats["wasted_generation_ms"] == 0.0
+
+    def test_rejection_discards_running_generation(self):
+        release = threading.Event()
+        future = self.speculation.submit(lambda: release.wait() and "SELECT 1")
+        time.sleep(0.05)
+
+        passed, _ = self.speculation.run(lambda: future, lambda: False)
+        release.set()
+        future.result(timeout=5)
+
+        assert passed is False
+        stats = self.speculation.get_stats()
+        assert (stats["cancelled"], stats["discarded"]) == (0, 1)
+        assert stats["wasted_rate"] == 1.0
+        assert stats["wasted_generation_ms"] > 0.0
+
+    def test_rejection_stops_running_generation_through_its_token(self):
+        token = CancellationToken()
+        future = self.speculation.submit(lambda: [time.sleep(0.01) for _ in range(500) if not token.cancelled])
+        time.sleep(0.05)
+
+        started = time.perf_counter()
+        passed, _ = self.speculation.run(lambda: future, lambda: False, token)
+        future.result(timeout=5)
+
+        assert passed is False
+        assert token.reason == INTENT_REJECTED
+        assert time.perf_counter() - started < 1.0
+        stats = self.speculation.get_stats()
+        assert (stats["discarded"], stats["stopped"]) == (1, 1)
+
+    def test_failed_check_cancels_generation(self):
+        queued = Future()
+
+        with pytest.raises(RuntimeError):
+            self.speculation.run(lambda: queued, MagicMock(side_effect=RuntimeError("intent model failed")))
+        assert queued.cancelled()
+
+
+class TestTextToSQLSystemSpeculation:
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def _system(self, mock_intent, batching_enabled=False):
+        def generate(system, items):
+            time.sleep(DELAY)
+            return ["SELECT count(*) FROM users"] * len(items)
+
+        # Patched on the class so the batching scheduler picks up the slow runner too
+        with patch.object(TextToSQLSystem, "_generate_scheduled_batch", generate):
+            system = TextToSQLSystem(batching_enabled=batching_enabled, inference_backend=MagicMock(),
+                                     schema_linking_enabled=False, tokenization_cache_enabled=False,
+                                     intent_fast_path_enabled=False, speculative_intent_enabled=True)
+        system._generate_scheduled_batch = lambda items: generate(system, items)
+        system.inference_backend.supports_decode_steps = False
+        system.t5_tokenizer = MagicMock(pad_token_id=0)
+        system.t5_tokenizer.return_value = {'input_ids': [[1, 2]]}
+        return system
+
+    def _slow_intent(self, system, result):
+        system.query_intent_recognizer.predict.side_effect = lambda question: time.sleep(DELAY) or np.int64(result)
+
+    @pytest.mark.parametrize("batching_enabled", [False, True])
+    def test_intent_and_generation_overlap(self, batching_enabled):
+        system = self._system(batching_enabled=batching_enabled)
+        self._slow_intent(system, 1)
+
+        started = time.perf_counter()
+        sql = system.generate_sql("How many users are there?", needPredictIntent=True, ddl_context="CREATE TABLE users (id INT)")
+        elapsed = time.perf_counter() - started
+
+        assert sql == "SELECT count(*) FROM users"
+        assert elapsed < 1.7 * DELAY
+        assert system.get_stats()["speculation"]["passed"] == 1
+
+    def test_rejected_question_returns_warning_and_counts_waste(self):
+        system = self._system()
+        self._slow_intent(system, -1)
+
+        response = system.generate_sql("Tell me about your day", needPredictIntent=True, ddl_context="CREATE TABLE users (id INT)")
+        time.sleep(DELAY)
+
+        assert response == REJECTED_RESPONSE
+        stats = system.get_stats()["speculation"]
+        assert (stats["rejected"], stats["discarded"]) == (1, 1)
+        assert stats["wasted_generation_ms"] > 0.0
+
+    def test_no_intent_check_generates_directly(self):
+        system = self._system()
+
+        assert system.generate_sql("How many users?", needPredictIntent=False, ddl_context=None) == "SELECT count(*) FROM users"
+        assert system.get_stats()["speculation"]["requests"] == 0
+        system.query_intent_recognizer.predict.assert_not_called()
+
+    def test_fast_path_decision_skips_speculation(self):
+        with patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer'):
+            system = TextToSQLSystem(batching_enabled=False, inference_backend=MagicMock(),
+                                     tokenization_cache_enabled=False, speculative_intent_enabled=True)
+        system.intent_fast_path.shadow_mode = False
+        system.t5_tokenizer = MagicMock()
+
+        assert system.generate_sql("hello", needPredictIntent=True, ddl_context="CREATE TABLE users (id INT)") == REJECTED_RESPONSE
+        assert system.get_stats()["speculation"]["requests"] == 0
+        system.inference_backend.generate.assert_not_called()
@@ -0,0 +1,169 @@
+import threading
+import time
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from transformers import GenerationConfig
+from core.ai_model.decoding import EncoderState
+from core.ai_model.sql_streaming import SQLTextStreamer
+from core.ai_model.text_to_sql_system import TextToSQLSystem
+
+PIECES = ["<pad>", "</s>", "▁SELECT", "▁name", "▁FROM", "▁users", "▁WHERE", "▁age", "▁>", "▁3", "0", ";"]
+TOKEN = {piece: token_id for token_id, piece in enumerate(PIECES)}
+SQL_TOKENS = [TOKEN[piece] for piece in ("▁SELECT", "▁name", "▁FROM", "▁users", "▁WHERE", "▁age", "▁>", "▁3", "0", "</s>")]
+ENCODE_SECONDS = 0.02
+STEP_SECONDS = 0.03
+
+
+class StubTokenizer:
+    """SentencePiece-like tokenizer over PIECES; every input becomes a single token."""
+    pad_token_id = 0
+
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": [[TOKEN["▁name"]] for _ in texts]}
+
+    def __len__(self):
+        return len(PIECES)
+
+    def convert_ids_to_tokens(self, token_ids):
+        return [PIECES[token_id] for token_id in token_ids]
+
+    def decode(self, token_ids, skip_special_tokens=True):
+        pieces = [PIECES[token_id] for token_id in token_ids if token_id > 1]
+        return "".join(pieces).replace("▁", " ").strip()
+
+
+class StubGenerator:
+    """Step-by-step backend that decodes SQL_TOKENS for every row at a fixed cost per pass."""
+    supports_decode_steps = True
+    name = "stub"
+
+    def __init__(self):
+        self.steps = 0
+
+    def encode(self, input_ids, attention_mask):
+        time.sleep(ENCODE_SECONDS)
+        return EncoderState(input_ids, attention_mask)
+
+    def decode_step(self, encoder_state, decoder_input_ids, past=None):
+        time.sleep(STEP_SECONDS)
+        self.steps += 1
+        position = past or 0
+        logits = np.zeros((decoder_input_ids.shape[0], 1, len(PIECES)), dtype=np.float32)
+        logits[:, 0, SQL_TOKENS[min(position, len(SQL_TOKENS) - 1)]] = 1.0
+        return logits, position + 1
+
+    def get_stats(self):
+        return {"name": self.name}
+
+
+class TestSQLTextStreamer:
+
+    def test_fragments_add_up_to_the_decoded_text(self):
+        fragments = []
+        streamer = SQLTextStreamer(StubTokenizer(), fragments.append)
+
+        for token_id in SQL_TOKENS:
+            streamer.put(token_id)
+        streamer.end("SELECT name FROM users WHERE age > 30")
+
+        assert fragments[:3] == ["SELECT", " name", " FROM"]
+        assert "".join(fragments) == "SELECT name FROM users WHERE age > 30"
+
+    def test_rewritten_text_waits_until_it_settles(self):
+        tokenizer = MagicMock()
+        tokenizer.decode.side_effect = ["SELECT a ", "SELECT a.", "SELECT a.b"]
+        fragments = []
+        streamer = SQLTextStreamer(tokenizer, fragments.append)
+
+        for token_id in range(3):
+            streamer.put(token_id)
+
+        # "SELECT a " was rewritten to "SELECT a.": nothing more is sent for this stream
+        assert fragments == ["SELECT a "]
+
+    def test_whole_sequence_backends_send_the_answer_at_the_end(self):
+        fragments = []
+        streamer = SQLTextStreamer(StubTokenizer(), fragments.append)
+
+        streamer.end("SELECT 1")
+        streamer.end("SELECT 1")
+
+        assert fragments == ["SELECT 1"]
+
+
+class TestStreamingGeneration:
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def _system(self, mock_intent, batching_enabled=False):
+        backend = StubGenerator()
+        system = TextToSQLSystem(batching_enabled=batching_enabled, inference_backend=backend,
+                                 schema_linking_enabled=False, tokenization_cache_enabled=False,
+                                 intent_fast_path_enabled=False)
+        system.t5_tokenizer = StubTokenizer()
+        system.gen_config = GenerationConfig(decoder_start_token_id=0, pad_token_id=0, eos_token_id=1, max_length=512)
+        system.generation_controller.stop_on_complete_statement = False
+        return system
+
+    def _timed_stream(self, system, question="list names"):
+        started = time.perf_counter()
+        arrivals = []
+        sql = system.generate_sql(question, False, "CREATE TABLE users (name TEXT, age INT)",
+                                  on_text=lambda text: arrivals.append((time.perf_counter() - started, text)))
+        return sql, arrivals, time.perf_counter() - started
+
+    @pytest.mark.parametrize("batching_enabled", [False, True])
+    def test_time_to_first_fragment_is_one_decoder_step(self, batching_enabled):
+        system = self._system(batching_enabled=batching_enabled)
+
+        sql, arrivals, total = self._timed_stream(system)
+
+        assert sql == "SELECT name FROM users WHERE age > 30"
+        assert "".join(text for _, text in arrivals) == sql
+        first_byte = arrivals[0][0]
+        # Encoder pass plus one decoder step, against all len(SQL_TOKENS) steps
+        assert first_byte < ENCODE_SECONDS + 3 * STEP_SECONDS
+        assert total > ENCODE_SECONDS + len(SQL_TOKENS) * STEP_SECONDS
+        assert first_byte < total / 3
+        print(f"time to first fragment {first_byte * 1000:.0f} ms, total {total * 1000:.0f} ms")
+
+    def test_batch_streams_only_the_rows_that_asked(self):
+        system = self._system(batching_enabled=True)
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def plain():
+            barrier.wait()
+            results["plain"] = system.generate_sql("count users", False, "CREATE TABLE users (name TEXT)")
+
+        thread = threading.Thread(target=plain)
+        thread.start()
+        barrier.wait()
+        sql, arrivals, _ = self._timed_stream(system)
+        thread.join()
+
+        assert results["plain"] == sql
+        assert "".join(text for _, text in arrivals) == sql
+
+    def test_rejected_question_streams_nothing(self):
+        system = self._system()
+        system.speculation = MagicMock()
+        system.query_intent_recognizer.predict.return_value = np.int64(-1)
+        fragments = []
+
+        result = system.generate_sql("hello there", True, "CREATE TABLE users (name TEXT)", on_text=fragments.append)
+
+        assert result == "Please ask something related to query data from database."
+        assert fragments == []
+        # Streaming requests check the intent first instead of speculating
+        system.speculation.run.assert_not_called()
+
+    def test_whole_sequence_backend_streams_once(self):
+        system = self._system()
+        system.generation_controller = None
+        system.inference_backend.generate = MagicMock(return_value=[[0] + SQL_TOKENS])
+        fragments = []
+
+        sql = system.generate_sql("list names", False, "CREATE TABLE users (name TEXT)", on_text=fragments.append)
+
+        assert fragments == [sql]
@@ -5,13 +5,18 @@ from core.ai_model.text_to_sql_system import TextToSQLSystem  # Replace with act
 
 class TestTextToSQLSystem:
 
-    @patch('core.ai_model.text_to_sql_system.TFT5ForConditionalGeneration.from_pretrained')
-    @patch('core.ai_model.text_to_sql_system.T5Tokenizer.from_pretrained')
     @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
-    def setup_method(self, method, mock_intent, mock_tokenizer, mock_model):
+    def setup_method(self, method, mock_intent):
         """Initializes the system with mocked dependencies before each test."""
-        self.system = TextToSQLSystem()
-        self.mock_model = self.system.t5_model
+        # Schema linking and the tokenization cache tokenize the input themselves;
+        # they are covered in schema_linking_test and tokenization_cache_test
+        self.system = TextToSQLSystem(batching_enabled=False, inference_backend=MagicMock(),
+                                      schema_linking_enabled=False, tokenization_cache_enabled=False)
+        # Whole-sequence generate() path; step-by-step decoding is covered in generation_control_test
+        self.system.inference_backend.supports_decode_steps = False
+        # A loaded tokenizer means _lazy_load_model has nothing left to fetch
+        self.system.t5_tokenizer = MagicMock(pad_token_id=0)
+        self.mock_model = self.system.inference_backend
         self.mock_tokenizer = self.system.t5_tokenizer
         self.mock_intent_recognizer = self.system.query_intent_recognizer
 
@@ -47,7 +52,7 @@ class TestTextToSQLSystem:
         """Test successful SQL generation flow."""
         # Setup mocks
         self.mock_intent_recognizer.predict.return_value = np.int64(1)
-        self.mock_tokenizer.return_value = {'input_ids': [1, 2], 'attention_mask': [1, 1]}
+        self.mock_tokenizer.return_value = {'input_ids': [[1, 2]], 'attention_mask': [[1, 1]]}
         
         # Mock the model output
         mock_output = MagicMock()
@@ -68,7 +73,7 @@ class TestTextToSQLSystem:
 
     def test_generate_sql_skip_intent_check(self):
         """Verify intent check is skipped if needPredictIntent is False."""
-        self.mock_tokenizer.return_value = {'input_ids': [1], 'attention_mask': [1]}
+        self.mock_tokenizer.return_value = {'input_ids': [[1]], 'attention_mask': [[1]]}
         self.mock_model.generate.return_value = [MagicMock()]
         self.mock_tokenizer.decode.return_value = "SELECT 1"
 
@@ -0,0 +1,217 @@
+import json
+import pytest
+import numpy as np
+from collections import defaultdict
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from core.ai_model.schema_linking import build_model_input
+from core.ai_model.text_to_sql_system import TextToSQLSystem
+from core.ai_model.tokenization_cache import InputTokenizationCache, pad_input_ids
+
+spm = pytest.importorskip("sentencepiece")
+transformers = pytest.importorskip("transformers")
+
+
+DEV_PATH = Path(__file__).resolve().parents[4] / "datasets" / "data" / "dev.jsonl"
+
+
+@pytest.fixture(scope="module")
+def dev_inputs():
+    """(question, DDL) of every dev example; tables get positional columns wide enough for their queries."""
+    with open(DEV_PATH, encoding="utf-8") as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    widths = defaultdict(int)
+    for example in examples:
+        sql = example["sql"]
+        widths[example["table_id"]] = max(widths[example["table_id"]], sql["sel"] + 1,
+                                          *(cond[0] + 1 for cond in sql["conds"]))
+    ddls = {
+        table_id: f"CREATE TABLE table_{table_id.replace('-', '_')} ({', '.join(f'col{i} TEXT' for i in range(width))})"
+        for table_id, width in widths.items()
+    }
+    return [(example["question"], ddls[example["table_id"]]) for example in examples]
+
+
+@pytest.fixture(scope="module")
+def tokenizer_dir(dev_inputs, tmp_path_factory):
+    """A small SentencePiece model trained on the dev questions and DDL, saved like the T5 checkpoint's tokenizer."""
+    directory = tmp_path_factory.mktemp("t5_tokenizer")
+    texts = [question for question, _ in dev_inputs] + sorted({ddl for _, ddl in dev_inputs})
+    spm.SentencePieceTrainer.train(
+        sentence_iterator=iter(texts), model_prefix=str(directory / "spiece"), vocab_size=2000,
+        model_type="unigram", character_coverage=1.0, pad_id=0, eos_id=1, unk_id=2, bos_id=-1, minloglevel=2
+    )
+    transformers.T5Tokenizer(str(directory / "spiece.model"), legacy=True).save_pretrained(str(directory))
+    return directory
+
+
+@pytest.fixture(scope="module")
+def slow_tokenizer(tokenizer_dir):
+    return transformers.T5Tokenizer.from_pretrained(str(tokenizer_dir), legacy=True)
+
+
+@pytest.fixture(scope="module")
+def fast_tokenizer(tokenizer_dir):
+    return transformers.T5TokenizerFast.from_pretrained(str(tokenizer_dir))
+
+
+def full_ids(tokenizer, question, ddl, max_length=128):
+    return tokenizer([build_model_input(question, ddl)], max_length=max_length, truncation=True)["input_ids"][0]
+
+
+class TestInputTokenizationCache:
+
+    def test_cached_ids_equal_full_tokenization_over_dev(self, dev_inputs, fast_tokenizer):
+        cache = InputTokenizationCache(max_length=128, max_entries=len(dev_inputs))
+
+        mismatches = [(question, ddl) for question, ddl in dev_inputs
+                      if cache.encode(fast_tokenizer, question, ddl) != full_ids(fast_tokenizer, question, ddl)]
+
+        assert mismatches == []
+        stats = cache.get_stats()
+        assert stats["unsplittable"] == 0
+        assert stats["misses"] == len({ddl for _, ddl in dev_inputs})
+        assert stats["hits"] == len(dev_inputs) - stats["misses"]
+
+    def test_slow_tokenizer_ids_are_unchanged_over_dev(self, dev_inputs, slow_tokenizer):
+        # Ties SentencePiece breaks differently in context send those DDLs to the full-text path
+        cache = InputTokenizationCache(max_length=128, max_entries=len(dev_inputs))
+
+        mismatches = [(question, ddl) for question, ddl in dev_inputs
+                      if cache.encode(slow_tokenizer, question, ddl) != full_ids(slow_tokenizer, question, ddl)]
+
+        assert mismatches == []
+        assert cache.get_stats()["unsplittable"] < len({ddl for _, ddl in dev_inputs}) * 0.05
+
+    def test_fast_tokenizer_differs_from_slow_only_on_score_ties(self, dev_inputs, slow_tokenizer, fast_tokenizer,
+                                                                  tokenizer_dir):
+        # Both pick a highest-scoring SentencePiece segmentation; they break exact ties differently
+        processor = spm.SentencePieceProcessor(model_file=str(tokenizer_dir / "spiece.model"))
+
+        def score(token_ids):
+            return sum(processor.get_score(token_id) for token_id in token_ids[:-1])
+
+        ties = 0
+        for question, ddl in dev_inputs:
+            slow_ids = full_ids(slow_tokenizer, question, ddl)
+            fast_ids = full_ids(fast_tokenizer, question, ddl)
+            if slow_ids != fast_ids:
+                ties += 1
+                assert score(slow_ids) == pytest.approx(score(fast_ids), abs=1e-4)
+                assert slow_tokenizer.decode(slow_ids) == fast_tokenizer.decode(fast_ids)
+        assert ties < len(dev_inputs) * 0.01
+
+    def test_long_input_is_truncated_like_the_tokenizer(self, fast_tokenizer):
+        cache = InputTokenizationCache(max_length=32)
+        ddl = "CREATE TABLE wide (" + ", ".join(f"col{i} TEXT" for i in range(40)) + ")"
+
+        for question in ("How many players?", "Which school did player number 3 play for?"):
+            token_ids = cache.encode(fast_tokenizer, question, ddl)
+            assert token_ids == full_ids(fast_tokenizer, question, ddl, max_length=32)
+            assert len(token_ids) == 32
+            assert token_ids[-1] == fast_tokenizer.eos_token_id
+
+    def test_missing_ddl_matches_model_input(self, fast_tokenizer):
+        cache = InputTokenizationCache()
+
+        assert cache.encode(fast_tokenizer, "How many players?", None) == full_ids(fast_tokenizer, "How many players?", None)
+        assert cache.encode(fast_tokenizer, "How many players?", "") == full_ids(fast_tokenizer, "How many players?", "")
+
+    def test_unsplittable_tokenizer_falls_back_to_full_text(self):
+        class BosTokenizer:
+            """Prepends a begin token, so joined segments differ from the whole text."""
+            eos_token_id = 1
+
+            def __call__(self, texts, add_special_tokens=True, **kwargs):
+                return {"input_ids": [[5] + [7] * len(text.split()) + ([1] if add_special_tokens else [])
+                                      for text in texts]}
+
+        tokenizer = BosTokenizer()
+        cache = InputTokenizationCache()
+
+        first = cache.encode(tokenizer, "list users", "CREATE TABLE users (id INT)")
+        second = cache.encode(tokenizer, "count users", "CREATE TABLE users (id INT)")
+
+        assert first == [5] + [7] * 9 + [1]
+        assert second == first
+        stats = cache.get_stats()
+        assert stats["unsplittable"] == 1
+        assert stats["hits"] == 1
+
+    @pytest.mark.parametrize("max_length", [128, 32])
+    def test_count_tokens_matches_the_untruncated_input(self, slow_tokenizer, max_length):
+        cache = InputTokenizationCache(max_length=max_length)
+        ddl = "CREATE TABLE wide (" + ", ".join(f"col{i} TEXT" for i in range(40)) + ")"
+
+        for question in ("How many players?", "Which school did player number 3 play for?"):
+            expected = len(slow_tokenizer([build_model_input(question, ddl)])["input_ids"][0])
+            assert cache.count_tokens(slow_tokenizer, question, ddl) == expected
+        assert cache.get_stats()["misses"] == 1
+
+    def test_cache_is_bounded(self, fast_tokenizer):
+        cache = InputTokenizationCache(max_entries=2)
+
+        for table in ("a", "b", "c"):
+            cache.encode(fast_tokenizer, "How many?", f"CREATE TABLE {table} (id INT)")
+
+        assert cache.get_stats()["entries"] == 2
+
+    def test_pad_input_ids_matches_tokenizer_padding(self, fast_tokenizer):
+        texts = ["Question: How many? | CREATE TABLE t (id INT)", "Question: Which school? | t"]
+        expected = fast_tokenizer(texts, return_tensors="np", padding=True)
+        rows = fast_tokenizer(texts)["input_ids"]
+
+        input_ids, attention_mask = pad_input_ids(rows, fast_tokenizer.pad_token_id)
+
+        np.testing.assert_array_equal(input_ids, expected["input_ids"])
+        np.testing.assert_array_equal(attention_mask, expected["attention_mask"])
+
+
+class TestTextToSQLSystemTokenization:
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def test_generate_sql_passes_cached_ids_to_backend(self, mock_intent, fast_tokenizer):
+        backend = MagicMock(supports_decode_steps=False)
+        backend.generate.return_value = [MagicMock()]
+        system = TextToSQLSystem(batching_enabled=False, inference_backend=backend, schema_linking_enabled=False)
+        system.t5_tokenizer = fast_tokenizer
+        ddl = "CREATE TABLE players (col0 TEXT, col1 TEXT)"
+
+        for question in ("How many players?", "Which school did player number 3 play for?"):
+            with patch.object(fast_tokenizer, "decode", return_value="SELECT 1"):
+                system.generate_sql(question, needPredictIntent=False, ddl_context=ddl)
+            input_ids, attention_mask, _ = backend.generate.call_args.args
+            assert input_ids.tolist() == [full_ids(fast_tokenizer, question, ddl)]
+            assert attention_mask.all()
+
+        assert system.get_stats()["tokenization"]["hits"] == 1
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def test_schema_linking_counts_tokens_from_the_cached_ddl(self, mock_intent, slow_tokenizer):
+        backend = MagicMock(supports_decode_steps=False)
+        backend.generate.return_value = [MagicMock()]
+        system = TextToSQLSystem(batching_enabled=False, inference_backend=backend)
+        system.t5_tokenizer = MagicMock(wraps=slow_tokenizer, eos_token_id=slow_tokenizer.eos_token_id,
+                                        pad_token_id=slow_tokenizer.pad_token_id, is_fast=False)
+        system.t5_tokenizer.decode.return_value = "SELECT 1"
+        ddl = "CREATE TABLE players (col0 TEXT, col1 TEXT)"
+
+        for question in ("How many players?", "Which school did player number 3 play for?"):
+            system.generate_sql(question, needPredictIntent=False, ddl_context=ddl)
+            input_ids, _, _ = backend.generate.call_args.args
+            assert input_ids.tolist() == [full_ids(slow_tokenizer, question, ddl)]
+
+        ddl_calls = [call for call in system.t5_tokenizer.call_args_list if any(ddl in text for text in call.args[0])]
+        assert len(ddl_calls) == 1
+        assert system.get_stats()["schema_linking"]["requests"] == 2
+
+    @patch('core.ai_model.text_to_sql_system.QueryIntentRecognizer')
+    def test_slow_tokenizer_is_loaded_by_default(self, mock_intent, tokenizer_dir):
+        # Its ids match the model's training tokenization (see test_slow_tokenizer_ids_are_unchanged_over_dev)
+        backend = MagicMock(supports_decode_steps=False, tokenizer_source=(str(tokenizer_dir), {}))
+        system = TextToSQLSystem(batching_enabled=False, inference_backend=backend)
+
+        with patch("transformers.GenerationConfig.from_pretrained", return_value=transformers.GenerationConfig()):
+            system._load_generator()
+
+        assert type(system.t5_tokenizer) is transformers.T5Tokenizer
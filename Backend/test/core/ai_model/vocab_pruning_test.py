@@ -0,0 +1,218 @@
+import pytest
+import numpy as np
+import tensorflow as tf
+from unittest.mock import MagicMock, patch
+from transformers import T5Config, TFT5ForConditionalGeneration
+from core.ai_model.decoding import greedy_search, prompt_lookup_search
+from core.ai_model.inference_backend import PrunedVocabBackend, TFBackend, create_inference_backend
+from core.ai_model.vocab_pruning import (
+    PrunedVocabulary, build_bound_clusters, count_token_usage, select_vocabulary
+)
+
+VOCAB_SIZE = 64
+
+
+class StubTokenizer:
+    """Whitespace tokenizer with a fixed word -> id table."""
+    all_special_ids = [0, 1, 2]
+
+    def __init__(self, words):
+        self.ids = {word: token_id for token_id, word in enumerate(words, start=3)}
+
+    def __call__(self, text, add_special_tokens=True):
+        return {"input_ids": [self.ids[word] for word in text.split() if word in self.ids]}
+
+
+@pytest.fixture(scope="module")
+def tiny_tf_backend():
+    config = T5Config(
+        vocab_size=VOCAB_SIZE, d_model=32, d_kv=8, d_ff=64, num_layers=2, num_decoder_layers=2, num_heads=4,
+        decoder_start_token_id=0, pad_token_id=0, eos_token_id=1,
+    )
+    model = TFT5ForConditionalGeneration(config)
+    model(input_ids=tf.ones((1, 4), tf.int32), decoder_input_ids=tf.zeros((1, 1), tf.int32))
+    for index, weight in enumerate(model.weights):
+        weight.assign(tf.random.stateless_normal(weight.shape, seed=(index, 2), stddev=0.5))
+    backend = TFBackend()
+    backend.model = model
+    return backend
+
+
+def _inputs(seed):
+    input_ids = np.random.default_rng(seed).integers(2, VOCAB_SIZE, size=(2, 9))
+    attention_mask = np.ones_like(input_ids)
+    input_ids[1, 6:] = 0
+    attention_mask[1, 6:] = 0
+    return input_ids, attention_mask
+
+
+def _greedy_tokens(backend, seeds):
+    """Token ids the full model generates for the seeded inputs."""
+    used = set()
+    for seed in seeds:
+        input_ids, attention_mask = _inputs(seed)
+        used.update(greedy_search(backend, input_ids, attention_mask, 10, 0, 1, 0).sequences.ravel().tolist())
+    return used
+
+
+def _pruned_backend(tiny_tf_backend, kept_ids, tmp_path, num_clusters=VOCAB_SIZE):
+    vocabulary = PrunedVocabulary.from_output_embeddings(
+        tiny_tf_backend.output_embeddings(), np.array(sorted(kept_ids)), num_clusters=num_clusters
+    )
+    path = tmp_path / "pruned.npz"
+    vocabulary.save(path)
+    backend = PrunedVocabBackend(tiny_tf_backend, str(path))
+    backend.load()
+    return backend
+
+
+class TestVocabularySelection:
+
+    def test_counts_token_usage(self):
+        tokenizer = StubTokenizer(["SELECT", "name", "FROM", "users"])
+
+        usage = count_token_usage(tokenizer, ["SELECT name FROM users", "SELECT name"])
+
+        assert usage == {3: 2, 4: 2, 5: 1, 6: 1}
+
+    def test_keeps_special_sql_target_and_frequent_input_tokens(self):
+        tokenizer = StubTokenizer(["SELECT", "FROM", "name", "users", "rare", "often"])
+        target_usage = count_token_usage(tokenizer, ["name users"])
+        input_usage = count_token_usage(tokenizer, ["rare often often"])
+
+        kept = select_vocabulary(tokenizer, target_usage, input_usage, min_count=2)
+
+        assert kept.tolist() == [0, 1, 2, 3, 4, 5, 6, 8]
+
+    def test_input_tokens_are_optional(self):
+        tokenizer = StubTokenizer(["SELECT", "name", "rare"])
+
+        kept = select_vocabulary(tokenizer, count_token_usage(tokenizer, ["name"]))
+
+        assert kept.tolist() == [0, 1, 2, 3, 4]
+
+
+class TestPrunedVocabulary:
+
+    def test_cluster_bound_covers_every_pruned_logit(self):
+        rng = np.random.default_rng(0)
+        rows = rng.normal(size=(300, 16)).astype(np.float32)
+        centers, radii = build_bound_clusters(rows, num_clusters=12)
+        hidden = rng.normal(size=(50, 16)).astype(np.float32)
+
+        bound = (hidden @ centers.T + np.linalg.norm(hidden, axis=1)[:, None] * radii).max(axis=1)
+
+        assert len(centers) <= 12
+        assert (bound >= (hidden @ rows.T).max(axis=1)).all()
+
+    def test_logits_match_full_head_argmax(self):
+        rng = np.random.default_rng(1)
+        embeddings = rng.normal(size=(VOCAB_SIZE, 64)).astype(np.float32)
+        vocabulary = PrunedVocabulary.from_output_embeddings(embeddings, np.arange(0, VOCAB_SIZE, 2),
+                                                               num_clusters=VOCAB_SIZE)
+        # Rows aligned with a kept token and with a pruned one
+        hidden = np.stack([embeddings[10] * 5, embeddings[11] * 5]).astype(np.float32)
+        full_logits = MagicMock(side_effect=lambda rows: rows @ embeddings.T)
+
+        logits, fallback = vocabulary.logits(hidden, full_logits)
+
+        np.testing.assert_array_equal(logits.argmax(axis=1), (hidden @ embeddings.T).argmax(axis=1))
+        assert fallback.tolist() == [False, True]
+        assert np.isneginf(logits[0, 1::2]).all()
+        assert full_logits.call_count == 1
+
+    def test_nothing_pruned_never_falls_back(self):
+        embeddings = np.random.default_rng(2).normal(size=(10, 4)).astype(np.float32)
+        vocabulary = PrunedVocabulary.from_output_embeddings(embeddings, np.arange(10))
+
+        logits, fallback = vocabulary.logits(embeddings, MagicMock())
+
+        assert not fallback.any()
+        np.testing.assert_allclose(logits, embeddings @ embeddings.T, rtol=1e-5)
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        embeddings = np.random.default_rng(3).normal(size=(20, 4)).astype(np.float32)
+        vocabulary = PrunedVocabulary.from_output_embeddings(embeddings, np.array([0, 1, 5, 7]), num_clusters=3)
+        vocabulary.save(tmp_path / "pruned.npz")
+
+        loaded = PrunedVocabulary.load(tmp_path / "pruned.npz")
+
+        np.testing.assert_array_equal(loaded.kept_ids, [0, 1, 5, 7])
+        np.testing.assert_array_equal(loaded.head, embeddings[[0, 1, 5, 7]])
+        np.testing.assert_array_equal(loaded.centers, vocabulary.centers)
+        assert loaded.vocab_size == 20
+        assert loaded.remap[[0, 5, 6]].tolist() == [0, 2, -1]
+        assert loaded.get_stats()["head_bytes"] < loaded.get_stats()["full_head_bytes"]
+
+
+class TestPrunedVocabBackend:
+
+    def test_greedy_search_matches_full_head(self, tiny_tf_backend, tmp_path):
+        used = _greedy_tokens(tiny_tf_backend, range(4))
+        # Drop a few tokens the model does produce, so the full-head fallback is needed
+        kept = set(range(0, VOCAB_SIZE, 4)) | (used - set(sorted(used)[2:5]))
+        backend = _pruned_backend(tiny_tf_backend, kept, tmp_path)
+
+        for seed in range(4):
+            input_ids, attention_mask = _inputs(seed)
+            expected = greedy_search(tiny_tf_backend, input_ids, attention_mask, 10, 0, 1, 0).sequences
+
+            output = greedy_search(backend, input_ids, attention_mask, 10, 0, 1, 0)
+
+            np.testing.assert_array_equal(output.sequences, expected)
+        stats = backend.get_stats()
+        assert stats["fallback_rows"] > 0
+        assert stats["fallback_rows"] < stats["scored_rows"]
+        assert stats["kept_tokens"] == len(kept)
+
+    def test_prompt_lookup_matches_full_head(self, tiny_tf_backend, tmp_path):
+        backend = _pruned_backend(tiny_tf_backend, _greedy_tokens(tiny_tf_backend, range(2)), tmp_path)
+
+        for seed in range(2):
+            input_ids, attention_mask = _inputs(seed)
+            expected = greedy_search(tiny_tf_backend, input_ids, attention_mask, 10, 0, 1, 0).sequences
+
+            output = prompt_lookup_search(backend, input_ids, attention_mask, 10, 0, 1, 0,
+                                          max_ngram_size=2, num_draft_tokens=3)
+
+            np.testing.assert_array_equal(output.sequences, expected)
+
+    def test_generate_uses_pruned_greedy_decode(self, tiny_tf_backend, tmp_path):
+        backend = _pruned_backend(tiny_tf_backend, _greedy_tokens(tiny_tf_backend, [0]), tmp_path)
+        generation_config = MagicMock(max_new_tokens=10, decoder_start_token_id=0, eos_token_id=1, pad_token_id=0)
+        input_ids, attention_mask = _inputs(0)
+
+        output = backend.generate(input_ids, attention_mask, generation_config)
+
+        np.testing.assert_array_equal(
+            output, greedy_search(tiny_tf_backend, input_ids, attention_mask, 10, 0, 1, 0).sequences
+        )
+        assert backend.name == "tf-pruned"
+        assert backend.get_stats()["decoder_steps"] > 0
+
+    def test_load_rejects_head_from_another_checkpoint(self, tiny_tf_backend, tmp_path):
+        embeddings = tiny_tf_backend.output_embeddings() + 1.0
+        PrunedVocabulary.from_output_embeddings(embeddings, np.arange(8)).save(tmp_path / "other.npz")
+        backend = PrunedVocabBackend(tiny_tf_backend, str(tmp_path / "other.npz"))
+
+        with pytest.raises(ValueError, match="not built from the loaded checkpoint"):
+            backend.load()
+        assert not backend.is_loaded()
+
+    def test_requires_hidden_state_decoding(self):
+        backend = MagicMock(spec=["name"])
+        backend.name = "onnx-int8"
+
+        with pytest.raises(ValueError, match="step-by-step TensorFlow backend"):
+            PrunedVocabBackend(backend, "pruned.npz")
+
+    @patch("core.ai_model.inference_backend.model_config")
+    def test_factory_wraps_tf_backend_when_configured(self, mock_config):
+        mock_config.VOCAB_PRUNING_PATH = "pruned.npz"
+        mock_config.MODEL_BUNDLE_DIR = ""
+
+        backend = create_inference_backend("tf")
+
+        assert isinstance(backend, PrunedVocabBackend)
+        assert isinstance(backend.backend, TFBackend)
+        assert backend.vocabulary_path == "pruned.npz"
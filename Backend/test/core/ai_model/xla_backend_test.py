@@ -0,0 +1,122 @@
+import pytest
+import numpy as np
+import tensorflow as tf
+from transformers import GenerationConfig, T5Config, TFT5ForConditionalGeneration
+from core.ai_model.inference_backend import XLABackend, create_inference_backend, pad_to_bucket, select_bucket
+
+
+@pytest.fixture(scope="module")
+def generation_config():
+    return GenerationConfig(decoder_start_token_id=0, pad_token_id=0, eos_token_id=1, max_length=12)
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    config = T5Config(
+        vocab_size=64, d_model=32, d_kv=8, d_ff=64, num_layers=2, num_decoder_layers=2, num_heads=4,
+        decoder_start_token_id=0, pad_token_id=0, eos_token_id=1,
+    )
+    model = TFT5ForConditionalGeneration(config)
+    model(input_ids=tf.ones((1, 4), tf.int32), decoder_input_ids=tf.zeros((1, 1), tf.int32))
+    # The default initialization is close to uniform: use weights that give varied greedy outputs
+    for index, weight in enumerate(model.weights):
+        weight.assign(tf.random.stateless_normal(weight.shape, seed=(index, 0), stddev=0.5))
+    return model
+
+
+@pytest.fixture(scope="module")
+def backend(tiny_model, generation_config):
+    """One compiled bucket (batch 2, length 16) shared by every test to keep compile time down."""
+    backend = XLABackend(length_buckets=(16,), batch_buckets=(2,))
+    backend.model = tiny_model
+    backend.warmup(generation_config)
+    return backend
+
+
+def _inputs(rows, length, real_lengths):
+    rng = np.random.default_rng(rows * 100 + length)
+    input_ids = rng.integers(2, 64, size=(rows, length)).astype(np.int32)
+    attention_mask = np.ones_like(input_ids)
+    for row, real_length in enumerate(real_lengths):
+        input_ids[row, real_length:] = 0
+        attention_mask[row, real_length:] = 0
+    return input_ids, attention_mask
+
+
+def _eager_generate(model, input_ids, attention_mask, generation_config):
+    return model.generate(
+        input_ids=tf.constant(input_ids), attention_mask=tf.constant(attention_mask), generation_config=generation_config
+    ).numpy()
+
+
+class TestBucketing:
+
+    def test_select_bucket(self):
+        assert select_bucket(1, (32, 64, 128)) == 32
+        assert select_bucket(32, (32, 64, 128)) == 32
+        assert select_bucket(33, (32, 64, 128)) == 64
+        assert select_bucket(129, (32, 64, 128)) is None
+
+    def test_pad_to_bucket_masks_padding_and_repeats_first_row(self):
+        input_ids = np.array([[5, 6, 7]], dtype=np.int64)
+        attention_mask = np.array([[1, 1, 1]], dtype=np.int64)
+
+        padded_ids, padded_mask = pad_to_bucket(input_ids, attention_mask, batch_size=2, length=5, pad_token_id=0)
+
+        np.testing.assert_array_equal(padded_ids, [[5, 6, 7, 0, 0], [5, 6, 7, 0, 0]])
+        np.testing.assert_array_equal(padded_mask, [[1, 1, 1, 0, 0], [1, 1, 1, 0, 0]])
+        assert padded_ids.dtype == np.int32
+
+
+class TestXLABackend:
+
+    def test_warmup_compiles_every_bucket(self, backend):
+        stats = backend.get_stats()
+        assert stats["compiled_buckets"] == 1
+        assert stats["buckets"]["2x16"]["compile_ms"] > 0
+        assert stats["buckets"]["2x16"]["calls"] == 0
+
+    def test_matches_eager_generate(self, backend, tiny_model, generation_config):
+        input_ids, attention_mask = _inputs(2, 11, real_lengths=(11, 7))
+
+        result = backend.generate(input_ids, attention_mask, generation_config)
+
+        expected = _eager_generate(tiny_model, input_ids, attention_mask, generation_config)
+        np.testing.assert_array_equal(result[:, :expected.shape[1]], expected)
+        assert (result[:, expected.shape[1]:] == 0).all()
+
+    def test_mixed_lengths_and_batch_sizes_do_not_retrace(self, backend, generation_config):
+        for rows, length in ((1, 5), (2, 16), (1, 9), (2, 3)):
+            input_ids, attention_mask = _inputs(rows, length, real_lengths=[length] * rows)
+            assert backend.generate(input_ids, attention_mask, generation_config).shape[0] == rows
+
+        stats = backend.get_stats()
+        assert stats["retraces"] == 0
+        assert stats["compiled_buckets"] == 1
+        assert stats["buckets"]["2x16"]["padded_rows"] >= 2
+
+    def test_large_batches_are_split_into_bucket_chunks(self, backend, tiny_model, generation_config):
+        input_ids, attention_mask = _inputs(3, 8, real_lengths=(8, 4, 6))
+
+        result = backend.generate(input_ids, attention_mask, generation_config)
+
+        assert result.shape[0] == 3
+        expected = _eager_generate(tiny_model, input_ids, attention_mask, generation_config)
+        np.testing.assert_array_equal(result[:, :expected.shape[1]], expected)
+        assert backend.get_stats()["retraces"] == 0
+
+    def test_inputs_longer_than_every_bucket_fall_back_to_eager(self, backend, generation_config):
+        fallbacks = backend.get_stats()["fallbacks"]
+        input_ids, attention_mask = _inputs(1, 20, real_lengths=(20,))
+
+        backend.generate(input_ids, attention_mask, generation_config)
+
+        assert backend.get_stats()["fallbacks"] == fallbacks + 1
+
+    def test_precompile_disabled_skips_warmup(self, generation_config):
+        backend = XLABackend(precompile=False)
+        backend.warmup(generation_config)
+        assert backend.get_stats()["compiled_buckets"] == 0
+
+    def test_factory_builds_xla_backend(self):
+        assert isinstance(create_inference_backend("tf-xla"), XLABackend)
@@ -0,0 +1,55 @@
+import pytest
+from core.cache.generation_result_cache import GenerationResultCache
+
+
+class TestGenerationResultCache:
+
+    def setup_method(self, method):
+        self.cache = GenerationResultCache(max_entries=10)
+
+    def test_key_normalizes_whitespace_but_not_case(self):
+        key = GenerationResultCache.make_key("How many  users? ", "CREATE TABLE users (id INT)", True, "v1")
+
+        assert key == GenerationResultCache.make_key("How many users?", "CREATE TABLE users (id INT)", True, "v1")
+        assert key != GenerationResultCache.make_key("how many users?", "CREATE TABLE users (id INT)", True, "v1")
+
+    def test_key_depends_on_ddl_flag_and_model(self):
+        base = GenerationResultCache.make_key("q", "ddl", True, "v1")
+
+        assert base != GenerationResultCache.make_key("q", "ddl2", True, "v1")
+        assert base != GenerationResultCache.make_key("q", "ddl", False, "v1")
+        assert base != GenerationResultCache.make_key("q", "ddl", True, "v2")
+
+    def test_put_get(self):
+        key = GenerationResultCache.make_key("q", "ddl", True, "v1")
+        self.cache.put(key, "SELECT 1", operator="admin", table_name="users")
+
+        assert self.cache.get(key) == "SELECT 1"
+
+    def test_schema_change_invalidates_only_that_table(self):
+        users_key = GenerationResultCache.make_key("q1", "ddl users", True, "v1")
+        orders_key = GenerationResultCache.make_key("q2", "ddl orders", True, "v1")
+        self.cache.put(users_key, "SELECT 1", operator="admin", table_name="users")
+        self.cache.put(orders_key, "SELECT 2", operator="admin", table_name="orders")
+
+        self.cache.on_schema_changed("admin", "users", "ddl users v2")
+
+        assert self.cache.get(users_key) is None
+        assert self.cache.get(orders_key) == "SELECT 2"
+        assert self.cache.get_stats()["invalidations"] == 1
+
+    def test_invalidate_other_operator_keeps_entry(self):
+        key = GenerationResultCache.make_key("q", "ddl", True, "v1")
+        self.cache.put(key, "SELECT 1", operator="admin", table_name="users")
+
+        assert self.cache.invalidate("someone_else", "users") == 0
+        assert self.cache.get(key) == "SELECT 1"
+
+    def test_memory_cap(self):
+        cache = GenerationResultCache(max_entries=100, max_bytes=1000)
+        for i in range(20):
+            cache.put(GenerationResultCache.make_key(f"q{i}", "ddl", True, "v1"), "SELECT 1", "admin", "users")
+
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 1000
+        assert stats["evictions"] > 0
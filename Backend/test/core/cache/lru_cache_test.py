@@ -0,0 +1,70 @@
+import pytest
+from core.cache.lru_cache import LRUCache
+
+
+class TestLRUCache:
+
+    def test_get_put(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("missing") is None
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")       # "b" is now least recently used
+        cache.put("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_pop_and_clear(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        assert cache.pop("a") == 1
+        assert len(cache) == 1
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            LRUCache(max_entries=0)
+
+    def test_ttl_expiry(self):
+        now = [0.0]
+        cache = LRUCache(max_entries=10, ttl_seconds=5, clock=lambda: now[0])
+        cache.put("a", 1)
+
+        now[0] = 4.9
+        assert cache.get("a") == 1
+        now[0] = 5.0
+        assert cache.get("a") is None
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_memory_cap_evicts_oldest(self):
+        evicted = []
+        cache = LRUCache(max_entries=10, max_bytes=10, size_of=lambda key, value: len(value),
+                         on_evict=lambda key, value: evicted.append(key))
+        cache.put("a", "xxxx")
+        cache.put("b", "xxxx")
+        cache.put("c", "xxxx")
+
+        assert "a" not in cache
+        assert cache.get_stats()["bytes"] == 8
+        assert evicted == ["a"]
+
+    def test_oversized_value_rejected(self):
+        cache = LRUCache(max_entries=10, max_bytes=3, size_of=lambda key, value: len(value))
+
+        assert cache.put("a", "xxxx") is False
+        assert len(cache) == 0
+        assert cache.get_stats()["rejected"] == 1
@@ -0,0 +1,128 @@
+import pytest
+import numpy as np
+from core.cache.semantic_cache import SemanticCache
+
+DDL = "CREATE TABLE employees (id INT, dept VARCHAR)"
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestSemanticCache:
+
+    def setup_method(self, method):
+        self.cache = SemanticCache(similarity_threshold=0.9, max_entries_per_partition=2)
+
+    def test_near_duplicate_hit(self):
+        self.cache.add("admin", "employees", DDL, "v1", "how many employees in finance",
+                       unit(1, 0, 0), "SELECT COUNT(*) FROM employees WHERE dept = 'finance'")
+
+        hit = self.cache.lookup("admin", DDL, "v1", unit(0.98, 0.1, 0))
+
+        assert hit is not None
+        assert hit.sql == "SELECT COUNT(*) FROM employees WHERE dept = 'finance'"
+        assert hit.question == "how many employees in finance"
+        assert hit.similarity > 0.9
+
+    def test_below_threshold_misses(self):
+        self.cache.add("admin", "employees", DDL, "v1", "q", unit(1, 0, 0), "SELECT 1")
+
+        assert self.cache.lookup("admin", DDL, "v1", unit(0, 1, 0)) is None
+        assert self.cache.get_stats()["hits"] == 0
+
+    def test_partitioned_by_operator_ddl_and_model(self):
+        self.cache.add("admin", "employees", DDL, "v1", "q", unit(1, 0, 0), "SELECT 1")
+
+        assert self.cache.lookup("other", DDL, "v1", unit(1, 0, 0)) is None
+        assert self.cache.lookup("admin", DDL + " ", "v1", unit(1, 0, 0)) is None
+        assert self.cache.lookup("admin", DDL, "v2", unit(1, 0, 0)) is None
+
+    def test_full_partition_evicts_least_recently_used(self):
+        self.cache.add("admin", "employees", DDL, "v1", "a", unit(1, 0, 0), "SQL a")
+        self.cache.add("admin", "employees", DDL, "v1", "b", unit(0, 1, 0), "SQL b")
+        self.cache.lookup("admin", DDL, "v1", unit(1, 0, 0))   # "b" is now least recently used
+        self.cache.add("admin", "employees", DDL, "v1", "c", unit(0, 0, 1), "SQL c")
+
+        assert self.cache.lookup("admin", DDL, "v1", unit(0, 1, 0)) is None
+        assert self.cache.lookup("admin", DDL, "v1", unit(1, 0, 0)).sql == "SQL a"
+        assert self.cache.lookup("admin", DDL, "v1", unit(0, 0, 1)).sql == "SQL c"
+        assert self.cache.get_stats()["evictions"] == 1
+
+    def test_partition_count_is_bounded(self):
+        cache = SemanticCache(similarity_threshold=0.9, max_partitions=1)
+        cache.add("admin", "t1", "ddl1", "v1", "q", unit(1, 0), "SQL 1")
+        cache.add("admin", "t2", "ddl2", "v1", "q", unit(1, 0), "SQL 2")
+
+        assert cache.get_stats()["partitions"] == 1
+        assert cache.lookup("admin", "ddl1", "v1", unit(1, 0)) is None
+
+    def test_questions_differing_only_in_a_number_miss(self):
+        self.cache.add("admin", "employees", DDL, "v1", "top 5 employees by salary",
+                       unit(1, 0, 0), "SELECT * FROM employees ORDER BY salary DESC LIMIT 5")
+
+        miss = self.cache.lookup("admin", DDL, "v1", unit(0.99, 0.05, 0), "top 10 employees by salary")
+        hit = self.cache.lookup("admin", DDL, "v1", unit(0.99, 0.05, 0), "show the top 5 employees by salary")
+
+        assert miss is None
+        assert hit.sql == "SELECT * FROM employees ORDER BY salary DESC LIMIT 5"
+        assert self.cache.get_stats()["literal_mismatches"] == 1
+
+    def test_literal_match_wins_over_a_closer_mismatch(self):
+        self.cache.add("admin", "employees", DDL, "v1", "top 10 employees", unit(1, 0, 0), "SQL 10")
+        self.cache.add("admin", "employees", DDL, "v1", "top 5 employees", unit(0.95, 0.3, 0), "SQL 5")
+
+        hit = self.cache.lookup("admin", DDL, "v1", unit(1, 0, 0), "top 5 employees")
+
+        assert hit.sql == "SQL 5"
+
+    def test_partition_matrix_grows_by_doubling(self):
+        cache = SemanticCache(similarity_threshold=0.9, max_entries_per_partition=20)
+        rows = []
+        for i in range(20):
+            embedding = np.zeros(32, dtype=np.float32)
+            embedding[i] = 1.0
+            cache.add("admin", "employees", DDL, "v1", f"q{i}", embedding, f"SQL {i}")
+            rows.append(next(iter(cache._partitions.values())).embeddings.shape[0])
+
+        assert rows[0] == 8
+        assert sorted(set(rows)) == [8, 16, 20]
+        assert cache.lookup("admin", DDL, "v1", embedding).sql == "SQL 19"
+
+    def test_total_bytes_are_bounded(self):
+        cache = SemanticCache(similarity_threshold=0.9, max_bytes=2000)
+        for i in range(5):
+            cache.add("admin", f"t{i}", f"ddl{i}", "v1", "q", np.ones(32), f"SQL {i}")
+
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 2000
+        assert stats["partitions"] < 5
+        assert cache.lookup("admin", "ddl4", "v1", np.ones(32)).sql == "SQL 4"
+        assert cache.lookup("admin", "ddl0", "v1", np.ones(32)) is None
+
+    def test_schema_change_releases_bytes(self):
+        self.cache.add("admin", "employees", DDL, "v1", "q", unit(1, 0, 0), "SELECT 1")
+        assert self.cache.get_stats()["bytes"] > 0
+
+        self.cache.invalidate("admin", "employees")
+
+        assert self.cache.get_stats()["bytes"] == 0
+
+    def test_schema_change_invalidates_table(self):
+        self.cache.add("admin", "employees", DDL, "v1", "q", unit(1, 0, 0), "SELECT 1")
+
+        self.cache.on_schema_changed("admin", "employees", None)
+
+        assert self.cache.lookup("admin", DDL, "v1", unit(1, 0, 0)) is None
+        assert self.cache.get_stats()["invalidations"] == 1
+
+    def test_stats_report_hit_scores(self):
+        self.cache.add("admin", "employees", DDL, "v1", "q", unit(1, 0, 0), "SELECT 1")
+        self.cache.observe_generation_latency(0.5)
+        self.cache.lookup("admin", DDL, "v1", unit(1, 0, 0))
+
+        stats = self.cache.get_stats()
+        assert stats["recent_hit_scores"] == [1.0]
+        assert stats["hit_score_histogram"]["<=1.0"] == 1
+        assert stats["estimated_saved_ms"] == pytest.approx(500.0)
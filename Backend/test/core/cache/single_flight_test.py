@@ -0,0 +1,73 @@
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from core.ai_model.cancellation import CancellationToken, DEADLINE_EXCEEDED, RequestCancelledError
+from core.cache.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+
+    def test_concurrent_callers_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            release.wait(timeout=5)
+            return "SELECT 1"
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(flight.do, "key", work) for _ in range(5)]
+            while flight.get_stats()["coalesced"] < 4:
+                pass
+            release.set()
+            results = [future.result(timeout=5) for future in futures]
+
+        assert len(calls) == 1
+        assert [result for result, _ in results] == ["SELECT 1"] * 5
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert flight.get_stats()["in_flight"] == 0
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight()
+
+        assert flight.do("key", lambda: 1) == (1, False)
+        assert flight.do("key", lambda: 2) == (2, False)
+        assert flight.get_stats()["leaders"] == 2
+
+    def test_exception_is_shared_and_key_released(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise RuntimeError("decode failed")
+
+        with pytest.raises(RuntimeError):
+            flight.do("key", fail)
+        assert flight.do("key", lambda: "ok") == ("ok", False)
+
+    def test_follower_stops_at_its_own_deadline(self):
+        flight = SingleFlight(wait_slice_seconds=0.01)
+        started = threading.Event()
+        release = threading.Event()
+
+        def work():
+            started.set()
+            release.wait(timeout=5)
+            return "SELECT 1"
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            leader = pool.submit(flight.do, "key", work, CancellationToken(timeout_seconds=5))
+            started.wait(timeout=5)
+            began = time.monotonic()
+            with pytest.raises(RequestCancelledError) as exc_info:
+                flight.do("key", work, CancellationToken(timeout_seconds=0.1))
+            waited = time.monotonic() - began
+            assert not leader.done()
+            release.set()
+            assert leader.result(timeout=5) == ("SELECT 1", False)
+
+        assert exc_info.value.reason == DEADLINE_EXCEEDED
+        assert waited < 1
+        assert flight.get_stats()["abandoned"] == 1
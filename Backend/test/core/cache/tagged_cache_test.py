@@ -0,0 +1,41 @@
+from core.cache.tagged_cache import TaggedLRUCache
+
+
+class TestTaggedLRUCache:
+
+    def test_invalidate_removes_only_that_tag(self):
+        cache = TaggedLRUCache(max_entries=4)
+        cache.put("a", 1, "users")
+        cache.put("b", 2, "users")
+        cache.put("c", 3, "orders")
+
+        assert cache.invalidate("users") == 2
+        assert cache.get("a") is None
+        assert cache.get("c") == 3
+
+    def test_re_put_under_another_tag_moves_the_key(self):
+        cache = TaggedLRUCache(max_entries=4)
+        cache.put("a", 1, "old")
+        cache.put("a", 2, "new")
+
+        assert cache.invalidate("old") == 0
+        assert cache.get("a") == 2
+        assert cache.invalidate("new") == 1
+        assert cache.get("a") is None
+
+    def test_eviction_of_a_re_tagged_key_keeps_the_index_in_sync(self):
+        cache = TaggedLRUCache(max_entries=1)
+        cache.put("a", 1, "old")
+        cache.put("a", 2, "new")
+        cache.put("b", 3, "new")   # evicts "a"
+
+        assert cache.invalidate("new") == 1
+        assert len(cache) == 0
+
+    def test_rejected_put_drops_the_stale_entry(self):
+        cache = TaggedLRUCache(max_entries=4, max_bytes=10, size_of=lambda key, value, tag: value)
+        cache.put("a", 5, "old")
+
+        assert cache.put("a", 50, "new") is False
+        assert cache.get("a") is None
+        assert cache.invalidate("old") == 0
@@ -0,0 +1,86 @@
+import random
+import pytest
+from core.cache.template_cache import (
+    TemplateCache, build_skeleton, extract_ddl_literals, fill_skeleton, mask_question
+)
+
+DDL = "CREATE TABLE players (player TEXT, no TEXT, school TEXT, dept TEXT DEFAULT 'Finance')"
+
+
+class TestMaskQuestion:
+
+    def test_numbers_are_masked(self):
+        template = mask_question("What school did player number 21 play for?")
+
+        assert template.text == "What school did player number <NUM> play for?"
+        assert template.slots == ("21",)
+
+    def test_quoted_strings_and_ddl_literals(self):
+        template = mask_question('Who in finance went to "Butler CC" in 1996-97?', extract_ddl_literals(DDL))
+
+        assert template.text == "Who in <VAL> went to <STR> in <NUM>?"
+        assert template.slots == ("finance", "Butler CC", "1996-97")
+
+    def test_question_without_literals(self):
+        assert mask_question("List all players").slots == ()
+
+
+class TestSkeleton:
+
+    def test_round_trip_with_new_literal(self):
+        skeleton = build_skeleton("SELECT school FROM players WHERE no = 21", ("21",))
+
+        assert fill_skeleton(skeleton, ("42",)) == "SELECT school FROM players WHERE no = 42"
+
+    def test_slot_not_in_sql_is_not_templated(self):
+        assert build_skeleton("SELECT school FROM players", ("21",)) is None
+
+    def test_repeated_slot_values_are_ambiguous(self):
+        assert build_skeleton("SELECT a FROM t WHERE b = 3 AND c = 3", ("3", "3")) is None
+
+    def test_slot_matches_whole_literal_only(self):
+        skeleton = build_skeleton("SELECT col1 FROM t WHERE year = 2021 AND no = 1", ("1",))
+
+        assert fill_skeleton(skeleton, ("7",)) == "SELECT col1 FROM t WHERE year = 2021 AND no = 7"
+
+
+class TestTemplateCache:
+
+    def setup_method(self, method):
+        self.cache = TemplateCache(max_entries=10)
+
+    def test_same_template_served_by_slot_filling(self):
+        self.cache.store("What school did player number 21 play for?", DDL, True, "v1",
+                         "SELECT school FROM players WHERE no = 21", operator="admin", table_name="players")
+
+        hit = self.cache.lookup("What school did player number 42 play for?", DDL, True, "v1")
+
+        assert hit.sql == "SELECT school FROM players WHERE no = 42"
+        assert self.cache.get_stats()["template_hits"] == 1
+
+    def test_different_ddl_or_flag_misses(self):
+        self.cache.store("player number 21?", DDL, True, "v1", "SELECT 21", "admin", "players")
+
+        assert self.cache.lookup("player number 42?", DDL + " ", True, "v1") is None
+        assert self.cache.lookup("player number 42?", DDL, False, "v1") is None
+
+    def test_disagreeing_verification_drops_template(self):
+        self.cache.store("player number 21?", DDL, True, "v1", "SELECT 21", "admin", "players")
+        hit = self.cache.lookup("player number 42?", DDL, True, "v1")
+
+        assert self.cache.record_verification(hit, "SELECT 43") is False
+        assert self.cache.lookup("player number 42?", DDL, True, "v1") is None
+        stats = self.cache.get_stats()
+        assert stats["verifications"] == 1
+        assert stats["disagreement_rate"] == 1.0
+
+    def test_should_verify_samples_by_rate(self):
+        assert TemplateCache(verify_rate=0.0).should_verify() is False
+        assert TemplateCache(verify_rate=1.0, rng=random.Random(0)).should_verify() is True
+
+    def test_schema_change_invalidates(self):
+        self.cache.store("player number 21?", DDL, True, "v1", "SELECT 21", "admin", "players")
+
+        self.cache.on_schema_changed("admin", "players", None)
+
+        assert self.cache.lookup("player number 42?", DDL, True, "v1") is None
@@ -76,4 +76,32 @@ class TestSchemaService:
         assert exc_info.value.status_code == 404
         assert "not found" in exc_info.value.detail
         # Ensure delete was never even called
-        mock_repo.delete.assert_not_called()
\ No newline at end of file
+        mock_repo.delete.assert_not_called()
+
+    def test_schema_change_listeners_notified(self, mock_converter, mock_repo):
+        # Arrange
+        listener = MagicMock()
+        service = SchemaService(mock_converter, mock_repo, schema_change_listeners=[listener])
+        schema = MagicMock(operator="admin", table_name="users", ddl_context="CREATE TABLE users (id INT)")
+        mock_repo.find_by_table_name_and_operator.return_value = MagicMock()
+
+        # Act
+        service.add_or_update_schema(schema)
+        service.delete_schema("users", "admin")
+
+        # Assert
+        assert listener.on_schema_changed.call_args_list[0][0] == ("admin", "users", "CREATE TABLE users (id INT)")
+        assert listener.on_schema_changed.call_args_list[1][0] == ("admin", "users", None)
+
+    def test_failing_listener_does_not_fail_save(self, mock_converter, mock_repo):
+        # Arrange
+        listener = MagicMock()
+        listener.on_schema_changed.side_effect = Exception("cache down")
+        service = SchemaService(mock_converter, mock_repo, schema_change_listeners=[listener])
+        mock_converter.core_to_vo.return_value = "FinalVO"
+
+        # Act
+        result = service.add_or_update_schema(MagicMock())
+
+        # Assert
+        assert result == "FinalVO"
@@ -0,0 +1,127 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from core.model.schema_models import SchemaCore
+from core.service.schema_manager.table_router import TableRouter, describe_table
+
+# Words -> axes of a toy embedding space
+AXES = {"employee": 0, "salary": 0, "staff": 0, "order": 1, "price": 1, "purchase": 1, "weather": 2}
+
+
+def embed(texts):
+    """Bag-of-words embedding over AXES, so the test controls which table a question is close to."""
+    embeddings = np.zeros((len(texts), 4), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().replace("?", "").split():
+            embeddings[row, AXES.get(word.rstrip("s"), 3)] += 1.0
+    return embeddings
+
+
+def schema(table_name, ddl_context, operator="alice"):
+    return SchemaCore(table_name=table_name, ddl_context=ddl_context, operator=operator)
+
+
+EMPLOYEES = "CREATE TABLE employees (id INT, salary INT)"
+ORDERS = "CREATE TABLE orders (id INT, price DECIMAL(10, 2))"
+
+
+@pytest.fixture
+def mock_repository():
+    repository = MagicMock()
+    repository.find_all_by_operator.return_value = [schema("employees", EMPLOYEES), schema("orders", ORDERS)]
+    return repository
+
+
+@pytest.fixture
+def router(mock_repository):
+    return TableRouter(embed=MagicMock(side_effect=embed), schema_repository=mock_repository)
+
+
+class TestTableRouter:
+
+    def test_describe_table_uses_table_and_column_words(self):
+        assert describe_table("staffMembers", "CREATE TABLE staffMembers (hire_date DATE, PRIMARY KEY (id))") == \
+            "staff member hire date"
+
+    def test_routes_question_to_most_similar_table(self, router, mock_repository):
+        routed = router.route("alice", "What is the total price of purchases?")
+
+        assert [table.table_name for table in routed] == ["orders"]
+        assert routed[0].ddl_context == ORDERS
+        mock_repository.find_all_by_operator.assert_called_once_with("alice")
+
+    def test_operator_index_is_loaded_once(self, router, mock_repository):
+        router.route("alice", "highest salary")
+        router.route("alice", "staff count")
+
+        mock_repository.find_all_by_operator.assert_called_once()
+        # One batched embedding of the tables, then one per question
+        assert router._embed.call_count == 3
+        assert router.get_stats()["tables"] == 2
+
+    def test_top_k_orders_tables_by_similarity(self, mock_repository):
+        router = TableRouter(embed=embed, schema_repository=mock_repository, top_k=5)
+
+        routed = router.route("alice", "salary of staff per order")
+
+        assert [table.table_name for table in routed] == ["employees", "orders"]
+        assert routed[0].similarity > routed[1].similarity
+
+    def test_min_similarity_leaves_question_unrouted(self, mock_repository):
+        router = TableRouter(embed=embed, schema_repository=mock_repository, min_similarity=0.5)
+
+        assert router.route("alice", "weather") == []
+        stats = router.get_stats()
+        assert stats["unrouted"] == 1
+        assert stats["routed"] == 0
+
+    def test_operator_without_tables_or_name(self, router, mock_repository):
+        mock_repository.find_all_by_operator.return_value = []
+
+        assert router.route("bob", "highest salary") == []
+        assert router.route(None, "highest salary") == []
+
+    def test_precomputed_question_embedding_is_used(self, router):
+        routed = router.route("alice", "ignored", question_embedding=np.array([0.0, 2.0, 0.0, 0.0]))
+
+        assert routed[0].table_name == "orders"
+
+    def test_saved_table_is_embedded_into_loaded_index(self, router):
+        router.route("alice", "salary")
+
+        router.on_schema_changed("alice", "forecasts", "CREATE TABLE forecasts (weather TEXT)")
+
+        assert router.route("alice", "weather")[0].table_name == "forecasts"
+        assert router.get_stats()["tables"] == 3
+
+    def test_updated_table_replaces_its_row(self, router):
+        router.route("alice", "salary")
+
+        router.on_schema_changed("alice", "orders", "CREATE TABLE orders (weather TEXT)")
+
+        assert router.route("alice", "weather")[0].table_name == "orders"
+        assert router.get("alice", "orders").ddl_context == "CREATE TABLE orders (weather TEXT)"
+        assert router.get_stats()["tables"] == 2
+
+    def test_deleted_table_leaves_index(self, router):
+        router.route("alice", "salary")
+
+        router.on_schema_changed("alice", "employees", None)
+
+        assert router.route("alice", "salary")[0].table_name == "orders"
+        assert router.get("alice", "employees") is None
+
+    def test_save_for_unloaded_operator_builds_its_index(self, router, mock_repository):
+        router.on_schema_changed("alice", "employees", EMPLOYEES)
+
+        mock_repository.find_all_by_operator.assert_called_once_with("alice")
+        assert router.get_stats()["operators"] == 1
+
+    def test_delete_for_unloaded_operator_does_nothing(self, router, mock_repository):
+        router.on_schema_changed("alice", "employees", None)
+
+        mock_repository.find_all_by_operator.assert_not_called()
+
+    def test_get_returns_named_table(self, router):
+        assert router.get("alice", "employees").ddl_context == EMPLOYEES
+        assert router.get("alice", "missing") is None
@@ -1,8 +1,18 @@
 import pytest
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
+from core.ai_model.cancellation import CLIENT_DISCONNECTED, CancellationToken, RequestCancelledError
 from core.model.models import StatusEnum
 from core.model.query_models import QueryRequest, QueryHistoryCore
 from core.service.sql_manager.query_service import QueryService, WARNING_MESSAGE 
+from core.cache.generation_result_cache import GenerationResultCache
+from core.cache.semantic_cache import SemanticCache
+from core.cache.template_cache import TemplateCache
+from core.cache.single_flight import SingleFlight
+from core.service.schema_manager.table_router import RoutedTable
 
 @pytest.fixture
 def mock_tts():
@@ -48,6 +58,64 @@ class TestQueryService:
         assert saved_history.generated_sql == generated_sql
         assert saved_history.intent_recognized is True
 
+    def test_process_streams_generated_sql(self, service, mock_tts, mock_repo, sample_request):
+        """Fragments go to the caller's callback; the response and history hold the whole SQL."""
+        def generate_sql(question, needPredictIntent, ddl_context, on_text=None, cancellation=None):
+            for fragment in ("SELECT", " count(*)", " FROM users;"):
+                on_text(fragment)
+            return "SELECT count(*) FROM users;"
+        mock_tts.generate_sql.side_effect = generate_sql
+        fragments = []
+
+        response = service.process_and_generate_sql(sample_request, on_text=fragments.append)
+
+        assert "".join(fragments) == response.result_data == "SELECT count(*) FROM users;"
+        assert mock_repo.save_query_history.call_args[0][0].generated_sql == response.result_data
+
+    def test_process_cancelled_request(self, service, mock_tts, mock_repo, sample_request):
+        """A cancelled generation is answered and recorded as CANCELLED."""
+        token = CancellationToken()
+        token.cancel(CLIENT_DISCONNECTED)
+        mock_tts.generate_sql.side_effect = RequestCancelledError(CLIENT_DISCONNECTED)
+
+        response = service.process_and_generate_sql(sample_request, cancellation=token)
+
+        assert mock_tts.generate_sql.call_args.kwargs["cancellation"] is token
+        assert response.status == StatusEnum.CANCELLED
+        assert response.error_context.error_type == "CLIENT_DISCONNECTED"
+        saved_history = mock_repo.save_query_history.call_args[0][0]
+        assert saved_history.status == StatusEnum.CANCELLED
+        assert saved_history.generated_sql is None
+
+    def test_coalesced_request_outlives_cancelled_leader(self, mock_tts, mock_repo, sample_request):
+        """A caller waiting on a cancelled leader generates the SQL itself."""
+        mock_tts.model_version = "v1"
+        leader_token = CancellationToken()
+        leader_started = threading.Event()
+        release = threading.Event()
+
+        def generate_sql(question, needPredictIntent, ddl_context, on_text=None, cancellation=None):
+            if cancellation is leader_token:
+                leader_started.set()
+                release.wait(5)
+                cancellation.raise_if_cancelled()
+            return "SELECT count(*) FROM users;"
+        mock_tts.generate_sql.side_effect = generate_sql
+        coalescing_service = QueryService(mock_tts, mock_repo, single_flight=SingleFlight())
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(coalescing_service.process_and_generate_sql, sample_request, cancellation=leader_token)
+            leader_started.wait(5)
+            follower = pool.submit(coalescing_service.process_and_generate_sql, sample_request)
+            while coalescing_service._single_flight.coalesced == 0:
+                time.sleep(0.001)
+            leader_token.cancel()
+            release.set()
+
+        assert leader.result().status == StatusEnum.CANCELLED
+        assert follower.result().status == StatusEnum.SUCCESS
+        assert follower.result().result_data == "SELECT count(*) FROM users;"
+
     def test_process_warning_illegal_question(self, service, mock_tts, mock_repo, sample_request):
         """Test when the AI determines the question is not DB-related."""
         # Arrange
@@ -107,4 +175,200 @@ class TestQueryService:
 
         # Assert
         assert result == ["history1", "history2"]
-        mock_repo.get_history_by_operator.assert_called_once_with("admin")
\ No newline at end of file
+        mock_repo.get_history_by_operator.assert_called_once_with("admin")
+    def test_result_cache_hit_skips_model_and_flags_history(self, mock_tts, mock_repo, sample_request):
+        """A repeated request is served from the cache and still written to history."""
+        # Arrange
+        mock_tts.model_version = "v1"
+        mock_tts.generate_sql.return_value = "SELECT count(*) FROM users;"
+        cached_service = QueryService(mock_tts, mock_repo, result_cache=GenerationResultCache(max_entries=10))
+
+        # Act
+        first = cached_service.process_and_generate_sql(sample_request)
+        second = cached_service.process_and_generate_sql(sample_request)
+
+        # Assert
+        assert first.result_data == second.result_data == "SELECT count(*) FROM users;"
+        mock_tts.generate_sql.assert_called_once()
+        assert mock_repo.save_query_history.call_count == 2
+        first_history, second_history = [c[0][0] for c in mock_repo.save_query_history.call_args_list]
+        assert first_history.served_from_cache is False
+        assert second_history.served_from_cache is True
+        assert second_history.status == StatusEnum.SUCCESS
+
+    def test_result_cache_not_filled_on_exception(self, mock_tts, mock_repo, sample_request):
+        """Failed generations are not cached."""
+        mock_tts.model_version = "v1"
+        mock_tts.generate_sql.side_effect = [Exception("Model Timeout"), "SELECT 1"]
+        cached_service = QueryService(mock_tts, mock_repo, result_cache=GenerationResultCache(max_entries=10))
+
+        cached_service.process_and_generate_sql(sample_request)
+        response = cached_service.process_and_generate_sql(sample_request)
+
+        assert response.result_data == "SELECT 1"
+        assert mock_tts.generate_sql.call_count == 2
+
+    def test_semantic_cache_hit_skips_generation(self, mock_tts, mock_repo, sample_request):
+        """A near-duplicate question reuses the stored SQL instead of running T5."""
+        # Arrange
+        mock_tts.model_version = "v1"
+        mock_tts.embed_questions.side_effect = [np.array([[1.0, 0.0]]), np.array([[0.99, 0.05]])]
+        mock_tts.generate_sql.return_value = "SELECT count(*) FROM users;"
+        mock_tts.predict_intent.return_value = True
+        cached_service = QueryService(mock_tts, mock_repo, semantic_cache=SemanticCache(similarity_threshold=0.9))
+        reworded = sample_request.model_copy(update={"question": "Count of users?"})
+
+        # Act
+        cached_service.process_and_generate_sql(sample_request)
+        response = cached_service.process_and_generate_sql(reworded)
+
+        # Assert
+        assert response.result_data == "SELECT count(*) FROM users;"
+        mock_tts.generate_sql.assert_called_once()
+        assert mock_repo.save_query_history.call_args[0][0].served_from_cache is True
+
+    def test_semantic_cache_hit_still_applies_intent_gate(self, mock_tts, mock_repo, sample_request):
+        # Arrange
+        mock_tts.model_version = "v1"
+        mock_tts.embed_questions.return_value = np.array([[1.0, 0.0]])
+        mock_tts.generate_sql.return_value = "SELECT count(*) FROM users;"
+        mock_tts.predict_intent.return_value = False
+        cached_service = QueryService(mock_tts, mock_repo, semantic_cache=SemanticCache(similarity_threshold=0.9))
+
+        # Act
+        cached_service.process_and_generate_sql(sample_request)
+        response = cached_service.process_and_generate_sql(sample_request.model_copy(update={"question": "Users?"}))
+
+        # Assert
+        assert response.status == StatusEnum.FAILED
+        assert response.error_context.error_type == "ILLEGAL_QUESTION"
+
+    def test_semantic_cache_skips_questions_with_other_literals(self, mock_tts, mock_repo, sample_request):
+        """Near-identical embeddings are not enough when the questions differ only in a number."""
+        # Arrange
+        mock_tts.model_version = "v1"
+        mock_tts.embed_questions.side_effect = [np.array([[1.0, 0.0]]), np.array([[0.99, 0.05]])]
+        mock_tts.generate_sql.side_effect = ["SELECT * FROM users LIMIT 5;", "SELECT * FROM users LIMIT 10;"]
+        mock_tts.predict_intent.return_value = True
+        cached_service = QueryService(mock_tts, mock_repo, semantic_cache=SemanticCache(similarity_threshold=0.9))
+        first = sample_request.model_copy(update={"question": "Show the first 5 users"})
+        second = sample_request.model_copy(update={"question": "Show the first 10 users"})
+
+        # Act
+        cached_service.process_and_generate_sql(first)
+        response = cached_service.process_and_generate_sql(second)
+
+        # Assert
+        assert response.result_data == "SELECT * FROM users LIMIT 10;"
+        assert mock_tts.generate_sql.call_count == 2
+
+    def test_template_cache_hit_fills_literals(self, mock_tts, mock_repo, sample_request):
+        """A question differing only in its literal is answered by slot filling."""
+        # Arrange
+        mock_tts.model_version = "v1"
+        mock_tts.generate_sql.return_value = "SELECT name FROM users WHERE id = 21"
+        cached_service = QueryService(mock_tts, mock_repo, template_cache=TemplateCache(max_entries=10))
+
+        # Act
+        cached_service.process_and_generate_sql(sample_request.model_copy(update={"question": "Who is user 21?"}))
+        response = cached_service.process_and_generate_sql(sample_request.model_copy(update={"question": "Who is user 42?"}))
+
+        # Assert
+        assert response.result_data == "SELECT name FROM users WHERE id = 42"
+        mock_tts.generate_sql.assert_called_once()
+        assert mock_repo.save_query_history.call_args[0][0].served_from_cache is True
+
+    def test_template_cache_hit_still_applies_intent_gate(self, mock_tts, mock_repo, sample_request):
+        # Arrange
+        mock_tts.model_version = "v1"
+        mock_tts.generate_sql.return_value = "SELECT name FROM users WHERE id = 21"
+        mock_tts.predict_intent.return_value = False
+        cached_service = QueryService(mock_tts, mock_repo, template_cache=TemplateCache(max_entries=10))
+
+        # Act
+        cached_service.process_and_generate_sql(sample_request.model_copy(update={"question": "Who is user 21?"}))
+        response = cached_service.process_and_generate_sql(sample_request.model_copy(update={"question": "Who is user 42?"}))
+
+        # Assert
+        assert response.status == StatusEnum.FAILED
+        assert response.error_context.error_type == "ILLEGAL_QUESTION"
+        mock_tts.generate_sql.assert_called_once()
+
+    def test_template_cache_verification_runs_model(self, mock_tts, mock_repo, sample_request):
+        # Arrange
+        mock_tts.model_version = "v1"
+        mock_tts.generate_sql.side_effect = ["SELECT name FROM users WHERE id = 21", "SELECT name FROM users WHERE uid = 42"]
+        template_cache = TemplateCache(max_entries=10, verify_rate=1.0)
+        cached_service = QueryService(mock_tts, mock_repo, template_cache=template_cache)
+
+        # Act
+        cached_service.process_and_generate_sql(sample_request.model_copy(update={"question": "Who is user 21?"}))
+        response = cached_service.process_and_generate_sql(sample_request.model_copy(update={"question": "Who is user 42?"}))
+
+        # Assert: the verified request returns the model's answer and the disagreement is recorded
+        assert response.result_data == "SELECT name FROM users WHERE uid = 42"
+        assert template_cache.get_stats()["disagreements"] == 1
+
+    def test_identical_in_flight_requests_are_coalesced(self, mock_tts, mock_repo, sample_request):
+        """Concurrent duplicates share one generate_sql call but each gets a history row."""
+        # Arrange
+        release = threading.Event()
+        single_flight = SingleFlight()
+        mock_tts.model_version = "v1"
+
+        def slow_generate(**kwargs):
+            release.wait(timeout=5)
+            return "SELECT count(*) FROM users;"
+
+        mock_tts.generate_sql.side_effect = slow_generate
+        coalescing_service = QueryService(mock_tts, mock_repo, single_flight=single_flight)
+
+        # Act
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(coalescing_service.process_and_generate_sql, sample_request) for _ in range(3)]
+            while single_flight.get_stats()["coalesced"] < 2:
+                pass
+            release.set()
+            responses = [future.result(timeout=5) for future in futures]
+
+        # Assert
+        assert all(response.result_data == "SELECT count(*) FROM users;" for response in responses)
+        mock_tts.generate_sql.assert_called_once()
+        assert mock_repo.save_query_history.call_count == 3
+        flags = sorted(c[0][0].served_from_cache for c in mock_repo.save_query_history.call_args_list)
+        assert flags == [False, True, True]
+
+    def test_request_without_ddl_is_routed_to_stored_table(self, mock_tts, mock_repo):
+        router = MagicMock()
+        router.route.return_value = [RoutedTable("users", "CREATE TABLE users (id INT)", 0.9)]
+        service = QueryService(mock_tts, mock_repo, table_router=router)
+        mock_tts.generate_sql.return_value = "SELECT COUNT(*) FROM users"
+
+        response = service.process_and_generate_sql(QueryRequest(question="How many users?", operator="admin"))
+
+        assert response.status == StatusEnum.SUCCESS
+        router.route.assert_called_once_with("admin", "How many users?")
+        assert mock_tts.generate_sql.call_args.kwargs["ddl_context"] == "CREATE TABLE users (id INT)"
+        saved_history = mock_repo.save_query_history.call_args[0][0]
+        assert saved_history.table_name == "users"
+        assert saved_history.ddl_context == "CREATE TABLE users (id INT)"
+
+    def test_named_table_without_ddl_uses_its_stored_ddl(self, mock_tts, mock_repo):
+        router = MagicMock()
+        router.get.return_value = RoutedTable("orders", "CREATE TABLE orders (id INT)", 1.0)
+        service = QueryService(mock_tts, mock_repo, table_router=router)
+
+        service.process_and_generate_sql(QueryRequest(question="Count orders", operator="admin", table_name="orders"))
+
+        router.get.assert_called_once_with("admin", "orders")
+        router.route.assert_not_called()
+        assert mock_tts.generate_sql.call_args.kwargs["ddl_context"] == "CREATE TABLE orders (id INT)"
+
+    def test_request_with_ddl_is_not_routed(self, mock_tts, mock_repo, sample_request):
+        router = MagicMock()
+        service = QueryService(mock_tts, mock_repo, table_router=router)
+
+        service.process_and_generate_sql(sample_request)
+
+        router.route.assert_not_called()
+        assert mock_tts.generate_sql.call_args.kwargs["ddl_context"] == "CREATE TABLE users..."
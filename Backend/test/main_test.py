@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock
+from core.ai_model.model_server import ModelServer
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Generous for slow CI machines: importing main took ~15 s while it imported the ML stack, ~1.3 s without
+IMPORT_BUDGET_SECONDS = 5.0
+READY_BUDGET_SECONDS = 8.0
+HEAVY_MODULES = ["tensorflow", "torch", "transformers", "sentence_transformers", "sklearn", "joblib", "pandas",
+                 "onnxruntime"]
+
+# Runs in a fresh interpreter: imports the app, swaps the model loads for stubs, starts it and waits for /ready
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - started
+heavy = [name for name in %(heavy)r if name in sys.modules]
+
+from controller.dependencies import model_registry
+for handle in model_registry.models.values():
+    handle._load = lambda: None
+    handle._warmup = None
+
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    status = client.get("/ready").status_code
+    while status != 200 and time.perf_counter() - started < 60:
+        time.sleep(0.01)
+        status = client.get("/ready").status_code
+print(json.dumps({"import_seconds": import_seconds, "ready_seconds": time.perf_counter() - started,
+                  "status": status, "heavy": heavy}))
+"""
+
+# An API worker of a model server (TTS_MODEL_SERVER_SOCKET): nothing to load, readiness and stats come from the server
+WORKER_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - started
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    status = client.get("/ready").status_code
+    stats = client.get("/metrics/inference").json()
+heavy = [name for name in %(heavy)r if name in sys.modules]
+print(json.dumps({"import_seconds": import_seconds, "status": status, "heavy": heavy,
+                  "served_by": stats["model_server"]["socket"]}))
+"""
+
+
+def run_startup(script=STARTUP_SCRIPT, env=None):
+    completed = subprocess.run(
+        [sys.executable, "-c", script % {"heavy": HEAVY_MODULES}],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120, env=env
+    )
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+class TestStartup:
+
+    def test_cold_start_within_budget_with_stub_models(self):
+        result = run_startup()
+
+        assert result["heavy"] == []
+        assert result["status"] == 200
+        assert result["import_seconds"] < IMPORT_BUDGET_SECONDS
+        assert result["ready_seconds"] < READY_BUDGET_SECONDS
+
+    def test_model_server_worker_starts_without_models(self):
+        tts_system = MagicMock()
+        tts_system.get_stats.return_value = {}
+        registry = MagicMock(tts_system=tts_system)
+        registry.readiness.return_value = {"ready": True, "models": {}}
+        directory = tempfile.mkdtemp(prefix="tts-")
+        server = ModelServer(registry, os.path.join(directory, "model.sock"))
+        server.start()
+        try:
+            result = run_startup(WORKER_SCRIPT, env={**os.environ, "TTS_MODEL_SERVER_SOCKET": server.socket_path})
+        finally:
+            server.shutdown()
+            shutil.rmtree(directory, ignore_errors=True)
+
+        assert result["heavy"] == []
+        assert result["status"] == 200
+        assert result["served_by"] == server.socket_path
+        assert result["import_seconds"] < IMPORT_BUDGET_SECONDS
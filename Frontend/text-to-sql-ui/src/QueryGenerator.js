@@ -1,9 +1,37 @@
 import { useState } from 'react';
-import axios from 'axios';
 
 // Define the base URL here (or pass it as a prop)
 const API_BASE_URL = process.env.REACT_APP_API_BASE_URL; 
 
+// Reads a text/event-stream response, calling onEvent(event, data) for each event
+const readServerSentEvents = async (response, onEvent) => {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) {
+            return;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            for (const line of block.split('\n')) {
+                if (line.startsWith('event: ')) {
+                    event = line.slice('event: '.length);
+                } else if (line.startsWith('data: ')) {
+                    data += line.slice('data: '.length);
+                }
+            }
+            onEvent(event, JSON.parse(data));
+        }
+    }
+};
+
 
 // --- Query Generator Component ---
 const QueryGenerator = ({ authToken, currentUsername, onQuerySuccess, selectedSchema }) => { 
@@ -12,11 +40,14 @@ const QueryGenerator = ({ authToken, currentUsername, onQuerySuccess, selectedSc
     const [useIntentRecognition, setUseIntentRecognition] = useState(true); 
     const [result, setResult] = useState(null);
     const [loading, setLoading] = useState(false);
+    // SQL received so far while the model is still generating
+    const [streamedSql, setStreamedSql] = useState('');
 
     const handleSubmit = async (e) => {
         e.preventDefault();
         setLoading(true);
         setResult(null);
+        setStreamedSql('');
 
         // --- Ensure user is logged in ---
         if (!authToken) {
@@ -37,17 +68,33 @@ const QueryGenerator = ({ authToken, currentUsername, onQuerySuccess, selectedSc
                 ddl_context: selectedSchema ? selectedSchema.ddl_context : null,
             };
 
-            const response = await axios.post(
-                `${API_BASE_URL}/generate_sql`, 
-                payload,
-                // --- Authorization Header ---
-                {
-                    headers: {
-                        Authorization: `Bearer ${authToken}`
-                    }
+            // Streaming variant of /generate_sql: SQL fragments as they are generated, then the result
+            const response = await fetch(`${API_BASE_URL}/generate_sql/stream`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    // --- Authorization Header ---
+                    Authorization: `Bearer ${authToken}`
+                },
+                body: JSON.stringify(payload)
+            });
+            if (!response.ok) {
+                const data = await response.json().catch(() => ({}));
+                throw Object.assign(new Error(`HTTP ${response.status}`), { response: { status: response.status, data } });
+            }
+
+            let finalResult = null;
+            await readServerSentEvents(response, (event, data) => {
+                if (event === 'sql') {
+                    setStreamedSql((sql) => sql + data.text);
+                } else if (event === 'result') {
+                    finalResult = data;
                 }
-            );
-            setResult(response.data);
+            });
+            if (!finalResult) {
+                throw new Error('The response ended before the result.');
+            }
+            setResult(finalResult);
 
             // Trigger history refresh
             if (onQuerySuccess) {
@@ -134,6 +181,12 @@ const QueryGenerator = ({ authToken, currentUsername, onQuerySuccess, selectedSc
                 </div>
             </form>
 
+            {loading && streamedSql && (
+                <div className="result-box">
+                    <p>SQL: <code>{streamedSql}</code></p>
+                </div>
+            )}
+
             {result && (
                 <div className={`result-box ${result.status === 'SUCCESS' ? 'success' : 'failure'}`}>
                     <strong>Status: {result.status}</strong>